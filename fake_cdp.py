@@ -0,0 +1,1559 @@
+#!/usr/bin/env python3
+"""本地 CDP 替身：不需要真实 Chrome 的 DevTools 端点（供性能测试使用）
+
+提供：
+- HTTP: /json/version、/json/list（/json）、/json/new、/json/protocol
+- WebSocket: /devtools/browser/<id>（flatten 会话）和 /devtools/page/<id>
+- 服务器用到的 CDP 子集：Target.*、Browser.getVersion、Page.*（含导航生命周期）、
+  Runtime.evaluate / callFunctionOn / getProperties、Accessibility.getFullAXTree、
+  Network（含 WebSocket 帧）/ Runtime.consoleAPICalled 事件（对象参数带 ObjectPreview）、扩展 Service Worker target、
+  Tracing.start / end + IO.read（返回 trace_data 中预先录制的 trace）
+
+行为可配置：页面数（可达数百个）、扩展数、命令延迟（固定 + 抖动，可按方法覆盖）、
+每页面每秒 console / network 事件数、无障碍树节点数。随机数使用固定种子，结果可复现。
+未实现的命令统一返回 {}，以便 puppeteer 的各种 enable/set* 调用直接通过。
+
+用法：
+    python3 fake_cdp.py --port 9333 --pages 200 --extensions 5 --latency 2 --jitter 1
+    python3 test-load.py --fake-cdp --transport sse
+
+    async with FakeChrome(pages=100, console_rate=5) as chrome:
+        server = ServerProcess("sse", browser_url=chrome.browser_url)
+
+只依赖标准库。
+"""
+
+import argparse
+import asyncio
+import base64
+import gzip
+import hashlib
+import itertools
+import json
+import random
+import re
+import signal
+import struct
+import sys
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 9333  # 避开真实 Chrome 常用的 9222
+PROTOCOL_VERSION = "1.3"
+BROWSER_VERSION = "Chrome/141.0.7390.54"
+USER_AGENT = ("Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+              "Chrome/141.0.7390.54 Safari/537.36")
+V8_VERSION = "14.1.146.11"
+DEFAULT_CONTEXT_ID = "FAKEDEFAULTBROWSERCONTEXT0000000"
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+WS_MAX_PAYLOAD = 256 * 1024 * 1024
+
+# Target.setAutoAttach / getTargets 未传 filter 时 Chrome 的默认过滤器
+DEFAULT_TARGET_FILTER = [{"type": "browser", "exclude": True}, {"type": "tab", "exclude": True}, {}]
+
+# 未配置 trace_data 时 Tracing.end 返回的空 trace
+EMPTY_TRACE = b'{"traceEvents":[]}'
+IO_READ_CHUNK = 1024 * 1024
+
+# 1x1 透明 PNG（Page.captureScreenshot）
+BLANK_PNG = ("iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg==")
+
+CONSOLE_TYPES = ["log", "info", "warning", "error", "debug"]
+# Chrome 的 ObjectPreview 最多展开的属性数（数组为 100），字符串预览的截断长度
+PREVIEW_MAX_PROPERTIES = 5
+PREVIEW_MAX_INDEXES = 100
+PREVIEW_MAX_STRING = 100
+AX_ROLES = ["heading", "link", "button", "StaticText", "textbox", "generic", "listitem", "image"]
+
+
+class CdpError(Exception):
+    """命令失败，作为 JSON-RPC error 返回给客户端"""
+
+    def __init__(self, message: str, code: int = -32000):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class JsFunction:
+    """Runtime.evaluate 得到的函数对象：保留源码，供后续 callFunctionOn 匹配"""
+
+    def __init__(self, source: str):
+        self.source = source
+
+
+class JsObject:
+    """不可按值返回的远程对象（例如 MutationObserver 句柄）"""
+
+    def __init__(self, value: Any = None, class_name: str = "Object"):
+        self.value = {} if value is None else value
+        self.class_name = class_name
+
+
+UNDEFINED = object()
+JS_NULL = object()
+
+
+def property_preview(name: str, value: Any) -> Dict[str, Any]:
+    if value is None or value is JS_NULL:
+        return {"name": name, "type": "object", "subtype": "null", "value": "null"}
+    if value is UNDEFINED:
+        return {"name": name, "type": "undefined", "value": "undefined"}
+    if isinstance(value, bool):
+        return {"name": name, "type": "boolean", "value": "true" if value else "false"}
+    if isinstance(value, (int, float)):
+        return {"name": name, "type": "number", "value": str(value)}
+    if isinstance(value, str):
+        if len(value) > PREVIEW_MAX_STRING:
+            value = value[:PREVIEW_MAX_STRING // 2] + "…" + value[-(PREVIEW_MAX_STRING // 2 - 1):]
+        return {"name": name, "type": "string", "value": value}
+    if isinstance(value, list):
+        return {"name": name, "type": "object", "subtype": "array", "value": f"Array({len(value)})"}
+    return {"name": name, "type": "object", "value": "Object"}
+
+
+def object_preview(value: Any) -> Dict[str, Any]:
+    """dict / list -> ObjectPreview（嵌套对象只给出类型描述）"""
+    if isinstance(value, list):
+        items = [(str(i), v) for i, v in enumerate(value)]
+        limit, preview = PREVIEW_MAX_INDEXES, {"type": "object", "subtype": "array",
+                                              "description": f"Array({len(value)})"}
+    else:
+        items = list(value.items())
+        limit, preview = PREVIEW_MAX_PROPERTIES, {"type": "object", "description": "Object"}
+    preview["overflow"] = len(items) > limit
+    preview["properties"] = [property_preview(name, v) for name, v in items[:limit]]
+    return preview
+
+
+def nested_object(depth: int, width: int, seq: int) -> Dict[str, Any]:
+    """depth 层、每层 width 个属性的对象；第一个属性指向下一层"""
+    value: Dict[str, Any] = {}
+    for i in range(width):
+        if i == 0 and depth > 1:
+            value["child"] = nested_object(depth - 1, width, seq)
+        elif i % 2:
+            value[f"n{i}"] = seq * width + i
+        else:
+            value[f"s{i}"] = f"item {seq}.{depth}.{i}"
+    return value
+
+
+def matches_filter(target_type: str, target_filter: Optional[List[Dict[str, Any]]]) -> bool:
+    """TargetFilter 语义：按顺序取第一条匹配的规则，没有匹配则排除"""
+    for entry in DEFAULT_TARGET_FILTER if target_filter is None else target_filter:
+        if "type" in entry and entry["type"] != target_type:
+            continue
+        return not entry.get("exclude", False)
+    return False
+
+
+def now_ms() -> float:
+    return time.time() * 1000
+
+
+# ============================================================================
+# Target / Session
+# ============================================================================
+
+class FakeTarget:
+    """一个 target（browser / tab / page / service_worker）"""
+
+    def __init__(self, chrome: "FakeChrome", target_id: str, target_type: str, url: str,
+                 title: str = "", parent: Optional["FakeTarget"] = None,
+                 extension: Optional[Dict[str, Any]] = None):
+        self.chrome = chrome
+        self.target_id = target_id
+        self.type = target_type
+        self.url = url
+        self.title = title or url
+        self.parent = parent
+        self.child: Optional[FakeTarget] = None
+        self.extension = extension
+        # Chrome 中主 frame id 与 page target id 相同
+        self.frame_id = target_id
+        self.loader_id = chrome.new_id()
+        self.context_id = chrome.next_context_id()
+        self.sessions: Set["CdpSession"] = set()
+        self.console_budget = 0.0
+        self.network_budget = 0.0
+        self.event_seq = 0
+        self._ax_cache: Optional[Tuple[str, List[Dict[str, Any]]]] = None
+
+    def info(self) -> Dict[str, Any]:
+        info = {
+            "targetId": self.target_id,
+            "type": self.type,
+            "title": self.title,
+            "url": self.url,
+            "attached": bool(self.sessions),
+            "canAccessOpener": False,
+            "browserContextId": DEFAULT_CONTEXT_ID,
+        }
+        if self.parent is not None:
+            info["parentId"] = self.parent.target_id
+        return info
+
+    def frame(self) -> Dict[str, Any]:
+        parts = urlsplit(self.url)
+        origin = f"{parts.scheme}://{parts.netloc}" if parts.netloc else "://"
+        return {
+            "id": self.frame_id,
+            "loaderId": self.loader_id,
+            "url": self.url,
+            "domainAndRegistry": parts.hostname or "",
+            "securityOrigin": origin,
+            "mimeType": "text/html",
+            "secureContextType": "Secure" if parts.scheme == "https" else "InsecureScheme",
+            "crossOriginIsolatedContextType": "NotIsolated",
+            "gatedAPIFeatures": [],
+        }
+
+    def ax_tree(self) -> List[Dict[str, Any]]:
+        """按节点数生成确定性的无障碍树（8 叉树），同一文档内缓存"""
+        if self._ax_cache and self._ax_cache[0] == self.loader_id:
+            return self._ax_cache[1]
+        count = max(1, self.chrome.ax_nodes)
+        nodes: List[Dict[str, Any]] = []
+        for i in range(count):
+            role = "RootWebArea" if i == 0 else AX_ROLES[i % len(AX_ROLES)]
+            name = self.title if i == 0 else f"{role} {i}"
+            node = {
+                "nodeId": str(i + 1),
+                "ignored": False,
+                "role": {"type": "role", "value": role},
+                "name": {"type": "computedString", "value": name},
+                "properties": [],
+                "childIds": [str(c + 1) for c in range(i * 8 + 1, min(i * 8 + 9, count))],
+                "backendDOMNodeId": i + 1,
+                "frameId": self.frame_id,
+            }
+            if role == "heading":
+                node["properties"].append({"name": "level", "value": {"type": "integer", "value": 2}})
+            if role in ("RootWebArea", "link", "button", "textbox"):
+                node["properties"].append({"name": "focusable", "value": {"type": "booleanOrUndefined", "value": True}})
+            if i > 0:
+                node["parentId"] = str((i - 1) // 8 + 1)
+            nodes.append(node)
+        self._ax_cache = (self.loader_id, nodes)
+        return nodes
+
+
+class CdpSession:
+    """一个 CDP 会话；命令按顺序串行处理（与 Chrome 渲染线程一致）"""
+
+    def __init__(self, conn: "CdpConnection", session_id: str, target: FakeTarget,
+                 parent: Optional["CdpSession"] = None):
+        self.conn = conn
+        self.session_id = session_id
+        self.target = target
+        self.parent = parent
+        self.domains: Set[str] = set()
+        self.lifecycle_events = False
+        self.auto_attach_filter: Optional[List[Dict[str, Any]]] = None
+        self.auto_attached: Set[str] = set()
+        # 隔离 world：name -> executionContextId；new_document_worlds 在导航后自动重建
+        self.worlds: Dict[str, int] = {}
+        self.new_document_worlds: Set[str] = set()
+        self.objects: Dict[str, Any] = {}
+        self.tracing = False
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+        self.task = asyncio.ensure_future(self._worker())
+
+    def emit(self, method: str, params: Dict[str, Any]):
+        self.conn.emit(self, method, params)
+
+    def close(self):
+        self.task.cancel()
+        self.target.sessions.discard(self)
+
+    async def _worker(self):
+        chrome = self.conn.chrome
+        while True:
+            message = await self.queue.get()
+            method = message.get("method", "")
+            delay = chrome.command_delay(method)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            chrome.command_counts[method] += 1
+            response: Dict[str, Any] = {"id": message.get("id")}
+            try:
+                handler = COMMANDS.get(method)
+                result = handler(self, message.get("params") or {}) if handler else {}
+                response["result"] = result
+            except CdpError as e:
+                response["error"] = {"code": e.code, "message": e.message}
+            if self.session_id:
+                response["sessionId"] = self.session_id
+            await self.conn.send(response)
+
+    # ------------------------------------------------------------------
+    # 执行上下文
+    # ------------------------------------------------------------------
+
+    def context_description(self, context_id: int, name: str = "") -> Dict[str, Any]:
+        target = self.target
+        if target.type == "service_worker":
+            aux = {"isDefault": True, "type": "default", "frameId": ""}
+        elif name:
+            aux = {"isDefault": False, "type": "isolated", "frameId": target.frame_id}
+        else:
+            aux = {"isDefault": True, "type": "default", "frameId": target.frame_id}
+        parts = urlsplit(target.url)
+        return {
+            "id": context_id,
+            "origin": f"{parts.scheme}://{parts.netloc}" if parts.netloc else "",
+            "name": name,
+            "uniqueId": f"{context_id}.{self.session_id or 'root'}",
+            "auxData": aux,
+        }
+
+    def announce_contexts(self):
+        if "Runtime" not in self.domains:
+            return
+        self.emit("Runtime.executionContextCreated",
+                  {"context": self.context_description(self.target.context_id)})
+        for name, context_id in self.worlds.items():
+            self.emit("Runtime.executionContextCreated",
+                      {"context": self.context_description(context_id, name)})
+
+    def store_object(self, value: Any) -> str:
+        object_id = f"{self.conn.chrome.next_object_id()}.{self.target.context_id}"
+        self.objects[object_id] = value
+        return object_id
+
+    def remote_object(self, value: Any, by_value: bool) -> Dict[str, Any]:
+        """Python 值 -> CDP RemoteObject"""
+        if value is UNDEFINED:
+            return {"type": "undefined"}
+        if value is JS_NULL or value is None:
+            return {"type": "object", "subtype": "null", "value": None}
+        if isinstance(value, bool):
+            return {"type": "boolean", "value": value}
+        if isinstance(value, (int, float)):
+            return {"type": "number", "value": value, "description": str(value)}
+        if isinstance(value, str):
+            return {"type": "string", "value": value}
+        if isinstance(value, JsFunction):
+            return {"type": "function", "className": "Function",
+                    "description": value.source, "objectId": self.store_object(value)}
+        if isinstance(value, JsObject):
+            return {"type": "object", "className": value.class_name,
+                    "description": value.class_name, "objectId": self.store_object(value)}
+        is_array = isinstance(value, list)
+        if by_value:
+            obj = {"type": "object", "value": value}
+            if is_array:
+                obj["subtype"] = "array"
+            return obj
+        if is_array:
+            return {"type": "object", "subtype": "array", "className": "Array",
+                    "description": f"Array({len(value)})", "objectId": self.store_object(value)}
+        return {"type": "object", "className": "Object", "description": "Object",
+                "objectId": self.store_object(value)}
+
+    def console_arg(self, value: Any) -> Dict[str, Any]:
+        """Runtime.consoleAPICalled 的参数：对象附带只展开一层的 ObjectPreview"""
+        obj = self.remote_object(value, False)
+        if isinstance(value, (list, dict)):
+            obj["preview"] = object_preview(value)
+        return obj
+
+
+# ============================================================================
+# WebSocket 连接
+# ============================================================================
+
+class CdpConnection:
+    """一条 DevTools WebSocket 连接（browser 端点或 page 端点）"""
+
+    def __init__(self, chrome: "FakeChrome", reader: asyncio.StreamReader,
+                 writer: asyncio.StreamWriter, root_target: FakeTarget):
+        self.chrome = chrome
+        self.reader = reader
+        self.writer = writer
+        self.root = CdpSession(self, "", root_target)
+        if root_target.type != "browser":
+            root_target.sessions.add(self.root)
+        self.sessions: Dict[str, CdpSession] = {}
+        self.discover_filter: Optional[List[Dict[str, Any]]] = None
+        self.closed = False
+        self._drain_lock = asyncio.Lock()
+
+    # ------------------------------------------------------------------
+    # 帧收发
+    # ------------------------------------------------------------------
+
+    def _write_frame(self, opcode: int, payload: bytes):
+        if self.closed:
+            return
+        length = len(payload)
+        if length < 126:
+            head = struct.pack("!BB", 0x80 | opcode, length)
+        elif length < 1 << 16:
+            head = struct.pack("!BBH", 0x80 | opcode, 126, length)
+        else:
+            head = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+        self.writer.write(head + payload)
+
+    def emit(self, session: CdpSession, method: str, params: Dict[str, Any]):
+        """事件直接写入缓冲区，保证与之前的响应顺序一致"""
+        message: Dict[str, Any] = {"method": method, "params": params}
+        if session.session_id:
+            message["sessionId"] = session.session_id
+        self._write_frame(0x1, json.dumps(message).encode())
+
+    async def send(self, message: Dict[str, Any]):
+        self._write_frame(0x1, json.dumps(message).encode())
+        if self.closed:
+            return
+        async with self._drain_lock:
+            try:
+                await self.writer.drain()
+            except ConnectionError:
+                self.closed = True
+
+    async def _read_frame(self) -> Tuple[int, bool, bytes]:
+        b1, b2 = await self.reader.readexactly(2)
+        fin = bool(b1 & 0x80)
+        opcode = b1 & 0x0F
+        length = b2 & 0x7F
+        if length == 126:
+            (length,) = struct.unpack("!H", await self.reader.readexactly(2))
+        elif length == 127:
+            (length,) = struct.unpack("!Q", await self.reader.readexactly(8))
+        if length > WS_MAX_PAYLOAD:
+            raise ConnectionError(f"frame too large: {length}")
+        mask = await self.reader.readexactly(4) if b2 & 0x80 else b""
+        payload = await self.reader.readexactly(length)
+        if mask and length:
+            # 整数异或比逐字节快得多，大消息（例如注入脚本）也不会拖慢
+            key = (mask * (length // 4 + 1))[:length]
+            payload = (int.from_bytes(payload, "big") ^ int.from_bytes(key, "big")).to_bytes(length, "big")
+        return opcode, fin, payload
+
+    async def serve(self):
+        fragments: List[bytes] = []
+        try:
+            while True:
+                opcode, fin, payload = await self._read_frame()
+                if opcode == 0x8:
+                    self._write_frame(0x8, payload[:2])
+                    break
+                if opcode == 0x9:
+                    self._write_frame(0xA, payload)
+                    continue
+                if opcode == 0xA:
+                    continue
+                fragments.append(payload)
+                if not fin:
+                    continue
+                data = b"".join(fragments)
+                fragments = []
+                self._dispatch(data)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.close()
+
+    def _dispatch(self, data: bytes):
+        try:
+            message = json.loads(data)
+        except ValueError:
+            return
+        session_id = message.get("sessionId")
+        session = self.sessions.get(session_id) if session_id else self.root
+        if session is None:
+            self._write_frame(0x1, json.dumps({
+                "id": message.get("id"),
+                "error": {"code": -32001, "message": "Session with given id not found."},
+                "sessionId": session_id,
+            }).encode())
+            return
+        session.queue.put_nowait(message)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for session in list(self.sessions.values()) + [self.root]:
+            session.close()
+        self.sessions.clear()
+        self.chrome.connections.discard(self)
+        self.writer.close()
+
+    # ------------------------------------------------------------------
+    # 会话管理
+    # ------------------------------------------------------------------
+
+    def attach(self, target: FakeTarget, parent: CdpSession) -> CdpSession:
+        session = CdpSession(self, self.chrome.new_id(), target, parent)
+        self.sessions[session.session_id] = session
+        target.sessions.add(session)
+        parent.emit("Target.attachedToTarget", {
+            "sessionId": session.session_id,
+            "targetInfo": target.info(),
+            "waitingForDebugger": False,
+        })
+        return session
+
+    def detach(self, session: CdpSession):
+        for child in [s for s in self.sessions.values() if s.parent is session]:
+            self.detach(child)
+        if self.sessions.pop(session.session_id, None) is None:
+            return
+        session.close()
+        parent = session.parent or self.root
+        parent.auto_attached.discard(session.target.target_id)
+        if parent is self.root or parent.session_id in self.sessions:
+            parent.emit("Target.detachedFromTarget", {
+                "sessionId": session.session_id,
+                "targetId": session.target.target_id,
+            })
+
+    def auto_attach_scope(self, session: CdpSession) -> List[FakeTarget]:
+        """会话自动附加的范围：browser 会话附加顶层 target，tab 会话附加其中的 page"""
+        target = session.target
+        if target.type == "browser":
+            return [t for t in self.chrome.targets.values() if t.parent is None]
+        if target.type == "tab" and target.child is not None:
+            return [target.child]
+        return []
+
+    def run_auto_attach(self, session: CdpSession):
+        if session.auto_attach_filter is None:
+            return
+        for target in self.auto_attach_scope(session):
+            if target.target_id in session.auto_attached:
+                continue
+            if not matches_filter(target.type, session.auto_attach_filter):
+                continue
+            session.auto_attached.add(target.target_id)
+            self.attach(target, session)
+
+    def notify_created(self, target: FakeTarget):
+        if self.discover_filter is not None and matches_filter(target.type, self.discover_filter):
+            self.root.emit("Target.targetCreated", {"targetInfo": target.info()})
+        for session in [self.root] + list(self.sessions.values()):
+            self.run_auto_attach(session)
+
+    def notify_destroyed(self, target: FakeTarget):
+        for session in [s for s in self.sessions.values() if s.target is target]:
+            self.detach(session)
+        if self.discover_filter is not None and matches_filter(target.type, self.discover_filter):
+            self.root.emit("Target.targetDestroyed", {"targetId": target.target_id})
+
+    def notify_info_changed(self, target: FakeTarget):
+        if self.discover_filter is not None and matches_filter(target.type, self.discover_filter):
+            self.root.emit("Target.targetInfoChanged", {"targetInfo": target.info()})
+
+
+# ============================================================================
+# 命令处理
+# ============================================================================
+
+COMMANDS: Dict[str, Callable[[CdpSession, Dict[str, Any]], Dict[str, Any]]] = {}
+
+
+def command(*methods: str):
+    def register(fn):
+        for method in methods:
+            COMMANDS[method] = fn
+        return fn
+    return register
+
+
+@command("Browser.getVersion")
+def _browser_get_version(session, params):
+    return {
+        "protocolVersion": PROTOCOL_VERSION,
+        "product": BROWSER_VERSION,
+        "revision": "@fake",
+        "userAgent": USER_AGENT,
+        "jsVersion": V8_VERSION,
+    }
+
+
+@command("Target.getBrowserContexts")
+def _target_get_browser_contexts(session, params):
+    return {"browserContextIds": []}
+
+
+@command("Target.createBrowserContext")
+def _target_create_browser_context(session, params):
+    return {"browserContextId": session.conn.chrome.new_id()}
+
+
+@command("Target.setDiscoverTargets")
+def _target_set_discover_targets(session, params):
+    conn = session.conn
+    if not params.get("discover"):
+        conn.discover_filter = None
+        return {}
+    conn.discover_filter = params.get("filter") or DEFAULT_TARGET_FILTER
+    for target in conn.chrome.targets.values():
+        if matches_filter(target.type, conn.discover_filter):
+            session.emit("Target.targetCreated", {"targetInfo": target.info()})
+    return {}
+
+
+@command("Target.setAutoAttach")
+def _target_set_auto_attach(session, params):
+    if not params.get("autoAttach"):
+        session.auto_attach_filter = None
+        return {}
+    if not params.get("flatten", session.target.type != "browser"):
+        raise CdpError("Only flatten protocol is supported with browser level auto-attach")
+    session.auto_attach_filter = params.get("filter") or DEFAULT_TARGET_FILTER
+    session.conn.run_auto_attach(session)
+    return {}
+
+
+@command("Target.getTargets")
+def _target_get_targets(session, params):
+    target_filter = params.get("filter") or DEFAULT_TARGET_FILTER
+    return {"targetInfos": [
+        target.info() for target in session.conn.chrome.targets.values()
+        if matches_filter(target.type, target_filter)
+    ]}
+
+
+@command("Target.getTargetInfo")
+def _target_get_target_info(session, params):
+    chrome = session.conn.chrome
+    target_id = params.get("targetId")
+    if target_id is None:
+        return {"targetInfo": session.target.info()}
+    return {"targetInfo": chrome.get_target(target_id).info()}
+
+
+@command("Target.attachToTarget")
+def _target_attach_to_target(session, params):
+    target = session.conn.chrome.get_target(params.get("targetId", ""))
+    if not params.get("flatten"):
+        raise CdpError("Only flatten protocol is supported")
+    attached = session.conn.attach(target, session.conn.root)
+    return {"sessionId": attached.session_id}
+
+
+@command("Target.attachToBrowserTarget")
+def _target_attach_to_browser_target(session, params):
+    attached = session.conn.attach(session.conn.chrome.browser_target, session.conn.root)
+    return {"sessionId": attached.session_id}
+
+
+@command("Target.detachFromTarget")
+def _target_detach_from_target(session, params):
+    conn = session.conn
+    detached = conn.sessions.get(params.get("sessionId", ""))
+    if detached is None:
+        raise CdpError("No session with given id")
+    conn.detach(detached)
+    return {}
+
+
+@command("Target.createTarget")
+def _target_create_target(session, params):
+    page = session.conn.chrome.add_page(params.get("url") or "about:blank")
+    return {"targetId": page.target_id}
+
+
+@command("Target.closeTarget")
+def _target_close_target(session, params):
+    chrome = session.conn.chrome
+    chrome.close_target(chrome.get_target(params.get("targetId", "")))
+    return {"success": True}
+
+
+@command("Target.activateTarget")
+def _target_activate_target(session, params):
+    session.conn.chrome.get_target(params.get("targetId", ""))
+    return {}
+
+
+@command("Runtime.enable")
+def _runtime_enable(session, params):
+    if "Runtime" not in session.domains:
+        session.domains.add("Runtime")
+        session.announce_contexts()
+    return {}
+
+
+def _domain_toggle(domain: str, enabled: bool):
+    def handler(session, params):
+        if enabled:
+            session.domains.add(domain)
+        else:
+            session.domains.discard(domain)
+        return {}
+    return handler
+
+
+for _domain in ("Network", "Log", "Page", "ServiceWorker"):
+    COMMANDS[f"{_domain}.enable"] = _domain_toggle(_domain, True)
+    COMMANDS[f"{_domain}.disable"] = _domain_toggle(_domain, False)
+COMMANDS["Runtime.disable"] = _domain_toggle("Runtime", False)
+
+
+@command("Page.getFrameTree")
+def _page_get_frame_tree(session, params):
+    return {"frameTree": {"frame": session.target.frame(), "childFrames": []}}
+
+
+@command("Page.getResourceTree")
+def _page_get_resource_tree(session, params):
+    return {"frameTree": {"frame": session.target.frame(), "childFrames": [], "resources": []}}
+
+
+@command("Page.setLifecycleEventsEnabled")
+def _page_set_lifecycle_events_enabled(session, params):
+    session.lifecycle_events = bool(params.get("enabled"))
+    if session.lifecycle_events:
+        # Chrome 在开启时立即补发当前文档已发生的生命周期事件
+        target = session.target
+        for name in ("init", "DOMContentLoaded", "load", "networkAlmostIdle", "networkIdle"):
+            session.emit("Page.lifecycleEvent", {
+                "frameId": target.frame_id, "loaderId": target.loader_id,
+                "name": name, "timestamp": time.monotonic(),
+            })
+    return {}
+
+
+@command("Page.addScriptToEvaluateOnNewDocument")
+def _page_add_script(session, params):
+    if params.get("worldName"):
+        session.new_document_worlds.add(params["worldName"])
+    return {"identifier": str(session.conn.chrome.next_object_id())}
+
+
+@command("Page.createIsolatedWorld")
+def _page_create_isolated_world(session, params):
+    name = params.get("worldName", "")
+    context_id = session.conn.chrome.next_context_id()
+    session.worlds[name] = context_id
+    if "Runtime" in session.domains:
+        session.emit("Runtime.executionContextCreated",
+                     {"context": session.context_description(context_id, name)})
+    return {"executionContextId": context_id}
+
+
+@command("Page.navigate")
+def _page_navigate(session, params):
+    url = params.get("url", "")
+    if not url:
+        raise CdpError("Invalid parameters", -32602)
+    loader_id = session.conn.chrome.navigate(session.target, url)
+    return {"frameId": session.target.frame_id, "loaderId": loader_id}
+
+
+@command("Page.reload")
+def _page_reload(session, params):
+    session.conn.chrome.navigate(session.target, session.target.url)
+    return {}
+
+
+@command("Page.getNavigationHistory")
+def _page_get_navigation_history(session, params):
+    target = session.target
+    return {"currentIndex": 0, "entries": [{
+        "id": 1, "url": target.url, "userTypedURL": target.url,
+        "title": target.title, "transitionType": "typed",
+    }]}
+
+
+@command("Page.captureScreenshot")
+def _page_capture_screenshot(session, params):
+    return {"data": BLANK_PNG}
+
+
+@command("Tracing.start")
+def _tracing_start(session, params):
+    session.tracing = True
+    return {}
+
+
+@command("Tracing.end")
+def _tracing_end(session, params):
+    if not session.tracing:
+        raise CdpError("Tracing is not started")
+    session.tracing = False
+    chrome = session.conn.chrome
+    handle = str(chrome.next_object_id())
+    chrome.streams[handle] = [chrome.trace_data or EMPTY_TRACE, 0]
+    # tracingComplete 在 Tracing.end 的响应之后发出
+    asyncio.get_running_loop().call_soon(session.emit, "Tracing.tracingComplete", {
+        "dataLossOccurred": False, "stream": handle, "traceFormat": "json",
+        "streamCompression": "none",
+    })
+    return {}
+
+
+@command("IO.read")
+def _io_read(session, params):
+    stream = session.conn.chrome.streams.get(params.get("handle", ""))
+    if stream is None:
+        raise CdpError("Invalid stream handle")
+    data, offset = stream
+    chunk = data[offset:offset + (params.get("size") or IO_READ_CHUNK)]
+    stream[1] = offset + len(chunk)
+    return {"base64Encoded": True, "data": base64.b64encode(chunk).decode(),
+            "eof": stream[1] >= len(data)}
+
+
+@command("IO.close")
+def _io_close(session, params):
+    session.conn.chrome.streams.pop(params.get("handle", ""), None)
+    return {}
+
+
+@command("Page.getLayoutMetrics")
+def _page_get_layout_metrics(session, params):
+    viewport = {"pageX": 0, "pageY": 0, "clientWidth": 1280, "clientHeight": 720}
+    content = {"x": 0, "y": 0, "width": 1280, "height": 2000}
+    visual = dict(viewport, offsetX=0, offsetY=0, scale=1, zoom=1)
+    return {
+        "layoutViewport": viewport, "visualViewport": visual, "contentSize": content,
+        "cssLayoutViewport": viewport, "cssVisualViewport": visual, "cssContentSize": content,
+    }
+
+
+@command("Accessibility.getFullAXTree")
+def _accessibility_get_full_ax_tree(session, params):
+    if session.target.type != "page":
+        raise CdpError("'Accessibility.getFullAXTree' wasn't found", -32601)
+    return {"nodes": session.target.ax_tree()}
+
+
+@command("Runtime.evaluate")
+def _runtime_evaluate(session, params):
+    expression = params.get("expression", "")
+    value = fake_eval(session.target, expression, [])
+    return _evaluation_result(session, value, params)
+
+
+@command("Runtime.callFunctionOn")
+def _runtime_call_function_on(session, params):
+    declaration = params.get("functionDeclaration", "")
+    args = []
+    for arg in params.get("arguments") or []:
+        if "objectId" in arg:
+            if arg["objectId"] not in session.objects:
+                raise CdpError("Could not find object with given id")
+            args.append(session.objects[arg["objectId"]])
+        elif "value" in arg:
+            args.append(arg["value"])
+        else:
+            args.append(UNDEFINED)
+    this = session.objects.get(params.get("objectId", ""))
+    if this is not None:
+        args.insert(0, this)
+    value = fake_eval(session.target, declaration, args, call=True)
+    return _evaluation_result(session, value, params)
+
+
+@command("Runtime.getProperties")
+def _runtime_get_properties(session, params):
+    value = session.objects.get(params.get("objectId", ""))
+    if value is None:
+        raise CdpError("Could not find object with given id")
+    if isinstance(value, JsObject):
+        value = value.value
+    if isinstance(value, list):
+        items = [(str(i), v) for i, v in enumerate(value)]
+        items.append(("length", len(value)))
+    elif isinstance(value, dict):
+        items = list(value.items())
+    else:
+        items = []
+    return {"result": [{
+        "name": name,
+        "value": session.remote_object(v, False),
+        "writable": True, "configurable": True, "enumerable": name != "length", "isOwn": True,
+    } for name, v in items]}
+
+
+@command("Runtime.releaseObject")
+def _runtime_release_object(session, params):
+    session.objects.pop(params.get("objectId", ""), None)
+    return {}
+
+
+@command("Runtime.releaseObjectGroup")
+def _runtime_release_object_group(session, params):
+    session.objects.clear()
+    return {}
+
+
+@command("Storage.clearDataForOrigin", "ServiceWorker.startWorker", "Runtime.runIfWaitingForDebugger")
+def _noop(session, params):
+    return {}
+
+
+def _evaluation_result(session: CdpSession, value: Any, params: Dict[str, Any]) -> Dict[str, Any]:
+    if isinstance(value, CdpJsException):
+        return {
+            "result": {"type": "object", "subtype": "error", "className": "Error",
+                       "description": value.description},
+            "exceptionDetails": {
+                "exceptionId": session.conn.chrome.next_object_id(),
+                "text": "Uncaught",
+                "lineNumber": 0,
+                "columnNumber": 0,
+                "exception": {"type": "object", "subtype": "error", "className": "Error",
+                              "description": value.description},
+            },
+        }
+    return {"result": session.remote_object(value, bool(params.get("returnByValue")))}
+
+
+# ============================================================================
+# 脚本求值（按源码特征匹配，不执行 JavaScript）
+# ============================================================================
+
+class CdpJsException:
+    def __init__(self, description: str):
+        self.description = description
+
+
+SOURCE_URL_RE = re.compile(r"//# sourceURL=\S*")
+FUNCTION_LITERAL_RE = re.compile(r"^\(*\s*(async\s+)?(function\b|\([^()]*\)\s*=>|[\w$]+\s*=>)")
+THROW_RE = re.compile(r"\bthrow\s+new\s+(\w*Error)\(\s*['\"`]([^'\"`]*)")
+
+
+def fake_eval(target: FakeTarget, source: str, args: List[Any], call: bool = False) -> Any:
+    """根据源码中的关键字返回页面状态；callFunctionOn 时把参数中的函数源码一起匹配
+
+    evaluate_script 先用 evaluateHandle 得到函数，再用包装函数
+    `JSON.stringify(await fn())` 调用它，因此需要把两段源码合起来看。
+    """
+    source = SOURCE_URL_RE.sub("", source).strip()
+    if not call and FUNCTION_LITERAL_RE.match(source):
+        return JsFunction(source)
+
+    text = source + "\n" + "\n".join(a.source for a in args if isinstance(a, JsFunction))
+    thrown = THROW_RE.search(text)
+    if thrown:
+        return CdpJsException(f"{thrown.group(1)}: {thrown.group(2)}")
+
+    value = _match_source(target, text)
+    if value is UNDEFINED and not call:
+        try:
+            value = json.loads(source)
+        except ValueError:
+            pass
+    if call and "JSON.stringify" in source:
+        return UNDEFINED if value is UNDEFINED else json.dumps(value, separators=(",", ":"))
+    return value
+
+
+def _match_source(target: FakeTarget, text: str) -> Any:
+    extension = target.extension
+    if "chrome.management.getAll" in text or "chrome.runtime.getManifest" in text:
+        if extension is None:
+            return CdpJsException("TypeError: Cannot read properties of undefined (reading 'runtime')")
+        if "chrome.management.getAll" in text:
+            return [ext["management"] for ext in target.chrome.extensions]
+        return extension["manifest"]
+    if "chrome.storage" in text:
+        return {} if extension else UNDEFINED
+    if "MutationObserver" in text:
+        return JsObject(class_name="Object")
+    if "document.title" in text:
+        return target.title
+    if "location.href" in text or "document.URL" in text or "window.location" in text:
+        return target.url
+    if "navigator.userAgent" in text:
+        return USER_AGENT
+    if "document.readyState" in text:
+        return "complete"
+    if "outerHTML" in text:
+        return f"<html><head><title>{target.title}</title></head><body></body></html>"
+    if "performance.now" in text:
+        return time.monotonic() * 1000
+    if "Date.now" in text:
+        return int(now_ms())
+    return UNDEFINED
+
+
+# ============================================================================
+# 浏览器
+# ============================================================================
+
+class FakeChrome:
+    """假浏览器：HTTP + WebSocket 服务器和全部 target 状态"""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = 0, pages: int = 1,
+                 extensions: int = 0, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 method_latency_ms: Optional[Dict[str, float]] = None,
+                 console_rate: float = 0.0, network_rate: float = 0.0,
+                 ax_nodes: int = 40, seed: int = 0, trace_data: Optional[bytes] = None):
+        self.host = host
+        self.port = port
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.method_latency = {k: v / 1000 for k, v in (method_latency_ms or {}).items()}
+        self.console_rate = console_rate
+        self.network_rate = network_rate
+        self.ax_nodes = ax_nodes
+        # Tracing.end 返回的 trace JSON；可在两次录制之间替换
+        self.trace_data = trace_data
+        self.streams: Dict[str, List[Any]] = {}
+        self.random = random.Random(seed)
+        self.command_counts: Counter = Counter()
+        self.connections: Set[CdpConnection] = set()
+        self.targets: Dict[str, FakeTarget] = {}
+        self.extensions: List[Dict[str, Any]] = []
+        self._context_ids = itertools.count(1)
+        self._object_ids = itertools.count(1)
+        self._page_seq = itertools.count(1)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._ticker: Optional[asyncio.Task] = None
+        self._initial_pages = pages
+        self._initial_extensions = extensions
+        self.browser_target = FakeTarget(self, self.new_id(), "browser", "")
+
+    # ------------------------------------------------------------------
+    # 生命周期
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        for _ in range(self._initial_pages):
+            self.add_page()
+        for _ in range(self._initial_extensions):
+            self.add_extension()
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port,
+                                                  limit=WS_MAX_PAYLOAD)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.console_rate > 0 or self.network_rate > 0:
+            self._ticker = asyncio.ensure_future(self._tick())
+
+    async def stop(self):
+        if self._ticker:
+            self._ticker.cancel()
+        for conn in list(self.connections):
+            conn.close()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def __aenter__(self) -> "FakeChrome":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    @property
+    def browser_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.port}/devtools/browser/{self.browser_target.target_id}"
+
+    # ------------------------------------------------------------------
+    # 工具方法
+    # ------------------------------------------------------------------
+
+    def new_id(self) -> str:
+        return "%032X" % self.random.getrandbits(128)
+
+    def next_context_id(self) -> int:
+        return next(self._context_ids)
+
+    def next_object_id(self) -> int:
+        return next(self._object_ids)
+
+    def command_delay(self, method: str) -> float:
+        base = self.method_latency.get(method, self.latency)
+        if self.jitter > 0:
+            base += self.random.uniform(0, self.jitter)
+        return base
+
+    def get_target(self, target_id: str) -> FakeTarget:
+        target = self.targets.get(target_id)
+        if target is None:
+            raise CdpError("No target with given id found")
+        return target
+
+    # ------------------------------------------------------------------
+    # Target 增删
+    # ------------------------------------------------------------------
+
+    def _register(self, target: FakeTarget):
+        self.targets[target.target_id] = target
+        for conn in list(self.connections):
+            conn.notify_created(target)
+
+    def add_page(self, url: Optional[str] = None) -> FakeTarget:
+        """新建页面（连同其 tab target），通知所有连接"""
+        index = next(self._page_seq)
+        url = url or f"https://example.com/fake/{index}"
+        tab = FakeTarget(self, self.new_id(), "tab", url, title_for(url, index))
+        page = FakeTarget(self, self.new_id(), "page", url, title_for(url, index), parent=tab)
+        tab.child = page
+        # page 先登记，tab 被附加后 tab 会话的自动附加才能找到它
+        self.targets[page.target_id] = page
+        self._register(tab)
+        for conn in list(self.connections):
+            conn.notify_created(page)
+        return page
+
+    def add_extension(self, name: Optional[str] = None) -> FakeTarget:
+        """新建一个 MV3 扩展及其 background service worker target"""
+        index = len(self.extensions) + 1
+        ext_id = "".join(chr(ord("a") + self.random.randrange(16)) for _ in range(32))
+        name = name or f"Fake Extension {index}"
+        version = f"1.0.{index}"
+        manifest = {
+            "manifest_version": 3,
+            "name": name,
+            "version": version,
+            "description": f"Synthetic extension #{index} for performance tests",
+            "background": {"service_worker": "background.js"},
+            "permissions": ["storage", "tabs"],
+            "host_permissions": ["<all_urls>"],
+        }
+        extension = {
+            "id": ext_id,
+            "manifest": manifest,
+            "management": {
+                "id": ext_id, "name": name, "shortName": name, "version": version,
+                "description": manifest["description"], "enabled": True, "mayDisable": True,
+                "type": "extension", "installType": "development", "offlineEnabled": False,
+                "permissions": manifest["permissions"], "hostPermissions": manifest["host_permissions"],
+                "optionsUrl": "", "homepageUrl": "", "isApp": False,
+            },
+        }
+        self.extensions.append(extension)
+        url = f"chrome-extension://{ext_id}/background.js"
+        worker = FakeTarget(self, self.new_id(), "service_worker", url,
+                            f"Service Worker {url}", extension=extension)
+        self._register(worker)
+        return worker
+
+    def close_target(self, target: FakeTarget):
+        if target.type == "page" and target.parent is not None:
+            target = target.parent
+        doomed = [target] + ([target.child] if target.child else [])
+        for item in reversed(doomed):
+            for conn in list(self.connections):
+                conn.notify_destroyed(item)
+            self.targets.pop(item.target_id, None)
+
+    # ------------------------------------------------------------------
+    # 导航
+    # ------------------------------------------------------------------
+
+    def navigate(self, target: FakeTarget, url: str) -> str:
+        """开始导航：立即返回 loaderId，提交和生命周期事件异步发出"""
+        loader_id = self.new_id()
+        for session in list(target.sessions):
+            if "Page" in session.domains:
+                session.emit("Page.frameStartedNavigating", {
+                    "frameId": target.frame_id, "url": url, "loaderId": loader_id,
+                    "navigationType": "differentDocument",
+                })
+                session.emit("Page.frameStartedLoading", {"frameId": target.frame_id})
+            if "Network" in session.domains:
+                session.emit("Network.requestWillBeSent",
+                             self._request_event(target, loader_id, loader_id, url, "Document"))
+        asyncio.ensure_future(self._commit_navigation(target, url, loader_id))
+        return loader_id
+
+    async def _commit_navigation(self, target: FakeTarget, url: str, loader_id: str):
+        await asyncio.sleep(self.command_delay("Page.navigate"))
+        if target.target_id not in self.targets:
+            return
+        target.url = url
+        target.title = title_for(url)
+        target.loader_id = loader_id
+        old_context = target.context_id
+        target.context_id = self.next_context_id()
+        timestamp = time.monotonic()
+        for session in list(target.sessions):
+            if "Network" in session.domains:
+                session.emit("Network.responseReceived",
+                             self._response_event(target, loader_id, loader_id, url, "Document"))
+            if "Runtime" in session.domains:
+                for context_id in [old_context] + list(session.worlds.values()):
+                    session.emit("Runtime.executionContextDestroyed", {
+                        "executionContextId": context_id,
+                        "executionContextUniqueId": f"{context_id}.{session.session_id or 'root'}",
+                    })
+                session.emit("Runtime.executionContextsCleared", {})
+            session.objects.clear()
+            session.worlds = {name: self.next_context_id() for name in session.new_document_worlds}
+            if "Page" in session.domains:
+                session.emit("Page.frameNavigated", {"frame": target.frame(), "type": "Navigation"})
+            session.announce_contexts()
+            if session.lifecycle_events:
+                for name in ("init", "commit", "DOMContentLoaded", "load", "networkAlmostIdle", "networkIdle"):
+                    session.emit("Page.lifecycleEvent", {
+                        "frameId": target.frame_id, "loaderId": loader_id,
+                        "name": name, "timestamp": timestamp,
+                    })
+            if "Page" in session.domains:
+                session.emit("Page.domContentEventFired", {"timestamp": timestamp})
+                session.emit("Page.loadEventFired", {"timestamp": timestamp})
+                session.emit("Page.frameStoppedLoading", {"frameId": target.frame_id})
+            if "Network" in session.domains:
+                session.emit("Network.loadingFinished", {
+                    "requestId": loader_id, "timestamp": timestamp, "encodedDataLength": 1024,
+                })
+        for conn in list(self.connections):
+            conn.notify_info_changed(target)
+            if target.parent is not None:
+                target.parent.url, target.parent.title = target.url, target.title
+                conn.notify_info_changed(target.parent)
+
+    # ------------------------------------------------------------------
+    # 合成事件
+    # ------------------------------------------------------------------
+
+    def _request_event(self, target: FakeTarget, request_id: str, loader_id: str,
+                       url: str, resource_type: str) -> Dict[str, Any]:
+        return {
+            "requestId": request_id,
+            "loaderId": loader_id,
+            "documentURL": target.url,
+            "request": {
+                "url": url, "method": "GET", "headers": {"Accept": "*/*", "User-Agent": USER_AGENT},
+                "initialPriority": "High", "referrerPolicy": "strict-origin-when-cross-origin",
+            },
+            "timestamp": time.monotonic(),
+            "wallTime": time.time(),
+            "initiator": {"type": "other"},
+            "redirectHasExtraInfo": False,
+            "type": resource_type,
+            "frameId": target.frame_id,
+            "hasUserGesture": False,
+        }
+
+    def _response_event(self, target: FakeTarget, request_id: str, loader_id: str,
+                        url: str, resource_type: str, status: int = 200) -> Dict[str, Any]:
+        return {
+            "requestId": request_id,
+            "loaderId": loader_id,
+            "timestamp": time.monotonic(),
+            "type": resource_type,
+            "response": {
+                "url": url, "status": status, "statusText": "OK" if status == 200 else "Not Found",
+                "headers": {"content-type": "application/json", "content-length": "512"},
+                "mimeType": "text/html" if resource_type == "Document" else "application/json",
+                "charset": "utf-8", "connectionReused": True, "connectionId": 1,
+                "remoteIPAddress": "127.0.0.1", "remotePort": 443, "fromDiskCache": False,
+                "fromServiceWorker": False, "fromPrefetchCache": False,
+                "encodedDataLength": 512, "protocol": "h2", "securityState": "secure",
+            },
+            "hasExtraInfo": False,
+            "frameId": target.frame_id,
+        }
+
+    def emit_console_burst(self, target: FakeTarget, count: int, depth: int = 0, width: int = 4):
+        """立即推送 count 条 console 事件；depth > 0 时每条附带一个
+        depth 层、每层 width 个属性的对象参数（每个会话各自持有对象句柄）"""
+        for _ in range(count):
+            seq = target.event_seq + 1
+            self._emit_console(target, nested_object(depth, width, seq) if depth > 0 else None)
+
+    def emit_websocket_created(self, target: FakeTarget, request_id: str, url: str):
+        """向已启用 Network 的会话推送 Network.webSocketCreated"""
+        for session in list(target.sessions):
+            if "Network" in session.domains:
+                session.emit("Network.webSocketCreated", {"requestId": request_id, "url": url})
+
+    def emit_websocket_frames(self, target: FakeTarget, request_id: str, count: int,
+                              payload_size: int = 64, control_every: int = 0) -> Counter:
+        """立即推送 count 个 WebSocket 帧（收发交替的文本帧，每 control_every 帧插入一个 ping）
+
+        返回实际推送的帧数统计（sent / received / control / bytes），供调用方核对。
+        """
+        emitted: Counter = Counter()
+        sessions = [s for s in target.sessions if "Network" in s.domains]
+        for _ in range(count):
+            target.event_seq += 1
+            seq = target.event_seq
+            if control_every and seq % control_every == 0:
+                opcode, data, direction = 9, "", "sent"
+                emitted["control"] += 1
+            else:
+                head = f'{{"seq":{seq},"data":"'
+                data = head + "x" * max(payload_size - len(head) - 2, 0) + '"}'
+                opcode, direction = 1, ("received" if seq % 2 else "sent")
+                emitted["bytes"] += len(data)
+            emitted[direction] += 1
+            method = ("Network.webSocketFrameReceived" if direction == "received"
+                      else "Network.webSocketFrameSent")
+            params = {
+                "requestId": request_id,
+                "timestamp": time.monotonic(),
+                "response": {"opcode": opcode, "mask": direction == "sent", "payloadData": data},
+            }
+            for session in sessions:
+                session.emit(method, params)
+        return emitted
+
+    def _emit_console(self, target: FakeTarget, payload: Any = None):
+        target.event_seq += 1
+        seq = target.event_seq
+        kind = CONSOLE_TYPES[seq % len(CONSOLE_TYPES)]
+        for session in list(target.sessions):
+            if "Runtime" not in session.domains:
+                continue
+            args = [
+                {"type": "string", "value": f"[fake] {kind} #{seq} from {target.url}"},
+                {"type": "number", "value": seq, "description": str(seq)},
+            ]
+            if payload is not None:
+                args.append(session.console_arg(payload))
+            session.emit("Runtime.consoleAPICalled", {
+                "type": kind,
+                "args": args,
+                "executionContextId": target.context_id,
+                "timestamp": now_ms(),
+                "stackTrace": {"callFrames": [{
+                    "functionName": "tick", "scriptId": "1", "url": target.url,
+                    "lineNumber": seq % 100, "columnNumber": 4,
+                }]},
+            })
+
+    def _emit_network(self, target: FakeTarget):
+        target.event_seq += 1
+        seq = target.event_seq
+        request_id = f"{1000 + len(target.target_id)}.{seq}"
+        url = f"{target.url.rstrip('/')}/api/item/{seq}"
+        failed = seq % 20 == 0
+        for session in list(target.sessions):
+            if "Network" not in session.domains:
+                continue
+            session.emit("Network.requestWillBeSent",
+                         self._request_event(target, request_id, target.loader_id, url, "Fetch"))
+            if failed:
+                session.emit("Network.loadingFailed", {
+                    "requestId": request_id, "timestamp": time.monotonic(), "type": "Fetch",
+                    "errorText": "net::ERR_CONNECTION_REFUSED", "canceled": False,
+                })
+                continue
+            session.emit("Network.responseReceived",
+                         self._response_event(target, request_id, target.loader_id, url, "Fetch",
+                                              404 if seq % 7 == 0 else 200))
+            session.emit("Network.loadingFinished", {
+                "requestId": request_id, "timestamp": time.monotonic(), "encodedDataLength": 512,
+            })
+
+    async def _tick(self, interval: float = 0.1):
+        """按配置速率向已启用相应 domain 的会话推送 console / network 事件"""
+        last = time.monotonic()
+        while True:
+            await asyncio.sleep(interval)
+            current = time.monotonic()
+            elapsed, last = current - last, current
+            for target in list(self.targets.values()):
+                if target.type not in ("page", "service_worker") or not target.sessions:
+                    continue
+                target.console_budget += self.console_rate * elapsed
+                while target.console_budget >= 1:
+                    target.console_budget -= 1
+                    self._emit_console(target)
+                if target.type == "page":
+                    target.network_budget += self.network_rate * elapsed
+                    while target.network_budget >= 1:
+                        target.network_budget -= 1
+                        self._emit_network(target)
+
+    # ------------------------------------------------------------------
+    # HTTP 端点
+    # ------------------------------------------------------------------
+
+    def _json_target(self, target: FakeTarget) -> Dict[str, Any]:
+        ws = f"{self.host}:{self.port}/devtools/page/{target.target_id}"
+        return {
+            "id": target.target_id,
+            "type": target.type,
+            "title": target.title,
+            "url": target.url,
+            "description": "",
+            "devtoolsFrontendUrl": f"/devtools/inspector.html?ws={ws}",
+            "webSocketDebuggerUrl": f"ws://{ws}",
+        }
+
+    def _http_route(self, method: str, path: str, query: Dict[str, List[str]]) -> Tuple[int, Any]:
+        if path == "/json/version":
+            return 200, {
+                "Browser": BROWSER_VERSION,
+                "Protocol-Version": PROTOCOL_VERSION,
+                "User-Agent": USER_AGENT,
+                "V8-Version": V8_VERSION,
+                "WebKit-Version": "537.36 (@fake)",
+                "webSocketDebuggerUrl": self.ws_url,
+            }
+        if path in ("/json", "/json/list"):
+            return 200, [self._json_target(t) for t in self.targets.values()
+                         if t.type in ("page", "service_worker")]
+        if path == "/json/new":
+            url = unquote(next(iter(query), "")) if query else None
+            return 200, self._json_target(self.add_page(url or None))
+        if path.startswith("/json/close/"):
+            target = self.targets.get(path.rsplit("/", 1)[-1])
+            if target is None:
+                return 404, "No such target id"
+            self.close_target(target)
+            return 200, "Target is closing"
+        if path == "/json/protocol":
+            return 200, {"version": {"major": "1", "minor": "3"}, "domains": []}
+        return 404, f"Unknown path {path}"
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            headers: Dict[str, str] = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except (ValueError, ConnectionError):
+            writer.close()
+            return
+
+        parts = urlsplit(target)
+        if headers.get("upgrade", "").lower() == "websocket":
+            await self._upgrade(reader, writer, parts.path, headers)
+            return
+
+        status, body = self._http_route(method, parts.path, parse_qs(parts.query, keep_blank_values=True))
+        payload = (json.dumps(body, indent=2) if not isinstance(body, str) else body).encode()
+        content_type = "application/json; charset=UTF-8" if not isinstance(body, str) else "text/plain"
+        reason = "OK" if status == 200 else "Not Found"
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload
+        )
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def _upgrade(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                       path: str, headers: Dict[str, str]):
+        if path == f"/devtools/browser/{self.browser_target.target_id}":
+            root = self.browser_target
+        elif path.startswith("/devtools/page/") and path.rsplit("/", 1)[-1] in self.targets:
+            root = self.targets[path.rsplit("/", 1)[-1]]
+        else:
+            writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            writer.close()
+            return
+        key = headers.get("sec-websocket-key", "")
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode()
+        )
+        conn = CdpConnection(self, reader, writer, root)
+        self.connections.add(conn)
+        await conn.serve()
+
+
+def title_for(url: str, index: Optional[int] = None) -> str:
+    if url == "about:blank":
+        return "about:blank"
+    if index is not None and "/fake/" in url:
+        return f"Fake page {index}"
+    parts = urlsplit(url)
+    return parts.netloc + parts.path if parts.netloc else url
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def parse_method_latency(values: List[str]) -> Dict[str, float]:
+    result: Dict[str, float] = {}
+    for value in values:
+        method, sep, ms = value.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"格式应为 METHOD=MS: {value}")
+        result[method] = float(ms)
+    return result
+
+
+def load_trace_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        data = f.read()
+    return gzip.decompress(data) if path.endswith(".gz") else data
+
+
+def add_fake_cdp_arguments(parser: Any, prefix: str = ""):
+    """注册 FakeChrome 的配置参数（parser 或参数组；独立运行和其它测试脚本共用）"""
+    parser.add_argument(f"--{prefix}pages", type=int, default=1, help="初始页面数")
+    parser.add_argument(f"--{prefix}extensions", type=int, default=0, help="扩展（Service Worker）数")
+    parser.add_argument(f"--{prefix}latency", type=float, default=0.0, help="每条 CDP 命令的固定延迟（毫秒）")
+    parser.add_argument(f"--{prefix}jitter", type=float, default=0.0, help="额外的随机延迟上限（毫秒）")
+    parser.add_argument(f"--{prefix}method-latency", action="append", default=[], metavar="METHOD=MS",
+                        help="按方法覆盖延迟，例如 Accessibility.getFullAXTree=50（可重复）")
+    parser.add_argument(f"--{prefix}console-rate", type=float, default=0.0,
+                        help="每个 target 每秒 console 事件数")
+    parser.add_argument(f"--{prefix}network-rate", type=float, default=0.0,
+                        help="每个页面每秒网络请求数")
+    parser.add_argument(f"--{prefix}ax-nodes", type=int, default=40, help="每个页面无障碍树节点数")
+    parser.add_argument(f"--{prefix}seed", type=int, default=0, help="随机种子")
+    parser.add_argument(f"--{prefix}trace-file", help="Tracing.end 返回的 trace（.json 或 .json.gz）")
+
+
+def fake_chrome_from_args(args: argparse.Namespace, prefix: str = "", **kwargs) -> FakeChrome:
+    attr = prefix.replace("-", "_")
+    option = lambda name: getattr(args, attr + name)  # noqa: E731
+    return FakeChrome(
+        pages=option("pages"),
+        extensions=option("extensions"),
+        latency_ms=option("latency"),
+        jitter_ms=option("jitter"),
+        method_latency_ms=parse_method_latency(option("method_latency")),
+        console_rate=option("console_rate"),
+        network_rate=option("network_rate"),
+        ax_nodes=option("ax_nodes"),
+        seed=option("seed"),
+        trace_data=load_trace_file(option("trace_file")) if option("trace_file") else None,
+        **kwargs,
+    )
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="本地 CDP 替身（无需真实 Chrome）")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    add_fake_cdp_arguments(parser)
+    args = parser.parse_args(argv)
+
+    chrome = fake_chrome_from_args(args, host=args.host, port=args.port)
+    await chrome.start()
+    # 与 Chrome 启动时的输出保持一致，方便脚本解析
+    print(f"DevTools listening on {chrome.ws_url}", flush=True)
+    print(f"  browserURL: {chrome.browser_url}  pages: {args.pages}  extensions: {args.extensions}",
+          flush=True)
+    stopped = asyncio.Event()
+    # 作为后台进程运行时 SIGINT 可能被忽略，SIGTERM 同样正常退出并输出统计
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopped.set)
+    try:
+        await stopped.wait()
+    finally:
+        await chrome.stop()
+        if chrome.command_counts:
+            print("\nCDP 命令统计:")
+            for method, count in chrome.command_counts.most_common():
+                print(f"  {count:>8}  {method}")
+    return 0
+
+
+if __name__ == "__main__":
+    from mcp_client import run
+    sys.exit(run(main()))
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""性能测试公共工具：延迟统计、内存采样、报表输出、JSON 结果文件"""
+
+import json
+import math
+import os
+import re
+import statistics
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """线性插值百分位（输入必须已排序）"""
+    if not sorted_values:
+        return 0.0
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (len(sorted_values) - 1) * p / 100.0
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    if low == high:
+        return sorted_values[int(rank)]
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def summarize(values: Iterable[float]) -> Dict[str, float]:
+    """计算 count/min/mean/p50/p95/p99/max（单位与输入一致）"""
+    data = sorted(values)
+    if not data:
+        return {"count": 0, "min": 0.0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    return {
+        "count": len(data),
+        "min": data[0],
+        "mean": sum(data) / len(data),
+        "p50": percentile(data, 50),
+        "p95": percentile(data, 95),
+        "p99": percentile(data, 99),
+        "max": data[-1],
+    }
+
+
+class LatencyRecorder:
+    """按 key（通常是工具名）记录延迟和错误"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+        self.started_at = time.perf_counter()
+        self.finished_at: Optional[float] = None
+
+    def record(self, key: str, seconds: float, error: Optional[str] = None):
+        self.latencies.setdefault(key, []).append(seconds)
+        if error is not None:
+            bucket = self.errors.setdefault(key, {})
+            bucket[error] = bucket.get(error, 0) + 1
+
+    def finish(self):
+        self.finished_at = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """每个 key 的统计（延迟单位：毫秒），另含 "ALL" 汇总行"""
+        elapsed = max(self.elapsed, 1e-9)
+        keys = sorted(self.latencies)
+        rows: Dict[str, Dict[str, Any]] = {}
+        for key in keys + ["ALL"]:
+            if key == "ALL":
+                values = [v for k in keys for v in self.latencies[k]]
+                errors: Dict[str, int] = {}
+                for bucket in self.errors.values():
+                    for name, count in bucket.items():
+                        errors[name] = errors.get(name, 0) + count
+            else:
+                values = self.latencies[key]
+                errors = dict(self.errors.get(key, {}))
+            stats = summarize(v * 1000 for v in values)
+            error_count = sum(errors.values())
+            stats.update({
+                "errors": error_count,
+                "error_rate": error_count / stats["count"] if stats["count"] else 0.0,
+                "throughput": stats["count"] / elapsed,
+                "error_kinds": errors,
+            })
+            rows[key] = stats
+        return rows
+
+
+def check_budget(value_ms: Optional[float], budget_ms: Optional[float]) -> Dict[str, Any]:
+    """把一个耗时指标（毫秒）与预算比较：status 为 pass / fail，未测得或无预算时为 n/a"""
+    if value_ms is None or budget_ms is None:
+        status = "n/a"
+    else:
+        status = "pass" if value_ms <= budget_ms else "fail"
+    return {"value_ms": value_ms, "budget_ms": budget_ms, "status": status}
+
+
+def format_budget(name: str, check: Dict[str, Any]) -> str:
+    """check_budget() 结果的一行文本"""
+    if check["value_ms"] is None:
+        return f"⏭️  {name}: 未测得"
+    icon = {"pass": "✅", "fail": "❌"}.get(check["status"], "ℹ️ ")
+    budget = f" (预算 {check['budget_ms']:.0f}ms)" if check["budget_ms"] is not None else ""
+    return f"{icon} {name}: {check['value_ms']:.0f}ms{budget}"
+
+
+def format_table(rows: Dict[str, Dict[str, Any]], title: str = "") -> str:
+    """把 LatencyRecorder.summary() 格式化为对齐的文本表格"""
+    header = f"{'tool':<28}{'count':>8}{'err%':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}{'req/s':>9}"
+    lines = []
+    if title:
+        lines.append(title)
+    lines.append(header)
+    lines.append("-" * len(header))
+    for key, row in rows.items():
+        if key == "ALL":
+            lines.append("-" * len(header))
+        lines.append(
+            f"{key:<28}{row['count']:>8}{row['error_rate'] * 100:>7.1f}%"
+            f"{row['p50']:>8.1f}ms{row['p95']:>8.1f}ms{row['p99']:>8.1f}ms{row['max']:>8.1f}ms"
+            f"{row['throughput']:>9.1f}"
+        )
+    for key, row in rows.items():
+        if key != "ALL" and row["error_kinds"]:
+            kinds = ", ".join(f"{name}×{count}" for name, count in row["error_kinds"].items())
+            lines.append(f"  ! {key}: {kinds}")
+    return "\n".join(lines)
+
+
+# ============================================================================
+# 内存采样（服务器以 MCP_DEBUG_MEMORY=1 启动，见 src/utils/memoryStats.ts）
+# ============================================================================
+
+MB = 1024 * 1024
+MEMORY_PREFIX = "[memory] "
+MEMORY_WINDOW = 3
+
+
+def memory_debug_env(interval: float) -> Dict[str, str]:
+    """开启服务器内存采样所需的环境变量（interval 单位：秒）"""
+    node_options = os.environ.get("NODE_OPTIONS", "")
+    return {
+        "MCP_DEBUG_MEMORY": "1",
+        "MCP_DEBUG_MEMORY_INTERVAL": str(int(interval * 1000)),
+        "NODE_OPTIONS": f"{node_options} --expose-gc".strip(),
+    }
+
+
+def slope(samples: List[Dict[str, Any]], key: str, x: str = "calls") -> float:
+    """samples 中 key 对 x 的最小二乘斜率"""
+    xs = [s[x] for s in samples]
+    ys = [s[key] for s in samples]
+    if len(xs) < 2:
+        return 0.0
+    mean_x, mean_y = statistics.fmean(xs), statistics.fmean(ys)
+    denominator = sum((v - mean_x) ** 2 for v in xs)
+    if denominator == 0:
+        return 0.0
+    return sum((a - mean_x) * (b - mean_y) for a, b in zip(xs, ys)) / denominator
+
+
+class MemoryTrace:
+    """内存采样序列，每个采样附带当时已完成的调用数
+
+    baseline 取预热结束后前 MEMORY_WINDOW 个采样的中位数，final 取最后
+    MEMORY_WINDOW 个采样的中位数，growth = final - baseline。
+    """
+
+    def __init__(self, warmup_calls: int = 0):
+        self.samples: List[Dict[str, Any]] = []
+        self.calls = 0
+        self.warmup_calls = warmup_calls
+
+    def add(self, stats: Dict[str, Any]):
+        self.samples.append({**stats, "calls": self.calls})
+
+    def add_line(self, line: str) -> bool:
+        """解析 stderr 中的 [memory] 行；不是采样行时返回 False"""
+        if not line.startswith(MEMORY_PREFIX):
+            return False
+        try:
+            self.add(json.loads(line[len(MEMORY_PREFIX):]))
+        except json.JSONDecodeError:
+            return False
+        return True
+
+    def measured(self) -> List[Dict[str, Any]]:
+        return [s for s in self.samples if s["calls"] >= self.warmup_calls]
+
+    def growth(self, key: str) -> Optional[Dict[str, float]]:
+        samples = self.measured()
+        if len(samples) < 2 * MEMORY_WINDOW:
+            return None
+        baseline = statistics.median(s[key] for s in samples[:MEMORY_WINDOW])
+        final = statistics.median(s[key] for s in samples[-MEMORY_WINDOW:])
+        return {
+            "baseline_mb": baseline / MB,
+            "final_mb": final / MB,
+            "peak_mb": max(s[key] for s in samples) / MB,
+            "growth_mb": (final - baseline) / MB,
+            "slope_kb_per_1k_calls": slope(samples, key) * 1000 / 1024,
+        }
+
+
+def format_growth(name: str, growth: Optional[Dict[str, float]], limit_mb: float) -> str:
+    """一行内存判定结果；采样不足时为警告"""
+    if growth is None:
+        return f"⚠️  {name}: 采样不足，无法判断（服务器是否支持 MCP_DEBUG_MEMORY？）"
+    icon = "✅" if growth["growth_mb"] <= limit_mb else "❌"
+    return (f"{icon} {name:<5} {growth['baseline_mb']:.1f}MB → {growth['final_mb']:.1f}MB "
+            f"(peak {growth['peak_mb']:.1f}MB, growth {growth['growth_mb']:+.1f}MB / 上限 {limit_mb:g}MB, "
+            f"slope {growth['slope_kb_per_1k_calls']:+.1f}KB/1k calls)")
+
+
+# ============================================================================
+# 服务器指标（GET /metrics，Prometheus 文本格式，见 src/utils/toolMetrics.ts）
+# ============================================================================
+
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+METRIC_LINE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)$')
+METRIC_LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+TOOL_PHASES = ("queue", "handler", "format")
+
+
+def metrics_env(port: int) -> Dict[str, str]:
+    """stdio 服务器开放 /metrics 所需的环境变量"""
+    return {"MCP_METRICS_PORT": str(port)}
+
+
+def parse_metrics(text: str) -> Dict[MetricKey, float]:
+    """解析 Prometheus 文本格式：{(name, ((label, value), ...)): value}"""
+    samples: Dict[MetricKey, float] = {}
+    for line in text.splitlines():
+        match = METRIC_LINE.match(line.strip())
+        if not match:
+            continue
+        name, raw_labels, value = match.groups()
+        labels = tuple(sorted(
+            (key, re.sub(r"\\(.)", lambda m: "\n" if m.group(1) == "n" else m.group(1), val))
+            for key, val in METRIC_LABEL.findall(raw_labels or "")
+        ))
+        try:
+            samples[(name, labels)] = float(value)
+        except ValueError:
+            continue
+    return samples
+
+
+def metrics_delta(before: Dict[MetricKey, float], after: Dict[MetricKey, float]) -> Dict[MetricKey, float]:
+    """两次抓取之间的增量（gauge 取 after 的值）"""
+    return {key: value - before.get(key, 0.0) if not key[0].endswith("_in_flight") else value
+            for key, value in after.items()}
+
+
+def _series(samples: Dict[MetricKey, float], name: str, group: str) -> Dict[Tuple[str, ...], Dict[str, Any]]:
+    """按 group 标签（逗号分隔）整理直方图：{labels: {"count", "sum", "buckets": [(le, n)]}}"""
+    keys = group.split(",")
+    result: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+    for (metric, labels), value in samples.items():
+        if not metric.startswith(name + "_"):
+            continue
+        label_map = dict(labels)
+        series = result.setdefault(tuple(label_map.get(k, "") for k in keys),
+                                   {"count": 0.0, "sum": 0.0, "buckets": []})
+        suffix = metric[len(name) + 1:]
+        if suffix == "bucket":
+            series["buckets"].append((float(label_map["le"]), value))
+        elif suffix in ("count", "sum"):
+            series[suffix] = value
+    for series in result.values():
+        series["buckets"].sort()
+    return result
+
+
+def histogram_quantile(buckets: List[Tuple[float, float]], q: float) -> float:
+    """按累积分桶线性插值估计分位数（与 PromQL histogram_quantile 相同）"""
+    if not buckets or buckets[-1][1] <= 0:
+        return 0.0
+    rank = q * buckets[-1][1]
+    previous_le, previous_count = 0.0, 0.0
+    for le, count in buckets:
+        if count >= rank:
+            if math.isinf(le):
+                return previous_le
+            if count == previous_count:
+                return le
+            return previous_le + (le - previous_le) * (rank - previous_count) / (count - previous_count)
+        previous_le, previous_count = le, count
+    return previous_le
+
+
+def summarize_metrics(delta: Dict[MetricKey, float]) -> Dict[str, Any]:
+    """把 /metrics 增量整理为每工具的阶段耗时和每个 CDP 方法的往返时间（毫秒）"""
+    tools: Dict[str, Dict[str, Any]] = {}
+    duration = _series(delta, "mcp_tool_duration_seconds", "tool")
+    phases = _series(delta, "mcp_tool_phase_duration_seconds", "tool,phase")
+    sizes = _series(delta, "mcp_tool_response_bytes", "tool")
+    for (tool,), series in duration.items():
+        count = series["count"]
+        if not count:
+            continue
+        row: Dict[str, Any] = {
+            "calls": count,
+            "errors": delta.get(("mcp_tool_calls_total", (("status", "error"), ("tool", tool))), 0.0),
+            "mean_ms": series["sum"] / count * 1000,
+            "p95_ms": histogram_quantile(series["buckets"], 0.95) * 1000,
+        }
+        for phase in TOOL_PHASES:
+            phase_series = phases.get((tool, phase))
+            row[f"{phase}_ms"] = (phase_series["sum"] / phase_series["count"] * 1000
+                                  if phase_series and phase_series["count"] else 0.0)
+        size = sizes.get((tool,))
+        row["bytes"] = size["sum"] / size["count"] if size and size["count"] else 0.0
+        tools[tool] = row
+
+    cdp: Dict[str, Dict[str, Any]] = {}
+    for (method,), series in _series(delta, "mcp_cdp_command_duration_seconds", "method").items():
+        count = series["count"]
+        if not count:
+            continue
+        cdp[method] = {
+            "count": count,
+            "errors": delta.get(("mcp_cdp_command_errors_total", (("method", method),)), 0.0),
+            "mean_ms": series["sum"] / count * 1000,
+            "p95_ms": histogram_quantile(series["buckets"], 0.95) * 1000,
+            "total_ms": series["sum"] * 1000,
+        }
+    return {"tools": tools, "cdp": cdp}
+
+
+def format_metrics_report(summary: Dict[str, Any], top_cdp: int = 10) -> str:
+    """summarize_metrics() 结果的文本报表：每工具的排队/处理/格式化耗时和最耗时的 CDP 方法"""
+    header = (f"{'tool':<28}{'calls':>7}{'err':>5}{'mean':>10}{'p95':>10}"
+              f"{'queue':>10}{'handler':>10}{'format':>10}{'bytes':>10}")
+    lines = [header, "-" * len(header)]
+    for tool, row in sorted(summary["tools"].items()):
+        lines.append(
+            f"{tool:<28}{row['calls']:>7.0f}{row['errors']:>5.0f}"
+            f"{row['mean_ms']:>8.1f}ms{row['p95_ms']:>8.1f}ms"
+            f"{row['queue_ms']:>8.1f}ms{row['handler_ms']:>8.1f}ms{row['format_ms']:>8.1f}ms"
+            f"{row['bytes']:>10.0f}"
+        )
+    cdp = sorted(summary["cdp"].items(), key=lambda item: item[1]["total_ms"], reverse=True)
+    if cdp:
+        header = f"{'CDP method':<40}{'count':>8}{'err':>5}{'mean':>10}{'p95':>10}{'total':>12}"
+        lines += ["", header, "-" * len(header)]
+        for method, row in cdp[:top_cdp]:
+            lines.append(
+                f"{method:<40}{row['count']:>8.0f}{row['errors']:>5.0f}"
+                f"{row['mean_ms']:>8.2f}ms{row['p95_ms']:>8.2f}ms{row['total_ms']:>10.0f}ms"
+            )
+    return "\n".join(lines)
+
+
+def write_json(path: str, data: Any):
+    """写出 JSON 结果（"-" 表示 stdout）"""
+    text = json.dumps(data, ensure_ascii=False, indent=2)
+    if path == "-":
+        print(text)
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text + "\n")
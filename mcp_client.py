@@ -0,0 +1,804 @@
+#!/usr/bin/env python3
+"""异步 MCP 客户端（供 Python 测试脚本共用）
+
+各传输方式共享同一接口：
+- stdio:        启动 `node build/src/index.js`，按行收发 JSON-RPC
+- sse:          GET /sse 建立事件流，POST /message?sessionId=... 发送请求
+- streamable:   POST /mcp，响应为 JSON 或 text/event-stream
+- multi-tenant: GET /api/v2/sse?token=... 建立事件流，其余同 sse
+
+响应按 JSON-RPC id 关联，同一个客户端可以同时保持多个请求在途。
+只依赖标准库。
+
+示例：
+    async with create_client("stdio", browser_url=CHROME_URL) as client:
+        await client.initialize()
+        results = await asyncio.gather(
+            client.call_tool("list_pages"),
+            client.call_tool("list_extensions"),
+        )
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+SERVER_ENTRY = "build/src/index.js"
+DEFAULT_PROTOCOL_VERSION = "2024-11-05"
+DEFAULT_CLIENT_INFO = {"name": "test-client", "version": "1.0.0"}
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_STARTUP_TIMEOUT = 30.0
+READY_POLL_INTERVAL = 0.05
+DEFAULT_PORTS = {"sse": 32122, "streamable": 32123, "multi-tenant": 32124}
+TRANSPORTS = ("stdio", "sse", "streamable", "multi-tenant")
+
+# 单行 JSON-RPC 消息上限（take_snapshot 等响应可能很大）
+STREAM_LIMIT = 64 * 1024 * 1024
+
+
+class McpError(Exception):
+    """服务器返回的 JSON-RPC 错误"""
+
+    def __init__(self, code: int, message: str, data: Any = None):
+        super().__init__(f"[{code}] {message}")
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+class TransportClosed(Exception):
+    """传输在请求完成前关闭"""
+
+
+# ============================================================================
+# 最小 HTTP 客户端（asyncio 原生，不依赖 requests）
+# ============================================================================
+
+class HttpResponse:
+    """已完整读取的 HTTP 响应"""
+
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+async def _open(url: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter, str]:
+    parts = urlsplit(url)
+    if parts.scheme != "http":
+        raise ValueError(f"仅支持 http:// URL: {url}")
+    host = parts.hostname or "127.0.0.1"
+    port = parts.port or 80
+    reader, writer = await asyncio.open_connection(host, port, limit=STREAM_LIMIT)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    return reader, writer, path
+
+
+async def _write_request(writer: asyncio.StreamWriter, url: str, path: str, method: str,
+                         headers: Optional[Dict[str, str]], body: Optional[bytes]):
+    parts = urlsplit(url)
+    lines = [f"{method} {path} HTTP/1.1", f"Host: {parts.netloc}", "Connection: close"]
+    for key, value in (headers or {}).items():
+        lines.append(f"{key}: {value}")
+    if body is not None:
+        lines.append(f"Content-Length: {len(body)}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+    if body is not None:
+        writer.write(body)
+    await writer.drain()
+
+
+async def _read_head(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str]]:
+    status_line = await reader.readline()
+    if not status_line:
+        raise TransportClosed("连接在响应头之前关闭")
+    status = int(status_line.split()[1])
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+    return status, headers
+
+
+async def _iter_body(reader: asyncio.StreamReader, headers: Dict[str, str]):
+    """按 Content-Length / chunked / 读到 EOF 逐块产出响应体"""
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size_line = await reader.readline()
+            if not size_line:
+                return
+            size = int(size_line.split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                await reader.readline()
+                return
+            chunk = await reader.readexactly(size)
+            await reader.readline()
+            yield chunk
+    elif "content-length" in headers:
+        remaining = int(headers["content-length"])
+        while remaining > 0:
+            chunk = await reader.read(min(remaining, 65536))
+            if not chunk:
+                return
+            remaining -= len(chunk)
+            yield chunk
+    else:
+        while True:
+            chunk = await reader.read(65536)
+            if not chunk:
+                return
+            yield chunk
+
+
+async def http_request(url: str, method: str = "GET", body: Any = None,
+                       headers: Optional[Dict[str, str]] = None,
+                       timeout: float = 10.0) -> HttpResponse:
+    """发送一次 HTTP 请求并读取完整响应；body 为 dict/list 时按 JSON 编码"""
+    headers = dict(headers or {})
+    payload: Optional[bytes] = None
+    if isinstance(body, (dict, list)):
+        payload = json.dumps(body).encode("utf-8")
+        headers.setdefault("Content-Type", "application/json")
+    elif isinstance(body, str):
+        payload = body.encode("utf-8")
+    elif body is not None:
+        payload = body
+
+    async def _do() -> HttpResponse:
+        reader, writer, path = await _open(url)
+        try:
+            await _write_request(writer, url, path, method, headers, payload)
+            status, resp_headers = await _read_head(reader)
+            chunks = [chunk async for chunk in _iter_body(reader, resp_headers)]
+            return HttpResponse(status, resp_headers, b"".join(chunks))
+        finally:
+            writer.close()
+
+    return await asyncio.wait_for(_do(), timeout)
+
+
+class _SseParser:
+    """增量解析 text/event-stream，产出 (event, data)"""
+
+    def __init__(self):
+        self._buffer = b""
+        self._event = "message"
+        self._data: List[str] = []
+
+    def feed(self, chunk: bytes) -> List[Tuple[str, str]]:
+        events = []
+        self._buffer += chunk
+        while b"\n" in self._buffer:
+            raw, self._buffer = self._buffer.split(b"\n", 1)
+            line = raw.rstrip(b"\r").decode("utf-8", errors="replace")
+            if line == "":
+                if self._data:
+                    events.append((self._event, "\n".join(self._data)))
+                self._event = "message"
+                self._data = []
+            elif line.startswith(":"):
+                continue
+            else:
+                field, _, value = line.partition(":")
+                if value.startswith(" "):
+                    value = value[1:]
+                if field == "event":
+                    self._event = value
+                elif field == "data":
+                    self._data.append(value)
+        return events
+
+
+# ============================================================================
+# 客户端
+# ============================================================================
+
+class McpClient:
+    """JSON-RPC over MCP 的公共部分：id 分配、响应关联、便捷方法
+
+    子类只需实现 start()/close()/_send()，并把收到的消息交给 _dispatch()。
+    """
+
+    transport = "base"
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self.server_info: Dict[str, Any] = {}
+        self.on_notification: Optional[Callable[[Dict[str, Any]], None]] = None
+        # 收到的每一帧原始消息（批量响应为数组），在按 id 分发之前调用
+        self.on_message: Optional[Callable[[Any], None]] = None
+        self._ids = itertools.count(1)
+        self._pending: Dict[Any, asyncio.Future] = {}
+        self._closed = False
+        self.initialized_at: Optional[float] = None
+
+    async def __aenter__(self) -> "McpClient":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    async def start(self):
+        raise NotImplementedError
+
+    async def close(self):
+        raise NotImplementedError
+
+    async def _send(self, message: Any):
+        raise NotImplementedError
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    async def request(self, method: str, params: Optional[Dict[str, Any]] = None,
+                      timeout: Optional[float] = None) -> Any:
+        """发送请求并等待同 id 的响应，返回 result；错误响应抛出 McpError"""
+        message = self.build_request(method, params)
+        response = await self.send_message(message, timeout)
+        return self.unwrap(response)
+
+    def build_request(self, method: str, params: Optional[Dict[str, Any]] = None,
+                      request_id: Any = None) -> Dict[str, Any]:
+        return {
+            "jsonrpc": "2.0",
+            "id": self.next_id() if request_id is None else request_id,
+            "method": method,
+            "params": params or {},
+        }
+
+    async def send_message(self, message: Dict[str, Any],
+                           timeout: Optional[float] = None) -> Dict[str, Any]:
+        """发送一条已构造的请求，返回原始响应消息"""
+        future = self._register(message["id"])
+        try:
+            await self._send(message)
+            return await asyncio.wait_for(future, timeout or self.timeout)
+        finally:
+            self._pending.pop(message["id"], None)
+
+    async def send_batch(self, messages: List[Dict[str, Any]],
+                         timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """以 JSON-RPC 批量请求（一个数组）发送多条请求，按 messages 顺序返回原始响应"""
+        futures = [self._register(message["id"]) for message in messages]
+        try:
+            await self._send(messages)
+            return list(await asyncio.wait_for(asyncio.gather(*futures), timeout or self.timeout))
+        finally:
+            for message in messages:
+                self._pending.pop(message["id"], None)
+
+    @staticmethod
+    def unwrap(response: Dict[str, Any]) -> Any:
+        if "error" in response:
+            error = response["error"]
+            raise McpError(error.get("code", 0), error.get("message", ""), error.get("data"))
+        return response.get("result")
+
+    async def notify(self, method: str, params: Optional[Dict[str, Any]] = None):
+        message: Dict[str, Any] = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            message["params"] = params
+        await self._send(message)
+
+    async def initialize(self, client_info: Optional[Dict[str, str]] = None,
+                         protocol_version: str = DEFAULT_PROTOCOL_VERSION) -> Dict[str, Any]:
+        result = await self.request("initialize", {
+            "protocolVersion": protocol_version,
+            "capabilities": {},
+            "clientInfo": client_info or DEFAULT_CLIENT_INFO,
+        })
+        self.initialized_at = time.perf_counter()
+        self.server_info = result.get("serverInfo", {})
+        await self.notify("notifications/initialized")
+        return result
+
+    async def list_tools(self) -> List[Dict[str, Any]]:
+        result = await self.request("tools/list")
+        return result.get("tools", [])
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None,
+                        timeout: Optional[float] = None,
+                        meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """meta 作为请求的 _meta 发送（例如 progressToken）"""
+        params: Dict[str, Any] = {"name": name, "arguments": arguments or {}}
+        if meta:
+            params["_meta"] = meta
+        return await self.request("tools/call", params, timeout=timeout)
+
+    def _register(self, request_id: Any) -> asyncio.Future:
+        if self._closed:
+            raise TransportClosed(f"{self.transport} 传输已关闭")
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        return future
+
+    def _dispatch(self, message: Any):
+        if self.on_message:
+            self.on_message(message)
+        self._route(message)
+
+    def _route(self, message: Any):
+        if isinstance(message, list):
+            for item in message:
+                self._route(item)
+            return
+        if not isinstance(message, dict):
+            return
+        if "id" in message and ("result" in message or "error" in message):
+            future = self._pending.get(message["id"])
+            if future and not future.done():
+                future.set_result(message)
+        elif "method" in message and self.on_notification:
+            self.on_notification(message)
+
+    def _fail_pending(self, reason: str):
+        self._closed = True
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(TransportClosed(reason))
+
+
+class StdioClient(McpClient):
+    """通过子进程 stdin/stdout 与服务器通信"""
+
+    transport = "stdio"
+
+    def __init__(self, command: Optional[List[str]] = None, browser_url: Optional[str] = None,
+                 cwd: Optional[str] = None, env: Optional[Dict[str, str]] = None,
+                 on_stderr: Optional[Callable[[str], None]] = None,
+                 timeout: float = DEFAULT_TIMEOUT):
+        super().__init__(timeout)
+        self.command = command or server_command("stdio", browser_url=browser_url)
+        self.cwd = cwd
+        self.env = env
+        self.on_stderr = on_stderr
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.spawned_at: Optional[float] = None
+        self._tasks: List[asyncio.Task] = []
+        self._write_lock = asyncio.Lock()
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid if self.process else None
+
+    @property
+    def startup_time(self) -> Optional[float]:
+        """冷启动耗时（秒）：从 spawn 到收到 initialize 响应；尚未握手时为 None"""
+        if self.spawned_at is None or self.initialized_at is None:
+            return None
+        return self.initialized_at - self.spawned_at
+
+    async def start(self):
+        self.spawned_at = time.perf_counter()
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=self.cwd,
+            env=self.env,
+            limit=STREAM_LIMIT,
+        )
+        self._tasks = [
+            asyncio.create_task(self._read_stdout()),
+            asyncio.create_task(self._read_stderr()),
+        ]
+
+    async def _read_stdout(self):
+        assert self.process and self.process.stdout
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                break
+            try:
+                self._dispatch(json.loads(line))
+            except json.JSONDecodeError:
+                if self.on_stderr:
+                    self.on_stderr(f"[stdout] {line.decode(errors='replace').rstrip()}")
+        self._fail_pending("stdio 服务器关闭了 stdout")
+
+    async def _read_stderr(self):
+        assert self.process and self.process.stderr
+        while True:
+            line = await self.process.stderr.readline()
+            if not line:
+                break
+            if self.on_stderr:
+                self.on_stderr(line.decode(errors="replace").rstrip())
+
+    async def _send(self, message: Any):
+        if not self.process or not self.process.stdin or self.process.returncode is not None:
+            raise TransportClosed("stdio 服务器未运行")
+        async with self._write_lock:
+            self.process.stdin.write(json.dumps(message).encode("utf-8") + b"\n")
+            await self.process.stdin.drain()
+
+    def is_running(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def close(self, timeout: float = 3.0):
+        self._fail_pending("客户端已关闭")
+        if self.process and self.process.returncode is None:
+            self.process.terminate()
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        # 进程退出后管道会 EOF，先让读取任务读完剩余输出（stderr 末尾常有诊断信息）
+        if self._tasks:
+            await asyncio.wait(self._tasks, timeout=1.0)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+class SseClient(McpClient):
+    """GET /sse 接收响应，POST /message 发送请求"""
+
+    transport = "sse"
+
+    def __init__(self, base_url: str, sse_path: str = "/sse",
+                 headers: Optional[Dict[str, str]] = None, timeout: float = DEFAULT_TIMEOUT):
+        super().__init__(timeout)
+        self.base_url = base_url.rstrip("/")
+        self.sse_path = sse_path
+        self.headers = dict(headers or {})
+        self.session_id: Optional[str] = None
+        self.message_url: Optional[str] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        url = self.base_url + self.sse_path
+        reader, writer, path = await _open(url)
+        self._writer = writer
+        headers = {"Accept": "text/event-stream", "Cache-Control": "no-cache", **self.headers}
+        await _write_request(writer, url, path, "GET", headers, None)
+        status, resp_headers = await asyncio.wait_for(_read_head(reader), self.timeout)
+        if status != 200:
+            chunks = [chunk async for chunk in _iter_body(reader, resp_headers)]
+            writer.close()
+            raise TransportClosed(f"SSE 连接失败: HTTP {status} {b''.join(chunks)[:200]!r}")
+        endpoint = asyncio.get_running_loop().create_future()
+        self._reader_task = asyncio.create_task(self._read_events(reader, resp_headers, endpoint))
+        self.message_url = await asyncio.wait_for(endpoint, self.timeout)
+        self.session_id = dict(
+            pair.split("=", 1) for pair in urlsplit(self.message_url).query.split("&") if "=" in pair
+        ).get("sessionId")
+
+    async def _read_events(self, reader, resp_headers, endpoint: asyncio.Future):
+        parser = _SseParser()
+        try:
+            async for chunk in _iter_body(reader, resp_headers):
+                for event, data in parser.feed(chunk):
+                    if event == "endpoint":
+                        uri = data
+                        if data.startswith("{"):
+                            uri = json.loads(data).get("uri", "")
+                        if not endpoint.done():
+                            endpoint.set_result(urljoin(self.base_url + "/", uri))
+                    elif event == "message":
+                        self._dispatch(json.loads(data))
+        finally:
+            if not endpoint.done():
+                endpoint.set_exception(TransportClosed("SSE 流在 endpoint 事件前关闭"))
+            self._fail_pending("SSE 流已关闭")
+
+    async def _send(self, message: Any):
+        if not self.message_url:
+            raise TransportClosed("SSE 会话未建立")
+        response = await http_request(self.message_url, "POST", message, self.headers, self.timeout)
+        if response.status >= 400:
+            raise TransportClosed(f"POST /message 失败: HTTP {response.status} {response.text()[:200]}")
+
+    async def close(self):
+        self._fail_pending("客户端已关闭")
+        if self._writer:
+            self._writer.close()
+        if self._reader_task:
+            self._reader_task.cancel()
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+
+
+class StreamableHttpClient(McpClient):
+    """POST /mcp，每个请求一个 HTTP 连接，因此天然支持并发在途"""
+
+    transport = "streamable"
+
+    def __init__(self, base_url: str, path: str = "/mcp",
+                 headers: Optional[Dict[str, str]] = None, timeout: float = DEFAULT_TIMEOUT):
+        super().__init__(timeout)
+        self.url = base_url.rstrip("/") + path
+        self.headers = dict(headers or {})
+        self.session_id: Optional[str] = None
+        self._posts: set = set()
+
+    async def start(self):
+        return None
+
+    async def _send(self, message: Any):
+        task = asyncio.create_task(self._post(message))
+        self._posts.add(task)
+        task.add_done_callback(self._posts.discard)
+        # 通知（无 id）需要等待 202，请求的结果则通过 _dispatch 回到 future
+        if isinstance(message, dict) and "id" not in message:
+            await task
+
+    async def _post(self, message: Any):
+        headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json, text/event-stream",
+            **self.headers,
+        }
+        if self.session_id:
+            headers["Mcp-Session-Id"] = self.session_id
+        body = json.dumps(message).encode("utf-8")
+        try:
+            reader, writer, path = await _open(self.url)
+            try:
+                await _write_request(writer, self.url, path, "POST", headers, body)
+                status, resp_headers = await _read_head(reader)
+                if "mcp-session-id" in resp_headers:
+                    self.session_id = resp_headers["mcp-session-id"]
+                if status >= 400:
+                    chunks = [chunk async for chunk in _iter_body(reader, resp_headers)]
+                    self._fail_request(message, f"HTTP {status} {b''.join(chunks)[:200]!r}")
+                    return
+                if resp_headers.get("content-type", "").startswith("text/event-stream"):
+                    parser = _SseParser()
+                    async for chunk in _iter_body(reader, resp_headers):
+                        for event, data in parser.feed(chunk):
+                            if event == "message" and data:
+                                self._dispatch(json.loads(data))
+                else:
+                    chunks = [chunk async for chunk in _iter_body(reader, resp_headers)]
+                    if chunks and b"".join(chunks).strip():
+                        self._dispatch(json.loads(b"".join(chunks)))
+            finally:
+                writer.close()
+        except (OSError, TransportClosed, asyncio.IncompleteReadError) as error:
+            self._fail_request(message, str(error))
+
+    def _fail_request(self, message: Any, reason: str):
+        items = message if isinstance(message, list) else [message]
+        for item in items:
+            future = self._pending.get(item.get("id")) if isinstance(item, dict) else None
+            if future and not future.done():
+                future.set_exception(TransportClosed(reason))
+
+    async def close(self):
+        if self.session_id:
+            headers = {"Mcp-Session-Id": self.session_id, **self.headers}
+            try:
+                await http_request(self.url, "DELETE", headers=headers, timeout=3)
+            except (OSError, asyncio.TimeoutError, TransportClosed):
+                pass
+        self._fail_pending("客户端已关闭")
+        for task in list(self._posts):
+            task.cancel()
+        await asyncio.gather(*self._posts, return_exceptions=True)
+
+
+# ============================================================================
+# HTTP 服务器进程管理
+# ============================================================================
+
+class ServerProcess:
+    """以子进程方式运行 sse / streamable / multi-tenant 服务器
+
+    start() 轮询 /health 直到服务器就绪，startup_time 记录冷启动耗时。
+    stdout/stderr 持续读入 output（最近若干行），避免管道写满阻塞服务器。
+    """
+
+    HEALTH_PATH = "/health"
+    OUTPUT_LINES = 500
+
+    def __init__(self, transport: str, port: Optional[int] = None,
+                 browser_url: Optional[str] = None, env: Optional[Dict[str, str]] = None,
+                 extra_args: Optional[List[str]] = None, cwd: Optional[str] = None,
+                 startup_timeout: float = DEFAULT_STARTUP_TIMEOUT):
+        self.transport = transport
+        self.port = port or DEFAULT_PORTS[transport]
+        self.command = server_command(transport, self.port, browser_url, extra_args)
+        self.env = {**os.environ, **(env or {})}
+        if transport == "multi-tenant":
+            self.env["PORT"] = str(self.port)
+        self.cwd = cwd
+        self.startup_timeout = startup_timeout
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.output: List[str] = []
+        self.spawned_at: Optional[float] = None
+        self.startup_time: Optional[float] = None
+        self._reader: Optional[asyncio.Task] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid if self.process else None
+
+    def is_running(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self):
+        self.spawned_at = time.perf_counter()
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            cwd=self.cwd,
+            env=self.env,
+            limit=STREAM_LIMIT,
+        )
+        self._reader = asyncio.create_task(self._drain())
+        await self.wait_ready()
+
+    async def wait_ready(self):
+        """轮询 /health 直到返回 200；进程退出或超过 startup_timeout 时抛出 TransportClosed"""
+        assert self.spawned_at is not None
+        deadline = self.spawned_at + self.startup_timeout
+        url = self.base_url + self.HEALTH_PATH
+        while True:
+            if not self.is_running():
+                raise TransportClosed(
+                    f"{self.transport} 服务器启动失败:\n" + "\n".join(self.output[-20:]))
+            try:
+                response = await http_request(url, timeout=1.0)
+                if response.status == 200:
+                    self.startup_time = time.perf_counter() - self.spawned_at
+                    return
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                pass
+            if time.perf_counter() >= deadline:
+                raise TransportClosed(
+                    f"{self.transport} 服务器 {self.startup_timeout:g}s 内未就绪 ({url}):\n"
+                    + "\n".join(self.output[-20:]))
+            await asyncio.sleep(READY_POLL_INTERVAL)
+
+    async def _drain(self):
+        assert self.process and self.process.stdout
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                break
+            self.output.append(line.decode(errors="replace").rstrip())
+            if len(self.output) > self.OUTPUT_LINES:
+                del self.output[: len(self.output) - self.OUTPUT_LINES]
+
+    async def stop(self, timeout: float = 3.0):
+        if self.process and self.process.returncode is None:
+            self.process.terminate()
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        if self._reader:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+
+    async def __aenter__(self) -> "ServerProcess":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+
+async def register_tenant(base_url: str, browser_url: str, email: str,
+                          token_name: Optional[str] = None, timeout: float = 10.0) -> Dict[str, Any]:
+    """在多租户服务器上注册用户并绑定浏览器，返回 {userId, browserId, token}"""
+    response = await http_request(f"{base_url}/api/v2/users", "POST",
+                                  {"email": email, "username": email.split("@")[0]}, timeout=timeout)
+    if response.status != 201:
+        raise McpError(response.status, f"注册用户失败: {response.text()[:200]}")
+    user_id = response.json()["userId"]
+    response = await http_request(f"{base_url}/api/v2/users/{user_id}/browsers", "POST",
+                                  {"browserURL": browser_url, "tokenName": token_name or f"bench-{user_id}"},
+                                  timeout=timeout)
+    if response.status != 201:
+        raise McpError(response.status, f"绑定浏览器失败: {response.text()[:200]}")
+    data = response.json()
+    return {"userId": user_id, "browserId": data["browserId"], "token": data["token"]}
+
+
+# ============================================================================
+# 工厂函数
+# ============================================================================
+
+def server_command(transport: str = "stdio", port: Optional[int] = None,
+                   browser_url: Optional[str] = None, extra_args: Optional[List[str]] = None) -> List[str]:
+    """构造启动服务器的命令行（multi-tenant 的端口通过 PORT 环境变量传入）"""
+    command = ["node", SERVER_ENTRY]
+    if transport == "multi-tenant":
+        return command + ["--mode", "multi-tenant"] + list(extra_args or [])
+    if transport != "stdio":
+        command += ["--transport", transport, "--port", str(port or DEFAULT_PORTS[transport])]
+    if browser_url:
+        command += ["--browserUrl", browser_url]
+    return command + list(extra_args or [])
+
+
+def create_client(transport: str, browser_url: Optional[str] = None,
+                  base_url: Optional[str] = None, port: Optional[int] = None,
+                  token: Optional[str] = None, **kwargs) -> McpClient:
+    """按传输方式创建客户端
+
+    stdio 会自行启动服务器进程；sse/streamable/multi-tenant 连接 base_url 上已运行的服务器。
+    multi-tenant 需要 register_tenant() 返回的 token。
+    """
+    if transport == "stdio":
+        return StdioClient(browser_url=browser_url, **kwargs)
+    base_url = base_url or f"http://127.0.0.1:{port or DEFAULT_PORTS[transport]}"
+    if transport == "sse":
+        return SseClient(base_url, **kwargs)
+    if transport == "streamable":
+        return StreamableHttpClient(base_url, **kwargs)
+    if transport == "multi-tenant":
+        if not token:
+            raise ValueError("multi-tenant 传输需要 token")
+        return SseClient(base_url, sse_path=f"/api/v2/sse?token={token}", **kwargs)
+    raise ValueError(f"未知传输方式: {transport}（可选: {', '.join(TRANSPORTS)}）")
+
+
+def tool_text(result: Dict[str, Any]) -> str:
+    """拼接 tools/call 结果中的文本内容"""
+    return "\n".join(
+        item.get("text", "") for item in result.get("content", []) if item.get("type") == "text"
+    )
+
+
+def run(coro: Awaitable[Any]) -> Any:
+    """脚本入口的 asyncio.run 封装，Ctrl+C 时返回 130"""
+    try:
+        return asyncio.run(coro)
+    except KeyboardInterrupt:
+        print("\n已中断", file=sys.stderr)
+        return 130
+
+
+__all__ = [
+    "McpClient", "StdioClient", "SseClient", "StreamableHttpClient",
+    "McpError", "TransportClosed", "HttpResponse",
+    "ServerProcess", "register_tenant",
+    "create_client", "server_command", "http_request", "tool_text", "run",
+    "DEFAULT_PORTS", "DEFAULT_STARTUP_TIMEOUT", "TRANSPORTS", "SERVER_ENTRY",
+]
+
+if __name__ == "__main__":
+    # 快速自检：python3 mcp_client.py [stdio|sse|streamable] [browserUrl]
+    async def _main() -> int:
+        transport = sys.argv[1] if len(sys.argv) > 1 else "stdio"
+        browser_url = sys.argv[2] if len(sys.argv) > 2 else os.environ.get(
+            "CHROME_URL", "http://127.0.0.1:9222")
+        async with create_client(transport, browser_url=browser_url) as client:
+            await client.initialize()
+            tools = await client.list_tools()
+            print(f"{transport}: {len(tools)} tools")
+        return 0
+
+    sys.exit(run(_main()))
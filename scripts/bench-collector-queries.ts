@@ -0,0 +1,163 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+/**
+ * 收集器查询基准：list_network_requests 的过滤与分页随收集条数（1k → 1M）的开销
+ *
+ * 对比改动前的做法（toArray() 后逐条 filter，再用 paginate 取一页）
+ * 与 IndexedBuffer 的索引查询（按键值列表遍历 + 游标）。
+ * 每次查询前先写入一条新请求，与真实页面一样让 toArray() 的缓存失效。
+ *
+ * 用法：
+ *   npm run build
+ *   node --experimental-strip-types scripts/bench-collector-queries.ts
+ *   node --experimental-strip-types scripts/bench-collector-queries.ts \
+ *     --sizes 1000,100000 --queries 50
+ */
+
+import {parseArgs} from 'node:util';
+
+import {BoundedBuffer} from '../build/src/collectors/BoundedBuffer.js';
+import {IndexedBuffer} from '../build/src/collectors/IndexedBuffer.js';
+import {
+  getStatusClass,
+  NETWORK_REQUEST_INDEX,
+} from '../build/src/PageCollector.js';
+import {paginate} from '../build/src/utils/pagination.js';
+
+const {values} = parseArgs({
+  options: {
+    sizes: {type: 'string', default: '1000,10000,100000,1000000'},
+    queries: {type: 'string', default: '20'},
+    'page-size': {type: 'string', default: '20'},
+  },
+});
+
+const sizes = values.sizes.split(',').map(Number);
+const queries = Number(values.queries);
+const pageSize = Number(values['page-size']);
+
+const RESOURCE_TYPES = ['script', 'image', 'xhr', 'fetch', 'stylesheet'];
+const HOSTS = Array.from({length: 50}, (_, i) => `host${i}.example.com`);
+
+/**
+ * 只实现索引和过滤用到的 HTTPRequest 方法
+ */
+function request(i: number) {
+  // 约 0.5% 的请求返回 5xx，1% 失败，其余 2xx
+  const status = i % 200 === 7 ? 503 : 200;
+  const failed = i % 100 === 42;
+  const response = failed ? null : {status: () => status};
+  const url = `https://${HOSTS[i % HOSTS.length]}/resource/${i}`;
+  return {
+    url: () => url,
+    resourceType: () => RESOURCE_TYPES[i % RESOURCE_TYPES.length],
+    response: () => response,
+    failure: () => (failed ? {errorText: 'net::ERR_FAILED'} : null),
+  };
+}
+
+type FakeRequest = ReturnType<typeof request>;
+
+interface Scenario {
+  name: string;
+  where: Record<string, string[]>;
+  /** 与 where 等价的逐条判断（改动前的做法） */
+  match: (request: FakeRequest) => boolean;
+}
+
+const scenarios: Scenario[] = [
+  {
+    name: 'type=xhr,fetch',
+    where: {resourceType: ['xhr', 'fetch']},
+    match: r => ['xhr', 'fetch'].includes(r.resourceType()),
+  },
+  {
+    name: 'status=5xx & host',
+    where: {statusClass: ['5xx'], host: [HOSTS[7]]},
+    match: r =>
+      getStatusClass(r as never) === '5xx' &&
+      new URL(r.url()).hostname === HOSTS[7],
+  },
+  {
+    name: 'status=failed',
+    where: {statusClass: ['failed']},
+    match: r => r.failure() !== null,
+  },
+];
+
+function time(fn: () => void): number {
+  const start = performance.now();
+  for (let i = 0; i < queries; i++) {
+    fn();
+  }
+  return (performance.now() - start) / queries;
+}
+
+function format(ms: number): string {
+  return ms < 1 ? `${(ms * 1000).toFixed(1)}µs` : `${ms.toFixed(2)}ms`;
+}
+
+console.log(`queries=${queries} pageSize=${pageSize}`);
+console.log(
+  `${'entries'.padStart(9)}  ${'query'.padEnd(20)}${'legacy page 0'.padStart(15)}${'indexed page 0'.padStart(16)}${'cursor page'.padStart(14)}${'cursor poll'.padStart(14)}`,
+);
+
+for (const size of sizes) {
+  const legacy = new BoundedBuffer<FakeRequest>(size);
+  const indexed = new IndexedBuffer<FakeRequest>(
+    size,
+    NETWORK_REQUEST_INDEX as never,
+  );
+  let next = 0;
+
+  let start = performance.now();
+  for (; next < size; next++) {
+    legacy.push(request(next));
+  }
+  const legacyIngest = (performance.now() - start) / size;
+  start = performance.now();
+  for (let i = 0; i < size; i++) {
+    indexed.push(request(i));
+  }
+  const indexedIngest = (performance.now() - start) / size;
+
+  const push = () => {
+    const item = request(next++);
+    legacy.push(item);
+    indexed.push(item);
+  };
+
+  for (const scenario of scenarios) {
+    const legacyMs = time(() => {
+      push();
+      const matched = legacy.toArray().filter(scenario.match);
+      paginate(matched, {pageSize, pageIdx: 0});
+    });
+    const indexedMs = time(() => {
+      push();
+      indexed.query({where: scenario.where, limit: pageSize});
+    });
+    // 从中间的游标继续翻页
+    const middle = indexed.firstSeq + Math.floor(size / 2);
+    const cursorMs = time(() => {
+      push();
+      indexed.query({where: scenario.where, after: middle, limit: pageSize});
+    });
+    // 轮询新请求：游标指向最新一条
+    const pollMs = time(() => {
+      const cursor = indexed.nextSeq - 1;
+      push();
+      indexed.query({where: scenario.where, after: cursor, limit: pageSize});
+    });
+    console.log(
+      `${size.toLocaleString().padStart(9)}  ${scenario.name.padEnd(20)}${format(legacyMs).padStart(15)}${format(indexedMs).padStart(16)}${format(cursorMs).padStart(14)}${format(pollMs).padStart(14)}`,
+    );
+  }
+  console.log(
+    `${''.padStart(9)}  ingest: legacy ${(legacyIngest * 1e6).toFixed(0)}ns/entry, indexed ${(indexedIngest * 1e6).toFixed(0)}ns/entry`,
+  );
+}
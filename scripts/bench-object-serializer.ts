@@ -0,0 +1,165 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+/**
+ * EnhancedObjectSerializer 基准：每个值的 CDP 消息数与延迟（in-page 对比 properties）
+ *
+ * 用本进程中的真实对象模拟页面：Runtime.getProperties 读取自有属性，
+ * Runtime.callFunctionOn 在本地执行函数声明并按值返回；每条消息增加 --latency-ms 的往返延迟。
+ *
+ * 用法：
+ *   npm run build
+ *   node --experimental-strip-types scripts/bench-object-serializer.ts
+ *   node --experimental-strip-types scripts/bench-object-serializer.ts --latency-ms 5
+ */
+
+import {setTimeout as sleep} from 'node:timers/promises';
+import {parseArgs} from 'node:util';
+
+import {
+  EnhancedObjectSerializer,
+  type SerializerMode,
+} from '../build/src/formatters/EnhancedObjectSerializer.js';
+
+const {values} = parseArgs({
+  options: {
+    'latency-ms': {type: 'string', default: '1'},
+    iterations: {type: 'string', default: '5'},
+  },
+});
+
+const latencyMs = Number(values['latency-ms']);
+const iterations = Number(values.iterations);
+
+interface RemoteObject {
+  type: string;
+  subtype?: string;
+  value?: unknown;
+  description?: string;
+  objectId?: string;
+}
+
+/**
+ * 模拟页面的 CDP 会话，统计收到的消息数
+ */
+class LocalPageSession {
+  messages = 0;
+  #objects = new Map<string, unknown>();
+
+  remote(value: unknown): RemoteObject {
+    if (value === null) {
+      return {type: 'object', subtype: 'null', value: null};
+    }
+    if (typeof value !== 'object' && typeof value !== 'function') {
+      return {type: typeof value, value};
+    }
+    const objectId = String(this.#objects.size + 1);
+    this.#objects.set(objectId, value);
+    if (typeof value === 'function') {
+      return {type: 'function', description: value.toString(), objectId};
+    }
+    if (Array.isArray(value)) {
+      const description = `Array(${value.length})`;
+      return {type: 'object', subtype: 'array', description, objectId};
+    }
+    if (value instanceof Map) {
+      const description = `Map(${value.size})`;
+      return {type: 'object', subtype: 'map', description, objectId};
+    }
+    return {type: 'object', description: 'Object', objectId};
+  }
+
+  async send(
+    method: string,
+    params: {
+      objectId: string;
+      functionDeclaration?: string;
+      arguments?: Array<{value: unknown}>;
+    },
+  ): Promise<unknown> {
+    this.messages++;
+    await sleep(latencyMs);
+    const target = this.#objects.get(params.objectId) as object;
+    if (method === 'Runtime.callFunctionOn') {
+      const fn = new Function(`return (${params.functionDeclaration})`)();
+      const value = fn.apply(
+        target,
+        params.arguments?.map(arg => arg.value),
+      );
+      return {result: {type: 'object', value: structuredClone(value)}};
+    }
+    if (method === 'Runtime.getProperties') {
+      return {
+        result: Object.getOwnPropertyNames(target).map(name => {
+          const descriptor = Object.getOwnPropertyDescriptor(target, name)!;
+          return {
+            name,
+            value:
+              'value' in descriptor ? this.remote(descriptor.value) : undefined,
+          };
+        }),
+      };
+    }
+    return {};
+  }
+}
+
+function tree(depth: number, width: number): Record<string, unknown> {
+  const node: Record<string, unknown> = {id: depth, label: `level ${depth}`};
+  if (depth > 0) {
+    for (let i = 0; i < width; i++) {
+      node[`child${i}`] = tree(depth - 1, width);
+    }
+  }
+  return node;
+}
+
+const samples: Record<string, () => unknown> = {
+  'flat object (20 fields)': () =>
+    Object.fromEntries(Array.from({length: 20}, (_, i) => [`field${i}`, i])),
+  'depth 3 × width 4': () => tree(3, 4),
+  'depth 3 × width 8': () => tree(3, 8),
+  'array of 50 records': () =>
+    Array.from({length: 50}, (_, i) => ({id: i, name: `item ${i}`, ok: true})),
+  'mixed (map, fn, nested)': () => ({
+    lookup: new Map([['a', 1]]),
+    handler: function onMessage(event: unknown) {
+      return event;
+    },
+    nested: {list: [1, 2, {deep: true}]},
+  }),
+};
+
+const modes: SerializerMode[] = ['properties', 'in-page'];
+
+console.log(`latency=${latencyMs}ms per CDP message, iterations=${iterations}`);
+console.log(
+  `${'value'.padEnd(26)}${'mode'.padEnd(12)}${'CDP msgs'.padStart(10)}${'ms/value'.padStart(12)}${'bytes'.padStart(10)}`,
+);
+
+for (const [name, create] of Object.entries(samples)) {
+  for (const mode of modes) {
+    const serializer = new EnhancedObjectSerializer({mode});
+    let messages = 0;
+    let bytes = 0;
+    const start = performance.now();
+    for (let i = 0; i < iterations; i++) {
+      const session = new LocalPageSession();
+      const value = await serializer.serialize(
+        // eslint-disable-next-line @typescript-eslint/no-explicit-any
+        session.remote(create()) as any,
+        // eslint-disable-next-line @typescript-eslint/no-explicit-any
+        session as any,
+      );
+      messages += session.messages;
+      bytes = JSON.stringify(value)?.length ?? 0;
+    }
+    const msPerValue = (performance.now() - start) / iterations;
+    console.log(
+      `${name.padEnd(26)}${mode.padEnd(12)}${(messages / iterations).toFixed(0).padStart(10)}${msPerValue.toFixed(1).padStart(12)}${String(bytes).padStart(10)}`,
+    );
+  }
+}
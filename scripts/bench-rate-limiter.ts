@@ -0,0 +1,185 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+/**
+ * 限流器微基准：对比改动前的时间戳数组滑动窗口与 RateLimiter.ts 中的实现
+ *
+ * Date.now() 被替换为模拟时钟（每次请求前进 --step-us 微秒），
+ * 不需要真实等待就能让窗口保持满载。
+ *
+ * 用法：
+ *   npm run build
+ *   node --experimental-strip-types --expose-gc scripts/bench-rate-limiter.ts
+ *   node --experimental-strip-types --expose-gc scripts/bench-rate-limiter.ts \
+ *     --ops 5000000 --users 100000
+ */
+
+import {parseArgs} from 'node:util';
+
+import {
+  GcraRateLimiter,
+  PerUserRateLimiter,
+  RateLimiter,
+  SlidingWindowRateLimiter,
+  type UserRateLimiter,
+} from '../build/src/multi-tenant/utils/RateLimiter.js';
+
+/**
+ * 改动前的 SlidingWindowRateLimiter：每次请求 filter 一遍时间戳数组
+ */
+class LegacySlidingWindowRateLimiter {
+  private requests: number[] = [];
+  private readonly maxRequests: number;
+  private readonly windowMs: number;
+
+  constructor(maxRequests: number, windowMs: number) {
+    this.maxRequests = maxRequests;
+    this.windowMs = windowMs;
+  }
+
+  tryAcquire(): boolean {
+    const cutoff = Date.now() - this.windowMs;
+    this.requests = this.requests.filter(time => time > cutoff);
+    if (this.requests.length < this.maxRequests) {
+      this.requests.push(Date.now());
+      return true;
+    }
+    return false;
+  }
+
+  isIdle(): boolean {
+    const cutoff = Date.now() - this.windowMs;
+    return this.requests.every(time => time <= cutoff);
+  }
+
+  getStats(): {currentRequests: number} {
+    return {currentRequests: this.requests.length};
+  }
+}
+
+interface Limiter {
+  tryAcquire(): boolean;
+  isIdle(): boolean;
+}
+
+const {values} = parseArgs({
+  options: {
+    ops: {type: 'string', default: '2000000'},
+    'legacy-ops': {type: 'string', default: '200000'},
+    users: {type: 'string', default: '10000'},
+    limit: {type: 'string', default: '1000'},
+    'window-ms': {type: 'string', default: '1000'},
+    'step-us': {type: 'string', default: '500'},
+  },
+});
+
+const ops = Number(values.ops);
+const legacyOps = Number(values['legacy-ops']);
+const users = Number(values.users);
+const limit = Number(values.limit);
+const windowMs = Number(values['window-ms']);
+const stepMs = Number(values['step-us']) / 1000;
+
+let now = 1_000_000;
+Date.now = () => Math.floor(now);
+
+const factories: Record<string, () => Limiter> = {
+  'legacy sliding window': () =>
+    new LegacySlidingWindowRateLimiter(limit, windowMs),
+  'bucketed sliding window': () =>
+    new SlidingWindowRateLimiter(limit, windowMs),
+  'token bucket': () =>
+    new RateLimiter({maxTokens: limit, refillRate: (limit * 1000) / windowMs}),
+  GCRA: () =>
+    new GcraRateLimiter({
+      burst: limit,
+      ratePerSecond: (limit * 1000) / windowMs,
+    }),
+};
+
+function heapUsed(): number {
+  globalThis.gc?.();
+  return process.memoryUsage().heapUsed;
+}
+
+function report(
+  name: string,
+  count: number,
+  elapsedMs: number,
+  allowed: number,
+  extra = '',
+): void {
+  const nsPerOp = ((elapsedMs * 1e6) / count).toFixed(1).padStart(10);
+  const opsPerSec = Math.round((count / elapsedMs) * 1000)
+    .toLocaleString()
+    .padStart(14);
+  const allowedPct = ((allowed / count) * 100).toFixed(1).padStart(6);
+  console.log(
+    `${name.padEnd(26)}${nsPerOp} ns/op${opsPerSec} op/s${allowedPct}% allowed${extra}`,
+  );
+}
+
+/**
+ * 单个 key：窗口保持满载（每 stepMs 一个请求）
+ */
+function benchSingleKey(name: string, create: () => Limiter): void {
+  const count = name.startsWith('legacy') ? legacyOps : ops;
+  const limiter = create();
+  let allowed = 0;
+  const start = performance.now();
+  for (let i = 0; i < count; i++) {
+    now += stepMs;
+    if (limiter.tryAcquire()) {
+      allowed++;
+    }
+  }
+  report(name, count, performance.now() - start, allowed);
+}
+
+/**
+ * 多个 key：通过 PerUserRateLimiter 轮流访问 users 个用户
+ */
+function benchManyKeys(name: string, create: () => Limiter): void {
+  const count = name.startsWith('legacy') ? legacyOps : ops;
+  const userIds = Array.from({length: users}, (_, i) => `user-${i}`);
+  const before = heapUsed();
+  const limiter = new PerUserRateLimiter(create as () => UserRateLimiter);
+  let allowed = 0;
+  const start = performance.now();
+  for (let i = 0; i < count; i++) {
+    now += stepMs / users;
+    if (limiter.tryAcquire(userIds[i % users])) {
+      allowed++;
+    }
+  }
+  const elapsed = performance.now() - start;
+  const bytesPerUser = (heapUsed() - before) / users;
+  limiter.stop();
+  report(
+    name,
+    count,
+    elapsed,
+    allowed,
+    `${Math.round(bytesPerUser).toLocaleString().padStart(10)} B/user`,
+  );
+}
+
+console.log(
+  `limit=${limit} window=${windowMs}ms step=${stepMs}ms ops=${ops} legacy-ops=${legacyOps}`,
+);
+if (!globalThis.gc) {
+  console.log('（未使用 --expose-gc，内存数据不准确）');
+}
+
+console.log('\n单个 key');
+for (const [name, create] of Object.entries(factories)) {
+  benchSingleKey(name, create);
+}
+
+console.log(`\n${users} 个用户（PerUserRateLimiter）`);
+for (const [name, create] of Object.entries(factories)) {
+  benchManyKeys(name, create);
+}
@@ -23,8 +23,15 @@ import type {
 import {CDPSessionManager} from './cdp/CDPSessionManager.js';
 import {CdpOperations} from './CdpOperations.js';
 import {CdpTargetManager} from './CdpTargetManager.js';
+import {CollectorBudget} from './collectors/BoundedBuffer.js';
 import {EnhancedConsoleCollector} from './collectors/EnhancedConsoleCollector.js';
+import type {
+  BufferQuery,
+  BufferQueryResult,
+} from './collectors/IndexedBuffer.js';
+import {getCollectorLimits} from './config/CollectorLimits.js';
 import {ExtensionHelper} from './extension/ExtensionHelper.js';
+import type {UrlMatcher} from './extension/ExtensionMetadataCache.js';
 import type {
   ExtensionContext,
   ExtensionInfo,
@@ -36,7 +43,12 @@ import {listPages} from './tools/pages.js';
 import {takeSnapshot} from './tools/snapshot.js';
 import {CLOSE_PAGE_ERROR} from './tools/ToolDefinition.js';
 import type {Context} from './tools/ToolDefinition.js';
-import type {TraceResult} from './trace-processing/parse.js';
+import type {RecordedTrace} from './trace-processing/TraceWorkerPool.js';
+import {
+  indexSnapshot,
+  reconcileSnapshot,
+  type TextSnapshotDiff,
+} from './utils/snapshotDiff.js';
 import {WaitForHelper} from './WaitForHelper.js';
 
 export interface TextSnapshotNode extends SerializedAXNode {
@@ -91,6 +103,9 @@ export class McpContext implements Context {
   #selectedPageIdx = 0;
   // The most recent snapshot.
   #textSnapshot: TextSnapshot | null = null;
+  // 每个页面最近一次的快照，用于增量快照
+  #textSnapshotCache = new WeakMap<Page, TextSnapshot>();
+  #textSnapshotDiff: TextSnapshotDiff | null = null;
   #networkCollector: NetworkCollector;
   #consoleCollector: PageCollector<ConsoleMessage | Error>;
 
@@ -100,7 +115,7 @@ export class McpContext implements Context {
   #dialog?: Dialog;
 
   #nextSnapshotId = 1;
-  #traceResults: TraceResult[] = [];
+  #traceResults: RecordedTrace[] = [];
 
   // Extension helper for extension debugging functionality
   #extensionHelper: ExtensionHelper;
@@ -116,6 +131,8 @@ export class McpContext implements Context {
   // CDP Session Manager for enhanced logging
   #cdpSessionManager: CDPSessionManager;
   #enhancedConsoleCollectors = new WeakMap<Page, EnhancedConsoleCollector>();
+  // 所有页面的增强日志共享一个总条数上限
+  #enhancedConsoleBudget = new CollectorBudget(getCollectorLimits().maxTotal);
 
   private constructor(browser: Browser, logger: Debugger) {
     this.browser = browser;
@@ -171,9 +188,14 @@ export class McpContext implements Context {
       }
 
       const cdpSession = await this.#cdpSessionManager.getOrCreateSession(page);
-      const collector = new EnhancedConsoleCollector();
+      const collector = new EnhancedConsoleCollector({
+        budget: this.#enhancedConsoleBudget,
+      });
       await collector.init(page, cdpSession);
       this.#enhancedConsoleCollectors.set(page, collector);
+      page.on('close', () => {
+        collector.dispose();
+      });
 
       // 监听页面导航，清空旧日志
       page.on('framenavigated', async frame => {
@@ -417,11 +439,51 @@ export class McpContext implements Context {
     return this.#networkCollector.getData(page);
   }
 
+  /**
+   * 用索引查询选中页面的网络请求（按资源类型、状态类别、主机名、时间和游标过滤）
+   */
+  queryNetworkRequests(query: BufferQuery): BufferQueryResult<HTTPRequest> {
+    const page = this.getSelectedPage();
+    return this.#networkCollector.query(page, query);
+  }
+
   getConsoleData(): Array<ConsoleMessage | Error> {
     const page = this.getSelectedPage();
     return this.#consoleCollector.getData(page);
   }
 
+  /**
+   * 选中页面因容量上限被淘汰的网络请求数
+   */
+  getNetworkRequestsDropped(): number {
+    return this.#networkCollector.getDroppedCount(this.getSelectedPage());
+  }
+
+  /**
+   * 选中页面因容量上限被淘汰的控制台消息数
+   */
+  getConsoleDataDropped(): number {
+    return this.#consoleCollector.getDroppedCount(this.getSelectedPage());
+  }
+
+  /**
+   * 各收集器的容量和占用情况
+   */
+  getCollectorStats() {
+    const describe = (budget: CollectorBudget) => ({
+      total: budget.total,
+      maxTotal: budget.maxTotal,
+      dropped: budget.dropped,
+      pages: budget.bufferCount,
+    });
+    return {
+      maxPerPage: this.#networkCollector.maxPerPage,
+      network: describe(this.#networkCollector.budget),
+      console: describe(this.#consoleCollector.budget),
+      enhancedConsole: describe(this.#enhancedConsoleBudget),
+    };
+  }
+
   async newPage(): Promise<Page> {
     let page: Page;
 
@@ -584,16 +646,15 @@ export class McpContext implements Context {
         `No snapshot found. Use ${takeSnapshot.name} to capture one.`,
       );
     }
-    const [snapshotId] = uid.split('_');
-
-    if (this.#textSnapshot.snapshotId !== snapshotId) {
-      throw new Error(
-        'This uid is coming from a stale snapshot. Call take_snapshot to get a fresh snapshot.',
-      );
-    }
-
-    const node = this.#textSnapshot?.idToNode.get(uid);
+    // 增量快照会沿用旧快照的 uid，所以先按 uid 查找，再判断是否过期
+    const node = this.#textSnapshot.idToNode.get(uid);
     if (!node) {
+      const [snapshotId] = uid.split('_');
+      if (this.#textSnapshot.snapshotId !== snapshotId) {
+        throw new Error(
+          'This uid is coming from a stale snapshot. Call take_snapshot to get a fresh snapshot.',
+        );
+      }
       throw new Error('No such element found in the snapshot');
     }
     const handle = await node.elementHandle();
@@ -607,7 +668,14 @@ export class McpContext implements Context {
    * Creates a snapshot of the pages.
    */
   async createPagesSnapshot(): Promise<Page[]> {
+    const selected = this.#pages[this.#selectedPageIdx];
     this.#pages = await this.browser.pages();
+    // 页面在快照之间打开或关闭后下标会移动：选中的页面仍然打开时按对象重新定位，
+    // 避免其它调用持锁期间选中页变成另一个页面
+    const idx = selected ? this.#pages.indexOf(selected) : -1;
+    if (idx !== -1) {
+      this.#selectedPageIdx = idx;
+    }
     return this.#pages;
   }
 
@@ -617,9 +685,22 @@ export class McpContext implements Context {
 
   /**
    * Creates a text snapshot of a page.
+   *
+   * With `incremental`, the snapshot is reconciled against the previous
+   * snapshot of the same page: unchanged elements keep their uids and the
+   * difference is available from getTextSnapshotDiff(). The accessibility
+   * tree is always queried: DOM mutation tracking misses changes inside
+   * shadow roots and state set by script (for example `input.checked`).
    */
-  async createTextSnapshot(): Promise<void> {
+  async createTextSnapshot(
+    options: {incremental?: boolean} = {},
+  ): Promise<void> {
     const page = this.getSelectedPage();
+    const previous = options.incremental
+      ? this.#textSnapshotCache.get(page)
+      : undefined;
+    this.#textSnapshotDiff = null;
+
     const rootNode = await page.accessibility.snapshot({
       includeIframes: true,
     });
@@ -650,6 +731,25 @@ export class McpContext implements Context {
       snapshotId: String(snapshotId),
       idToNode,
     };
+    if (previous) {
+      this.#textSnapshotDiff = reconcileSnapshot(
+        previous.root,
+        rootNodeWithId,
+        previous.snapshotId,
+      );
+      if (this.#textSnapshotDiff) {
+        this.#textSnapshot.idToNode = indexSnapshot(rootNodeWithId);
+      }
+    }
+    this.#textSnapshotCache.set(page, this.#textSnapshot);
+  }
+
+  /**
+   * The difference between the last incremental snapshot and the previous
+   * snapshot of the same page, or null if the last snapshot was a full one.
+   */
+  getTextSnapshotDiff(): TextSnapshotDiff | null {
+    return this.#textSnapshotDiff;
   }
 
   getTextSnapshot(): TextSnapshot | null {
@@ -690,11 +790,11 @@ export class McpContext implements Context {
     }
   }
 
-  storeTraceRecording(result: TraceResult): void {
-    this.#traceResults.push(result);
+  storeTraceRecording(trace: RecordedTrace): void {
+    this.#traceResults.push(trace);
   }
 
-  recordedTraces(): TraceResult[] {
+  recordedTraces(): RecordedTrace[] {
     return this.#traceResults;
   }
 
@@ -745,6 +845,23 @@ export class McpContext implements Context {
     return this.#extensionHelper.getExtensionDetails(extensionId);
   }
 
+  /**
+   * Get a compiled content script match pattern (cached per extension version)
+   */
+  getExtensionMatchPattern(
+    extension: ExtensionInfo,
+    pattern: string,
+  ): UrlMatcher {
+    return this.#extensionHelper.getMatchPattern(extension, pattern);
+  }
+
+  /**
+   * Drop cached manifest, match patterns and extension list after a reload
+   */
+  invalidateExtensionCache(extensionId: string): void {
+    this.#extensionHelper.invalidateExtension(extensionId);
+  }
+
   /**
    * Get all contexts for an extension
    */
@@ -1015,6 +1132,15 @@ export class McpContext implements Context {
       }
     }
 
+    // 分离扩展 target 的 session 池
+    this.#extensionHelper.dispose();
+
+    // 释放解析 worker 中保留的 trace
+    for (const trace of this.#traceResults) {
+      trace.release();
+    }
+    this.#traceResults = [];
+
     this.logger('McpContext resources disposed');
   }
 }
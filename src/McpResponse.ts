@@ -7,7 +7,6 @@ import type {
   ImageContent,
   TextContent,
 } from '@modelcontextprotocol/sdk/types.js';
-import type {ResourceType} from 'puppeteer-core';
 
 import {formatConsoleEvent} from './formatters/consoleFormatter.js';
 import {
@@ -17,11 +16,35 @@ import {
   getShortDescriptionForRequest,
   getStatusFromRequest,
 } from './formatters/networkFormatter.js';
-import {formatA11ySnapshot} from './formatters/snapshotFormatter.js';
+import {
+  formatA11ySnapshotDiff,
+  formatA11ySnapshotLines,
+} from './formatters/snapshotFormatter.js';
 import type {McpContext} from './McpContext.js';
 import {handleDialog} from './tools/pages.js';
-import type {ImageContentData, Response} from './tools/ToolDefinition.js';
-import {paginate, type PaginationOptions} from './utils/pagination.js';
+import type {
+  ImageContentData,
+  NetworkRequestsOptions,
+  Response,
+} from './tools/ToolDefinition.js';
+import {
+  decodeCursor,
+  DEFAULT_PAGE_SIZE,
+  encodeCursor,
+  paginate,
+  type PaginationOptions,
+} from './utils/pagination.js';
+
+/**
+ * Where McpResponse.handleStreaming() writes the text of large responses.
+ */
+export interface ResponseStream {
+  // Responses shorter than this (in characters) are not streamed.
+  threshold: number;
+  chunkSize: number;
+  // `sent` is the number of characters written so far, including `chunk`.
+  write(chunk: string, sent: number): Promise<void>;
+}
 
 interface NetworkRequestData {
   networkRequestUrl: string;
@@ -32,6 +55,7 @@ interface NetworkRequestData {
 export class McpResponse implements Response {
   #includePages = false;
   #includeSnapshot = false;
+  #incrementalSnapshot = false;
   #attachedNetworkRequestData?: NetworkRequestData;
   #includeConsoleData = false;
   #textResponseLines: string[] = [];
@@ -40,24 +64,25 @@ export class McpResponse implements Response {
   #networkRequestsOptions?: {
     include: boolean;
     pagination?: PaginationOptions;
-    resourceTypes?: ResourceType[];
+    resourceTypes?: string[];
+    statusClasses?: string[];
+    hosts?: string[];
+    since?: number;
+    cursor?: string;
   };
 
   setIncludePages(value: boolean): void {
     this.#includePages = value;
   }
 
-  setIncludeSnapshot(value: boolean): void {
+  setIncludeSnapshot(value: boolean, options?: {incremental?: boolean}): void {
     this.#includeSnapshot = value;
+    this.#incrementalSnapshot = options?.incremental ?? false;
   }
 
   setIncludeNetworkRequests(
     value: boolean,
-    options?: {
-      pageSize?: number;
-      pageIdx?: number;
-      resourceTypes?: ResourceType[];
-    },
+    options?: NetworkRequestsOptions,
   ): void {
     if (!value) {
       this.#networkRequestsOptions = undefined;
@@ -74,6 +99,10 @@ export class McpResponse implements Response {
             }
           : undefined,
       resourceTypes: options?.resourceTypes,
+      statusClasses: options?.statusClasses,
+      hosts: options?.hosts?.map(host => host.toLowerCase()),
+      since: options?.since,
+      cursor: options?.cursor,
     };
   }
 
@@ -129,11 +158,18 @@ export class McpResponse implements Response {
     toolName: string,
     context: McpContext,
   ): Promise<Array<TextContent | ImageContent>> {
+    await this.#prepare(context);
+    return this.format(toolName, context);
+  }
+
+  async #prepare(context: McpContext): Promise<void> {
     if (this.#includePages) {
       await context.createPagesSnapshot();
     }
     if (this.#includeSnapshot) {
-      await context.createTextSnapshot();
+      await context.createTextSnapshot({
+        incremental: this.#incrementalSnapshot,
+      });
     }
 
     let formattedConsoleMessages: string[];
@@ -162,115 +198,246 @@ export class McpResponse implements Response {
         this.#formattedConsoleData = formattedConsoleMessages;
       }
     }
-
-    return this.format(toolName, context);
   }
 
   format(
     toolName: string,
     context: McpContext,
   ): Array<TextContent | ImageContent> {
-    const response = [`# ${toolName} response`];
-    for (const line of this.#textResponseLines) {
-      response.push(line);
+    const text: TextContent = {
+      type: 'text',
+      text: [...this.#formatText(toolName, context)].join(''),
+    };
+    return [text, ...this.#formatImages()];
+  }
+
+  /**
+   * Formats the response while streaming the text to `stream`.
+   *
+   * Small responses (below `stream.threshold` characters) are returned as
+   * usual. Larger ones are written in chunks of about `stream.chunkSize`
+   * characters as they are formatted, so the full text is never held in
+   * memory, and the returned text content only summarizes what was sent.
+   */
+  async handleStreaming(
+    toolName: string,
+    context: McpContext,
+    stream: ResponseStream,
+  ): Promise<Array<TextContent | ImageContent>> {
+    await this.#prepare(context);
+
+    let buffered: string[] = [];
+    let bufferedLength = 0;
+    let sent = 0;
+    let chunks = 0;
+    let streaming = false;
+    const flush = async (all: boolean) => {
+      let pending = buffered.join('');
+      buffered = [];
+      while (pending.length >= stream.chunkSize || (all && pending.length)) {
+        let end = Math.min(stream.chunkSize, pending.length);
+        // 不要把 UTF-16 代理对拆到两个分块里
+        const last = pending.charCodeAt(end - 1);
+        if (last >= 0xd800 && last <= 0xdbff) {
+          if (end === pending.length && !all) {
+            // 低位代理还没有格式化出来，留到下一次
+            break;
+          }
+          if (end < pending.length) {
+            // chunkSize 为 1 时不能后退，整个代理对放进同一个分块
+            end += end > 1 ? -1 : 1;
+          }
+        }
+        const chunk = pending.slice(0, end);
+        pending = pending.slice(chunk.length);
+        sent += chunk.length;
+        chunks++;
+        await stream.write(chunk, sent);
+      }
+      if (pending) {
+        buffered.push(pending);
+      }
+      bufferedLength = pending.length;
+    };
+
+    for (const piece of this.#formatText(toolName, context)) {
+      buffered.push(piece);
+      bufferedLength += piece.length;
+      if (!streaming && bufferedLength < stream.threshold) {
+        continue;
+      }
+      streaming = true;
+      if (bufferedLength >= stream.chunkSize) {
+        await flush(false);
+      }
+    }
+
+    if (!streaming) {
+      const text: TextContent = {type: 'text', text: buffered.join('')};
+      return [text, ...this.#formatImages()];
+    }
+    await flush(true);
+    const text: TextContent = {
+      type: 'text',
+      text: `# ${toolName} response\nStreamed ${sent} characters in ${chunks} progress notifications.`,
+    };
+    return [text, ...this.#formatImages()];
+  }
+
+  #formatImages(): ImageContent[] {
+    return this.#images.map(imageData => {
+      return {
+        type: 'image',
+        ...imageData,
+      } as const;
+    });
+  }
+
+  /**
+   * The response text as a sequence of pieces; joined, they form the text
+   * content of the response.
+   */
+  *#formatText(toolName: string, context: McpContext): Generator<string> {
+    let first = true;
+    for (const part of this.#formatParts(toolName, context)) {
+      if (!first) {
+        yield '\n';
+      }
+      first = false;
+      if (typeof part === 'string') {
+        yield part;
+      } else {
+        yield* part;
+      }
     }
+  }
+
+  /**
+   * The response lines. A line given as an iterable is produced piece by
+   * piece (e.g. one snapshot node at a time).
+   */
+  *#formatParts(
+    toolName: string,
+    context: McpContext,
+  ): Generator<string | Iterable<string>> {
+    yield `# ${toolName} response`;
+    yield* this.#textResponseLines;
 
     const networkConditions = context.getNetworkConditions();
     if (networkConditions) {
-      response.push(`## Network emulation`);
-      response.push(`Emulating: ${networkConditions}`);
-      response.push(
-        `Default navigation timeout set to ${context.getNavigationTimeout()} ms`,
-      );
+      yield `## Network emulation`;
+      yield `Emulating: ${networkConditions}`;
+      yield `Default navigation timeout set to ${context.getNavigationTimeout()} ms`;
     }
 
     const cpuThrottlingRate = context.getCpuThrottlingRate();
     if (cpuThrottlingRate > 1) {
-      response.push(`## CPU emulation`);
-      response.push(`Emulating: ${cpuThrottlingRate}x slowdown`);
+      yield `## CPU emulation`;
+      yield `Emulating: ${cpuThrottlingRate}x slowdown`;
     }
 
     const dialog = context.getDialog();
     if (dialog) {
-      response.push(`# Open dialog
+      yield `# Open dialog
 ${dialog.type()}: ${dialog.message()} (default value: ${dialog.message()}).
-Call ${handleDialog.name} to handle it before continuing.`);
+Call ${handleDialog.name} to handle it before continuing.`;
     }
 
     if (this.#includePages) {
-      const parts = [`## Pages`];
+      yield `## Pages`;
       let idx = 0;
       for (const page of context.getPages()) {
-        parts.push(
-          `${idx}: ${page.url()}${idx === context.getSelectedPageIdx() ? ' [selected]' : ''}`,
-        );
+        yield `${idx}: ${page.url()}${idx === context.getSelectedPageIdx() ? ' [selected]' : ''}`;
         idx++;
       }
-      response.push(...parts);
     }
 
     if (this.#includeSnapshot) {
       const snapshot = context.getTextSnapshot();
-      if (snapshot) {
-        const formattedSnapshot = formatA11ySnapshot(snapshot.root);
-        response.push('## Page content');
-        response.push(formattedSnapshot);
+      const diff = this.#incrementalSnapshot
+        ? context.getTextSnapshotDiff()
+        : null;
+      // 大部分节点都变了时，完整快照比差异更容易阅读
+      if (snapshot && diff && diff.size <= snapshot.idToNode.size / 2) {
+        yield '## Page content changes';
+        yield formatA11ySnapshotDiff(diff, snapshot.snapshotId);
+      } else if (snapshot) {
+        yield '## Page content';
+        yield formatA11ySnapshotLines(snapshot.root);
       }
     }
 
-    response.push(...this.#getIncludeNetworkRequestsData(context));
+    yield* this.#getIncludeNetworkRequestsData(context);
 
     if (this.#networkRequestsOptions?.include) {
-      let requests = context.getNetworkRequests();
-
-      // Apply resource type filtering if specified
-      if (this.#networkRequestsOptions.resourceTypes?.length) {
-        const normalizedTypes = new Set(
-          this.#networkRequestsOptions.resourceTypes,
-        );
-        requests = requests.filter(request => {
-          const type = request.resourceType();
-          return normalizedTypes.has(type);
-        });
+      const {pagination, cursor, since} = this.#networkRequestsOptions;
+      // 过滤走收集器的索引，不再扫描整页的请求
+      const query = {
+        where: {
+          resourceType: this.#networkRequestsOptions.resourceTypes,
+          statusClass: this.#networkRequestsOptions.statusClasses,
+          host: this.#networkRequestsOptions.hosts,
+        },
+        since,
+      };
+
+      yield '## Network requests';
+      const dropped = context.getNetworkRequestsDropped();
+      if (dropped > 0) {
+        yield `${dropped} older requests were dropped (collector limit reached).`;
       }
-
-      response.push('## Network requests');
-      if (requests.length) {
-        const data = this.#dataWithPagination(
-          requests,
-          this.#networkRequestsOptions.pagination,
-        );
-        response.push(...data.info);
-        const pageIdx = context.getSelectedPageIdx();
-        for (const request of data.items) {
-          response.push(getShortDescriptionForRequest(request, pageIdx));
+      const pageIdx = context.getSelectedPageIdx();
+      if (cursor !== undefined) {
+        const after = decodeCursor(cursor);
+        if (after === undefined) {
+          yield 'Invalid cursor provided. Showing first page.';
+        }
+        const result = context.queryNetworkRequests({
+          ...query,
+          after,
+          limit: pagination?.pageSize ?? DEFAULT_PAGE_SIZE,
+        });
+        if (result.items.length) {
+          yield `Showing ${result.items.length} requests after the cursor.`;
+          for (const request of result.items) {
+            yield getShortDescriptionForRequest(request, pageIdx);
+          }
+        } else {
+          yield 'No requests found after the cursor.';
+        }
+        const last = result.seqs.at(-1) ?? after;
+        if (last !== undefined) {
+          yield `Next cursor: ${encodeCursor(last)}${result.hasMore ? '' : ' (no more requests yet)'}`;
         }
       } else {
-        response.push('No requests found.');
+        const {items: requests, seqs} = context.queryNetworkRequests(query);
+        if (requests.length) {
+          const data = this.#dataWithPagination(requests, pagination);
+          yield* data.info;
+          for (const request of data.items) {
+            yield getShortDescriptionForRequest(request, pageIdx);
+          }
+          if (data.hasNextPage) {
+            yield `Next cursor: ${encodeCursor(seqs[data.endIndex - 1])}`;
+          }
+        } else {
+          yield 'No requests found.';
+        }
       }
     }
 
     if (this.#includeConsoleData && this.#formattedConsoleData) {
-      response.push('## Console messages');
+      yield '## Console messages';
+      const dropped = context.getConsoleDataDropped();
+      if (dropped > 0) {
+        yield `${dropped} older messages were dropped (collector limit reached).`;
+      }
       if (this.#formattedConsoleData.length) {
-        response.push(...this.#formattedConsoleData);
+        yield* this.#formattedConsoleData;
       } else {
-        response.push('<no console messages found>');
+        yield '<no console messages found>';
       }
     }
-
-    const text: TextContent = {
-      type: 'text',
-      text: response.join('\n'),
-    };
-    const images: ImageContent[] = this.#images.map(imageData => {
-      return {
-        type: 'image',
-        ...imageData,
-      } as const;
-    });
-
-    return [text, ...images];
   }
 
   #dataWithPagination<T>(data: T[], pagination?: PaginationOptions) {
@@ -296,6 +463,8 @@ Call ${handleDialog.name} to handle it before continuing.`);
     return {
       info: response,
       items: paginationResult.items,
+      hasNextPage: paginationResult.hasNextPage,
+      endIndex: paginationResult.endIndex,
     };
   }
 
@@ -39,3 +39,97 @@ export class Mutex {
     resolve();
   }
 }
+
+/**
+ * 读写锁：共享持有者可以并发，独占持有者与其它任何持有者互斥。
+ *
+ * 与 Mutex 一样按 FIFO 授予：排在独占请求之后的共享请求不会插队，
+ * 因此持续的只读请求不会让写请求饿死。
+ */
+export class ReadWriteMutex {
+  static Guard = class Guard {
+    #release: () => void;
+    #released = false;
+    constructor(release: () => void) {
+      this.#release = release;
+    }
+    dispose(): void {
+      if (this.#released) {
+        return;
+      }
+      this.#released = true;
+      this.#release();
+    }
+  };
+
+  #readers = 0;
+  #writer = false;
+  #waiters: Array<{shared: boolean; resolve: () => void}> = [];
+
+  /**
+   * 独占获取（与 Mutex.acquire 语义相同）
+   */
+  async acquire(): Promise<InstanceType<typeof ReadWriteMutex.Guard>> {
+    await this.#enqueue(false);
+    return new ReadWriteMutex.Guard(() => this.#releaseExclusive());
+  }
+
+  /**
+   * 共享获取：可以与其它共享持有者同时运行
+   */
+  async acquireShared(): Promise<InstanceType<typeof ReadWriteMutex.Guard>> {
+    await this.#enqueue(true);
+    return new ReadWriteMutex.Guard(() => this.#releaseShared());
+  }
+
+  get readers(): number {
+    return this.#readers;
+  }
+
+  get locked(): boolean {
+    return this.#writer || this.#readers > 0;
+  }
+
+  #enqueue(shared: boolean): Promise<void> {
+    if (this.#waiters.length === 0 && this.#canGrant(shared)) {
+      this.#grant(shared);
+      return Promise.resolve();
+    }
+    const {resolve, promise} = Promise.withResolvers<void>();
+    this.#waiters.push({shared, resolve});
+    return promise;
+  }
+
+  #canGrant(shared: boolean): boolean {
+    return shared ? !this.#writer : !this.#writer && this.#readers === 0;
+  }
+
+  #grant(shared: boolean): void {
+    if (shared) {
+      this.#readers++;
+    } else {
+      this.#writer = true;
+    }
+  }
+
+  #releaseShared(): void {
+    this.#readers--;
+    this.#drain();
+  }
+
+  #releaseExclusive(): void {
+    this.#writer = false;
+    this.#drain();
+  }
+
+  #drain(): void {
+    while (
+      this.#waiters.length > 0 &&
+      this.#canGrant(this.#waiters[0].shared)
+    ) {
+      const waiter = this.#waiters.shift()!;
+      this.#grant(waiter.shared);
+      waiter.resolve();
+    }
+  }
+}
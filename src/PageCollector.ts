@@ -6,22 +6,48 @@
 
 import type {Browser, HTTPRequest, Page} from 'puppeteer-core';
 
+import {CollectorBudget} from './collectors/BoundedBuffer.js';
+import {
+  IndexedBuffer,
+  type BufferIndexSpec,
+  type BufferQuery,
+  type BufferQueryResult,
+} from './collectors/IndexedBuffer.js';
+import {getCollectorLimits} from './config/CollectorLimits.js';
+
+export interface PageCollectorOptions<T> {
+  /** Maximum entries kept per page; the oldest entries are evicted first. */
+  maxPerPage?: number;
+  /** Budget shared by all pages of this collector (or several collectors). */
+  budget?: CollectorBudget;
+  /** Secondary indexes maintained for each page, see query(). */
+  index?: BufferIndexSpec<T>;
+}
+
 export class PageCollector<T> {
   #browser: Browser;
   #initializer: (page: Page, collector: (item: T) => void) => void;
+  #maxPerPage: number;
+  #budget: CollectorBudget;
+  #index: BufferIndexSpec<T>;
   /**
-   * The Array in this map should only be set once
-   * As we use the reference to it.
-   * Use methods that manipulate the array in place.
+   * The buffer in this map should only be set once
+   * As the page listeners keep a reference to it.
+   * Use methods that manipulate the buffer in place.
    */
-  protected storage = new WeakMap<Page, T[]>();
+  protected storage = new WeakMap<Page, IndexedBuffer<T>>();
 
   constructor(
     browser: Browser,
     initializer: (page: Page, collector: (item: T) => void) => void,
+    options: PageCollectorOptions<T> = {},
   ) {
+    const limits = getCollectorLimits();
     this.#browser = browser;
     this.#initializer = initializer;
+    this.#maxPerPage = options.maxPerPage ?? limits.maxPerPage;
+    this.#budget = options.budget ?? new CollectorBudget(limits.maxTotal);
+    this.#index = options.index ?? {keys: {}};
   }
 
   async init() {
@@ -48,7 +74,11 @@ export class PageCollector<T> {
       return;
     }
 
-    const stored: T[] = [];
+    const stored = new IndexedBuffer<T>(
+      this.#maxPerPage,
+      this.#index,
+      this.#budget,
+    );
     this.storage.set(page, stored);
 
     page.on('framenavigated', frame => {
@@ -58,38 +88,117 @@ export class PageCollector<T> {
       }
       this.cleanup(page);
     });
+    page.on('close', () => {
+      // Release the page's share of the global budget
+      stored.detach();
+    });
     this.#initializer(page, value => {
       stored.push(value);
     });
   }
 
   protected cleanup(page: Page) {
-    const collection = this.storage.get(page);
-    if (collection) {
-      // Keep the reference alive
-      collection.length = 0;
-    }
+    // Keep the buffer alive, the listeners reference it
+    this.storage.get(page)?.clear();
   }
 
+  /**
+   * Entries in insertion order. The array is shared until the next change,
+   * do not modify it.
+   */
   getData(page: Page): T[] {
-    return this.storage.get(page) ?? [];
+    return this.storage.get(page)?.toArray() ?? [];
+  }
+
+  /**
+   * Entries matching the query, in insertion order. Uses the indexes given in
+   * the options instead of scanning every entry of the page.
+   */
+  query(page: Page, query: BufferQuery = {}): BufferQueryResult<T> {
+    return (
+      this.storage.get(page)?.query(query) ?? {
+        items: [],
+        seqs: [],
+        hasMore: false,
+      }
+    );
+  }
+
+  /**
+   * Number of entries evicted for the page since its last navigation.
+   */
+  getDroppedCount(page: Page): number {
+    return this.storage.get(page)?.dropped ?? 0;
+  }
+
+  get budget(): CollectorBudget {
+    return this.#budget;
+  }
+
+  get maxPerPage(): number {
+    return this.#maxPerPage;
+  }
+}
+
+/**
+ * Status class of a finished request (`2xx`, `4xx`, ... or `failed`),
+ * undefined while the request is pending.
+ */
+export function getStatusClass(request: HTTPRequest): string | undefined {
+  const response = request.response();
+  if (response) {
+    return `${Math.floor(response.status() / 100)}xx`;
   }
+  return request.failure() ? 'failed' : undefined;
 }
 
+function getHost(request: HTTPRequest): string | undefined {
+  try {
+    return new URL(request.url()).hostname || undefined;
+  } catch {
+    return undefined;
+  }
+}
+
+/**
+ * Indexes of the network collector. The status class is only known once the
+ * response arrives, so it is indexed late.
+ */
+export const NETWORK_REQUEST_INDEX: BufferIndexSpec<HTTPRequest> = {
+  keys: {
+    resourceType: request => request.resourceType(),
+    statusClass: getStatusClass,
+    host: getHost,
+  },
+  lateKeys: ['statusClass'],
+};
+
 export class NetworkCollector extends PageCollector<HTTPRequest> {
+  constructor(
+    browser: Browser,
+    initializer: (page: Page, collector: (item: HTTPRequest) => void) => void,
+    options: PageCollectorOptions<HTTPRequest> = {},
+  ) {
+    super(browser, initializer, {index: NETWORK_REQUEST_INDEX, ...options});
+  }
+
   override cleanup(page: Page) {
-    const requests = this.storage.get(page) ?? [];
+    const requests = this.storage.get(page);
     if (!requests) {
       return;
     }
-    const lastRequestIdx = requests.findLastIndex(request => {
+    const lastRequestIdx = requests.toArray().findLastIndex(request => {
       return request.frame() === page.mainFrame()
         ? request.isNavigationRequest()
         : false;
     });
+    if (lastRequestIdx === -1) {
+      return;
+    }
     // Keep all requests since the last navigation request including that
-    // navigation request itself.
-    // Keep the reference
-    requests.splice(0, Math.max(lastRequestIdx, 0));
+    // navigation request itself. Evicted entries are older than it, so they
+    // belonged to the previous document.
+    requests.trimStart(lastRequestIdx);
+    requests.resetDropped();
   }
 }
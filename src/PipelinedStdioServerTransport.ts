@@ -0,0 +1,217 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+import process from 'node:process';
+import type {Readable, Writable} from 'node:stream';
+
+import type {Transport} from '@modelcontextprotocol/sdk/shared/transport.js';
+import type {
+  JSONRPCMessage,
+  RequestId,
+} from '@modelcontextprotocol/sdk/types.js';
+import {JSONRPCMessageSchema} from '@modelcontextprotocol/sdk/types.js';
+
+/**
+ * 支持流水线和批量请求的 stdio 传输
+ *
+ * 与 SDK 的 StdioServerTransport 一样按行读取 JSON-RPC 消息，区别在于：
+ * - 每一行解析后立即交给协议层处理，不等待之前的请求完成；响应在各自的
+ *   处理函数完成时写出，因此可以乱序返回（客户端按 id 关联）
+ * - 支持 JSON-RPC 2.0 批量请求：一行是一个数组时，数组中的请求同时分发，
+ *   所有响应收齐后作为一个数组写回；只包含通知的批量请求不产生输出
+ * - 非法 JSON / 非法消息返回标准的 -32700 / -32600 错误，而不是静默丢弃
+ */
+
+interface PendingBatch {
+  remaining: Set<RequestId>;
+  responses: unknown[];
+}
+
+const PARSE_ERROR = -32700;
+const INVALID_REQUEST = -32600;
+
+function errorResponse(id: RequestId | null, code: number, message: string) {
+  return {jsonrpc: '2.0', id, error: {code, message}};
+}
+
+function isResponse(message: JSONRPCMessage): boolean {
+  return 'id' in message && ('result' in message || 'error' in message);
+}
+
+function isRequest(message: JSONRPCMessage): boolean {
+  return 'id' in message && 'method' in message;
+}
+
+export class PipelinedStdioServerTransport implements Transport {
+  #stdin: Readable;
+  #stdout: Writable;
+  #buffer: Buffer | undefined;
+  #started = false;
+  // 请求 id -> 所属批次，用于把响应收集回对应的数组
+  #batches = new Map<RequestId, PendingBatch>();
+
+  onclose?: () => void;
+  onerror?: (error: Error) => void;
+  onmessage?: (message: JSONRPCMessage) => void;
+
+  constructor(
+    stdin: Readable = process.stdin,
+    stdout: Writable = process.stdout,
+  ) {
+    this.#stdin = stdin;
+    this.#stdout = stdout;
+  }
+
+  async start(): Promise<void> {
+    if (this.#started) {
+      throw new Error(
+        'PipelinedStdioServerTransport already started! If using Server class, note that connect() calls start() automatically.',
+      );
+    }
+    this.#started = true;
+    this.#stdin.on('data', this.#onData);
+    this.#stdin.on('error', this.#onError);
+  }
+
+  async close(): Promise<void> {
+    this.#stdin.off('data', this.#onData);
+    this.#stdin.off('error', this.#onError);
+    if (this.#stdin.listenerCount('data') === 0) {
+      this.#stdin.pause();
+    }
+    this.#buffer = undefined;
+    this.#batches.clear();
+    this.onclose?.();
+  }
+
+  async send(message: JSONRPCMessage): Promise<void> {
+    if (isResponse(message)) {
+      const id = (message as {id: RequestId}).id;
+      const batch = this.#batches.get(id);
+      if (batch) {
+        this.#batches.delete(id);
+        batch.remaining.delete(id);
+        batch.responses.push(message);
+        await this.#flushBatch(batch);
+        return;
+      }
+    }
+    await this.#write(message);
+  }
+
+  get pendingBatchRequests(): number {
+    return this.#batches.size;
+  }
+
+  #onData = (chunk: Buffer) => {
+    this.#buffer = this.#buffer ? Buffer.concat([this.#buffer, chunk]) : chunk;
+    while (this.#buffer) {
+      const index = this.#buffer.indexOf('\n');
+      if (index === -1) {
+        break;
+      }
+      const line = this.#buffer.toString('utf8', 0, index).replace(/\r$/, '');
+      this.#buffer =
+        index + 1 < this.#buffer.length
+          ? this.#buffer.subarray(index + 1)
+          : undefined;
+      this.#processLine(line);
+    }
+  };
+
+  #onError = (error: Error) => {
+    this.onerror?.(error);
+  };
+
+  #processLine(line: string): void {
+    if (!line.trim()) {
+      return;
+    }
+    let parsed: unknown;
+    try {
+      parsed = JSON.parse(line);
+    } catch (error) {
+      this.onerror?.(error as Error);
+      void this.#write(errorResponse(null, PARSE_ERROR, 'Parse error'));
+      return;
+    }
+
+    if (Array.isArray(parsed)) {
+      this.#processBatch(parsed);
+      return;
+    }
+
+    const message = this.#validate(parsed);
+    if (message) {
+      this.onmessage?.(message);
+    } else {
+      void this.#write(errorResponse(null, INVALID_REQUEST, 'Invalid Request'));
+    }
+  }
+
+  #processBatch(items: unknown[]): void {
+    if (items.length === 0) {
+      void this.#write(errorResponse(null, INVALID_REQUEST, 'Invalid Request'));
+      return;
+    }
+
+    const batch: PendingBatch = {remaining: new Set(), responses: []};
+    const messages: JSONRPCMessage[] = [];
+    for (const item of items) {
+      const message = this.#validate(item);
+      if (!message) {
+        batch.responses.push(
+          errorResponse(null, INVALID_REQUEST, 'Invalid Request'),
+        );
+        continue;
+      }
+      if (isRequest(message)) {
+        const id = (message as {id: RequestId}).id;
+        // 与在途请求 id 重复时不归入批次，响应按普通消息单独写出
+        if (!this.#batches.has(id) && !batch.remaining.has(id)) {
+          batch.remaining.add(id);
+          this.#batches.set(id, batch);
+        }
+      }
+      messages.push(message);
+    }
+
+    // 先登记整个批次再分发，避免同步完成的请求提前触发写出
+    for (const message of messages) {
+      this.onmessage?.(message);
+    }
+    void this.#flushBatch(batch);
+  }
+
+  #validate(item: unknown): JSONRPCMessage | undefined {
+    const result = JSONRPCMessageSchema.safeParse(item);
+    if (!result.success) {
+      this.onerror?.(new Error(`Invalid JSON-RPC message: ${result.error}`));
+      return undefined;
+    }
+    return result.data;
+  }
+
+  async #flushBatch(batch: PendingBatch): Promise<void> {
+    if (batch.remaining.size > 0 || batch.responses.length === 0) {
+      return;
+    }
+    const responses = batch.responses;
+    batch.responses = [];
+    await this.#write(responses);
+  }
+
+  #write(payload: unknown): Promise<void> {
+    return new Promise(resolve => {
+      const json = JSON.stringify(payload) + '\n';
+      if (this.#stdout.write(json)) {
+        resolve();
+      } else {
+        this.#stdout.once('drain', resolve);
+      }
+    });
+  }
+}
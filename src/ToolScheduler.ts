@@ -0,0 +1,134 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+import type {Page} from 'puppeteer-core';
+
+import {ReadWriteMutex} from './Mutex.js';
+import {ToolCategories} from './tools/categories.js';
+import type {
+  Context,
+  ToolDefinition,
+  ToolScope,
+} from './tools/ToolDefinition.js';
+
+// 未显式声明 scope 时按分类推断：扩展和浏览器信息类工具不操作选中页面
+const BROWSER_SCOPED_CATEGORIES = new Set<ToolCategories>([
+  ToolCategories.EXTENSION_DISCOVERY,
+  ToolCategories.EXTENSION_LIFECYCLE,
+  ToolCategories.EXTENSION_DEBUGGING,
+  ToolCategories.EXTENSION_INTERACTION,
+  ToolCategories.EXTENSION_MONITORING,
+  ToolCategories.EXTENSION_INSPECTION,
+  ToolCategories.BROWSER_INFO,
+]);
+
+export function getToolScope(tool: ToolDefinition): ToolScope {
+  if (tool.annotations.scope) {
+    return tool.annotations.scope;
+  }
+  return BROWSER_SCOPED_CATEGORIES.has(tool.annotations.category)
+    ? 'browser'
+    : 'page';
+}
+
+type SchedulerContext = Pick<Context, 'getSelectedPage' | 'getPageByIdx'>;
+
+interface Guard {
+  dispose(): void;
+}
+
+/**
+ * 按工具元数据调度工具调用，取代所有调用共用的一把 toolMutex。
+ *
+ * 每次调用先持有所属上下文的读写锁，再持有目标资源的读写锁：
+ * - context: 独占上下文（切换/新建/关闭页面），等待该上下文中所有调用结束；
+ *   带 pageIdx 参数时同时独占该页面
+ * - page:    共享上下文 + 选中页面的锁
+ * - browser: 共享上下文；带 extensionId 参数时再持有该扩展的锁
+ * concurrencySafe 的工具以共享方式持有资源锁，其它工具独占。
+ *
+ * 因此不同页面/扩展上的调用、只读调用可以并发，同一页面上的修改仍然串行。
+ * 加锁顺序固定为"上下文 → 资源"，不会死锁。页面锁在所有上下文之间共享
+ * （HTTP 模式下不同会话可能操作同一个页面）。
+ */
+export class ToolScheduler {
+  #contextLocks = new WeakMap<object, ReadWriteMutex>();
+  #pageLocks = new WeakMap<Page, ReadWriteMutex>();
+  #extensionLocks = new Map<string, ReadWriteMutex>();
+
+  async acquire(
+    tool: ToolDefinition,
+    params: Record<string, unknown>,
+    context: SchedulerContext,
+  ): Promise<Guard> {
+    const scope = getToolScope(tool);
+    const shared = tool.annotations.concurrencySafe ?? false;
+    const contextLock = this.#lockFor(this.#contextLocks, context);
+    const guards: Guard[] = [];
+    const release = () => {
+      for (const guard of guards.reverse()) {
+        guard.dispose();
+      }
+    };
+
+    try {
+      if (scope === 'context') {
+        guards.push(await contextLock.acquire());
+        const {pageIdx} = params;
+        const page =
+          typeof pageIdx === 'number'
+            ? this.#resolve(() => context.getPageByIdx(pageIdx))
+            : undefined;
+        if (page) {
+          guards.push(await this.#lockFor(this.#pageLocks, page).acquire());
+        }
+        return {dispose: release};
+      }
+
+      guards.push(await contextLock.acquireShared());
+      let resource: ReadWriteMutex | undefined;
+      if (scope === 'page') {
+        const page = this.#resolve(() => context.getSelectedPage());
+        // 没有可用页面时工具自己会报错，只需持有上下文
+        resource = page && this.#lockFor(this.#pageLocks, page);
+      } else if (typeof params.extensionId === 'string') {
+        resource = this.#extensionLocks.get(params.extensionId);
+        if (!resource) {
+          resource = new ReadWriteMutex();
+          this.#extensionLocks.set(params.extensionId, resource);
+        }
+      }
+      if (resource) {
+        guards.push(
+          shared ? await resource.acquireShared() : await resource.acquire(),
+        );
+      }
+      return {dispose: release};
+    } catch (error) {
+      release();
+      throw error;
+    }
+  }
+
+  #lockFor<K extends object>(
+    locks: WeakMap<K, ReadWriteMutex>,
+    key: K,
+  ): ReadWriteMutex {
+    let lock = locks.get(key);
+    if (!lock) {
+      lock = new ReadWriteMutex();
+      locks.set(key, lock);
+    }
+    return lock;
+  }
+
+  #resolve(getPage: () => Page): Page | undefined {
+    try {
+      return getPage();
+    } catch {
+      return undefined;
+    }
+  }
+}
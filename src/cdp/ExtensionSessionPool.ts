@@ -0,0 +1,298 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+import {CDPSessionEvent} from 'puppeteer-core';
+import type {Browser, CDPSession, Target} from 'puppeteer-core';
+
+/**
+ * Target.getTargets 返回的 target 信息
+ */
+export interface ExtensionTargetInfo {
+  targetId: string;
+  type: string;
+  title: string;
+  url: string;
+  attached: boolean;
+  canAccessOpener: boolean;
+}
+
+export interface ExtensionSessionPoolStats {
+  /** 当前保持附加的 session 数 */
+  sessions: number;
+  /** 复用已有 session 的次数 */
+  sessionHits: number;
+  /** 新附加 session 的次数 */
+  attaches: number;
+  /** 因 target 销毁或 session 断开而丢弃的 session 数 */
+  invalidations: number;
+  /** 空闲超时后分离的 session 数 */
+  idleDetaches: number;
+  /** 复用 target 列表的次数 */
+  discoveryHits: number;
+  /** 实际发送 Target.getTargets 的次数 */
+  discoveries: number;
+}
+
+const ATTACH_TIMEOUT = 5000;
+const ENABLE_TIMEOUT = 3000;
+/**
+ * 最后一个使用者释放后保留 session 的时间
+ *
+ * 附加着 DevTools session 的 MV3 Service Worker 不会因空闲被 Chrome 停止，
+ * 所以 session 只在连续调用之间短暂复用，远小于 Chrome 约 30 秒的空闲停止时间。
+ */
+export const SESSION_IDLE_TIMEOUT = 5000;
+
+function targetIdOf(target: Target): string | undefined {
+  return (target as unknown as {_targetId?: string})._targetId;
+}
+
+function withTimeout<T>(
+  promise: Promise<T>,
+  timeoutMs: number,
+  message: string,
+): Promise<T> {
+  let timer: NodeJS.Timeout | undefined;
+  const timeout = new Promise<never>((_, reject) => {
+    timer = setTimeout(() => reject(new Error(message)), timeoutMs);
+  });
+  return Promise.race([promise, timeout]).finally(() => clearTimeout(timer));
+}
+
+/**
+ * 扩展 target 的 CDP session 池
+ *
+ * 扩展工具（evaluate_in_extension、日志捕获、上下文列表等）每次调用都要
+ * 通过 Target.getTargets 查找 Service Worker / Offscreen / Popup，
+ * 并为日志捕获附加、再分离一个 CDP session。同一个扩展被反复调用时，
+ * 这里按 targetId 复用已附加的 session（Runtime domain 已启用），
+ * 并缓存 target 列表：
+ * - targetcreated / targetchanged / targetdestroyed 时丢弃 target 列表
+ * - targetdestroyed（Target.targetDestroyed）或 session 断开时丢弃对应 session
+ * - 所有使用者 release() 后空闲超过 idleTimeout 的 session 关闭 Runtime 并分离，
+ *   避免一直附加让 Service Worker 无法空闲停止、控制台事件持续经过 CDP
+ *
+ * 浏览器事件监听在第一次使用时注册，dispose() 时移除。
+ */
+export class ExtensionSessionPool {
+  #browser: Browser;
+  #listTargets: () => Promise<ExtensionTargetInfo[]>;
+  #sessions = new Map<string, Promise<CDPSession>>();
+  /** targetId → 尚未 release() 的使用者数 */
+  #users = new Map<string, number>();
+  #idleTimers = new Map<string, NodeJS.Timeout>();
+  #idleTimeout: number;
+  #targets: Promise<ExtensionTargetInfo[]> | null = null;
+  #listening = false;
+  #stats = {
+    sessionHits: 0,
+    attaches: 0,
+    invalidations: 0,
+    idleDetaches: 0,
+    discoveryHits: 0,
+    discoveries: 0,
+  };
+
+  constructor(
+    browser: Browser,
+    listTargets: () => Promise<ExtensionTargetInfo[]>,
+    options: {idleTimeout?: number} = {},
+  ) {
+    this.#browser = browser;
+    this.#listTargets = listTargets;
+    this.#idleTimeout = options.idleTimeout ?? SESSION_IDLE_TIMEOUT;
+  }
+
+  /**
+   * 当前 target 列表；target 未变化时复用上一次 Target.getTargets 的结果
+   */
+  async getTargets(): Promise<ExtensionTargetInfo[]> {
+    this.#listen();
+    if (this.#targets) {
+      this.#stats.discoveryHits++;
+      return await this.#targets;
+    }
+    this.#stats.discoveries++;
+    const targets = this.#listTargets();
+    this.#targets = targets;
+    targets.catch(() => {
+      if (this.#targets === targets) {
+        this.#targets = null;
+      }
+    });
+    return await targets;
+  }
+
+  /**
+   * 获取 target 的已附加 session（Runtime domain 已启用）
+   *
+   * session 归池所有，调用方只增删自己的事件监听，不要 detach；
+   * 用完后（包括出错时）调用一次 release()。acquire 抛出时不需要 release。
+   *
+   * @param targetId - CDP targetId
+   * @param target - 已找到的 Puppeteer Target；省略时按 targetId 查找
+   */
+  async acquire(targetId: string, target?: Target): Promise<CDPSession> {
+    this.#listen();
+    clearTimeout(this.#idleTimers.get(targetId));
+    this.#idleTimers.delete(targetId);
+    this.#users.set(targetId, (this.#users.get(targetId) ?? 0) + 1);
+
+    let session = this.#sessions.get(targetId);
+    if (session) {
+      this.#stats.sessionHits++;
+    } else {
+      this.#stats.attaches++;
+      const attached = this.#attach(targetId, target);
+      this.#sessions.set(targetId, attached);
+      attached.catch(() => {
+        if (this.#sessions.get(targetId) === attached) {
+          this.#sessions.delete(targetId);
+        }
+      });
+      session = attached;
+    }
+    try {
+      return await session;
+    } catch (error) {
+      this.release(targetId);
+      throw error;
+    }
+  }
+
+  /**
+   * 归还 acquire() 得到的 session；最后一个使用者归还后开始空闲计时
+   */
+  release(targetId: string): void {
+    const users = (this.#users.get(targetId) ?? 0) - 1;
+    if (users > 0) {
+      this.#users.set(targetId, users);
+      return;
+    }
+    this.#users.delete(targetId);
+    if (!this.#sessions.has(targetId) || this.#idleTimers.has(targetId)) {
+      return;
+    }
+    const timer = setTimeout(() => {
+      this.#idleTimers.delete(targetId);
+      const session = this.#sessions.get(targetId);
+      if (!session) {
+        return;
+      }
+      this.#sessions.delete(targetId);
+      this.#stats.idleDetaches++;
+      void this.#detach(session);
+    }, this.#idleTimeout);
+    timer.unref();
+    this.#idleTimers.set(targetId, timer);
+  }
+
+  /**
+   * 丢弃 target 的 session（例如调用方发现 session 已不可用）
+   */
+  invalidate(targetId: string): void {
+    const session = this.#sessions.get(targetId);
+    if (!session) {
+      return;
+    }
+    this.#sessions.delete(targetId);
+    clearTimeout(this.#idleTimers.get(targetId));
+    this.#idleTimers.delete(targetId);
+    this.#stats.invalidations++;
+    void this.#detach(session);
+  }
+
+  getStats(): ExtensionSessionPoolStats {
+    return {...this.#stats, sessions: this.#sessions.size};
+  }
+
+  /**
+   * 分离所有 session 并移除浏览器事件监听
+   */
+  dispose(): void {
+    if (this.#listening) {
+      this.#browser.off('targetcreated', this.#onTargetChanged);
+      this.#browser.off('targetchanged', this.#onTargetChanged);
+      this.#browser.off('targetdestroyed', this.#onTargetDestroyed);
+      this.#listening = false;
+    }
+    for (const targetId of Array.from(this.#sessions.keys())) {
+      this.invalidate(targetId);
+    }
+    this.#users.clear();
+    this.#targets = null;
+  }
+
+  /**
+   * 关闭 Runtime domain 并分离 session；target 已销毁时两者都会失败，忽略
+   */
+  async #detach(session: Promise<CDPSession>): Promise<void> {
+    let resolved: CDPSession;
+    try {
+      resolved = await session;
+    } catch {
+      return;
+    }
+    await resolved.send('Runtime.disable').catch(() => undefined);
+    await resolved.detach().catch(() => undefined);
+  }
+
+  async #attach(targetId: string, target?: Target): Promise<CDPSession> {
+    const resolved =
+      target ?? this.#browser.targets().find(t => targetIdOf(t) === targetId);
+    if (!resolved) {
+      throw new Error(`Target ${targetId} not found`);
+    }
+
+    const session = await withTimeout(
+      resolved.createCDPSession(),
+      ATTACH_TIMEOUT,
+      `CDPSession creation timeout (${ATTACH_TIMEOUT / 1000}s)`,
+    );
+    try {
+      await withTimeout(
+        session.send('Runtime.enable'),
+        ENABLE_TIMEOUT,
+        `CDP Runtime.enable timeout (${ENABLE_TIMEOUT}ms)`,
+      );
+    } catch (error) {
+      await session.detach().catch(() => {
+        // Ignore detach errors
+      });
+      throw error;
+    }
+
+    session.once(CDPSessionEvent.Disconnected, () => {
+      if (this.#sessions.has(targetId)) {
+        this.#sessions.delete(targetId);
+        this.#stats.invalidations++;
+      }
+    });
+    return session;
+  }
+
+  #listen(): void {
+    if (this.#listening) {
+      return;
+    }
+    this.#browser.on('targetcreated', this.#onTargetChanged);
+    this.#browser.on('targetchanged', this.#onTargetChanged);
+    this.#browser.on('targetdestroyed', this.#onTargetDestroyed);
+    this.#listening = true;
+  }
+
+  #onTargetChanged = (): void => {
+    this.#targets = null;
+  };
+
+  #onTargetDestroyed = (target: Target): void => {
+    this.#targets = null;
+    const targetId = targetIdOf(target);
+    if (targetId) {
+      this.invalidate(targetId);
+    }
+  };
+}
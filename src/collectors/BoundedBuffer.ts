@@ -0,0 +1,238 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+/**
+ * 有界的环形缓冲区（收集器的每页存储）
+ *
+ * 与 multi-tenant/utils/circular-buffer.ts 思路相同：写满后覆盖最旧的元素，
+ * push 为 O(1)，不需要 Array.shift()。在此基础上：
+ * - 存储按需增长到 capacity，空页面不会预先分配整块数组
+ * - 记录被淘汰的条目数（dropped），供工具在响应中提示
+ * - 可以挂到一个 CollectorBudget 上，由全局预算统一限制所有页面的总条数
+ * - toArray() 的结果在下一次修改前被缓存，调用方不得修改返回的数组
+ * - 每个元素按写入顺序获得单调递增的序号（seq），淘汰和 clear() 都不会复用序号，
+ *   可以用作跨调用稳定的游标
+ */
+export class BoundedBuffer<T> {
+  readonly capacity: number;
+  #items: Array<T | undefined> = [];
+  #head = 0;
+  #size = 0;
+  #dropped = 0;
+  #nextSeq = 0;
+  #snapshot?: T[];
+  #budget?: CollectorBudget;
+
+  constructor(capacity: number, budget?: CollectorBudget) {
+    if (capacity <= 0) {
+      throw new Error('Capacity must be positive');
+    }
+    this.capacity = capacity;
+    this.#budget = budget;
+    budget?.register(this);
+  }
+
+  get length(): number {
+    return this.#size;
+  }
+
+  /**
+   * 自上次 clear() / resetDropped() 以来因容量或全局预算被淘汰的条目数
+   */
+  get dropped(): number {
+    return this.#dropped;
+  }
+
+  /**
+   * 最旧元素的序号（缓冲区为空时等于 nextSeq）
+   */
+  get firstSeq(): number {
+    return this.#nextSeq - this.#size;
+  }
+
+  /**
+   * 下一个写入的元素将获得的序号
+   */
+  get nextSeq(): number {
+    return this.#nextSeq;
+  }
+
+  /**
+   * 按序号读取元素；已被淘汰或尚未写入时返回 undefined
+   */
+  at(seq: number): T | undefined {
+    const offset = seq - this.firstSeq;
+    if (offset < 0 || offset >= this.#size) {
+      return undefined;
+    }
+    return this.#items[(this.#head + offset) % this.#items.length];
+  }
+
+  /**
+   * 追加元素；已满时覆盖最旧的元素并计入 dropped
+   *
+   * 时间复杂度: O(1)（触发全局预算淘汰时为 O(页面数)）
+   */
+  push(item: T): void {
+    this.#nextSeq++;
+    if (this.#size === this.capacity) {
+      this.#items[this.#head] = item;
+      this.#head = (this.#head + 1) % this.capacity;
+      this.#dropped++;
+      this.#snapshot = undefined;
+      this.#budget?.recordDropped(1);
+      return;
+    }
+    if (this.#size === this.#items.length) {
+      if (this.#head !== 0) {
+        this.#items = this.toArray().slice();
+        this.#head = 0;
+      }
+      this.#items.push(item);
+    } else {
+      this.#items[(this.#head + this.#size) % this.#items.length] = item;
+    }
+    this.#size++;
+    this.#snapshot = undefined;
+    this.#budget?.adjust(1);
+  }
+
+  /**
+   * 按插入顺序返回所有元素（缓存到下一次修改）
+   */
+  toArray(): T[] {
+    if (!this.#snapshot) {
+      const result = new Array<T>(this.#size);
+      for (let i = 0; i < this.#size; i++) {
+        result[i] = this.#items[(this.#head + i) % this.#items.length] as T;
+      }
+      this.#snapshot = result;
+    }
+    return this.#snapshot;
+  }
+
+  /**
+   * 淘汰最旧的 count 个元素并计入 dropped（全局预算使用）
+   */
+  evict(count = 1): number {
+    const removed = this.#removeOldest(count);
+    this.#dropped += removed;
+    this.#budget?.recordDropped(removed);
+    return removed;
+  }
+
+  /**
+   * 移除最旧的 count 个元素，不计入 dropped（例如导航后丢弃旧文档的数据）
+   */
+  trimStart(count: number): number {
+    return this.#removeOldest(count);
+  }
+
+  clear(): void {
+    const size = this.#size;
+    this.#items = [];
+    this.#head = 0;
+    this.#size = 0;
+    this.#dropped = 0;
+    this.#snapshot = undefined;
+    this.#budget?.adjust(-size);
+  }
+
+  resetDropped(): void {
+    this.#dropped = 0;
+  }
+
+  /**
+   * 从全局预算中注销（页面关闭时调用），之后仍可读取但不再计入预算
+   */
+  detach(): void {
+    this.#budget?.unregister(this);
+    this.#budget = undefined;
+  }
+
+  #removeOldest(count: number): number {
+    const removed = Math.min(Math.max(count, 0), this.#size);
+    if (removed === 0) {
+      return 0;
+    }
+    for (let i = 0; i < removed; i++) {
+      // 释放引用，让被淘汰的对象可以被回收
+      this.#items[(this.#head + i) % this.#items.length] = undefined;
+    }
+    this.#head = (this.#head + removed) % this.#items.length;
+    this.#size -= removed;
+    this.#snapshot = undefined;
+    this.#budget?.adjust(-removed);
+    return removed;
+  }
+}
+
+/**
+ * 多个 BoundedBuffer 共享的全局条数预算
+ *
+ * 总条数超过 maxTotal 时，从当前条目最多的缓冲区淘汰最旧的条目，
+ * 因此一个刷屏的页面只会挤掉自己的历史，而不会清空其它页面。
+ */
+export class CollectorBudget {
+  readonly maxTotal: number;
+  #buffers = new Set<BoundedBuffer<unknown>>();
+  #total = 0;
+  #dropped = 0;
+
+  constructor(maxTotal: number) {
+    if (maxTotal <= 0) {
+      throw new Error('maxTotal must be positive');
+    }
+    this.maxTotal = maxTotal;
+  }
+
+  get total(): number {
+    return this.#total;
+  }
+
+  get dropped(): number {
+    return this.#dropped;
+  }
+
+  get bufferCount(): number {
+    return this.#buffers.size;
+  }
+
+  register(buffer: BoundedBuffer<unknown>): void {
+    this.#buffers.add(buffer);
+  }
+
+  unregister(buffer: BoundedBuffer<unknown>): void {
+    if (this.#buffers.delete(buffer)) {
+      this.#total -= buffer.length;
+    }
+  }
+
+  adjust(delta: number): void {
+    this.#total += delta;
+    if (delta > 0) {
+      this.#enforce();
+    }
+  }
+
+  recordDropped(count: number): void {
+    this.#dropped += count;
+  }
+
+  #enforce(): void {
+    while (this.#total > this.maxTotal) {
+      let largest: BoundedBuffer<unknown> | undefined;
+      for (const buffer of this.#buffers) {
+        if (!largest || buffer.length > largest.length) {
+          largest = buffer;
+        }
+      }
+      if (!largest || largest.evict(1) === 0) {
+        return;
+      }
+    }
+  }
+}
@@ -12,8 +12,16 @@ import type {
   JSHandle,
 } from 'puppeteer-core';
 
+import {getCollectorLimits} from '../config/CollectorLimits.js';
 import {EnhancedObjectSerializer} from '../formatters/EnhancedObjectSerializer.js';
 
+import type {CollectorBudget} from './BoundedBuffer.js';
+import {
+  IndexedBuffer,
+  type BufferIndexSpec,
+  type BufferQueryResult,
+} from './IndexedBuffer.js';
+
 /**
  * 可过滤的日志类型
  *
@@ -68,21 +76,80 @@ export interface ConsoleLog {
   lineNumber?: number;
   columnNumber?: number;
   source?: ConsoleLogSource; // 日志来源
+  /**
+   * false 表示 args / text 是摄取时的预览，
+   * 调用 EnhancedConsoleCollector.resolveLogs() 后替换为完整序列化的结果
+   */
+  serialized?: boolean;
+}
+
+/**
+ * 日志按类型、来源和时间戳建立索引，过滤时不再扫描全部日志
+ */
+const CONSOLE_LOG_INDEX: BufferIndexSpec<ConsoleLog> = {
+  keys: {
+    type: log => log.type,
+    source: log => log.source || undefined,
+  },
+  timestamp: log => log.timestamp,
+};
+
+/**
+ * 日志查询条件
+ */
+export interface ConsoleLogQuery {
+  types?: string[];
+  sources?: ConsoleLogSource[];
+  /** 只返回时间戳不早于 since 的日志（毫秒） */
+  since?: number;
+  /** 只返回此序号之后的日志（游标，见 utils/pagination.ts） */
+  after?: number;
+  limit?: number;
+  /** 为 true 时 limit 取最新的 N 条，否则取最早的 N 条 */
+  tail?: boolean;
 }
 
+/**
+ * 尚未完整序列化的日志参数
+ */
+interface DeferredArgs {
+  load: () => Promise<unknown[]>;
+  format: (args: unknown[]) => string;
+  resolving?: Promise<void>;
+}
+
+/** resolveLogs() 同时完整序列化的最大日志条数 */
+const MAX_CONCURRENT_RESOLVES = 8;
+
 /**
  * 增强的控制台日志收集器
  *
  * 使用 CDP Runtime.consoleAPICalled 捕获所有上下文的日志
  * 包括页面主上下文和 Content Script
+ *
+ * 摄取时只根据事件自带的 RemoteObject 预览格式化参数，不访问页面；
+ * 预览不完整的日志保留对象句柄，由 resolveLogs() 在真正返回给调用方时完整序列化。
  */
 export class EnhancedConsoleCollector {
-  private logs: ConsoleLog[] = [];
+  private logs: IndexedBuffer<ConsoleLog>;
   private serializer = new EnhancedObjectSerializer();
+  private deferred = new WeakMap<ConsoleLog, DeferredArgs>();
   private isInitialized = false;
   private mainExecutionContextId: number | null = null;
   private frameExecutionContexts = new Map<number, string>(); // contextId -> frameUrl
 
+  /**
+   * @param options.maxLogs 最多保留的日志条数，超出后淘汰最旧的（默认 MCP_COLLECTOR_MAX_PER_PAGE）
+   * @param options.budget 与其它页面共享的全局条数预算
+   */
+  constructor(options: {maxLogs?: number; budget?: CollectorBudget} = {}) {
+    this.logs = new IndexedBuffer<ConsoleLog>(
+      options.maxLogs ?? getCollectorLimits().maxPerPage,
+      CONSOLE_LOG_INDEX,
+      options.budget,
+    );
+  }
+
   /**
    * 初始化日志收集
    */
@@ -139,9 +206,9 @@ export class EnhancedConsoleCollector {
       // Worker 日志由 Puppeteer 的 page.on('console') 处理
       cdpSession.on(
         'Runtime.consoleAPICalled',
-        async (params: Protocol.Runtime.ConsoleAPICalledEvent) => {
+        (params: Protocol.Runtime.ConsoleAPICalledEvent) => {
           try {
-            const log = await this.formatConsoleAPICall(params, cdpSession);
+            const log = this.formatConsoleAPICall(params, cdpSession);
 
             // 判断日志来源
             if (this.frameExecutionContexts.has(params.executionContextId)) {
@@ -165,9 +232,9 @@ export class EnhancedConsoleCollector {
       // 监听异常（页面主上下文）
       cdpSession.on(
         'Runtime.exceptionThrown',
-        async (params: Protocol.Runtime.ExceptionThrownEvent) => {
+        (params: Protocol.Runtime.ExceptionThrownEvent) => {
           try {
-            const log = await this.formatException(params, cdpSession);
+            const log = this.formatException(params, cdpSession);
             log.source = 'page';
             this.logs.push(log);
           } catch (error) {
@@ -234,11 +301,9 @@ export class EnhancedConsoleCollector {
                 // 监听 Worker 的日志
                 workerSession.on(
                   'Runtime.consoleAPICalled',
-                  async (
-                    workerParams: Protocol.Runtime.ConsoleAPICalledEvent,
-                  ) => {
+                  (workerParams: Protocol.Runtime.ConsoleAPICalledEvent) => {
                     try {
-                      const log = await this.formatConsoleAPICall(
+                      const log = this.formatConsoleAPICall(
                         workerParams,
                         workerSession,
                       );
@@ -262,11 +327,9 @@ export class EnhancedConsoleCollector {
                 // 监听 Worker 的异常
                 workerSession.on(
                   'Runtime.exceptionThrown',
-                  async (
-                    workerParams: Protocol.Runtime.ExceptionThrownEvent,
-                  ) => {
+                  (workerParams: Protocol.Runtime.ExceptionThrownEvent) => {
                     try {
-                      const log = await this.formatException(
+                      const log = this.formatException(
                         workerParams,
                         workerSession,
                       );
@@ -319,13 +382,13 @@ export class EnhancedConsoleCollector {
 
       // 使用 Puppeteer 的 console 事件捕获 Worker 日志
       // 这是因为 Puppeteer 的 CDP 封装不会自动转发 Worker 的 CDP 事件
-      page.on('console', async (msg: ConsoleMessage) => {
+      page.on('console', (msg: ConsoleMessage) => {
         try {
           const location = msg.location();
 
           // 只处理 Worker 日志（通过 URL 判断）
           if (this.isWorkerLog(location.url)) {
-            const log = await this.formatPuppeteerConsoleMessage(msg);
+            const log = this.formatPuppeteerConsoleMessage(msg);
             log.source = 'worker';
             this.logs.push(log);
             console.log(
@@ -353,23 +416,81 @@ export class EnhancedConsoleCollector {
     }
   }
 
+  /**
+   * 推迟完整序列化：记录如何加载参数，直到 resolveLogs() 时才访问页面
+   */
+  private defer(
+    log: ConsoleLog,
+    load: () => Promise<unknown[]>,
+    format: (args: unknown[]) => string,
+  ): void {
+    log.serialized = false;
+    this.deferred.set(log, {load, format});
+  }
+
+  /**
+   * 完整序列化这些日志中尚未序列化的参数
+   *
+   * 每条日志只访问页面一次，结果写回日志（args / text）并缓存。
+   * 对象句柄已失效（例如 Worker 已退出）时保留摄取时的预览。
+   */
+  async resolveLogs(logs: ConsoleLog[]): Promise<ConsoleLog[]> {
+    const pending = logs.filter(log => this.deferred.has(log));
+    // 最多同时序列化 MAX_CONCURRENT_RESOLVES 条，避免一次查询大量日志时压垮 CDP 连接
+    let next = 0;
+    const worker = async () => {
+      while (next < pending.length) {
+        await this.resolveLog(pending[next++]);
+      }
+    };
+    await Promise.all(
+      Array.from(
+        {length: Math.min(MAX_CONCURRENT_RESOLVES, pending.length)},
+        worker,
+      ),
+    );
+    return logs;
+  }
+
+  private resolveLog(log: ConsoleLog): Promise<void> {
+    const deferred = this.deferred.get(log);
+    if (!deferred) {
+      return Promise.resolve();
+    }
+    deferred.resolving ??= deferred
+      .load()
+      .then(
+        args => {
+          log.args = args;
+          log.text = deferred.format(args);
+        },
+        () => {
+          // 保留预览
+        },
+      )
+      .finally(() => {
+        log.serialized = true;
+        this.deferred.delete(log);
+      });
+    return deferred.resolving;
+  }
+
   /**
    * 格式化 console API 调用
    */
-  private async formatConsoleAPICall(
+  private formatConsoleAPICall(
     params: Protocol.Runtime.ConsoleAPICalledEvent,
     session: CDPSession,
-  ): Promise<ConsoleLog> {
-    // 序列化所有参数
-    const args = await Promise.all(
-      params.args.map(arg => this.serializer.serialize(arg, session)),
-    );
+  ): ConsoleLog {
+    // 摄取时只生成预览
+    const previews = params.args.map(arg => this.serializer.preview(arg));
+    const args = previews.map(preview => preview.value);
 
     // 获取调用位置
     const stackTrace = params.stackTrace;
     const topFrame = stackTrace?.callFrames?.[0];
 
-    return {
+    const log: ConsoleLog = {
       type: params.type,
       args: args,
       timestamp: params.timestamp,
@@ -380,35 +501,58 @@ export class EnhancedConsoleCollector {
       lineNumber: topFrame?.lineNumber,
       columnNumber: topFrame?.columnNumber,
     };
+    if (previews.some(preview => !preview.complete)) {
+      this.defer(
+        log,
+        () =>
+          Promise.all(
+            params.args.map(arg => this.serializer.serialize(arg, session)),
+          ),
+        resolved => this.formatArgs(resolved),
+      );
+    }
+    return log;
   }
 
   /**
    * 格式化异常
    */
-  private async formatException(
+  private formatException(
     params: Protocol.Runtime.ExceptionThrownEvent,
     session: CDPSession,
-  ): Promise<ConsoleLog> {
+  ): ConsoleLog {
     const exception = params.exceptionDetails.exception;
-    const serialized = exception
-      ? await this.serializer.serialize(exception, session)
-      : {message: params.exceptionDetails.text};
+    const preview = exception
+      ? this.serializer.preview(exception)
+      : {value: {message: params.exceptionDetails.text}, complete: true};
+    const format = ([serialized]: unknown[]) => {
+      const error = serialized as {name?: string; message?: string};
+      return `Uncaught ${error.name || 'Error'}: ${error.message || params.exceptionDetails.text}`;
+    };
 
     const stackTrace = params.exceptionDetails.stackTrace;
     const topFrame = stackTrace?.callFrames?.[0];
 
-    return {
+    const log: ConsoleLog = {
       type: 'error',
-      args: [serialized],
+      args: [preview.value],
       timestamp: params.timestamp,
       executionContextId: params.exceptionDetails.executionContextId || 0,
       stackTrace: stackTrace,
-      text: `Uncaught ${(serialized as {name?: string; message?: string}).name || 'Error'}: ${(serialized as {name?: string; message?: string}).message || params.exceptionDetails.text}`,
+      text: format([preview.value]),
       url: topFrame?.url || params.exceptionDetails.url,
       lineNumber: topFrame?.lineNumber ?? params.exceptionDetails.lineNumber,
       columnNumber:
         topFrame?.columnNumber ?? params.exceptionDetails.columnNumber,
     };
+    if (exception && !preview.complete) {
+      this.defer(
+        log,
+        async () => [await this.serializer.serialize(exception, session)],
+        format,
+      );
+    }
+    return log;
   }
 
   /**
@@ -454,14 +598,28 @@ export class EnhancedConsoleCollector {
    * 获取所有日志
    */
   getLogs(): ConsoleLog[] {
-    return this.logs;
+    return this.logs.toArray();
   }
 
   /**
-   * 清空日志
+   * 清空日志（同时清零淘汰计数）
    */
   clear(): void {
-    this.logs = [];
+    this.logs.clear();
+  }
+
+  /**
+   * 因容量上限被淘汰的日志条数（自上次清空以来）
+   */
+  getDroppedCount(): number {
+    return this.logs.dropped;
+  }
+
+  /**
+   * 页面关闭后释放在全局预算中占用的份额
+   */
+  dispose(): void {
+    this.logs.detach();
   }
 
   /**
@@ -484,17 +642,17 @@ export class EnhancedConsoleCollector {
   /**
    * 格式化 Puppeteer ConsoleMessage
    */
-  private async formatPuppeteerConsoleMessage(
-    msg: ConsoleMessage,
-  ): Promise<ConsoleLog> {
+  private formatPuppeteerConsoleMessage(msg: ConsoleMessage): ConsoleLog {
     const location = msg.location();
 
-    // 序列化参数
-    const args = await Promise.all(
-      msg.args().map(arg => this.serializePuppeteerHandle(arg)),
+    // 摄取时只生成预览
+    const handles = msg.args();
+    const previews = handles.map(handle =>
+      this.serializer.preview(handle.remoteObject()),
     );
+    const args = previews.map(preview => preview.value);
 
-    return {
+    const log: ConsoleLog = {
       type: msg.type(),
       args: args,
       timestamp: Date.now(),
@@ -504,6 +662,17 @@ export class EnhancedConsoleCollector {
       lineNumber: location.lineNumber,
       columnNumber: location.columnNumber,
     };
+    if (previews.some(preview => !preview.complete)) {
+      this.defer(
+        log,
+        () =>
+          Promise.all(
+            handles.map(handle => this.serializePuppeteerHandle(handle)),
+          ),
+        resolved => this.formatArgs(resolved),
+      );
+    }
+    return log;
   }
 
   /**
@@ -600,59 +769,54 @@ export class EnhancedConsoleCollector {
    * 按类型过滤日志
    */
   getLogsByType(type: string): ConsoleLog[] {
-    return this.logs.filter(log => log.type === type);
+    return this.queryLogs({types: [type]}).items;
   }
 
   /**
    * 按来源过滤日志
    */
-  getLogsBySource(
-    source: 'page' | 'worker' | 'service-worker' | 'iframe',
-  ): ConsoleLog[] {
-    return this.logs.filter(log => log.source === source);
+  getLogsBySource(source: ConsoleLogSource): ConsoleLog[] {
+    return this.queryLogs({sources: [source]}).items;
   }
 
   /**
    * 按时间范围过滤日志
    */
   getLogsSince(timestamp: number): ConsoleLog[] {
-    return this.logs.filter(log => log.timestamp >= timestamp);
+    return this.queryLogs({since: timestamp}).items;
   }
 
   /**
-   * 高级过滤日志
+   * 高级过滤日志（limit 取最新的 N 条）
    */
   getFilteredLogs(options: {
     types?: string[];
-    sources?: Array<'page' | 'worker' | 'service-worker' | 'iframe'>;
+    sources?: ConsoleLogSource[];
     since?: number;
     limit?: number;
   }): ConsoleLog[] {
-    let filtered = this.logs;
-
-    // 按类型过滤
-    if (options.types && options.types.length > 0) {
-      filtered = filtered.filter(log => options.types!.includes(log.type));
-    }
-
-    // 按来源过滤
-    if (options.sources && options.sources.length > 0) {
-      filtered = filtered.filter(
-        log => log.source && options.sources!.includes(log.source),
-      );
-    }
-
-    // 按时间过滤
-    if (options.since) {
-      filtered = filtered.filter(log => log.timestamp >= options.since!);
-    }
+    return this.queryLogs({...options, tail: true}).items;
+  }
 
-    // 限制数量
-    if (options.limit && options.limit > 0) {
-      filtered = filtered.slice(-options.limit);
-    }
+  /**
+   * 用索引查询日志，结果附带序号，可用于游标分页
+   */
+  queryLogs(query: ConsoleLogQuery): BufferQueryResult<ConsoleLog> {
+    return this.logs.query({
+      where: {type: query.types, source: query.sources},
+      // 与之前的行为一致：since 为 0 时不过滤
+      since: query.since || undefined,
+      after: query.after,
+      limit: query.limit && query.limit > 0 ? query.limit : undefined,
+      tail: query.tail,
+    });
+  }
 
-    return filtered;
+  /**
+   * 最新一条日志的序号（没有日志时为 -1），用作“之后的新日志”的游标
+   */
+  getLastSeq(): number {
+    return this.logs.nextSeq - 1;
   }
 
   /**
@@ -663,23 +827,10 @@ export class EnhancedConsoleCollector {
     byType: Record<string, number>;
     bySource: Record<string, number>;
   } {
-    const byType: Record<string, number> = {};
-    const bySource: Record<string, number> = {};
-
-    for (const log of this.logs) {
-      // 统计类型
-      byType[log.type] = (byType[log.type] || 0) + 1;
-
-      // 统计来源
-      if (log.source) {
-        bySource[log.source] = (bySource[log.source] || 0) + 1;
-      }
-    }
-
     return {
       total: this.logs.length,
-      byType,
-      bySource,
+      byType: this.logs.countBy('type'),
+      bySource: this.logs.countBy('source'),
     };
   }
 }
@@ -0,0 +1,404 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+import {BoundedBuffer, type CollectorBudget} from './BoundedBuffer.js';
+
+/**
+ * 索引定义
+ */
+export interface BufferIndexSpec<T> {
+  /**
+   * 键名 → 取值函数。返回 undefined 的元素不进入该键的索引，按该键过滤时不会匹配
+   */
+  keys: Record<string, (item: T) => string | undefined>;
+  /**
+   * 写入时可能还取不到值的键（例如响应到达前的状态码）。
+   * 这些元素先记为待定，查询前重新取值，全部取到后一起补入索引
+   */
+  lateKeys?: readonly string[];
+  /**
+   * 元素自带的时间戳（毫秒），缺省使用写入时的 Date.now()
+   */
+  timestamp?: (item: T) => number;
+}
+
+export interface BufferQuery {
+  /**
+   * 键名 → 允许的值：同一个键的多个值之间为“或”，不同键之间为“与”；
+   * 省略或空数组表示不按该键过滤
+   */
+  where?: Record<string, readonly string[] | undefined>;
+  /** 只返回时间戳不早于 since 的元素（毫秒） */
+  since?: number;
+  /** 只返回序号大于 after 的元素（游标） */
+  after?: number;
+  /** 最多返回的条数 */
+  limit?: number;
+  /** 为 true 时取最后 limit 条匹配，否则取最前 limit 条 */
+  tail?: boolean;
+}
+
+export interface BufferQueryResult<T> {
+  /** 按写入顺序排列的匹配元素 */
+  items: T[];
+  /** 与 items 一一对应的序号 */
+  seqs: number[];
+  /** 是否还有因 limit 未返回的匹配元素 */
+  hasMore: boolean;
+}
+
+/** 失效部分超过这个长度且过半时才压缩数组，摊还 O(1) */
+const COMPACT_THRESHOLD = 1024;
+
+/**
+ * 带二级索引的 BoundedBuffer（可查询的收集器存储）
+ *
+ * - 每个键维护 值 → 升序序号列表，过滤只遍历预计匹配最少的那个键的列表，
+ *   其它条件逐条检查，不再扫描整个缓冲区
+ * - 时间戳按序号存放并保持单调不减，since 用二分查找换算成起始序号
+ * - 被淘汰的元素不会立即从索引中删除：读取时跳过小于 firstSeq 的序号，
+ *   写入量每达到一个缓冲区长度时统一压缩一次
+ * - 序号不会复用，after 游标在新元素到达、旧元素被淘汰后仍然有效
+ */
+export class IndexedBuffer<T> extends BoundedBuffer<T> {
+  #spec: BufferIndexSpec<T>;
+  #lateKeys: ReadonlySet<string>;
+  #index = new Map<string, Map<string, Postings>>();
+  #pending: number[] = [];
+  /** #times[i] 是序号 #timeBase + i 的时间戳 */
+  #times: number[] = [];
+  #timeBase = 0;
+  #maintainedAt = 0;
+
+  constructor(
+    capacity: number,
+    spec: BufferIndexSpec<T>,
+    budget?: CollectorBudget,
+  ) {
+    super(capacity, budget);
+    this.#spec = spec;
+    this.#lateKeys = new Set(spec.lateKeys);
+    for (const key of Object.keys(spec.keys)) {
+      this.#index.set(key, new Map());
+    }
+  }
+
+  override push(item: T): void {
+    const seq = this.nextSeq;
+    super.push(item);
+
+    const time = this.#spec.timestamp?.(item) ?? Date.now();
+    this.#times.push(Math.max(time, this.#times.at(-1) ?? -Infinity));
+
+    for (const [key, getValue] of Object.entries(this.#spec.keys)) {
+      if (this.#lateKeys.has(key)) {
+        continue;
+      }
+      const value = getValue(item);
+      if (value !== undefined) {
+        this.#postings(key, value).add(seq);
+      }
+    }
+    if (this.#lateKeys.size && !this.#indexLateKeys(seq, item)) {
+      this.#pending.push(seq);
+    }
+
+    if (this.nextSeq - this.#maintainedAt >= this.#maintenanceInterval()) {
+      this.#maintain();
+    }
+  }
+
+  override clear(): void {
+    super.clear();
+    for (const values of this.#index.values()) {
+      values.clear();
+    }
+    this.#pending = [];
+    this.#times = [];
+    this.#timeBase = this.nextSeq;
+    this.#maintainedAt = this.nextSeq;
+  }
+
+  /**
+   * 按条件查询，结果按写入顺序排列
+   *
+   * 时间复杂度: O(log n + 遍历的候选数)；tail 模式需要遍历全部候选
+   */
+  query(query: BufferQuery = {}): BufferQueryResult<T> {
+    this.#resolvePending();
+    const empty: BufferQueryResult<T> = {items: [], seqs: [], hasMore: false};
+    const end = this.nextSeq;
+    let from = Math.max(this.firstSeq, (query.after ?? -1) + 1);
+    if (query.since !== undefined) {
+      from = Math.max(from, this.#seqAtTime(query.since));
+    }
+
+    const filters: Array<Filter<T>> = [];
+    for (const [key, values] of Object.entries(query.where ?? {})) {
+      if (!values?.length) {
+        continue;
+      }
+      const filter = this.#filter(key, values);
+      if (!filter.postings.length) {
+        return empty;
+      }
+      filters.push(filter);
+    }
+    // 从预计匹配最少的键开始遍历
+    filters.sort((a, b) => a.size - b.size);
+    const [driver, ...rest] = filters;
+    const next = driver ? unionOf(driver.postings, from) : sequence(from, end);
+
+    const limit = query.limit ?? Infinity;
+    const items: T[] = [];
+    const seqs: number[] = [];
+    let hasMore = false;
+    for (let seq = next(); seq !== undefined && seq < end; seq = next()) {
+      const item = this.at(seq) as T;
+      if (!this.#matches(item, rest, query.since)) {
+        continue;
+      }
+      if (!query.tail && items.length === limit) {
+        hasMore = true;
+        break;
+      }
+      items.push(item);
+      seqs.push(seq);
+    }
+    if (query.tail && items.length > limit) {
+      const start = items.length - limit;
+      return {
+        items: items.slice(start),
+        seqs: seqs.slice(start),
+        hasMore: true,
+      };
+    }
+    return {items, seqs, hasMore};
+  }
+
+  /**
+   * 某个键各个值当前的元素数（不含待定的元素）
+   */
+  countBy(key: string): Record<string, number> {
+    this.#resolvePending();
+    const counts: Record<string, number> = {};
+    const firstSeq = this.firstSeq;
+    for (const [value, postings] of this.#valuesOf(key)) {
+      const size = postings.prune(firstSeq);
+      if (size > 0) {
+        counts[value] = size;
+      }
+    }
+    return counts;
+  }
+
+  #valuesOf(key: string): Map<string, Postings> {
+    const values = this.#index.get(key);
+    if (!values) {
+      throw new Error(`Unknown index key: ${key}`);
+    }
+    return values;
+  }
+
+  #postings(key: string, value: string): Postings {
+    const values = this.#valuesOf(key);
+    let postings = values.get(value);
+    if (!postings) {
+      postings = new Postings();
+      values.set(value, postings);
+    }
+    return postings;
+  }
+
+  #filter(key: string, values: readonly string[]): Filter<T> {
+    const index = this.#valuesOf(key);
+    const allowed = new Set(values);
+    const firstSeq = this.firstSeq;
+    const postings: Postings[] = [];
+    let size = 0;
+    for (const value of allowed) {
+      const list = index.get(value);
+      if (list) {
+        size += list.prune(firstSeq);
+        postings.push(list);
+      }
+    }
+    return {getValue: this.#spec.keys[key], allowed, postings, size};
+  }
+
+  #matches(item: T, filters: Array<Filter<T>>, since?: number): boolean {
+    for (const filter of filters) {
+      const value = filter.getValue(item);
+      if (value === undefined || !filter.allowed.has(value)) {
+        return false;
+      }
+    }
+    // 时间索引单调化后只能保证下界，元素自带时间戳时再逐条确认
+    if (since !== undefined && this.#spec.timestamp) {
+      return this.#spec.timestamp(item) >= since;
+    }
+    return true;
+  }
+
+  /**
+   * 时间戳不早于 time 的第一个序号（时间戳单调不减）
+   */
+  #seqAtTime(time: number): number {
+    const start = Math.max(this.firstSeq - this.#timeBase, 0);
+    return this.#timeBase + lowerBound(this.#times, time, start);
+  }
+
+  #indexLateKeys(seq: number, item: T): boolean {
+    const values: Array<[string, string]> = [];
+    for (const key of this.#lateKeys) {
+      const value = this.#spec.keys[key](item);
+      if (value === undefined) {
+        return false;
+      }
+      values.push([key, value]);
+    }
+    for (const [key, value] of values) {
+      this.#postings(key, value).add(seq);
+    }
+    return true;
+  }
+
+  #resolvePending(): void {
+    if (!this.#pending.length) {
+      return;
+    }
+    const firstSeq = this.firstSeq;
+    this.#pending = this.#pending.filter(
+      seq => seq >= firstSeq && !this.#indexLateKeys(seq, this.at(seq) as T),
+    );
+  }
+
+  #maintenanceInterval(): number {
+    return Math.max(COMPACT_THRESHOLD, this.length);
+  }
+
+  /**
+   * 剔除已淘汰元素在索引中的序号，释放空列表
+   */
+  #maintain(): void {
+    const firstSeq = this.firstSeq;
+    for (const values of this.#index.values()) {
+      for (const [value, postings] of values) {
+        if (postings.prune(firstSeq) === 0) {
+          values.delete(value);
+        }
+      }
+    }
+    this.#pending = this.#pending.filter(seq => seq >= firstSeq);
+    const stale = firstSeq - this.#timeBase;
+    if (stale > 0) {
+      this.#times = this.#times.slice(stale);
+      this.#timeBase = firstSeq;
+    }
+    this.#maintainedAt = this.nextSeq;
+  }
+}
+
+interface Filter<T> {
+  getValue: (item: T) => string | undefined;
+  allowed: ReadonlySet<string>;
+  postings: Postings[];
+  size: number;
+}
+
+/**
+ * 某个键值对应的序号列表
+ *
+ * 按写入顺序追加，天然升序；补录的待定元素可能乱序，下次读取前排序。
+ * 失效的序号只会出现在头部，用 start 跳过。
+ */
+class Postings {
+  seqs: number[] = [];
+  start = 0;
+  #sorted = true;
+
+  add(seq: number): void {
+    if (this.seqs.length > this.start && seq < this.seqs.at(-1)!) {
+      this.#sorted = false;
+    }
+    this.seqs.push(seq);
+  }
+
+  /**
+   * 跳过小于 firstSeq 的序号，返回剩余的条数
+   */
+  prune(firstSeq: number): number {
+    if (!this.#sorted) {
+      this.seqs = this.seqs.slice(this.start).sort((a, b) => a - b);
+      this.start = 0;
+      this.#sorted = true;
+    }
+    this.start = lowerBound(this.seqs, firstSeq, this.start);
+    if (this.start === this.seqs.length) {
+      this.seqs = [];
+      this.start = 0;
+    } else if (
+      this.start > COMPACT_THRESHOLD &&
+      this.start * 2 > this.seqs.length
+    ) {
+      this.seqs = this.seqs.slice(this.start);
+      this.start = 0;
+    }
+    return this.seqs.length - this.start;
+  }
+}
+
+/**
+ * 第一个不小于 target 的下标
+ */
+function lowerBound(values: readonly number[], target: number, start = 0) {
+  let low = start;
+  let high = values.length;
+  while (low < high) {
+    const mid = (low + high) >>> 1;
+    if (values[mid] < target) {
+      low = mid + 1;
+    } else {
+      high = mid;
+    }
+  }
+  return low;
+}
+
+function sequence(from: number, end: number): () => number | undefined {
+  let seq = from;
+  return () => (seq < end ? seq++ : undefined);
+}
+
+/**
+ * 按升序逐个产出多个序号列表的并集（同一个键的不同值之间没有重复序号）
+ */
+function unionOf(
+  postings: readonly Postings[],
+  from: number,
+): () => number | undefined {
+  // 列表在查询开始时已排序，遍历期间不会被修改
+  const lists = postings.map(list => list.seqs);
+  const positions = postings.map(list =>
+    lowerBound(list.seqs, from, list.start),
+  );
+  return () => {
+    let which = -1;
+    let min = Infinity;
+    for (let i = 0; i < lists.length; i++) {
+      const seq = lists[i][positions[i]];
+      if (seq !== undefined && seq < min) {
+        min = seq;
+        which = i;
+      }
+    }
+    if (which === -1) {
+      return undefined;
+    }
+    positions[which]++;
+    return min;
+  };
+}
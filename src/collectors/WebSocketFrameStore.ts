@@ -0,0 +1,364 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+import {createWriteStream, type WriteStream} from 'node:fs';
+import path from 'node:path';
+
+/**
+ * CDP Network.webSocketFrameSent / webSocketFrameReceived 中的一帧
+ */
+export interface WebSocketFrameInput {
+  /** WebSocket 连接的 requestId */
+  connectionId: string;
+  direction: 'sent' | 'received';
+  /** CDP MonotonicTime（秒） */
+  timestamp: number;
+  opcode: number;
+  mask: boolean;
+  /** opcode 为 1 时是文本，否则是 base64 编码的二进制数据 */
+  payloadData: string;
+}
+
+/**
+ * 存储中的一帧：payload 只保留截断后的预览和完整内容的哈希
+ */
+export interface WebSocketFrameRecord {
+  connectionId: string;
+  url?: string;
+  direction: 'sent' | 'received';
+  timestamp: number;
+  opcode: number;
+  mask: boolean;
+  /** payload 的字节数（二进制帧为解码后的字节数） */
+  size: number;
+  /** 完整 payload 的 FNV-1a 32 位哈希（8 位十六进制） */
+  hash: string;
+  preview: string;
+  truncated: boolean;
+}
+
+/**
+ * 单个连接的累计统计，每帧 O(1) 更新
+ */
+export interface WebSocketConnectionStats {
+  connectionId: string;
+  url?: string;
+  sentFrames: number;
+  receivedFrames: number;
+  sentBytes: number;
+  receivedBytes: number;
+  /** opcode → 帧数 */
+  opcodes: Record<number, number>;
+  firstTimestamp: number;
+  lastTimestamp: number;
+}
+
+export interface WebSocketFrameStoreOptions {
+  /** 预览保留的最大字符数，默认 200 */
+  previewLength?: number;
+}
+
+/** 控制帧：close / ping / pong */
+export function isControlFrame(opcode: number): boolean {
+  return opcode === 8 || opcode === 9 || opcode === 10;
+}
+
+const DEFAULT_PREVIEW_LENGTH = 200;
+
+// flags 的位布局：低 4 位为 opcode
+const OPCODE_MASK = 0x0f;
+const RECEIVED_FLAG = 0x10;
+const MASK_FLAG = 0x20;
+const TRUNCATED_FLAG = 0x40;
+
+/**
+ * WebSocket 帧的定长环形存储
+ *
+ * - 按列存放（时间戳、字节数、哈希、标志位、连接序号各一个定型数组），
+ *   每帧只新建一个截断后的预览字符串，不保留完整 payload
+ * - 满了之后覆盖最旧的帧，内存占用与捕获时长无关
+ * - 每个连接的帧数、字节数、opcode 分布随写入累加，汇总不需要再遍历帧
+ */
+export class WebSocketFrameStore {
+  readonly capacity: number;
+  #previewLength: number;
+  #timestamps: Float64Array;
+  #sizes: Uint32Array;
+  #hashes: Uint32Array;
+  #flags: Uint8Array;
+  #connections: Uint32Array;
+  #previews: string[];
+  /** 下一帧写入的位置 */
+  #head = 0;
+  #length = 0;
+  #total = 0;
+  #stats = new Map<string, WebSocketConnectionStats>();
+  /** 连接序号 → 统计（与 #connections 中的序号对应） */
+  #statsById: WebSocketConnectionStats[] = [];
+  #ids = new Map<string, number>();
+
+  constructor(capacity: number, options: WebSocketFrameStoreOptions = {}) {
+    if (!Number.isInteger(capacity) || capacity <= 0) {
+      throw new Error(`Invalid WebSocket frame capacity: ${capacity}`);
+    }
+    this.capacity = capacity;
+    this.#previewLength = options.previewLength ?? DEFAULT_PREVIEW_LENGTH;
+    this.#timestamps = new Float64Array(capacity);
+    this.#sizes = new Uint32Array(capacity);
+    this.#hashes = new Uint32Array(capacity);
+    this.#flags = new Uint8Array(capacity);
+    this.#connections = new Uint32Array(capacity);
+    this.#previews = new Array<string>(capacity).fill('');
+  }
+
+  /** 当前保留的帧数 */
+  get length(): number {
+    return this.#length;
+  }
+
+  /** 写入存储的帧总数（含已被覆盖的） */
+  get totalFrames(): number {
+    return this.#total;
+  }
+
+  /** 因容量限制被覆盖的帧数 */
+  get droppedFrames(): number {
+    return this.#total - this.#length;
+  }
+
+  /**
+   * 记录连接的 URL（Network.webSocketCreated）
+   */
+  setUrl(connectionId: string, url: string): void {
+    this.#connectionStats(connectionId).url = url;
+  }
+
+  getUrl(connectionId: string): string | undefined {
+    return this.#stats.get(connectionId)?.url;
+  }
+
+  /**
+   * 累加统计并把帧写入环形存储
+   *
+   * 时间复杂度: O(payload 长度)（计算字节数和哈希），不分配与 payload 等长的内存
+   */
+  add(frame: WebSocketFrameInput): void {
+    const stats = this.#connectionStats(frame.connectionId);
+    const size = payloadSize(frame.opcode, frame.payloadData);
+    if (frame.direction === 'sent') {
+      stats.sentFrames++;
+      stats.sentBytes += size;
+    } else {
+      stats.receivedFrames++;
+      stats.receivedBytes += size;
+    }
+    stats.opcodes[frame.opcode] = (stats.opcodes[frame.opcode] ?? 0) + 1;
+    if (stats.sentFrames + stats.receivedFrames === 1) {
+      stats.firstTimestamp = frame.timestamp;
+    }
+    stats.lastTimestamp = Math.max(stats.lastTimestamp, frame.timestamp);
+
+    const slot = this.#head;
+    const truncated = frame.payloadData.length > this.#previewLength;
+    this.#timestamps[slot] = frame.timestamp;
+    this.#sizes[slot] = Math.min(size, 0xffffffff);
+    this.#hashes[slot] = fnv1a(frame.payloadData);
+    this.#flags[slot] =
+      (frame.opcode & OPCODE_MASK) |
+      (frame.direction === 'received' ? RECEIVED_FLAG : 0) |
+      (frame.mask ? MASK_FLAG : 0) |
+      (truncated ? TRUNCATED_FLAG : 0);
+    this.#connections[slot] = this.#ids.get(frame.connectionId)!;
+    this.#previews[slot] = truncated
+      ? preview(frame.payloadData, this.#previewLength)
+      : frame.payloadData;
+
+    this.#head = (slot + 1) % this.capacity;
+    this.#length = Math.min(this.#length + 1, this.capacity);
+    this.#total++;
+  }
+
+  /**
+   * 按写入顺序返回保留的帧（最旧的在前）；给出 limit 时只返回最近的 limit 帧
+   */
+  toArray(limit = this.#length): WebSocketFrameRecord[] {
+    const count = Math.min(limit, this.#length);
+    const start = (this.#head - count + this.capacity) % this.capacity;
+    const frames: WebSocketFrameRecord[] = [];
+    for (let i = 0; i < count; i++) {
+      const slot = (start + i) % this.capacity;
+      const flags = this.#flags[slot];
+      const stats = this.#statsById[this.#connections[slot]];
+      frames.push({
+        connectionId: stats.connectionId,
+        url: stats.url,
+        direction: flags & RECEIVED_FLAG ? 'received' : 'sent',
+        timestamp: this.#timestamps[slot],
+        opcode: flags & OPCODE_MASK,
+        mask: (flags & MASK_FLAG) !== 0,
+        size: this.#sizes[slot],
+        hash: this.#hashes[slot].toString(16).padStart(8, '0'),
+        preview: this.#previews[slot],
+        truncated: (flags & TRUNCATED_FLAG) !== 0,
+      });
+    }
+    return frames;
+  }
+
+  /**
+   * 有帧的连接的累计统计（按首帧时间排序）
+   */
+  connections(): WebSocketConnectionStats[] {
+    return [...this.#stats.values()]
+      .filter(stats => stats.sentFrames + stats.receivedFrames > 0)
+      .sort((a, b) => a.firstTimestamp - b.firstTimestamp);
+  }
+
+  /**
+   * 所有连接合计的统计
+   */
+  totals(): Omit<WebSocketConnectionStats, 'connectionId' | 'url'> {
+    const totals = {
+      sentFrames: 0,
+      receivedFrames: 0,
+      sentBytes: 0,
+      receivedBytes: 0,
+      opcodes: {} as Record<number, number>,
+      firstTimestamp: Infinity,
+      lastTimestamp: -Infinity,
+    };
+    for (const stats of this.connections()) {
+      totals.sentFrames += stats.sentFrames;
+      totals.receivedFrames += stats.receivedFrames;
+      totals.sentBytes += stats.sentBytes;
+      totals.receivedBytes += stats.receivedBytes;
+      for (const [opcode, count] of Object.entries(stats.opcodes)) {
+        totals.opcodes[Number(opcode)] =
+          (totals.opcodes[Number(opcode)] ?? 0) + count;
+      }
+      totals.firstTimestamp = Math.min(
+        totals.firstTimestamp,
+        stats.firstTimestamp,
+      );
+      totals.lastTimestamp = Math.max(
+        totals.lastTimestamp,
+        stats.lastTimestamp,
+      );
+    }
+    return totals;
+  }
+
+  #connectionStats(connectionId: string): WebSocketConnectionStats {
+    let stats = this.#stats.get(connectionId);
+    if (!stats) {
+      stats = {
+        connectionId,
+        sentFrames: 0,
+        receivedFrames: 0,
+        sentBytes: 0,
+        receivedBytes: 0,
+        opcodes: {},
+        firstTimestamp: 0,
+        lastTimestamp: 0,
+      };
+      this.#stats.set(connectionId, stats);
+      this.#ids.set(connectionId, this.#statsById.length);
+      this.#statsById.push(stats);
+    }
+    return stats;
+  }
+}
+
+/**
+ * payload 的字节数：文本帧按 UTF-8 计算，其它帧按 base64 解码后的长度计算
+ */
+export function payloadSize(opcode: number, payloadData: string): number {
+  if (opcode === 1) {
+    return Buffer.byteLength(payloadData, 'utf8');
+  }
+  const length = payloadData.length;
+  if (length === 0) {
+    return 0;
+  }
+  let padding = 0;
+  if (payloadData.charCodeAt(length - 1) === 61 /* = */) {
+    padding++;
+    if (payloadData.charCodeAt(length - 2) === 61) {
+      padding++;
+    }
+  }
+  return Math.floor((length * 3) / 4) - padding;
+}
+
+/**
+ * 字符串（UTF-16 码元）的 FNV-1a 32 位哈希
+ */
+export function fnv1a(text: string): number {
+  let hash = 0x811c9dc5;
+  for (let i = 0; i < text.length; i++) {
+    hash ^= text.charCodeAt(i);
+    hash = Math.imul(hash, 0x01000193);
+  }
+  return hash >>> 0;
+}
+
+/**
+ * 截取前 length 个字符并复制一份：V8 的 slice 结果会引用原字符串，
+ * 直接保存会让整个 payload 一直留在内存里
+ */
+function preview(text: string, length: number): string {
+  const code = text.charCodeAt(length - 1);
+  // 不把代理对从中间截断
+  const end = code >= 0xd800 && code <= 0xdbff ? length - 1 : length;
+  return Buffer.from(text.slice(0, end), 'utf8').toString('utf8');
+}
+
+/** 写入文件的缓冲超过这个大小时丢弃后续的帧 */
+const MAX_PENDING_BYTES = 16 * 1024 * 1024;
+
+/**
+ * 把捕获的帧（含完整 payload）逐行写入 JSONL 文件
+ *
+ * 写入是异步的；磁盘跟不上时不无限缓冲，超过 MAX_PENDING_BYTES 的帧被丢弃并计数。
+ */
+export class WebSocketCaptureFile {
+  readonly filename: string;
+  written = 0;
+  dropped = 0;
+  #stream: WriteStream;
+  #error?: Error;
+
+  constructor(filename: string) {
+    this.filename = path.resolve(filename);
+    this.#stream = createWriteStream(this.filename);
+    this.#stream.on('error', error => {
+      this.#error = error;
+    });
+  }
+
+  write(frame: WebSocketFrameInput, url?: string): void {
+    if (this.#error || this.#stream.writableLength > MAX_PENDING_BYTES) {
+      this.dropped++;
+      return;
+    }
+    this.#stream.write(JSON.stringify({...frame, url}) + '\n');
+    this.written++;
+  }
+
+  /**
+   * 写完缓冲中的内容并关闭文件；写入出错时抛出
+   */
+  async close(): Promise<void> {
+    if (!this.#error) {
+      await new Promise<void>(resolve => this.#stream.end(resolve));
+    }
+    if (this.#error) {
+      throw new Error(`Could not write WebSocket capture to ${this.filename}`, {
+        cause: this.#error,
+      });
+    }
+  }
+}
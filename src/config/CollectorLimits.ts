@@ -0,0 +1,35 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+import {readPositiveIntEnv} from '../utils/common.js';
+
+/**
+ * 收集器容量配置
+ *
+ * 控制台消息和网络请求按页面保存在环形缓冲区中，超出上限时淘汰最旧的条目：
+ * - MCP_COLLECTOR_MAX_PER_PAGE: 每个页面每类数据最多保留的条数（默认 1000）
+ * - MCP_COLLECTOR_MAX_TOTAL:    同一类数据在所有页面上的总条数上限（默认 10000）
+ */
+
+export const DEFAULT_MAX_PER_PAGE = 1000;
+export const DEFAULT_MAX_TOTAL = 10000;
+
+export interface CollectorLimits {
+  maxPerPage: number;
+  maxTotal: number;
+}
+
+export function getCollectorLimits(): CollectorLimits {
+  const maxPerPage = readPositiveIntEnv(
+    'MCP_COLLECTOR_MAX_PER_PAGE',
+    DEFAULT_MAX_PER_PAGE,
+  );
+  const maxTotal = readPositiveIntEnv(
+    'MCP_COLLECTOR_MAX_TOTAL',
+    DEFAULT_MAX_TOTAL,
+  );
+  return {maxPerPage, maxTotal: Math.max(maxTotal, maxPerPage)};
+}
@@ -0,0 +1,40 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+import {readPositiveIntEnv} from '../utils/common.js';
+
+/**
+ * 大响应的流式发送配置
+ *
+ * 客户端在 tools/call 的 _meta 中同时提供 progressToken 和
+ * `"chrome-devtools-mcp/stream": true` 时，超过阈值的响应文本会边格式化边以
+ * notifications/progress（message 字段）分块发送，最终结果只包含摘要：
+ * - MCP_STREAM_THRESHOLD:  响应文本超过多少字符才分块发送（默认 65536）
+ * - MCP_STREAM_CHUNK_SIZE: 每个通知携带的字符数（默认 16384）
+ */
+
+export const STREAM_META_KEY = 'chrome-devtools-mcp/stream';
+
+export const DEFAULT_STREAM_THRESHOLD = 64 * 1024;
+export const DEFAULT_STREAM_CHUNK_SIZE = 16 * 1024;
+
+export interface ResponseStreamingConfig {
+  threshold: number;
+  chunkSize: number;
+}
+
+export function getResponseStreamingConfig(): ResponseStreamingConfig {
+  return {
+    threshold: readPositiveIntEnv(
+      'MCP_STREAM_THRESHOLD',
+      DEFAULT_STREAM_THRESHOLD,
+    ),
+    chunkSize: readPositiveIntEnv(
+      'MCP_STREAM_CHUNK_SIZE',
+      DEFAULT_STREAM_CHUNK_SIZE,
+    ),
+  };
+}
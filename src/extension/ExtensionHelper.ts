@@ -7,8 +7,19 @@
 import type {Browser, Page, CDPSession} from 'puppeteer';
 import type {Protocol} from 'puppeteer';
 
+import {
+  ExtensionSessionPool,
+  type ExtensionTargetInfo,
+  type ExtensionSessionPoolStats,
+} from '../cdp/ExtensionSessionPool.js';
 import {logger} from '../logger.js';
 
+import {
+  ExtensionMetadataCache,
+  type ExtensionMetadataCacheStats,
+  type UrlMatcher,
+} from './ExtensionMetadataCache.js';
+
 import type {
   ExtensionInfo,
   ExtensionContext,
@@ -19,14 +30,7 @@ import type {
   ExtensionContextType,
 } from './types.js';
 
-interface CDPTargetInfo {
-  targetId: string;
-  type: string;
-  title: string;
-  url: string;
-  attached: boolean;
-  canAccessOpener: boolean;
-}
+type CDPTargetInfo = ExtensionTargetInfo;
 
 /**
  * Chrome Management API types
@@ -98,8 +102,12 @@ export interface ExtensionHelperOptions {
  * 参考 chrome-extension-debug-mcp 的实现方式
  */
 export class ExtensionHelper {
-  private cdpSession: CDPSession | null = null;
+  private cdpSession: Promise<CDPSession> | null = null;
   private options: Required<ExtensionHelperOptions>;
+  // 扩展 target 的 session 和 target 列表缓存，随 target 事件失效
+  private sessionPool: ExtensionSessionPool;
+  // manifest、match pattern 和扩展列表缓存（按扩展 ID + 版本）
+  private metadataCache: ExtensionMetadataCache;
 
   constructor(
     private browser: Browser,
@@ -116,9 +124,51 @@ export class ExtensionHelper {
         useConsole: options.logging?.useConsole || false,
       },
     };
+    this.sessionPool = new ExtensionSessionPool(this.browser, async () => {
+      const cdp = await this.getCDPSession();
+      const {targetInfos} = await cdp.send('Target.getTargets');
+      return targetInfos as CDPTargetInfo[];
+    });
+    this.metadataCache = new ExtensionMetadataCache(this.browser);
     // Helper Client 将在第一次需要时初始化
   }
 
+  /**
+   * 扩展元数据缓存的命中统计
+   */
+  getMetadataCacheStats(): ExtensionMetadataCacheStats {
+    return this.metadataCache.getStats();
+  }
+
+  /**
+   * 丢弃扩展的 manifest、match pattern 和扩展列表缓存（重新加载扩展后调用）
+   */
+  invalidateExtension(extensionId: string): void {
+    this.metadataCache.invalidate(extensionId);
+  }
+
+  /**
+   * 获取扩展的 content script match pattern 匹配函数（按扩展 ID + 版本缓存）
+   */
+  getMatchPattern(extension: ExtensionInfo, pattern: string): UrlMatcher {
+    return this.metadataCache.getMatcher(extension, pattern);
+  }
+
+  /**
+   * 扩展 target session 池的统计
+   */
+  getSessionPoolStats(): ExtensionSessionPoolStats {
+    return this.sessionPool.getStats();
+  }
+
+  /**
+   * 分离池中的 session、清空元数据缓存并移除浏览器事件监听
+   */
+  dispose(): void {
+    this.sessionPool.dispose();
+    this.metadataCache.dispose();
+  }
+
   /**
    * 日志方法（使用项目统一的 logger 系统）
    */
@@ -144,14 +194,20 @@ export class ExtensionHelper {
    * 获取 CDP Session
    */
   private async getCDPSession(): Promise<CDPSession> {
+    // 缓存 Promise 而不是结果：并发调用（只读工具可以并发执行）共享同一个会话
     if (!this.cdpSession) {
-      const pages = await this.browser.pages();
-      if (pages.length === 0) {
-        throw new Error('No pages available to create CDP session');
-      }
-      this.cdpSession = await pages[0].createCDPSession();
+      this.cdpSession = (async () => {
+        const pages = await this.browser.pages();
+        if (pages.length === 0) {
+          throw new Error('No pages available to create CDP session');
+        }
+        return await pages[0].createCDPSession();
+      })();
+      this.cdpSession.catch(() => {
+        this.cdpSession = null;
+      });
     }
-    return this.cdpSession;
+    return await this.cdpSession;
   }
 
   /**
@@ -476,10 +532,12 @@ export class ExtensionHelper {
 
       // 🚀 并行获取所有扩展的 manifest
       const manifestPromises = managementData.map((ext: ManagementExtension) =>
-        this.getExtensionManifestQuick(ext.id).then(manifest => ({
-          ext,
-          manifest,
-        })),
+        this.getExtensionManifestQuick(ext.id, ext.version).then(
+          manifest => ({
+            ext,
+            manifest,
+          }),
+        ),
       );
 
       const manifestResults = await Promise.all(manifestPromises);
@@ -514,6 +572,7 @@ export class ExtensionHelper {
           serviceWorkerStatus,
           permissions: ext.permissions || [],
           hostPermissions: ext.hostPermissions || [],
+          manifest: manifest ?? undefined,
         });
       }
 
@@ -689,17 +748,28 @@ export class ExtensionHelper {
   }
 
   /**
-   * 获取所有扩展信息（优化版：三层回退策略）
+   * 获取所有扩展信息
+   *
+   * 扩展的 target 未变化时直接返回上一次的检测结果
    */
   async getExtensions(includeDisabled = false): Promise<ExtensionInfo[]> {
+    return await this.metadataCache.getExtensions(includeDisabled, () =>
+      this.discoverExtensions(includeDisabled),
+    );
+  }
+
+  /**
+   * 检测所有扩展（优化版：三层回退策略）
+   */
+  private async discoverExtensions(
+    includeDisabled: boolean,
+  ): Promise<ExtensionInfo[]> {
     try {
       this.log('=== 开始扩展检测 ===');
       this.log(`[ExtensionHelper] includeDisabled: ${includeDisabled}`);
 
       // 获取所有 targets（只调用一次）
-      const cdp = await this.getCDPSession();
-      const {targetInfos} = await cdp.send('Target.getTargets');
-      const allTargets = targetInfos as CDPTargetInfo[];
+      const allTargets = await this.sessionPool.getTargets();
 
       this.log(
         `[ExtensionHelper] CDP Target.getTargets 返回 ${allTargets.length} 个 targets`,
@@ -871,6 +941,7 @@ export class ExtensionHelper {
             manifestVersion === 3
               ? (manifest as ManifestV3).host_permissions
               : undefined,
+          manifest,
         });
       }
 
@@ -908,24 +979,16 @@ export class ExtensionHelper {
 
   /**
    * 快速获取 manifest（用于批量处理，带缓存和快速失败）
+   *
+   * 按扩展 ID + 版本缓存（包括 null）；传入 version 且与缓存不同时重新读取
    */
-  private manifestCache = new Map<string, ManifestV2 | ManifestV3 | null>();
-
   private async getExtensionManifestQuick(
     extensionId: string,
+    version?: string,
   ): Promise<(ManifestV2 | ManifestV3) | null> {
-    // 检查缓存
-    if (this.manifestCache.has(extensionId)) {
-      return this.manifestCache.get(extensionId)!;
-    }
-
-    // 调用原有方法
-    const manifest = await this.getExtensionManifest(extensionId);
-
-    // 缓存结果（包括 null）
-    this.manifestCache.set(extensionId, manifest);
-
-    return manifest;
+    return await this.metadataCache.getManifest(extensionId, version, () =>
+      this.getExtensionManifest(extensionId),
+    );
   }
 
   /**
@@ -939,15 +1002,13 @@ export class ExtensionHelper {
   ): Promise<ExtensionInfo | null> {
     try {
       // 1. 获取该扩展的 manifest
-      const manifest = await this.getExtensionManifest(extensionId);
+      const manifest = await this.getExtensionManifestQuick(extensionId);
       if (!manifest) {
         return null;
       }
 
-      // 2. 获取 targets（轻量级操作）
-      const cdp = await this.getCDPSession();
-      const {targetInfos} = await cdp.send('Target.getTargets');
-      const allTargets = targetInfos as CDPTargetInfo[];
+      // 2. 获取 targets（target 未变化时复用缓存）
+      const allTargets = await this.sessionPool.getTargets();
 
       // 3. 查找该扩展的 background target
       const backgroundTarget =
@@ -981,6 +1042,7 @@ export class ExtensionHelper {
           manifest.manifest_version === 3
             ? (manifest as ManifestV3).host_permissions
             : undefined,
+        manifest,
       };
     } catch (_error) {
       // 静默失败
@@ -998,9 +1060,7 @@ export class ExtensionHelper {
       // 获取 manifest 用于精确判断类型
       const manifest = await this.getExtensionManifestQuick(extensionId);
 
-      const cdp = await this.getCDPSession();
-      const result = await cdp.send('Target.getTargets');
-      const targets = result.targetInfos as CDPTargetInfo[];
+      const targets = await this.sessionPool.getTargets();
 
       const contexts: ExtensionContext[] = [];
 
@@ -1101,9 +1161,7 @@ export class ExtensionHelper {
    */
   async switchToExtensionContext(contextId: string): Promise<Page> {
     try {
-      const cdp = await this.getCDPSession();
-      const result = await cdp.send('Target.getTargets');
-      const targets = result.targetInfos as CDPTargetInfo[];
+      const targets = await this.sessionPool.getTargets();
 
       const target = targets.find(t => t.targetId === contextId);
 
@@ -1150,9 +1208,7 @@ export class ExtensionHelper {
     extensionId: string,
   ): Promise<CDPTargetInfo | null> {
     try {
-      const cdp = await this.getCDPSession();
-      const result = await cdp.send('Target.getTargets');
-      const targets = result.targetInfos as CDPTargetInfo[];
+      const targets = await this.sessionPool.getTargets();
 
       const backgroundTarget = targets.find(
         t =>
@@ -1180,9 +1236,7 @@ export class ExtensionHelper {
     extensionId: string,
   ): Promise<CDPTargetInfo | null> {
     try {
-      const cdp = await this.getCDPSession();
-      const result = await cdp.send('Target.getTargets');
-      const targets = result.targetInfos as CDPTargetInfo[];
+      const targets = await this.sessionPool.getTargets();
 
       // 直接通过 URL 匹配，不限制 type
       // 因为 Offscreen Document 的 type 在不同 Chrome 版本可能不同
@@ -1383,7 +1437,7 @@ export class ExtensionHelper {
     suggestion?: string;
   }> {
     try {
-      const manifest = await this.getExtensionManifest(extensionId);
+      const manifest = await this.getExtensionManifestQuick(extensionId);
       if (!manifest) {
         return {
           success: false,
@@ -1643,6 +1697,7 @@ export class ExtensionHelper {
       lineNumber?: number;
     }> = [];
     let swSession: CDPSession | null = null;
+    let backgroundTargetId: string | null = null;
 
     try {
       // 1. 找到 Service Worker target（使用 Puppeteer Target API）
@@ -1651,6 +1706,7 @@ export class ExtensionHelper {
       if (!backgroundTarget) {
         return {logs: [], isActive: false};
       }
+      backgroundTargetId = backgroundTarget.targetId;
 
       // 2. 通过 URL 匹配找到对应的 Puppeteer Target（更可靠）
       const targets = await this.browser.targets();
@@ -1681,18 +1737,9 @@ export class ExtensionHelper {
 
       this.log(`[ExtensionHelper] Found Background target: ${swTarget.url()}`);
 
-      // 3. 创建独立的 CDPSession for Service Worker
-      // Add timeout protection for CDPSession creation
-      const sessionPromise = swTarget.createCDPSession();
-      const sessionTimeout = new Promise((_, reject) => {
-        setTimeout(
-          () => reject(new Error('CDPSession creation timeout (5s)')),
-          5000,
-        );
-      });
-      const session = await Promise.race([sessionPromise, sessionTimeout]);
-      swSession = session as CDPSession;
-      this.log('[ExtensionHelper] 已为 Service Worker 创建独立 CDPSession');
+      // 3. 获取 Service Worker 的 CDPSession（池中已附加且启用了 Runtime）
+      swSession = await this.sessionPool.acquire(backgroundTargetId, swTarget);
+      this.log('[ExtensionHelper] 已获取 Service Worker CDPSession');
 
       // 4. 获取历史日志（如果需要） - 使用 CDP Log domain
       const historicalLogs: Array<{
@@ -1773,15 +1820,6 @@ export class ExtensionHelper {
           lineNumber?: number;
         }> = [];
 
-        // 启用 Runtime domain（在 SW session 上）（带超时保护）
-        await this.cdpSendWithTimeout(
-          swSession,
-          'Runtime.enable',
-          undefined,
-          3000,
-        );
-        this.log('[ExtensionHelper] 已在 SW session 上启用 Runtime domain');
-
         // 监听 console API 调用（在 SW session 上）
         const consoleHandler = (event: ConsoleAPICalledEvent) => {
           this.log(
@@ -1827,17 +1865,9 @@ export class ExtensionHelper {
         this.log(`[ExtensionHelper] 捕获日志 ${duration}ms...`);
         await new Promise(resolve => setTimeout(resolve, duration));
 
-        // 停止监听
+        // 停止监听（Runtime domain 保持启用，供下次调用复用）
         swSession.off('Runtime.consoleAPICalled', consoleHandler);
 
-        // 禁用 Runtime domain（带超时保护）
-        await this.cdpSendWithTimeout(
-          swSession,
-          'Runtime.disable',
-          undefined,
-          3000,
-        );
-
         const captureEndTime = Date.now();
 
         captureInfo = {
@@ -1855,13 +1885,6 @@ export class ExtensionHelper {
         logs.push(...capturedLogs);
       }
 
-      // 6. 分离 session
-      if (swSession) {
-        await swSession.detach();
-        swSession = null;
-        this.log('[ExtensionHelper] 已分离 SW CDPSession');
-      }
-
       // 按时间戳排序
       logs.sort((a, b) => a.timestamp - b.timestamp);
 
@@ -1871,17 +1894,18 @@ export class ExtensionHelper {
         captureInfo,
       };
     } catch (error) {
-      // 清理
-      if (swSession) {
-        try {
-          await swSession.detach();
-        } catch (_e) {
-          // Ignore
-        }
+      // session 可能已不可用，从池中丢弃，下次重新附加
+      if (swSession && backgroundTargetId) {
+        this.sessionPool.invalidate(backgroundTargetId);
       }
 
       this.logError(`[ExtensionHelper] getBackgroundLogs 失败:`, error);
       return {logs: [], isActive: false};
+    } finally {
+      // 归还 session：空闲一段时间后池会关闭 Runtime 并分离，不让 Worker 一直保持活跃
+      if (swSession && backgroundTargetId) {
+        this.sessionPool.release(backgroundTargetId);
+      }
     }
   }
 
@@ -1939,6 +1963,7 @@ export class ExtensionHelper {
       lineNumber?: number;
     }> = [];
     let offscreenSession: CDPSession | null = null;
+    let offscreenTargetId: string | null = null;
 
     try {
       // 1. 找到 Offscreen Document target
@@ -1947,6 +1972,7 @@ export class ExtensionHelper {
       if (!offscreenTarget) {
         return {logs: [], isActive: false};
       }
+      offscreenTargetId = offscreenTarget.targetId;
 
       // 2. 通过 URL 匹配找到对应的 Puppeteer Target（更可靠）
       const targets = await this.browser.targets();
@@ -1977,21 +2003,12 @@ export class ExtensionHelper {
 
       this.log(`[ExtensionHelper] Found Offscreen target: ${offTarget.url()}`);
 
-      // 3. 创建独立的 CDPSession for Offscreen Document
-      // Add timeout protection for CDPSession creation
-      const offSessionPromise = offTarget.createCDPSession();
-      const offSessionTimeout = new Promise((_, reject) => {
-        setTimeout(
-          () => reject(new Error('Offscreen CDPSession creation timeout (5s)')),
-          5000,
-        );
-      });
-      const session = await Promise.race([
-        offSessionPromise,
-        offSessionTimeout,
-      ]);
-      offscreenSession = session as CDPSession;
-      this.log('[ExtensionHelper] 已为 Offscreen Document 创建独立 CDPSession');
+      // 3. 获取 Offscreen Document 的 CDPSession（池中已附加且启用了 Runtime）
+      offscreenSession = await this.sessionPool.acquire(
+        offscreenTargetId,
+        offTarget,
+      );
+      this.log('[ExtensionHelper] 已获取 Offscreen Document CDPSession');
 
       // 4. 获取历史日志（如果需要） - 使用 CDP Log domain
       const historicalLogs: Array<{
@@ -2079,17 +2096,6 @@ export class ExtensionHelper {
           lineNumber?: number;
         }> = [];
 
-        // 启用 Runtime domain（带超时保护）
-        await this.cdpSendWithTimeout(
-          offscreenSession,
-          'Runtime.enable',
-          undefined,
-          3000,
-        );
-        this.log(
-          '[ExtensionHelper] 已在 Offscreen session 上启用 Runtime domain',
-        );
-
         // 监听 console API 调用
         const consoleHandler = (event: ConsoleAPICalledEvent) => {
           this.log(
@@ -2135,17 +2141,9 @@ export class ExtensionHelper {
         this.log(`[ExtensionHelper] 捕获 Offscreen 日志 ${duration}ms...`);
         await new Promise(resolve => setTimeout(resolve, duration));
 
-        // 停止监听
+        // 停止监听（Runtime domain 保持启用，供下次调用复用）
         offscreenSession.off('Runtime.consoleAPICalled', consoleHandler);
 
-        // 禁用 Runtime domain（带超时保护）
-        await this.cdpSendWithTimeout(
-          offscreenSession,
-          'Runtime.disable',
-          undefined,
-          3000,
-        );
-
         const captureEndTime = Date.now();
 
         captureInfo = {
@@ -2163,13 +2161,6 @@ export class ExtensionHelper {
         logs.push(...capturedLogs);
       }
 
-      // 6. 分离 session
-      if (offscreenSession) {
-        await offscreenSession.detach();
-        offscreenSession = null;
-        this.log('[ExtensionHelper] 已分离 Offscreen CDPSession');
-      }
-
       // 按时间戳排序
       logs.sort((a, b) => a.timestamp - b.timestamp);
 
@@ -2179,17 +2170,18 @@ export class ExtensionHelper {
         captureInfo,
       };
     } catch (error) {
-      // 清理
-      if (offscreenSession) {
-        try {
-          await offscreenSession.detach();
-        } catch (_e) {
-          // Ignore
-        }
+      // session 可能已不可用，从池中丢弃，下次重新附加
+      if (offscreenSession && offscreenTargetId) {
+        this.sessionPool.invalidate(offscreenTargetId);
       }
 
       this.logError(`[ExtensionHelper] getOffscreenLogs 失败:`, error);
       return {logs: [], isActive: false};
+    } finally {
+      // 归还 session：空闲一段时间后池会关闭 Runtime 并分离，不让 Worker 一直保持活跃
+      if (offscreenSession && offscreenTargetId) {
+        this.sessionPool.release(offscreenTargetId);
+      }
     }
   }
 
@@ -0,0 +1,297 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+import type {Browser, Target} from 'puppeteer';
+
+import type {ExtensionInfo, ManifestV2, ManifestV3} from './types.js';
+
+type Manifest = ManifestV2 | ManifestV3;
+
+/**
+ * 编译后的 match pattern：输入已解析的 URL，返回是否匹配
+ */
+export type UrlMatcher = (url: URL) => boolean;
+
+interface CounterPair {
+  hits: number;
+  misses: number;
+}
+
+export interface ExtensionMetadataCacheStats {
+  manifests: CounterPair;
+  matchPatterns: CounterPair;
+  discovery: CounterPair;
+  /** 因扩展 target 变化或重新加载而丢弃缓存的次数 */
+  invalidations: number;
+  /** 当前缓存的扩展数 */
+  extensions: number;
+}
+
+interface ExtensionEntry {
+  /** manifest 中的版本；未读取到 manifest 时为 undefined */
+  version: string | undefined;
+  /** 尚未读取 manifest 时为 null */
+  manifest: Promise<Manifest | null> | null;
+  /** manifest 已读取但为空（扩展被禁用或读取超时） */
+  missing: boolean;
+  matchers: Map<string, UrlMatcher>;
+}
+
+const EXTENSION_URL_PREFIX = 'chrome-extension://';
+
+/**
+ * 匹配 host
+ */
+function matchHost(host: string, pattern: string): boolean {
+  if (pattern === '*') {
+    return true;
+  }
+
+  // *.example.com 匹配 example.com 和所有子域
+  if (pattern.startsWith('*.')) {
+    const baseDomain = pattern.substring(2);
+    return host === baseDomain || host.endsWith('.' + baseDomain);
+  }
+
+  return host === pattern;
+}
+
+/**
+ * 把 content script 的 match pattern 编译为匹配函数
+ *
+ * 支持 `<all_urls>` 和 `scheme://host/path`（scheme 可为 *，host 可为 * 或
+ * *.example.com，path 中的 * 匹配任意字符）；无法解析的模式不匹配任何 URL。
+ */
+export function compileMatchPattern(pattern: string): UrlMatcher {
+  // <all_urls> 匹配所有
+  if (pattern === '<all_urls>') {
+    return url =>
+      url.protocol === 'http:' ||
+      url.protocol === 'https:' ||
+      url.protocol === 'file:';
+  }
+
+  // 解析 pattern: scheme://host/path
+  const patternParts = pattern.match(
+    /^(\*|https?|file|ftp):\/\/([^/]+)(\/.*)$/,
+  );
+  if (!patternParts) {
+    return () => false;
+  }
+
+  const [, schemePattern, hostPattern, pathPattern] = patternParts;
+  // 将 path pattern 转换为正则表达式
+  const regexPattern = pathPattern
+    .replace(/[.+?^${}()|[\]\\]/g, '\\$&') // 转义特殊字符
+    .replace(/\*/g, '.*'); // * 匹配任意字符
+  const pathRegex = new RegExp('^' + regexPattern + '$');
+
+  return url => {
+    const urlScheme = url.protocol.slice(0, -1); // 移除 ':'
+    if (schemePattern !== '*' && schemePattern !== urlScheme) {
+      return false;
+    }
+    return matchHost(url.hostname, hostPattern) && pathRegex.test(url.pathname);
+  };
+}
+
+/**
+ * 扩展元数据缓存
+ *
+ * list_extensions、get_extension_details、inspect_extension_manifest、
+ * check_content_script_injection 等只读工具每次调用都要重新枚举扩展、
+ * 打开 manifest.json 读取 manifest，内容脚本检查还要重新解析 match pattern。
+ * 这里按扩展 ID + 版本缓存：
+ * - manifest：已知版本（chrome.management 返回的 version）与缓存不同时重新读取
+ * - 编译后的 match pattern：随所属扩展的缓存条目一起失效
+ * - 扩展列表（按 includeDisabled 分别缓存，空结果不缓存）
+ *
+ * 失效：
+ * - chrome-extension:// target 创建、变化或销毁时丢弃扩展列表
+ *   （Service Worker 启停会改变列表中的状态），以及该扩展读取失败的 manifest
+ * - reload_extension 重新加载扩展时丢弃该扩展的全部缓存
+ */
+export class ExtensionMetadataCache {
+  #browser: Browser;
+  #entries = new Map<string, ExtensionEntry>();
+  #discovery = new Map<boolean, Promise<ExtensionInfo[]>>();
+  #listening = false;
+  #stats = {
+    manifests: {hits: 0, misses: 0},
+    matchPatterns: {hits: 0, misses: 0},
+    discovery: {hits: 0, misses: 0},
+    invalidations: 0,
+  };
+
+  constructor(browser: Browser) {
+    this.#browser = browser;
+  }
+
+  /**
+   * 获取扩展的 manifest
+   *
+   * @param version - 已知的扩展版本；与缓存的版本不同时重新读取，省略时接受缓存
+   * @param load - 缓存未命中时读取 manifest
+   */
+  async getManifest(
+    extensionId: string,
+    version: string | undefined,
+    load: () => Promise<Manifest | null>,
+  ): Promise<Manifest | null> {
+    this.#listen();
+    let entry = this.#entries.get(extensionId);
+    const sameVersion =
+      entry && (version === undefined || entry.version === version);
+    if (entry?.manifest && sameVersion) {
+      this.#stats.manifests.hits++;
+      return await entry.manifest;
+    }
+
+    this.#stats.manifests.misses++;
+    if (!entry || !sameVersion) {
+      // 版本变化：丢弃旧版本的 manifest 和 match pattern
+      entry = {version, manifest: null, missing: false, matchers: new Map()};
+      this.#entries.set(extensionId, entry);
+    }
+    const created = entry;
+    const manifest = load();
+    created.manifest = manifest;
+    manifest.then(
+      value => {
+        created.version = value?.version ?? created.version;
+        created.missing = value === null;
+      },
+      () => {
+        if (created.manifest === manifest) {
+          created.manifest = null;
+        }
+      },
+    );
+    return await manifest;
+  }
+
+  /**
+   * 获取扩展列表；chrome-extension:// target 未变化时复用上一次的结果
+   */
+  async getExtensions(
+    includeDisabled: boolean,
+    load: () => Promise<ExtensionInfo[]>,
+  ): Promise<ExtensionInfo[]> {
+    this.#listen();
+    const cached = this.#discovery.get(includeDisabled);
+    if (cached) {
+      this.#stats.discovery.hits++;
+      return await cached;
+    }
+
+    this.#stats.discovery.misses++;
+    const extensions = load();
+    this.#discovery.set(includeDisabled, extensions);
+    const forget = () => {
+      if (this.#discovery.get(includeDisabled) === extensions) {
+        this.#discovery.delete(includeDisabled);
+      }
+    };
+    // 空列表通常意味着检测失败，不缓存
+    extensions.then(list => {
+      if (list.length === 0) {
+        forget();
+      }
+    }, forget);
+    return await extensions;
+  }
+
+  /**
+   * 按扩展 ID + 版本获取编译后的 match pattern
+   */
+  getMatcher(extension: ExtensionInfo, pattern: string): UrlMatcher {
+    let entry = this.#entries.get(extension.id);
+    if (!entry || entry.version !== extension.version) {
+      entry = {
+        version: extension.version,
+        manifest: extension.manifest
+          ? Promise.resolve(extension.manifest)
+          : null,
+        missing: false,
+        matchers: new Map(),
+      };
+      this.#entries.set(extension.id, entry);
+    }
+
+    let matcher = entry.matchers.get(pattern);
+    if (matcher) {
+      this.#stats.matchPatterns.hits++;
+      return matcher;
+    }
+    this.#stats.matchPatterns.misses++;
+    matcher = compileMatchPattern(pattern);
+    entry.matchers.set(pattern, matcher);
+    return matcher;
+  }
+
+  /**
+   * 丢弃扩展的全部缓存（例如重新加载之后）；省略 extensionId 时清空所有扩展
+   */
+  invalidate(extensionId?: string): void {
+    if (extensionId === undefined) {
+      this.#entries.clear();
+    } else {
+      this.#entries.delete(extensionId);
+    }
+    this.#discovery.clear();
+    this.#stats.invalidations++;
+  }
+
+  getStats(): ExtensionMetadataCacheStats {
+    return {
+      manifests: {...this.#stats.manifests},
+      matchPatterns: {...this.#stats.matchPatterns},
+      discovery: {...this.#stats.discovery},
+      invalidations: this.#stats.invalidations,
+      extensions: this.#entries.size,
+    };
+  }
+
+  /**
+   * 移除浏览器事件监听并清空缓存
+   */
+  dispose(): void {
+    if (this.#listening) {
+      this.#browser.off('targetcreated', this.#onTargetEvent);
+      this.#browser.off('targetchanged', this.#onTargetEvent);
+      this.#browser.off('targetdestroyed', this.#onTargetEvent);
+      this.#listening = false;
+    }
+    this.#entries.clear();
+    this.#discovery.clear();
+  }
+
+  #listen(): void {
+    if (this.#listening) {
+      return;
+    }
+    this.#browser.on('targetcreated', this.#onTargetEvent);
+    this.#browser.on('targetchanged', this.#onTargetEvent);
+    this.#browser.on('targetdestroyed', this.#onTargetEvent);
+    this.#listening = true;
+  }
+
+  #onTargetEvent = (target: Target): void => {
+    const url = target.url();
+    if (!url.startsWith(EXTENSION_URL_PREFIX)) {
+      return;
+    }
+    // 扩展有了 target，之前读取失败的 manifest 可能已经可以读取
+    const extensionId = url.slice(EXTENSION_URL_PREFIX.length).split('/')[0];
+    if (this.#entries.get(extensionId)?.missing) {
+      this.#entries.delete(extensionId);
+    }
+    if (this.#discovery.size > 0) {
+      this.#discovery.clear();
+      this.#stats.invalidations++;
+    }
+  };
+}
@@ -6,27 +6,331 @@
 
 import type {CDPSession, Protocol} from 'puppeteer-core';
 
+/**
+ * preview() 的结果
+ */
+export interface SerializedPreview {
+  value: unknown;
+  /** 与 serialize() 的结果相同，不需要再访问页面 */
+  complete: boolean;
+}
+
+/**
+ * CDP 会截断预览中超过 100 个字符的字符串
+ */
+const PREVIEW_STRING_LIMIT = 100;
+
+/**
+ * 只凭 RemoteObject 本身就能序列化的对象子类型
+ */
+const INLINE_SUBTYPES = new Set(['null', 'date', 'regexp', 'map', 'set']);
+
+/**
+ * 序列化方式
+ *
+ * - in-page: 在页面内用一次 Runtime.callFunctionOn 遍历整个对象图（默认）
+ * - properties: 每个对象一次 Runtime.getProperties，逐层递归
+ */
+export type SerializerMode = 'in-page' | 'properties';
+
+export interface EnhancedObjectSerializerOptions {
+  /** 默认读取 MCP_OBJECT_SERIALIZER，未设置时为 in-page */
+  mode?: SerializerMode;
+  /** in-page：每个对象 / 数组最多序列化的属性数 */
+  maxEntries?: number;
+  /** in-page：一次序列化最多访问的对象数 */
+  maxNodes?: number;
+  /** in-page：字符串的最大长度 */
+  maxStringLength?: number;
+}
+
+export const DEFAULT_MAX_ENTRIES = 100;
+export const DEFAULT_MAX_NODES = 1000;
+export const DEFAULT_MAX_STRING_LENGTH = 10_000;
+
+function defaultMode(): SerializerMode {
+  return process.env.MCP_OBJECT_SERIALIZER === 'properties'
+    ? 'properties'
+    : 'in-page';
+}
+
+/**
+ * 在页面内执行（Runtime.callFunctionOn，this 为要序列化的对象），结果按值返回
+ *
+ * 输出格式与 properties 方式相同：只读取自有的数据属性（不触发 getter），
+ * Function / Error / Date / RegExp / Map / Set 使用相同的 __type 结构。
+ * 另外处理 properties 方式无法处理的情况：循环引用返回 '[Circular]'，
+ * DOM 节点返回 __type: 'Node' 摘要，超出 maxEntries / maxNodes / maxStringLength 的部分被截断。
+ *
+ * 限制：页面内无法在不触发 trap 的情况下识别 Proxy，嵌套的 Proxy 会像普通对象一样被遍历，
+ * 其 getPrototypeOf / ownKeys / getOwnPropertyDescriptor trap 会执行页面代码。
+ * 任何异常（例如 trap 抛出）都让整次调用失败，由调用方回退到 properties 方式；
+ * 需要完全不执行页面代码时使用 properties 方式（MCP_OBJECT_SERIALIZER=properties）。
+ */
+function serializeInPage(
+  this: unknown,
+  maxDepth: number,
+  maxEntries: number,
+  maxNodes: number,
+  maxStringLength: number,
+): unknown {
+  const ancestors = new Set<object>();
+  let nodes = 0;
+
+  const describeFunction = (fn: (...args: unknown[]) => unknown) => {
+    const source = Function.prototype.toString.call(fn);
+    return {
+      __type: 'Function',
+      name: fn.name || 'anonymous',
+      async: source.startsWith('async'),
+      length: fn.length,
+      source: source.substring(0, 100) + (source.length > 100 ? '...' : ''),
+    };
+  };
+
+  const visit = (value: unknown, depth: number): unknown => {
+    if (depth > maxDepth) {
+      return '[Max Depth Reached]';
+    }
+    switch (typeof value) {
+      case 'string':
+        return value.length > maxStringLength
+          ? value.substring(0, maxStringLength) + '…'
+          : value;
+      case 'number':
+        // NaN、Infinity 没有 JSON 表示
+        return Number.isFinite(value) ? value : undefined;
+      case 'boolean':
+        return value;
+      case 'function':
+        return describeFunction(value as (...args: unknown[]) => unknown);
+      case 'object':
+        break;
+      default:
+        // undefined、bigint、symbol
+        return undefined;
+    }
+    if (value === null) {
+      return null;
+    }
+
+    const obj = value as object;
+    if (ancestors.has(obj)) {
+      return '[Circular]';
+    }
+    if (++nodes > maxNodes) {
+      return '[Truncated]';
+    }
+
+    if (obj instanceof Error) {
+      return {
+        __type: 'Error',
+        name: obj.name || 'Error',
+        message: obj.message || '',
+        stack: obj.stack || '',
+      };
+    }
+    if (obj instanceof Date) {
+      const text = String(obj);
+      return {__type: 'Date', value: text, iso: text};
+    }
+    if (obj instanceof RegExp) {
+      return {__type: 'RegExp', source: String(obj)};
+    }
+    if (obj instanceof Map || obj instanceof Set) {
+      const type = obj instanceof Map ? 'Map' : 'Set';
+      return {
+        __type: type,
+        size: obj.size,
+        preview: `${type}(${obj.size})`,
+      };
+    }
+    if (typeof Node === 'function' && obj instanceof Node) {
+      const element = obj as Partial<Element>;
+      return {
+        __type: 'Node',
+        nodeName: obj.nodeName,
+        id: element.id || undefined,
+        className:
+          typeof element.className === 'string'
+            ? element.className || undefined
+            : undefined,
+      };
+    }
+
+    ancestors.add(obj);
+    try {
+      const names = Object.getOwnPropertyNames(obj);
+      const isArray = Array.isArray(obj);
+      const keys = isArray ? names.filter(name => /^\d+$/.test(name)) : names;
+      const result: Record<string, unknown> | unknown[] = isArray ? [] : {};
+      const count = Math.min(keys.length, maxEntries);
+      for (let i = 0; i < count; i++) {
+        const descriptor = Object.getOwnPropertyDescriptor(obj, keys[i]);
+        // 访问器属性与 properties 方式一样跳过，避免执行页面代码
+        if (!descriptor || !('value' in descriptor)) {
+          continue;
+        }
+        const serialized = visit(descriptor.value, depth + 1);
+        if (Array.isArray(result)) {
+          result.push(serialized);
+        } else {
+          result[keys[i]] = serialized;
+        }
+      }
+      if (keys.length > count) {
+        const more = `${keys.length - count} more`;
+        if (Array.isArray(result)) {
+          result.push(`[… ${more}]`);
+        } else {
+          result['…'] = more;
+        }
+      }
+      return result;
+    } finally {
+      ancestors.delete(obj);
+    }
+  };
+
+  return visit(this, 0);
+}
+
+const SERIALIZE_IN_PAGE = serializeInPage.toString();
+
 /**
  * Enhanced Object Serializer
  *
- * 使用 CDP Runtime.getProperties 完整序列化对象
- * 支持函数、Error、Map、Set 等复杂类型
+ * 完整序列化页面中的对象，支持函数、Error、Map、Set 等复杂类型。
+ * 默认在页面内一次 Runtime.callFunctionOn 完成；顶层是 Proxy 或页面内遍历抛出异常
+ * （例如嵌套 Proxy 的 trap 抛出）时回退到逐层 Runtime.getProperties。
+ * 页面内遍历会执行嵌套 Proxy 的 trap，见 serializeInPage。
  */
 export class EnhancedObjectSerializer {
+  private readonly mode: SerializerMode;
+  private readonly maxEntries: number;
+  private readonly maxNodes: number;
+  private readonly maxStringLength: number;
+
+  constructor(options: EnhancedObjectSerializerOptions = {}) {
+    this.mode = options.mode ?? defaultMode();
+    this.maxEntries = options.maxEntries ?? DEFAULT_MAX_ENTRIES;
+    this.maxNodes = options.maxNodes ?? DEFAULT_MAX_NODES;
+    this.maxStringLength = options.maxStringLength ?? DEFAULT_MAX_STRING_LENGTH;
+  }
+
   /**
-   * 序列化 RemoteObject 为可读的 JSON
+   * 只根据 RemoteObject 自带的 value / description / preview 生成预览，
+   * 不发送任何 CDP 命令
+   *
+   * 只含基本类型属性且未截断的对象预览是完整的；其余情况 complete 为 false，
+   * 需要时再用 serialize() 完整序列化。
    */
-  async serialize(
+  preview(obj: Protocol.Runtime.RemoteObject): SerializedPreview {
+    if (obj.type === 'function') {
+      const nameMatch = obj.description?.match(
+        /^(?:async\s+)?function\s+(\w+)/,
+      );
+      return {
+        value: {
+          __type: 'Function',
+          name: nameMatch?.[1] || 'anonymous',
+          async: obj.description?.startsWith('async') || false,
+        },
+        complete: false,
+      };
+    }
+
+    if (obj.subtype === 'error') {
+      // description 是 stack：首行为 "Name: message"
+      const firstLine = obj.description?.split('\n', 1)[0] ?? '';
+      const separator = firstLine.indexOf(': ');
+      const hasMessage = separator > 0;
+      const name = hasMessage ? firstLine.slice(0, separator) : firstLine;
+      return {
+        value: {
+          __type: 'Error',
+          name: name || 'Error',
+          message: hasMessage ? firstLine.slice(separator + 2) : '',
+          stack: obj.description || '',
+        },
+        complete: false,
+      };
+    }
+
+    if (
+      obj.type === 'object' &&
+      obj.objectId &&
+      !INLINE_SUBTYPES.has(obj.subtype ?? '')
+    ) {
+      return this.previewObject(obj);
+    }
+
+    // 其余类型 serialize() 也不需要访问页面
+    return {value: this.serializeInline(obj), complete: true};
+  }
+
+  /**
+   * 根据 ObjectPreview 预览数组和普通对象
+   */
+  private previewObject(
     obj: Protocol.Runtime.RemoteObject,
-    session: CDPSession,
-    depth = 0,
-    maxDepth = 3,
-  ): Promise<unknown> {
-    // 深度限制（防止无限递归）
-    if (depth > maxDepth) {
-      return '[Max Depth Reached]';
+  ): SerializedPreview {
+    const preview = obj.preview;
+    if (!preview) {
+      return {value: obj.description ?? obj.className, complete: false};
     }
 
+    // Promise、Proxy、DOM 节点等的预览里是内部属性，与 serialize() 的结果不同
+    let complete =
+      !preview.overflow &&
+      (obj.subtype === undefined || obj.subtype === 'array');
+    const entries: Array<[string, unknown]> = [];
+    for (const prop of preview.properties) {
+      if (prop.name.startsWith('[[')) {
+        continue;
+      }
+      switch (prop.type) {
+        case 'string':
+          complete &&= (prop.value ?? '').length < PREVIEW_STRING_LIMIT;
+          entries.push([prop.name, prop.value ?? '']);
+          break;
+        case 'number': {
+          // NaN、Infinity 在 serialize() 中没有 value
+          const value = Number(prop.value);
+          complete &&= Number.isFinite(value);
+          entries.push([prop.name, value]);
+          break;
+        }
+        case 'boolean':
+          entries.push([prop.name, prop.value === 'true']);
+          break;
+        case 'undefined':
+          entries.push([prop.name, undefined]);
+          break;
+        default:
+          if (prop.subtype === 'null') {
+            entries.push([prop.name, null]);
+          } else {
+            complete = false;
+            entries.push([prop.name, prop.value]);
+          }
+      }
+    }
+
+    if (obj.subtype === 'array') {
+      const elements = entries.filter(([name]) => /^\d+$/.test(name));
+      return {
+        value: elements.map(([, value]) => value),
+        complete: complete && elements.length === entries.length,
+      };
+    }
+    return {value: Object.fromEntries(entries), complete};
+  }
+
+  /**
+   * 不需要访问页面的类型
+   */
+  private serializeInline(obj: Protocol.Runtime.RemoteObject): unknown {
     // 基本类型
     if (['string', 'number', 'boolean'].includes(obj.type)) {
       return obj.value;
@@ -36,16 +340,6 @@ export class EnhancedObjectSerializer {
     if (obj.type === 'undefined') return undefined;
     if (obj.subtype === 'null') return null;
 
-    // 函数
-    if (obj.type === 'function') {
-      return await this.serializeFunction(obj, session);
-    }
-
-    // Error 对象
-    if (obj.subtype === 'error') {
-      return await this.serializeError(obj, session);
-    }
-
     // Date 对象
     if (obj.subtype === 'date') {
       return {
@@ -65,12 +359,61 @@ export class EnhancedObjectSerializer {
 
     // Map 对象
     if (obj.subtype === 'map') {
-      return await this.serializeMap(obj, session, depth, maxDepth);
+      return this.serializeMap(obj);
     }
 
     // Set 对象
     if (obj.subtype === 'set') {
-      return await this.serializeSet(obj, session, depth, maxDepth);
+      return this.serializeSet(obj);
+    }
+
+    // 其他情况返回原值
+    return obj.value;
+  }
+
+  /**
+   * 序列化 RemoteObject 为可读的 JSON
+   */
+  async serialize(
+    obj: Protocol.Runtime.RemoteObject,
+    session: CDPSession,
+    depth = 0,
+    maxDepth = 3,
+  ): Promise<unknown> {
+    // 深度限制（防止无限递归）
+    if (depth > maxDepth) {
+      return '[Max Depth Reached]';
+    }
+
+    // 整个对象图在页面内一次序列化；顶层 Proxy 仍逐层读取，不执行它的 trap
+    // （嵌套 Proxy 的限制见 serializeInPage）。
+    // 失败时下面的逐层递归（depth > 0）不再尝试
+    if (
+      this.mode === 'in-page' &&
+      depth === 0 &&
+      obj.objectId &&
+      (obj.type === 'function' || obj.type === 'object') &&
+      obj.subtype !== 'proxy' &&
+      !INLINE_SUBTYPES.has(obj.subtype ?? '')
+    ) {
+      const result = await this.serializeInPage(
+        obj.objectId,
+        session,
+        maxDepth,
+      );
+      if (result.ok) {
+        return result.value;
+      }
+    }
+
+    // 函数
+    if (obj.type === 'function') {
+      return await this.serializeFunction(obj, session);
+    }
+
+    // Error 对象
+    if (obj.subtype === 'error') {
+      return await this.serializeError(obj, session);
     }
 
     // 数组
@@ -79,12 +422,45 @@ export class EnhancedObjectSerializer {
     }
 
     // 普通对象
-    if (obj.type === 'object' && obj.objectId) {
+    if (
+      obj.type === 'object' &&
+      obj.objectId &&
+      !INLINE_SUBTYPES.has(obj.subtype ?? '')
+    ) {
       return await this.serializeObject(obj, session, depth, maxDepth);
     }
 
-    // 其他情况返回原值
-    return obj.value;
+    return this.serializeInline(obj);
+  }
+
+  /**
+   * 用一次 Runtime.callFunctionOn 在页面内序列化；页面内抛出异常或命令失败时 ok 为 false
+   */
+  private async serializeInPage(
+    objectId: string,
+    session: CDPSession,
+    maxDepth: number,
+  ): Promise<{ok: true; value: unknown} | {ok: false}> {
+    try {
+      const response = await session.send('Runtime.callFunctionOn', {
+        objectId,
+        functionDeclaration: SERIALIZE_IN_PAGE,
+        arguments: [
+          {value: maxDepth},
+          {value: this.maxEntries},
+          {value: this.maxNodes},
+          {value: this.maxStringLength},
+        ],
+        returnByValue: true,
+        silent: true,
+      });
+      if (response.exceptionDetails) {
+        return {ok: false};
+      }
+      return {ok: true, value: response.result.value};
+    } catch {
+      return {ok: false};
+    }
   }
 
   /**
@@ -160,12 +536,7 @@ export class EnhancedObjectSerializer {
   /**
    * 序列化 Map 对象
    */
-  private async serializeMap(
-    obj: Protocol.Runtime.RemoteObject,
-    _session: CDPSession,
-    _depth: number,
-    _maxDepth: number,
-  ): Promise<unknown> {
+  private serializeMap(obj: Protocol.Runtime.RemoteObject): unknown {
     // 从 description 解析大小（如 "Map(2)"）
     const sizeMatch = obj.description?.match(/Map\((\d+)\)/);
     const size = sizeMatch ? parseInt(sizeMatch[1]) : 0;
@@ -180,12 +551,7 @@ export class EnhancedObjectSerializer {
   /**
    * 序列化 Set 对象
    */
-  private async serializeSet(
-    obj: Protocol.Runtime.RemoteObject,
-    _session: CDPSession,
-    _depth: number,
-    _maxDepth: number,
-  ): Promise<unknown> {
+  private serializeSet(obj: Protocol.Runtime.RemoteObject): unknown {
     // 从 description 解析大小（如 "Set(5)"）
     const sizeMatch = obj.description?.match(/Set\((\d+)\)/);
     const size = sizeMatch ? parseInt(sizeMatch[1]) : 0;
@@ -4,23 +4,76 @@
  * SPDX-License-Identifier: Apache-2.0
  */
 import type {TextSnapshotNode} from '../McpContext.js';
+import type {TextSnapshotDiff} from '../utils/snapshotDiff.js';
 
 export function formatA11ySnapshot(
   serializedAXNodeRoot: TextSnapshotNode,
   depth = 0,
 ): string {
   let result = '';
+  for (const line of formatA11ySnapshotLines(serializedAXNodeRoot, depth)) {
+    result += line;
+  }
+  return result;
+}
+
+/**
+ * Same output as formatA11ySnapshot(), one node (line) at a time.
+ */
+export function* formatA11ySnapshotLines(
+  serializedAXNodeRoot: TextSnapshotNode,
+  depth = 0,
+): Generator<string> {
   const attributes = getAttributes(serializedAXNodeRoot);
-  const line = ' '.repeat(depth * 2) + attributes.join(' ') + '\n';
-  result += line;
+  yield ' '.repeat(depth * 2) + attributes.join(' ') + '\n';
 
   for (const child of serializedAXNodeRoot.children) {
-    result += formatA11ySnapshot(child, depth + 1);
+    yield* formatA11ySnapshotLines(child, depth + 1);
   }
+}
 
+export function formatA11ySnapshotDiff(
+  diff: TextSnapshotDiff,
+  snapshotId: string,
+): string {
+  if (diff.size === 0) {
+    return `No changes since snapshot ${diff.baseSnapshotId}. All uids from it are still valid.\n`;
+  }
+  let result = `Snapshot ${snapshotId} compared to snapshot ${diff.baseSnapshotId}: ${diff.added.length} added, ${diff.removed.length} removed, ${diff.changed.length} changed. Unchanged elements keep their uids.\n`;
+  if (diff.added.length) {
+    result += '### Added\n';
+    for (const {parentId, node} of diff.added) {
+      result += `in uid=${parentId}:\n`;
+      result += formatA11ySnapshot(node, 1);
+    }
+  }
+  if (diff.changed.length) {
+    result += '### Changed\n';
+    for (const node of diff.changed) {
+      result += getAttributes(node).join(' ') + '\n';
+    }
+  }
+  if (diff.removed.length) {
+    result += '### Removed\n';
+    for (const node of diff.removed) {
+      const descendants = countDescendants(node);
+      result +=
+        getAttributes(node).join(' ') +
+        (descendants ? ` (and ${descendants} descendants)` : '') +
+        '\n';
+    }
+  }
   return result;
 }
 
+function countDescendants(node: TextSnapshotNode): number {
+  let count = 0;
+  for (const child of node.children) {
+    count += 1 + countDescendants(child);
+  }
+  return count;
+}
+
 function getAttributes(serializedAXNodeRoot: TextSnapshotNode): string[] {
   const attributes = [
     `uid=${serializedAXNodeRoot.id}`,
@@ -17,8 +17,10 @@
 
 import {parseArguments} from './cli.js';
 import {checkNodeVersion} from './utils/common.js';
+import {beginStartupPhase, markStartup} from './utils/startupProfile.js';
 import {VERSION} from './version.js';
 
+markStartup('entry');
 checkNodeVersion();
 
 const args = parseArguments(VERSION) as {
@@ -98,6 +100,8 @@ async function startStandardMode() {
     // stdio mode
     console.error('[MCP] Starting stdio server...');
     console.error('');
+    // 在 main.ts 模块体的第一行结束，即所有静态依赖的加载和求值时间
+    beginStartupPhase('moduleImport');
     await import('./main.js');
   }
 }
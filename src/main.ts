@@ -7,8 +7,10 @@
 import './polyfill.js';
 
 import {McpServer} from '@modelcontextprotocol/sdk/server/mcp.js';
-import {StdioServerTransport} from '@modelcontextprotocol/sdk/server/stdio.js';
-import type {CallToolResult} from '@modelcontextprotocol/sdk/types.js';
+import type {
+  CallToolResult,
+  TextContent,
+} from '@modelcontextprotocol/sdk/types.js';
 import {SetLevelRequestSchema} from '@modelcontextprotocol/sdk/types.js';
 
 import type {Channel} from './browser.js';
@@ -21,12 +23,27 @@ import {parseArguments} from './cli.js';
 import {logger, saveLogsToFile} from './logger.js';
 import {McpContext} from './McpContext.js';
 import {McpResponse} from './McpResponse.js';
-import {Mutex} from './Mutex.js';
+import {PipelinedStdioServerTransport} from './PipelinedStdioServerTransport.js';
+import {ToolScheduler} from './ToolScheduler.js';
 import {getAllTools} from './tools/registry.js';
 import type {ToolDefinition} from './tools/ToolDefinition.js';
+import {startMemoryReporter} from './utils/memoryStats.js';
 import {displayStdioModeInfo} from './utils/modeMessages.js';
+import {handleToolResponse} from './utils/responseStreaming.js';
+import {
+  beginStartupPhase,
+  endStartupPhase,
+  markStartup,
+} from './utils/startupProfile.js';
+import {
+  instrumentCdp,
+  startMetricsServer,
+  toolMetrics,
+} from './utils/toolMetrics.js';
 import {VERSION} from './version.js';
 
+endStartupPhase('moduleImport');
+
 const version = VERSION;
 
 export const args = parseArguments(version);
@@ -47,12 +64,25 @@ server.server.setRequestHandler(SetLevelRequestSchema, () => {
 });
 
 let context: McpContext;
+let pendingContext: Promise<McpContext> | undefined;
+/**
+ * 并发执行的工具调用共用同一次浏览器连接检查和上下文初始化
+ */
 async function getContext(): Promise<McpContext> {
+  pendingContext ??= resolveContext().finally(() => {
+    pendingContext = undefined;
+  });
+  return await pendingContext;
+}
+
+async function resolveContext(): Promise<McpContext> {
   const extraArgs: string[] = (args.chromeArg ?? []).map(String);
   if (args.proxyServer) {
     extraArgs.push(`--proxy-server=${args.proxyServer}`);
   }
   const devtools = args.experimentalDevtools ?? false;
+  // 浏览器在首次工具调用时才连接，两个阶段都只记录第一次
+  beginStartupPhase('browserConnect');
   const browser = args.browserUrl
     ? await ensureBrowserConnected({
         browserURL: args.browserUrl,
@@ -69,14 +99,20 @@ async function getContext(): Promise<McpContext> {
         acceptInsecureCerts: args.acceptInsecureCerts,
         devtools,
       });
+  endStartupPhase('browserConnect');
 
   if (context?.browser !== browser) {
+    beginStartupPhase('contextInit');
+    await instrumentCdp(browser);
     context = await McpContext.from(browser, logger);
+    endStartupPhase('contextInit');
   }
   return context;
 }
 
-const toolMutex = new Mutex();
+// 按工具的作用范围和 concurrencySafe 调度：不同页面、只读和浏览器级的调用可以并发，
+// 流水线/批量请求中的这类调用会乱序返回；同一页面上的修改仍然串行
+const toolScheduler = new ToolScheduler();
 
 function registerTool(tool: ToolDefinition): void {
   server.registerTool(
@@ -86,14 +122,17 @@ function registerTool(tool: ToolDefinition): void {
       inputSchema: tool.schema,
       annotations: tool.annotations,
     },
-    async (params): Promise<CallToolResult> => {
-      const guard = await toolMutex.acquire();
+    async (params, extra): Promise<CallToolResult> => {
+      // 更新活动时间（用于空闲超时检测）
+      lastRequestTime = Date.now();
+      const timer = toolMetrics.startCall(tool.name);
+      let guard: {dispose(): void} | undefined;
       try {
-        // 更新活动时间（用于空闲超时检测）
-        lastRequestTime = Date.now();
+        const context = await getContext();
+        guard = await toolScheduler.acquire(tool, params, context);
+        timer.mark('queue');
 
         logger(`${tool.name} request: ${JSON.stringify(params, null, '  ')}`);
-        const context = await getContext();
         const response = new McpResponse();
         await tool.handler(
           {
@@ -102,22 +141,31 @@ function registerTool(tool: ToolDefinition): void {
           response,
           context,
         );
+        timer.mark('handler');
         try {
-          const content = await response.handle(tool.name, context);
+          const content = await handleToolResponse(
+            response,
+            tool.name,
+            context,
+            extra,
+          );
+          timer.mark('format');
+          timer.end('ok', content);
           return {
             content,
           };
         } catch (error) {
           const errorText =
             error instanceof Error ? error.message : String(error);
-
+          const content: TextContent[] = [
+            {
+              type: 'text',
+              text: errorText,
+            },
+          ];
+          timer.end('error', content);
           return {
-            content: [
-              {
-                type: 'text',
-                text: errorText,
-              },
-            ],
+            content,
             isError: true,
           };
         }
@@ -125,23 +173,28 @@ function registerTool(tool: ToolDefinition): void {
         logger(`${tool.name} error: ${err.message}`);
         throw err;
       } finally {
-        guard.dispose();
+        timer.end('error');
+        guard?.dispose();
       }
     },
   );
 }
 
 // 从统一注册中心获取所有工具
+beginStartupPhase('toolRegistry');
 const tools = getAllTools();
 for (const tool of tools) {
   registerTool(tool);
 }
+endStartupPhase('toolRegistry');
 
 // 如果配置了 --browserUrl，在启动时验证浏览器连接
 if (args.browserUrl) {
   try {
     console.error('[MCP] Validating browser connection...');
+    beginStartupPhase('browserValidate');
     await validateBrowserURL(args.browserUrl);
+    endStartupPhase('browserValidate');
     console.error('[MCP] Browser validation successful');
     console.error('');
   } catch (error) {
@@ -166,7 +219,7 @@ if (args.browserUrl) {
   }
 }
 
-const transport = new StdioServerTransport();
+const transport = new PipelinedStdioServerTransport();
 
 // Handle stdout errors (EPIPE, broken pipe, etc.)
 process.stdout.on('error', error => {
@@ -189,7 +242,12 @@ process.stderr.on('error', error => {
   }
 });
 
+beginStartupPhase('transportConnect');
 await server.connect(transport);
+endStartupPhase('transportConnect');
+markStartup('ready');
+startMemoryReporter();
+startMetricsServer();
 logger('Chrome DevTools MCP Server connected');
 displayStdioModeInfo();
 
@@ -4,6 +4,8 @@
  * SPDX-License-Identifier: Apache-2.0
  */
 
+import {performance} from 'node:perf_hooks';
+
 import puppeteer from 'puppeteer-core';
 import type {Browser} from 'puppeteer-core';
 
@@ -13,12 +15,18 @@ import type {
   BrowserConnectionStatus,
   BrowserPoolConfig,
   BrowserPoolStats,
+  HealthCheckStats,
 } from '../types/browser-pool.types.js';
 
 /**
  * 浏览器连接池
  *
  * 负责管理多个浏览器连接的生命周期
+ *
+ * 健康检查不再每个周期对所有连接同时发起：一轮检查均匀分布在整个
+ * healthCheckInterval 内，最多 healthCheckConcurrency 个同时进行，
+ * 最近一个周期内有过成功 CDP 通信（recordActivity）的连接直接跳过。
+ * 这样连接数增长时不会出现周期性的 CPU / socket 尖峰。
  */
 export class BrowserConnectionPool {
   /** 浏览器连接存储 */
@@ -31,7 +39,21 @@ export class BrowserConnectionPool {
   #config: BrowserPoolConfig;
 
   /** 健康检查定时器 */
-  #healthCheckInterval?: NodeJS.Timeout;
+  #healthCheckTimer?: NodeJS.Timeout;
+
+  /** stop() 之后正在进行的检查轮次提前结束 */
+  #stopped = false;
+
+  /** 健康检查开销 */
+  #healthStats: HealthCheckStats = {
+    cycles: 0,
+    checked: 0,
+    skipped: 0,
+    failed: 0,
+    inFlight: 0,
+    checkMs: {total: 0, max: 0},
+    lastCycle: null,
+  };
 
   constructor(config?: Partial<BrowserPoolConfig>) {
     this.#config = {
@@ -39,6 +61,8 @@ export class BrowserConnectionPool {
       maxReconnectAttempts: config?.maxReconnectAttempts ?? 3,
       reconnectDelay: config?.reconnectDelay ?? 5000, // 5 秒
       connectionTimeout: config?.connectionTimeout ?? 10000, // 10 秒
+      healthCheckConcurrency: config?.healthCheckConcurrency ?? 8,
+      healthCheckTimeout: config?.healthCheckTimeout ?? 5000, // 5 秒
     };
   }
 
@@ -49,10 +73,8 @@ export class BrowserConnectionPool {
     logger('[BrowserConnectionPool] 启动连接池');
 
     // 定期健康检查
-    this.#healthCheckInterval = setInterval(
-      () => this.healthCheckAll(),
-      this.#config.healthCheckInterval,
-    );
+    this.#stopped = false;
+    this.#scheduleHealthCheck(this.#config.healthCheckInterval);
   }
 
   /**
@@ -61,9 +83,10 @@ export class BrowserConnectionPool {
   async stop(): Promise<void> {
     logger('[BrowserConnectionPool] 停止连接池');
 
-    if (this.#healthCheckInterval) {
-      clearInterval(this.#healthCheckInterval);
-      this.#healthCheckInterval = undefined;
+    this.#stopped = true;
+    if (this.#healthCheckTimer) {
+      clearTimeout(this.#healthCheckTimer);
+      this.#healthCheckTimer = undefined;
     }
 
     // 断开所有连接
@@ -212,6 +235,20 @@ export class BrowserConnectionPool {
     return this.#userConnections.has(userId);
   }
 
+  /**
+   * 记录一次成功的 CDP 通信（例如工具调用成功）
+   *
+   * 下一个健康检查周期内会跳过该连接
+   *
+   * @param userId - 用户 ID
+   */
+  recordActivity(userId: string): void {
+    const connection = this.getConnection(userId);
+    if (connection) {
+      connection.lastActivity = Date.now();
+    }
+  }
+
   /**
    * 健康检查
    *
@@ -229,6 +266,10 @@ export class BrowserConnectionPool {
       return false;
     }
 
+    const stats = this.#healthStats;
+    const start = performance.now();
+    stats.checked++;
+    stats.inFlight++;
     try {
       // 检查浏览器是否连接
       const isConnected = connection.browser.isConnected();
@@ -236,31 +277,82 @@ export class BrowserConnectionPool {
       connection.lastHealthCheck = new Date();
 
       if (!isConnected) {
+        stats.failed++;
         connection.status = 'disconnected';
         await this.#reconnect(browserId);
         return false;
       }
 
+      // 一次 CDP 往返，发现 isConnected() 察觉不到的半开连接
+      await this.#withTimeout(
+        connection.browser.version(),
+        this.#config.healthCheckTimeout,
+        '健康检查超时',
+      );
+
       connection.status = 'connected';
+      connection.lastActivity = Date.now();
       return true;
     } catch (error) {
       logger(`[BrowserConnectionPool] 健康检查失败: ${userId} - ${error}`);
+      stats.failed++;
       connection.status = 'disconnected';
       return false;
+    } finally {
+      const elapsed = performance.now() - start;
+      stats.inFlight--;
+      stats.checkMs.total += elapsed;
+      stats.checkMs.max = Math.max(stats.checkMs.max, elapsed);
     }
   }
 
   /**
    * 对所有连接进行健康检查
+   *
+   * 各连接的检查在 spreadMs 内均匀错开，最多 healthCheckConcurrency 个
+   * 同时进行；近期有过成功通信或正在重连的连接跳过。
+   *
+   * @param spreadMs - 把一轮检查分散到多长时间内（毫秒），0 表示立即全部开始
    */
-  async healthCheckAll(): Promise<void> {
-    const checkPromises: Array<Promise<boolean>> = [];
+  async healthCheckAll(spreadMs = 0): Promise<void> {
+    const userIds = Array.from(this.#userConnections.keys());
+    const spacing = userIds.length > 0 ? spreadMs / userIds.length : 0;
+    const cycleStart = performance.now();
+    const cycle = {checked: 0, skipped: 0};
+    let next = 0;
+
+    const worker = async () => {
+      while (next < userIds.length && !this.#stopped) {
+        const index = next++;
+        const wait = cycleStart + index * spacing - performance.now();
+        if (wait > 0) {
+          await new Promise(resolve => setTimeout(resolve, wait).unref());
+        }
+        if (this.#stopped) {
+          return;
+        }
+        const userId = userIds[index];
+        if (this.#canSkipHealthCheck(userId)) {
+          cycle.skipped++;
+          continue;
+        }
+        cycle.checked++;
+        await this.healthCheck(userId);
+      }
+    };
 
-    for (const userId of this.#userConnections.keys()) {
-      checkPromises.push(this.healthCheck(userId));
-    }
+    const workers = Math.min(
+      this.#config.healthCheckConcurrency,
+      userIds.length,
+    );
+    await Promise.all(Array.from({length: workers}, worker));
 
-    await Promise.all(checkPromises);
+    this.#healthStats.cycles++;
+    this.#healthStats.skipped += cycle.skipped;
+    this.#healthStats.lastCycle = {
+      durationMs: performance.now() - cycleStart,
+      ...cycle,
+    };
   }
 
   /**
@@ -310,6 +402,7 @@ export class BrowserConnectionPool {
       byUser.set(connection.userId, connection.status);
     }
 
+    const healthStats = this.#healthStats;
     return {
       total: this.#connections.size,
       connected,
@@ -317,9 +410,58 @@ export class BrowserConnectionPool {
       reconnecting,
       failed,
       byUser,
+      healthChecks: {
+        ...healthStats,
+        checkMs: {...healthStats.checkMs},
+        lastCycle: healthStats.lastCycle && {...healthStats.lastCycle},
+      },
     };
   }
 
+  /**
+   * 安排下一轮健康检查；一轮检查本身占用整个周期，结束后补足剩余时间
+   *
+   * @param delay - 距下一轮开始的时间（毫秒）
+   */
+  #scheduleHealthCheck(delay: number): void {
+    this.#healthCheckTimer = setTimeout(async () => {
+      const interval = this.#config.healthCheckInterval;
+      const start = performance.now();
+      try {
+        await this.healthCheckAll(interval);
+      } catch (error) {
+        logger(`[BrowserConnectionPool] 健康检查轮次失败: ${error}`);
+      }
+      if (!this.#stopped) {
+        this.#scheduleHealthCheck(
+          Math.max(0, interval - (performance.now() - start)),
+        );
+      }
+    }, delay);
+    this.#healthCheckTimer.unref();
+  }
+
+  /**
+   * 连接在最近一个周期内有过成功通信，或正在重连时，本轮不检查
+   *
+   * @param userId - 用户 ID
+   */
+  #canSkipHealthCheck(userId: string): boolean {
+    const connection = this.getConnection(userId);
+    if (!connection) {
+      return true;
+    }
+    if (connection.status === 'reconnecting') {
+      return true;
+    }
+    return (
+      connection.status === 'connected' &&
+      connection.browser.isConnected() &&
+      connection.lastActivity !== undefined &&
+      Date.now() - connection.lastActivity < this.#config.healthCheckInterval
+    );
+  }
+
   /**
    * 处理浏览器断开事件
    *
@@ -411,18 +553,32 @@ export class BrowserConnectionPool {
    * @returns 浏览器实例
    */
   async #connectWithTimeout(browserURL: string): Promise<Browser> {
+    return this.#withTimeout(
+      puppeteer.connect({browserURL}),
+      this.#config.connectionTimeout,
+      '连接超时',
+    );
+  }
+
+  /**
+   * 给 Promise 加上超时
+   *
+   * 确保定时器被清理，避免内存泄漏
+   */
+  async #withTimeout<T>(
+    promise: Promise<T>,
+    timeout: number,
+    message: string,
+  ): Promise<T> {
     let timeoutId: NodeJS.Timeout;
 
     return Promise.race([
-      puppeteer.connect({browserURL}).finally(() => {
-        // 连接完成（成功或失败）时清理定时器
+      promise.finally(() => {
+        // 完成（成功或失败）时清理定时器
         clearTimeout(timeoutId);
       }),
-      new Promise<Browser>((_, reject) => {
-        timeoutId = setTimeout(
-          () => reject(new Error('连接超时')),
-          this.#config.connectionTimeout,
-        );
+      new Promise<T>((_, reject) => {
+        timeoutId = setTimeout(() => reject(new Error(message)), timeout);
       }),
     ]);
   }
@@ -34,6 +34,8 @@ import {McpContext} from '../McpContext.js';
 import {Mutex} from '../Mutex.js';
 import {getAllTools} from '../tools/registry.js';
 import type {ToolDefinition} from '../tools/ToolDefinition.js';
+import {readPositiveIntEnv} from '../utils/common.js';
+import {handleMemoryDebugRequest} from '../utils/memoryStats.js';
 import {displayMultiTenantModeInfo} from '../utils/modeMessages.js';
 import {setupResponseErrorHandling} from '../utils/response-error-handler.js';
 import {VERSION} from '../version.js';
@@ -58,7 +60,11 @@ import {
 } from './utils/ip-matcher.js';
 import {createLogger} from './utils/Logger.js';
 import {PerformanceMonitor} from './utils/performance-monitor.js';
-import {RateLimiter, PerUserRateLimiter} from './utils/RateLimiter.js';
+import {
+  GcraRateLimiter,
+  PerUserRateLimiter,
+  RateLimiter,
+} from './utils/RateLimiter.js';
 import {SimpleCache} from './utils/simple-cache.js';
 
 /**
@@ -118,7 +124,11 @@ class MultiTenantMCPServer {
     : 28800000; // 默认 8 小时，适合 IDE 长期连接
   private static readonly CLEANUP_INTERVAL = 60000; // 1 minute
   private static readonly CONNECTION_TIMEOUT = 30000; // 30 seconds
-  private static readonly BROWSER_HEALTH_CHECK = 30000; // 30 seconds
+  // 30 seconds，一轮检查分散在整个间隔内；非法值或 0 会让调度空转，回退到默认值
+  private static readonly BROWSER_HEALTH_CHECK = readPositiveIntEnv(
+    'MCP_BROWSER_HEALTH_CHECK_INTERVAL',
+    30000,
+  );
   private static readonly MAX_RECONNECT_ATTEMPTS = 3;
   private static readonly RECONNECT_DELAY = 5000; // 5 seconds
   private static readonly BROWSER_DETECTION_TIMEOUT = 3000; // 3 seconds
@@ -197,17 +207,18 @@ class MultiTenantMCPServer {
       refillRate: 100, // 每秒补充100个令牌
     });
 
+    // 每用户限流器数量随用户数增长，使用只保存一个时间戳的 GCRA
     this.userRateLimiter = new PerUserRateLimiter(
       () =>
-        new RateLimiter({
-          maxTokens: 100, // 每个用户最多100个请求
-          refillRate: 10, // 每秒补充10个令牌
+        new GcraRateLimiter({
+          burst: 100, // 每个用户最多突发100个请求
+          ratePerSecond: 10, // 持续速率每秒10个请求
         }),
     );
 
     this.serverLogger.info('限流器已初始化', {
       global: {maxTokens: 1000, refillRate: 100},
-      perUser: {maxTokens: 100, refillRate: 10},
+      perUser: {burst: 100, ratePerSecond: 10},
     });
 
     // CDP 混合架构：从环境变量读取配置
@@ -285,9 +296,13 @@ class MultiTenantMCPServer {
       if (!this.storeV2) {
         throw new Error('JSONL storage not initialized');
       }
+      const loadStart = Date.now();
       await this.storeV2.initialize();
       this.unifiedStorage = new UnifiedStorage(this.storeV2);
-      console.log('   ✅ JSONL storage initialized');
+      const stats = this.storeV2.getStats();
+      console.log(
+        `   ✅ JSONL storage initialized (${stats.users} users, ${stats.browsers} browsers, ${stats.logLines} log lines, ${Date.now() - loadStart}ms)`,
+      );
     }
 
     // Start managers
@@ -417,9 +432,10 @@ class MultiTenantMCPServer {
       return;
     }
 
-    // 限流检查（/health和/version端点除外）
+    // 限流检查（/health、/version 和内存采样端点除外）
     if (
       url.pathname !== '/health' &&
+      url.pathname !== '/debug/memory' &&
       url.pathname !== '/version' &&
       url.pathname !== '/api/version'
     ) {
@@ -471,6 +487,8 @@ class MultiTenantMCPServer {
       // 路由分发
       if (url.pathname === '/health') {
         await this.handleHealth(req, res);
+      } else if (handleMemoryDebugRequest(url, res)) {
+        // 内存采样（MCP_DEBUG_MEMORY=1 时开放）
       } else if (url.pathname === '/metrics') {
         await this.handleMetrics(req, res);
       } else if (
@@ -762,6 +780,8 @@ class MultiTenantMCPServer {
     const metrics = {
       summary,
       cache: cacheStats,
+      // 使用统计的批量写入：flushes / toolCalls 即每次工具调用的存储写操作数
+      usage: this.unifiedStorage?.getUsageStats() ?? null,
       topEndpoints,
       slowestEndpoints,
       highErrorRateEndpoints,
@@ -1433,6 +1453,8 @@ class MultiTenantMCPServer {
           // 记录工具调用计数（V2 架构）
           const sessionData = this.sessionManager.getSession(sessionId);
           if (sessionData?.userId) {
+            // 工具调用成功说明 CDP 连接正常，下一轮健康检查可以跳过
+            this.browserPool.recordActivity(sessionData.userId);
             try {
               const userBrowsers =
                 await this.getUnifiedStorage().getUserBrowsersAsync(
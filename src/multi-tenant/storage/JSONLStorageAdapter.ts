@@ -16,6 +16,7 @@ import {
   type BrowserRecordV2,
 } from './PersistentStoreV2.js';
 import type {StorageAdapter} from './StorageAdapter.js';
+import type {BrowserUsageUpdate} from './UsageBuffer.js';
 
 /**
  * JSONL 存储适配器
@@ -117,6 +118,10 @@ export class JSONLStorageAdapter implements StorageAdapter {
     await this.store.incrementToolCallCount(browserId);
   }
 
+  async recordUsage(updates: BrowserUsageUpdate[]): Promise<void> {
+    await this.store.recordUsage(updates);
+  }
+
   async unbindBrowser(browserId: string): Promise<void> {
     await this.store.unbindBrowser(browserId);
   }
@@ -16,9 +16,12 @@
 import crypto from 'node:crypto';
 import fs from 'node:fs';
 import path from 'node:path';
+import readline from 'node:readline';
 
 import {logger} from '../../logger.js';
 
+import type {BrowserUsageUpdate} from './UsageBuffer.js';
+
 /**
  * 用户记录 V2
  */
@@ -70,6 +73,7 @@ type LogOperation =
     }
   | {op: 'update_last_connected'; timestamp: number; browserId: string}
   | {op: 'increment_tool_call'; timestamp: number; browserId: string}
+  | {op: 'record_usage'; timestamp: number; updates: BrowserUsageUpdate[]}
   | {op: 'unbind_browser'; timestamp: number; browserId: string}
   | {
       op: 'snapshot';
@@ -86,16 +90,24 @@ export interface StoreConfig {
   logFileName?: string;
   snapshotThreshold?: number;
   autoCompaction?: boolean;
+  /** 压缩时保留的带时间戳的旧日志备份数，默认 5 */
+  maxBackups?: number;
 }
 
 /**
  * 持久化存储引擎 V2
+ *
+ * 日志格式：第一行通常是压缩时写入的 snapshot，其后是快照之后的增量操作。
+ * 启动时流式读取并重放（不把整个文件读入内存）；日志行数达到
+ * snapshotThreshold 后在后台压缩：先把快照写入临时文件，再原子替换日志，
+ * 因此重启只需解析一个快照加上快照之后的尾部。
  */
 export class PersistentStoreV2 {
   private dataDir: string;
   private logFilePath: string;
   private snapshotThreshold: number;
   private autoCompaction: boolean;
+  private maxBackups: number;
 
   // 内存索引
   private users = new Map<string, UserRecordV2>(); // userId -> User
@@ -108,6 +120,13 @@ export class PersistentStoreV2 {
   private logStream: fs.WriteStream | null = null;
   private logLineCount = 0;
 
+  // 后台压缩：压缩期间新的写入在 writeBarrier 上等待，保证快照与日志一致
+  private compaction: Promise<void> | null = null;
+  private writeBarrier: Promise<void> | null = null;
+  private pendingWrites = 0;
+  private lastBackupStamp = 0;
+  private idleWaiters: Array<() => void> = [];
+
   constructor(config: StoreConfig) {
     this.dataDir = config.dataDir;
     this.logFilePath = path.join(
@@ -116,6 +135,7 @@ export class PersistentStoreV2 {
     );
     this.snapshotThreshold = config.snapshotThreshold || 10000;
     this.autoCompaction = config.autoCompaction ?? true;
+    this.maxBackups = config.maxBackups ?? 5;
   }
 
   /**
@@ -130,19 +150,83 @@ export class PersistentStoreV2 {
       logger(`[PersistentStoreV2] 创建数据目录: ${this.dataDir}`);
     }
 
+    // 上次压缩中断时留下的临时文件
+    this.recoverCompaction();
+
     // 加载现有数据
     await this.loadFromDisk();
 
     // 打开日志文件
-    this.logStream = fs.createWriteStream(this.logFilePath, {
-      flags: 'a',
-      encoding: 'utf8',
-    });
+    this.logStream = this.openLogStream();
 
     logger(`[PersistentStoreV2] 初始化完成`);
     logger(`[PersistentStoreV2] - 用户数: ${this.users.size}`);
     logger(`[PersistentStoreV2] - 浏览器数: ${this.browsers.size}`);
     logger(`[PersistentStoreV2] - 日志行数: ${this.logLineCount}`);
+
+    // 旧版本留下的长日志在后台压缩，下次启动只需重放快照之后的部分
+    this.maybeCompact();
+  }
+
+  private get compactingPath(): string {
+    return `${this.logFilePath}.compacting`;
+  }
+
+  /**
+   * 本次压缩的备份路径：<日志>.<时间戳>.bak；时间戳严格递增，
+   * 同一毫秒内的多次压缩不会覆盖或排在已有备份之前
+   */
+  private nextBackupPath(): string {
+    let stamp = Math.max(Date.now(), this.lastBackupStamp + 1);
+    while (fs.existsSync(`${this.logFilePath}.${stamp}.bak`)) {
+      stamp++;
+    }
+    this.lastBackupStamp = stamp;
+    return `${this.logFilePath}.${stamp}.bak`;
+  }
+
+  /**
+   * 只保留最新的 maxBackups 个备份，删除失败不影响压缩
+   */
+  private async pruneBackups(): Promise<void> {
+    const prefix = `${path.basename(this.logFilePath)}.`;
+    try {
+      const backups = (await fs.promises.readdir(this.dataDir))
+        .filter(name => name.startsWith(prefix) && name.endsWith('.bak'))
+        .map(name => name.slice(prefix.length, -'.bak'.length))
+        .filter(stamp => /^\d+$/.test(stamp))
+        .map(stamp => ({name: `${prefix}${stamp}.bak`, stamp: Number(stamp)}))
+        .sort((a, b) => b.stamp - a.stamp);
+      for (const {name} of backups.slice(this.maxBackups)) {
+        await fs.promises.unlink(path.join(this.dataDir, name));
+      }
+    } catch (error) {
+      logger(`[PersistentStoreV2] 清理旧备份失败: ${error}`);
+    }
+  }
+
+  private openLogStream(): fs.WriteStream {
+    return fs.createWriteStream(this.logFilePath, {
+      flags: 'a',
+      encoding: 'utf8',
+    });
+  }
+
+  /**
+   * 压缩在替换日志的两次 rename 之间中断时，临时文件已完整写入，直接启用；
+   * 否则日志仍是完整的，丢弃可能只写了一半的临时文件。
+   */
+  private recoverCompaction(): void {
+    if (!fs.existsSync(this.compactingPath)) {
+      return;
+    }
+    if (fs.existsSync(this.logFilePath)) {
+      fs.unlinkSync(this.compactingPath);
+      logger('[PersistentStoreV2] 丢弃未完成的压缩文件');
+    } else {
+      fs.renameSync(this.compactingPath, this.logFilePath);
+      logger('[PersistentStoreV2] 恢复中断的压缩结果');
+    }
   }
 
   /**
@@ -155,12 +239,16 @@ export class PersistentStoreV2 {
     }
 
     const startTime = Date.now();
-    const content = fs.readFileSync(this.logFilePath, 'utf8');
-    const lines = content.split('\n').filter(line => line.trim());
-
-    logger(`[PersistentStoreV2] 加载日志: ${lines.length} 行`);
+    // 逐行流式读取，不把整个日志读入内存，也不长时间阻塞事件循环
+    const lines = readline.createInterface({
+      input: fs.createReadStream(this.logFilePath, {encoding: 'utf8'}),
+      crlfDelay: Infinity,
+    });
 
-    for (const line of lines) {
+    for await (const line of lines) {
+      if (!line.trim()) {
+        continue;
+      }
       try {
         const operation = JSON.parse(line) as LogOperation;
         this.applyOperation(operation);
@@ -171,7 +259,9 @@ export class PersistentStoreV2 {
     }
 
     const duration = Date.now() - startTime;
-    logger(`[PersistentStoreV2] 日志重放完成，耗时 ${duration}ms`);
+    logger(
+      `[PersistentStoreV2] 日志重放完成: ${this.logLineCount} 行，耗时 ${duration}ms`,
+    );
   }
 
   /**
@@ -257,6 +347,23 @@ export class PersistentStoreV2 {
         break;
       }
 
+      case 'record_usage':
+        for (const update of op.updates) {
+          const browser = this.browsers.get(update.browserId);
+          if (!browser) {
+            continue;
+          }
+          browser.toolCallCount =
+            (browser.toolCallCount || 0) + update.toolCalls;
+          if (
+            update.lastConnectedAt !== undefined &&
+            update.lastConnectedAt > (browser.lastConnectedAt ?? 0)
+          ) {
+            browser.lastConnectedAt = update.lastConnectedAt;
+          }
+        }
+        break;
+
       case 'unbind_browser': {
         const unboundBrowser = this.browsers.get(op.browserId);
         if (unboundBrowser) {
@@ -293,6 +400,34 @@ export class PersistentStoreV2 {
     }
   }
 
+  /**
+   * 写入日志并应用到内存索引
+   */
+  private async commit(op: LogOperation): Promise<void> {
+    while (this.writeBarrier) {
+      await this.writeBarrier;
+    }
+    this.pendingWrites++;
+    try {
+      await this.writeLog(op);
+      this.applyOperation(op);
+    } finally {
+      this.pendingWrites--;
+      if (this.pendingWrites === 0) {
+        for (const resolve of this.idleWaiters.splice(0)) {
+          resolve();
+        }
+      }
+    }
+  }
+
+  private async waitForPendingWrites(): Promise<void> {
+    if (this.pendingWrites === 0) {
+      return;
+    }
+    await new Promise<void>(resolve => this.idleWaiters.push(resolve));
+  }
+
   /**
    * 写入日志
    */
@@ -375,12 +510,11 @@ export class PersistentStoreV2 {
       data: user,
     };
 
-    await this.writeLog(operation);
-    this.applyOperation(operation);
+    await this.commit(operation);
 
     logger(`[PersistentStoreV2] 注册用户: ${email} → ${userId}`);
 
-    await this.maybeCompact();
+    this.maybeCompact();
 
     return user;
   }
@@ -430,12 +564,11 @@ export class PersistentStoreV2 {
       username,
     };
 
-    await this.writeLog(operation);
-    this.applyOperation(operation);
+    await this.commit(operation);
 
     logger(`[PersistentStoreV2] 更新用户名: ${userId} → ${username}`);
 
-    await this.maybeCompact();
+    this.maybeCompact();
   }
 
   /**
@@ -465,14 +598,13 @@ export class PersistentStoreV2 {
       userId,
     };
 
-    await this.writeLog(operation);
-    this.applyOperation(operation);
+    await this.commit(operation);
 
     logger(
       `[PersistentStoreV2] 删除用户: ${userId} (${deletedBrowserNames.length} 个浏览器)`,
     );
 
-    await this.maybeCompact();
+    this.maybeCompact();
 
     return deletedBrowserNames;
   }
@@ -526,14 +658,13 @@ export class PersistentStoreV2 {
       data: browser,
     };
 
-    await this.writeLog(operation);
-    this.applyOperation(operation);
+    await this.commit(operation);
 
     logger(
       `[PersistentStoreV2] 绑定浏览器: ${userId}/${finalTokenName} (${browser.token.substring(0, 16)}...)`,
     );
 
-    await this.maybeCompact();
+    this.maybeCompact();
 
     return browser;
   }
@@ -611,12 +742,11 @@ export class PersistentStoreV2 {
       description: data.description,
     };
 
-    await this.writeLog(operation);
-    this.applyOperation(operation);
+    await this.commit(operation);
 
     logger(`[PersistentStoreV2] 更新浏览器: ${browserId}`);
 
-    await this.maybeCompact();
+    this.maybeCompact();
   }
 
   /**
@@ -633,8 +763,8 @@ export class PersistentStoreV2 {
       browserId,
     };
 
-    await this.writeLog(operation);
-    this.applyOperation(operation);
+    await this.commit(operation);
+    this.maybeCompact();
   }
 
   /**
@@ -651,8 +781,27 @@ export class PersistentStoreV2 {
       browserId,
     };
 
-    await this.writeLog(operation);
-    this.applyOperation(operation);
+    await this.commit(operation);
+    this.maybeCompact();
+  }
+
+  /**
+   * 批量写入合并后的使用统计（UsageBuffer），整批只追加一行日志
+   */
+  async recordUsage(updates: BrowserUsageUpdate[]): Promise<void> {
+    const known = updates.filter(update => this.browsers.has(update.browserId));
+    if (known.length === 0) {
+      return;
+    }
+
+    const operation: LogOperation = {
+      op: 'record_usage',
+      timestamp: Date.now(),
+      updates: known,
+    };
+
+    await this.commit(operation);
+    this.maybeCompact();
   }
 
   /**
@@ -671,14 +820,13 @@ export class PersistentStoreV2 {
       browserId,
     };
 
-    await this.writeLog(operation);
-    this.applyOperation(operation);
+    await this.commit(operation);
 
     logger(
       `[PersistentStoreV2] 解绑浏览器: ${browser.userId}/${browser.tokenName}`,
     );
 
-    await this.maybeCompact();
+    this.maybeCompact();
   }
 
   // ==================== 统计和维护 ====================
@@ -699,55 +847,77 @@ export class PersistentStoreV2 {
   }
 
   /**
-   * 检查是否需要压缩
+   * 检查是否需要压缩；压缩在后台进行，不阻塞当前操作
    */
-  private async maybeCompact(): Promise<void> {
-    if (!this.autoCompaction) return;
+  private maybeCompact(): void {
+    if (!this.autoCompaction || this.compaction) return;
 
     if (this.logLineCount >= this.snapshotThreshold) {
       logger(`[PersistentStoreV2] 触发自动压缩 (${this.logLineCount} 行)`);
-      await this.compact();
+      this.compact().catch(error => {
+        logger(`[PersistentStoreV2] ⚠️  压缩失败: ${error}`);
+      });
     }
   }
 
   /**
-   * 压缩日志（生成快照）
+   * 压缩日志（生成快照）；已有压缩在进行时返回同一个 Promise
    */
   async compact(): Promise<void> {
+    this.compaction ??= this.runCompaction().finally(() => {
+      this.compaction = null;
+    });
+    return this.compaction;
+  }
+
+  private async runCompaction(): Promise<void> {
     logger('[PersistentStoreV2] 开始压缩日志...');
 
     const startTime = Date.now();
+    let backupPath = '';
+    let releaseWrites!: () => void;
+    this.writeBarrier = new Promise(resolve => {
+      releaseWrites = resolve;
+    });
 
-    // 关闭当前日志流
-    if (this.logStream) {
-      this.logStream.end();
-      await new Promise<void>(resolve =>
-        this.logStream!.once('finish', () => resolve()),
+    try {
+      // 等已开始的写入完成，此时内存状态与日志内容完全一致
+      await this.waitForPendingWrites();
+
+      const snapshot: LogOperation = {
+        op: 'snapshot',
+        timestamp: Date.now(),
+        users: Array.from(this.users.values()),
+        browsers: Array.from(this.browsers.values()),
+      };
+      await fs.promises.writeFile(
+        this.compactingPath,
+        JSON.stringify(snapshot) + '\n',
+        'utf8',
       );
-    }
 
-    // 备份旧日志
-    const backupPath = `${this.logFilePath}.${Date.now()}.bak`;
-    if (fs.existsSync(this.logFilePath)) {
-      fs.renameSync(this.logFilePath, backupPath);
+      await this.closeLogStream();
+      backupPath = this.nextBackupPath();
+      try {
+        // 保留上一代日志作为备份，再原子替换为快照
+        if (fs.existsSync(this.logFilePath)) {
+          await fs.promises.rename(this.logFilePath, backupPath);
+        }
+        await fs.promises.rename(this.compactingPath, this.logFilePath);
+      } catch (error) {
+        if (!fs.existsSync(this.logFilePath) && fs.existsSync(backupPath)) {
+          fs.renameSync(backupPath, this.logFilePath);
+        }
+        throw error;
+      }
+      this.logLineCount = 1;
+    } finally {
+      this.logStream ??= this.openLogStream();
+      this.writeBarrier = null;
+      releaseWrites();
     }
 
-    // 创建新日志文件，写入快照
-    const snapshot: LogOperation = {
-      op: 'snapshot',
-      timestamp: Date.now(),
-      users: Array.from(this.users.values()),
-      browsers: Array.from(this.browsers.values()),
-    };
-
-    fs.writeFileSync(this.logFilePath, JSON.stringify(snapshot) + '\n', 'utf8');
-    this.logLineCount = 1;
-
-    // 重新打开日志流
-    this.logStream = fs.createWriteStream(this.logFilePath, {
-      flags: 'a',
-      encoding: 'utf8',
-    });
+    await this.pruneBackups();
 
     const duration = Date.now() - startTime;
     logger(`[PersistentStoreV2] 压缩完成，耗时 ${duration}ms`);
@@ -755,18 +925,23 @@ export class PersistentStoreV2 {
     logger(`[PersistentStoreV2] - 新日志行数: ${this.logLineCount}`);
   }
 
+  private async closeLogStream(): Promise<void> {
+    const stream = this.logStream;
+    if (!stream) {
+      return;
+    }
+    this.logStream = null;
+    stream.end();
+    await new Promise<void>(resolve => stream.once('finish', () => resolve()));
+  }
+
   /**
    * 关闭存储
    */
   async close(): Promise<void> {
     logger('[PersistentStoreV2] 关闭存储引擎');
 
-    if (this.logStream) {
-      this.logStream.end();
-      await new Promise<void>(resolve =>
-        this.logStream!.once('finish', () => resolve()),
-      );
-      this.logStream = null;
-    }
+    await this.compaction?.catch(() => undefined);
+    await this.closeLogStream();
   }
 }
@@ -24,6 +24,7 @@ import {createDB} from './db.js';
 import type {UserRecordV2, BrowserRecordV2} from './PersistentStoreV2.js';
 import type {Database} from './schema.js';
 import type {StorageAdapter} from './StorageAdapter.js';
+import type {BrowserUsageUpdate} from './UsageBuffer.js';
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
@@ -468,11 +469,31 @@ export class PostgreSQLStorageAdapter implements StorageAdapter {
 
   async incrementToolCallCount(browserId: string): Promise<void> {
     await this.pool.query(
-      'UPDATE mcp_browsers SET tool_call_count = tool_call_count + 1 WHERE browser_id = $2',
+      'UPDATE mcp_browsers SET tool_call_count = tool_call_count + 1 WHERE browser_id = $1',
       [browserId],
     );
   }
 
+  async recordUsage(updates: BrowserUsageUpdate[]): Promise<void> {
+    if (updates.length === 0) {
+      return;
+    }
+    // 整批一条 UPDATE；GREATEST 忽略 NULL，批次内没有连接记录时保持原值
+    await this.pool.query(
+      `UPDATE mcp_browsers AS b
+       SET tool_call_count = COALESCE(b.tool_call_count, 0) + u.calls,
+           last_connected_at = GREATEST(b.last_connected_at, u.connected_at)
+       FROM unnest($1::uuid[], $2::int[], $3::bigint[])
+         AS u(browser_id, calls, connected_at)
+       WHERE b.browser_id = u.browser_id`,
+      [
+        updates.map(update => update.browserId),
+        updates.map(update => update.toolCalls),
+        updates.map(update => update.lastConnectedAt ?? null),
+      ],
+    );
+  }
+
   async unbindBrowser(browserId: string): Promise<void> {
     await this.pool.query('DELETE FROM mcp_browsers WHERE browser_id = $1', [
       browserId,
@@ -14,6 +14,7 @@
  */
 
 import type {UserRecordV2, BrowserRecordV2} from './PersistentStoreV2.js';
+import type {BrowserUsageUpdate} from './UsageBuffer.js';
 
 /**
  * 存储适配器接口
@@ -113,6 +114,11 @@ export interface StorageAdapter {
    */
   incrementToolCallCount(browserId: string): Promise<void>;
 
+  /**
+   * 批量写入合并后的使用统计（工具调用增量、最近连接时间）
+   */
+  recordUsage(updates: BrowserUsageUpdate[]): Promise<void>;
+
   /**
    * 解绑浏览器
    */
@@ -21,14 +21,26 @@ import type {
   BrowserRecordV2,
 } from './PersistentStoreV2.js';
 import type {StorageAdapter} from './StorageAdapter.js';
+import {UsageBuffer, type UsageBufferStats} from './UsageBuffer.js';
 
 /**
  * 统一存储适配器
  * 包装 PersistentStoreV2 使其符合 StorageAdapter 接口
+ *
+ * 工具调用计数和最近连接时间经 UsageBuffer 合并后批量写入，
+ * 读到的这两个字段最多滞后一个刷新周期。
  */
 export class UnifiedStorage {
   private storeV2: PersistentStoreV2 | null = null;
   private storage: StorageAdapter | null = null;
+  private usage = new UsageBuffer(async updates => {
+    if (this.storeV2) {
+      return this.storeV2.recordUsage(updates);
+    }
+    if (this.storage) {
+      return this.storage.recordUsage(updates);
+    }
+  });
 
   constructor(store: PersistentStoreV2 | StorageAdapter) {
     // 检查是否是 StorageAdapter（异步接口）
@@ -264,21 +276,11 @@ export class UnifiedStorage {
   }
 
   async updateLastConnected(browserId: string): Promise<void> {
-    if (this.storeV2) {
-      return this.storeV2.updateLastConnected(browserId);
-    }
-    if (this.storage) {
-      return this.storage.updateLastConnected(browserId);
-    }
+    this.usage.recordConnected(browserId);
   }
 
   async incrementToolCallCount(browserId: string): Promise<void> {
-    if (this.storeV2) {
-      return this.storeV2.incrementToolCallCount(browserId);
-    }
-    if (this.storage) {
-      return this.storage.incrementToolCallCount(browserId);
-    }
+    this.usage.recordToolCall(browserId);
   }
 
   async unbindBrowser(browserId: string): Promise<void> {
@@ -304,6 +306,10 @@ export class UnifiedStorage {
     return {users: 0, browsers: 0};
   }
 
+  getUsageStats(): UsageBufferStats {
+    return this.usage.getStats();
+  }
+
   // ============================================================================
   // 生命周期
   // ============================================================================
@@ -318,6 +324,7 @@ export class UnifiedStorage {
   }
 
   async close(): Promise<void> {
+    await this.usage.close();
     if (this.storeV2) {
       return this.storeV2.close();
     }
@@ -0,0 +1,178 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+/**
+ * 浏览器使用统计的写入合并
+ *
+ * 每次工具调用都会增加 toolCallCount、每次连接都会更新 lastConnectedAt，
+ * 逐条写入时每次调用都要追加一行日志（JSONL）或一次 SQL 往返（PostgreSQL）。
+ * 这里先在内存中按浏览器合并，再批量写入：
+ * - 距第一条未写入的记录满 flushIntervalMs 后写入
+ * - 未写入的记录达到 maxPending 条时立即写入
+ * - 关闭存储时写入剩余记录
+ * 因此进程崩溃时最多丢失一个刷新周期（或 maxPending 条）的统计。
+ *
+ * 环境变量：
+ * - MCP_USAGE_FLUSH_INTERVAL_MS: 刷新周期（默认 1000）
+ * - MCP_USAGE_FLUSH_MAX_PENDING: 触发立即刷新的记录数（默认 1000）
+ */
+
+import {logger} from '../../logger.js';
+import {readPositiveIntEnv} from '../../utils/common.js';
+
+export const DEFAULT_FLUSH_INTERVAL_MS = 1000;
+export const DEFAULT_MAX_PENDING = 1000;
+
+/**
+ * 一个浏览器在一个批次内的合并结果
+ */
+export interface BrowserUsageUpdate {
+  browserId: string;
+  /** 工具调用次数增量 */
+  toolCalls: number;
+  /** 批次内最近一次连接时间 */
+  lastConnectedAt?: number;
+}
+
+export interface UsageBufferOptions {
+  flushIntervalMs: number;
+  maxPending: number;
+}
+
+export interface UsageBufferStats {
+  /** 记录的工具调用次数 */
+  toolCalls: number;
+  /** 记录的连接次数 */
+  connections: number;
+  /** 成功的批量写入次数（即实际的存储写操作数） */
+  flushes: number;
+  failedFlushes: number;
+  /** 尚未写入的记录数 */
+  pending: number;
+}
+
+export function getUsageBufferOptions(): UsageBufferOptions {
+  return {
+    flushIntervalMs: readPositiveIntEnv(
+      'MCP_USAGE_FLUSH_INTERVAL_MS',
+      DEFAULT_FLUSH_INTERVAL_MS,
+    ),
+    maxPending: readPositiveIntEnv(
+      'MCP_USAGE_FLUSH_MAX_PENDING',
+      DEFAULT_MAX_PENDING,
+    ),
+  };
+}
+
+export class UsageBuffer {
+  #write: (updates: BrowserUsageUpdate[]) => Promise<void>;
+  #options: UsageBufferOptions;
+  #pending = new Map<string, BrowserUsageUpdate>();
+  #pendingRecords = 0;
+  #timer: NodeJS.Timeout | null = null;
+  #flushing: Promise<void> = Promise.resolve();
+  #stats = {toolCalls: 0, connections: 0, flushes: 0, failedFlushes: 0};
+
+  constructor(
+    write: (updates: BrowserUsageUpdate[]) => Promise<void>,
+    options: UsageBufferOptions = getUsageBufferOptions(),
+  ) {
+    this.#write = write;
+    this.#options = options;
+  }
+
+  recordToolCall(browserId: string): void {
+    this.#entry(browserId).toolCalls++;
+    this.#stats.toolCalls++;
+    this.#recorded();
+  }
+
+  recordConnected(browserId: string, timestamp = Date.now()): void {
+    const entry = this.#entry(browserId);
+    entry.lastConnectedAt = Math.max(entry.lastConnectedAt ?? 0, timestamp);
+    this.#stats.connections++;
+    this.#recorded();
+  }
+
+  /**
+   * 写入当前缓冲的记录；批次按顺序写入，失败的批次并回缓冲区等待下次刷新
+   */
+  flush(): Promise<void> {
+    if (this.#timer) {
+      clearTimeout(this.#timer);
+      this.#timer = null;
+    }
+    this.#flushing = this.#flushing.then(() => this.#writeBatch());
+    return this.#flushing;
+  }
+
+  async close(): Promise<void> {
+    await this.flush();
+  }
+
+  getStats(): UsageBufferStats {
+    return {...this.#stats, pending: this.#pendingRecords};
+  }
+
+  #entry(browserId: string): BrowserUsageUpdate {
+    let entry = this.#pending.get(browserId);
+    if (!entry) {
+      entry = {browserId, toolCalls: 0};
+      this.#pending.set(browserId, entry);
+    }
+    return entry;
+  }
+
+  #recorded(): void {
+    this.#pendingRecords++;
+    // 只在刚达到上限时立即刷新；写入失败并回的记录等定时器重试
+    if (this.#pendingRecords === this.#options.maxPending) {
+      void this.flush();
+    } else {
+      this.#schedule();
+    }
+  }
+
+  #schedule(): void {
+    if (this.#timer) {
+      return;
+    }
+    this.#timer = setTimeout(() => {
+      this.#timer = null;
+      void this.flush();
+    }, this.#options.flushIntervalMs);
+    this.#timer.unref();
+  }
+
+  async #writeBatch(): Promise<void> {
+    if (this.#pending.size === 0) {
+      return;
+    }
+    const batch = Array.from(this.#pending.values());
+    const records = this.#pendingRecords;
+    this.#pending = new Map();
+    this.#pendingRecords = 0;
+    try {
+      await this.#write(batch);
+      this.#stats.flushes++;
+    } catch (error) {
+      this.#stats.failedFlushes++;
+      logger(`[UsageBuffer] ⚠️  写入使用统计失败，下次重试: ${error}`);
+      for (const update of batch) {
+        const entry = this.#entry(update.browserId);
+        entry.toolCalls += update.toolCalls;
+        if (update.lastConnectedAt !== undefined) {
+          entry.lastConnectedAt = Math.max(
+            entry.lastConnectedAt ?? 0,
+            update.lastConnectedAt,
+          );
+        }
+      }
+      this.#pendingRecords += records;
+      this.#schedule();
+    }
+  }
+}
@@ -31,6 +31,8 @@ export interface BrowserConnection {
   status: BrowserConnectionStatus;
   /** 最后健康检查时间 */
   lastHealthCheck: Date;
+  /** 最近一次成功的 CDP 通信（工具调用或健康检查），用于跳过健康检查 */
+  lastActivity?: number;
   /** 重连尝试次数 */
   reconnectAttempts: number;
   /** 创建时间 */
@@ -49,6 +51,30 @@ export interface BrowserPoolConfig {
   reconnectDelay: number;
   /** 连接超时（毫秒）*/
   connectionTimeout: number;
+  /** 同时进行的健康检查数上限 */
+  healthCheckConcurrency: number;
+  /** 单次健康检查（CDP 往返）超时（毫秒）*/
+  healthCheckTimeout: number;
+}
+
+/**
+ * 健康检查开销统计
+ */
+export interface HealthCheckStats {
+  /** 完成的检查轮数 */
+  cycles: number;
+  /** 实际发出 CDP 探测的检查数 */
+  checked: number;
+  /** 因近期有成功通信而跳过的检查数 */
+  skipped: number;
+  /** 失败的检查数 */
+  failed: number;
+  /** 正在进行的检查数 */
+  inFlight: number;
+  /** 单次检查耗时（毫秒）*/
+  checkMs: {total: number; max: number};
+  /** 最近一轮：耗时、检查数、跳过数 */
+  lastCycle: {durationMs: number; checked: number; skipped: number} | null;
 }
 
 /**
@@ -67,4 +93,6 @@ export interface BrowserPoolStats {
   failed: number;
   /** 按用户分组 */
   byUser: Map<string, BrowserConnectionStatus>;
+  /** 健康检查开销 */
+  healthChecks: HealthCheckStats;
 }
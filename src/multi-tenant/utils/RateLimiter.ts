@@ -7,7 +7,12 @@
 /**
  * 限流器
  *
- * 使用令牌桶算法实现限流功能
+ * - RateLimiter: 令牌桶
+ * - GcraRateLimiter: GCRA（与令牌桶等价，每个 key 只保存一个时间戳）
+ * - SlidingWindowRateLimiter: 分桶滑动窗口
+ * - PerUserRateLimiter: 按用户分片保存上述限流器
+ *
+ * 所有实现的 tryAcquire() 都是常数时间，每个 key 占用的内存与限额无关。
  */
 
 import {RateLimitError} from '../errors/AppError.js';
@@ -106,6 +111,14 @@ export class RateLimiter {
     this.lastRefill = Date.now();
   }
 
+  /**
+   * 令牌已补满：丢弃后重新创建的限流器行为完全相同
+   */
+  isIdle(): boolean {
+    this.refill();
+    return this.tokens >= this.maxTokens;
+  }
+
   /**
    * 获取当前可用令牌数
    */
@@ -133,38 +146,181 @@ export class RateLimiter {
   }
 }
 
+/**
+ * GCRA 限流器选项
+ */
+export interface GcraRateLimiterOptions {
+  /** 允许的突发请求数（相当于令牌桶容量） */
+  burst: number;
+  /** 持续速率（requests/second） */
+  ratePerSecond: number;
+}
+
+/**
+ * GCRA（Generic Cell Rate Algorithm）限流器
+ *
+ * 行为与容量为 burst、补充速率为 ratePerSecond 的令牌桶相同，
+ * 但状态只有一个"理论到达时间"（TAT）：每个请求把 TAT 推后一个发射间隔，
+ * TAT 超出当前时间 burst 个间隔时拒绝。
+ */
+export class GcraRateLimiter {
+  private readonly burst: number;
+  private readonly intervalMs: number;
+  private tat = 0;
+
+  constructor(options: GcraRateLimiterOptions) {
+    this.burst = options.burst;
+    this.intervalMs = 1000 / options.ratePerSecond;
+  }
+
+  /**
+   * 尝试获取许可
+   *
+   * @param cost 消耗的许可数（默认：1）
+   */
+  tryAcquire(cost = 1): boolean {
+    const now = Date.now();
+    const next = Math.max(this.tat, now) + cost * this.intervalMs;
+    if (next - now > this.burst * this.intervalMs) {
+      return false;
+    }
+    this.tat = next;
+    return true;
+  }
+
+  /**
+   * 获取许可（如果超限则抛出错误）
+   */
+  async acquire(cost = 1): Promise<void> {
+    if (!this.tryAcquire(cost)) {
+      throw new RateLimitError(this.burst, Math.round(this.intervalMs), {
+        requested: cost,
+        retryAfterMs: this.retryAfterMs(cost),
+      });
+    }
+  }
+
+  /**
+   * 距离下一次能获取 cost 个许可还需等待的毫秒数
+   */
+  retryAfterMs(cost = 1): number {
+    const now = Date.now();
+    const next = Math.max(this.tat, now) + cost * this.intervalMs;
+    return Math.max(0, Math.ceil(next - now - this.burst * this.intervalMs));
+  }
+
+  /**
+   * 重置限流器
+   */
+  reset(): void {
+    this.tat = 0;
+  }
+
+  /**
+   * TAT 已过去：丢弃后重新创建的限流器行为完全相同
+   */
+  isIdle(): boolean {
+    return this.tat <= Date.now();
+  }
+
+  /**
+   * 获取当前可用许可数
+   */
+  getAvailableTokens(): number {
+    const backlog = Math.max(0, this.tat - Date.now());
+    return Math.floor(
+      (this.burst * this.intervalMs - backlog) / this.intervalMs,
+    );
+  }
+
+  /**
+   * 获取统计信息
+   */
+  getStats(): {
+    burst: number;
+    availableTokens: number;
+    utilization: number;
+    ratePerSecond: number;
+  } {
+    const availableTokens = this.getAvailableTokens();
+    return {
+      burst: this.burst,
+      availableTokens,
+      utilization: ((this.burst - availableTokens) / this.burst) * 100,
+      ratePerSecond: 1000 / this.intervalMs,
+    };
+  }
+}
+
+/**
+ * 滑动窗口默认分桶数
+ */
+export const DEFAULT_WINDOW_BUCKETS = 10;
+
 /**
  * 滑动窗口限流器
  *
- * 基于时间窗口的限流，精确控制时间窗口内的请求数
+ * 把时间窗口分成固定数量的桶，只记录每个桶的请求数和窗口内的总数，
+ * 不保存每个请求的时间戳：tryAcquire() 是常数时间，内存与 maxRequests 无关。
+ * 请求在所属的桶滑出窗口时整体过期，因此过期时刻最多比精确滑动窗口早
+ * windowMs / buckets。
  */
 export class SlidingWindowRateLimiter {
-  private requests: number[] = [];
   private readonly maxRequests: number;
   private readonly windowMs: number;
+  private readonly bucketMs: number;
+  private readonly counts: Uint32Array;
+  /** 当前桶在 counts 中的下标 */
+  private head = 0;
+  /** 当前桶的起始时间 */
+  private headStart = 0;
+  /** 窗口内（所有桶）的请求总数 */
+  private total = 0;
 
-  constructor(maxRequests: number, windowMs: number) {
+  constructor(
+    maxRequests: number,
+    windowMs: number,
+    buckets = DEFAULT_WINDOW_BUCKETS,
+  ) {
     this.maxRequests = maxRequests;
     this.windowMs = windowMs;
+    this.counts = new Uint32Array(Math.max(1, buckets));
+    this.bucketMs = windowMs / this.counts.length;
   }
 
   /**
-   * 清理过期的请求记录
+   * 前进到 now 所在的桶，清空滑出窗口的桶
    */
-  private cleanup(): void {
-    const now = Date.now();
-    const cutoff = now - this.windowMs;
-    this.requests = this.requests.filter(timestamp => timestamp > cutoff);
+  private advance(now: number): void {
+    const elapsed = Math.floor((now - this.headStart) / this.bucketMs);
+    if (elapsed <= 0) {
+      return;
+    }
+    const size = this.counts.length;
+    if (elapsed >= size) {
+      this.counts.fill(0);
+      this.total = 0;
+      this.head = 0;
+      this.headStart = now - ((now - this.headStart) % this.bucketMs);
+      return;
+    }
+    for (let i = 0; i < elapsed; i++) {
+      this.head = (this.head + 1) % size;
+      this.total -= this.counts[this.head];
+      this.counts[this.head] = 0;
+    }
+    this.headStart += elapsed * this.bucketMs;
   }
 
   /**
    * 尝试获取许可
    */
   tryAcquire(): boolean {
-    this.cleanup();
+    this.advance(Date.now());
 
-    if (this.requests.length < this.maxRequests) {
-      this.requests.push(Date.now());
+    if (this.total < this.maxRequests) {
+      this.counts[this.head]++;
+      this.total++;
       return true;
     }
 
@@ -184,7 +340,16 @@ export class SlidingWindowRateLimiter {
    * 重置限流器
    */
   reset(): void {
-    this.requests = [];
+    this.counts.fill(0);
+    this.total = 0;
+  }
+
+  /**
+   * 窗口内没有请求：丢弃后重新创建的限流器行为完全相同
+   */
+  isIdle(): boolean {
+    this.advance(Date.now());
+    return this.total === 0;
   }
 
   /**
@@ -196,46 +361,81 @@ export class SlidingWindowRateLimiter {
     utilization: number;
     windowMs: number;
   } {
-    this.cleanup();
+    this.advance(Date.now());
     return {
       maxRequests: this.maxRequests,
-      currentRequests: this.requests.length,
-      utilization: (this.requests.length / this.maxRequests) * 100,
+      currentRequests: this.total,
+      utilization: (this.total / this.maxRequests) * 100,
       windowMs: this.windowMs,
     };
   }
 }
 
+export type UserRateLimiter =
+  | RateLimiter
+  | GcraRateLimiter
+  | SlidingWindowRateLimiter;
+
+/**
+ * 默认分片数
+ */
+export const DEFAULT_RATE_LIMITER_SHARDS = 16;
+
+function shardIndex(key: string, shards: number): number {
+  // FNV-1a
+  let hash = 0x811c9dc5;
+  for (let i = 0; i < key.length; i++) {
+    hash ^= key.charCodeAt(i);
+    hash = Math.imul(hash, 0x01000193);
+  }
+  return (hash >>> 0) % shards;
+}
+
 /**
  * 每用户限流器
  *
- * 为每个用户维护独立的限流器
+ * 为每个用户维护独立的限流器，按用户 ID 哈希分片保存。
+ * 清理定时器每次只扫描一个分片，并且只移除已空闲（isIdle()）的限流器：
+ * 移除后重新创建的限流器状态相同，不会重置仍在限流中的用户。
  */
 export class PerUserRateLimiter {
-  private limiters = new Map<string, RateLimiter | SlidingWindowRateLimiter>();
-  private readonly createLimiter: () => RateLimiter | SlidingWindowRateLimiter;
+  private readonly shards: Array<Map<string, UserRateLimiter>>;
+  private readonly createLimiter: () => UserRateLimiter;
   private readonly cleanupInterval: NodeJS.Timeout;
+  private nextShard = 0;
+  private evicted = 0;
 
   constructor(
-    limiterFactory: () => RateLimiter | SlidingWindowRateLimiter,
+    limiterFactory: () => UserRateLimiter,
     cleanupIntervalMs = 60000, // 1分钟
+    shards = DEFAULT_RATE_LIMITER_SHARDS,
   ) {
     this.createLimiter = limiterFactory;
+    this.shards = Array.from({length: Math.max(1, shards)}, () => new Map());
+
+    // 定期清理闲置的限流器（每次一个分片，整个表每 shards 个周期扫描一遍）
+    this.cleanupInterval = setInterval(
+      () => {
+        this.cleanup();
+      },
+      Math.max(1, Math.floor(cleanupIntervalMs / this.shards.length)),
+    );
+    this.cleanupInterval.unref();
+  }
 
-    // 定期清理长时间未使用的限流器
-    this.cleanupInterval = setInterval(() => {
-      this.cleanup();
-    }, cleanupIntervalMs);
+  private shardFor(userId: string): Map<string, UserRateLimiter> {
+    return this.shards[shardIndex(userId, this.shards.length)];
   }
 
   /**
    * 获取或创建用户的限流器
    */
-  private getLimiter(userId: string): RateLimiter | SlidingWindowRateLimiter {
-    let limiter = this.limiters.get(userId);
+  private getLimiter(userId: string): UserRateLimiter {
+    const shard = this.shardFor(userId);
+    let limiter = shard.get(userId);
     if (!limiter) {
       limiter = this.createLimiter();
-      this.limiters.set(userId, limiter);
+      shard.set(userId, limiter);
     }
     return limiter;
   }
@@ -260,18 +460,21 @@ export class PerUserRateLimiter {
    * 重置用户的限流器
    */
   reset(userId: string): void {
-    const limiter = this.limiters.get(userId);
-    if (limiter) {
-      limiter.reset();
-    }
+    this.shardFor(userId).delete(userId);
   }
 
   /**
-   * 清理长时间未使用的限流器
+   * 清理下一个分片中闲置的限流器
    */
   private cleanup(): void {
-    // 简单实现：清除所有限流器（可以优化为只清除闲置的）
-    this.limiters.clear();
+    const shard = this.shards[this.nextShard];
+    this.nextShard = (this.nextShard + 1) % this.shards.length;
+    for (const [userId, limiter] of shard) {
+      if (limiter.isIdle()) {
+        shard.delete(userId);
+        this.evicted++;
+      }
+    }
   }
 
   /**
@@ -286,14 +489,18 @@ export class PerUserRateLimiter {
    */
   getStats(): {
     totalUsers: number;
+    evicted: number;
     limiters: Map<string, unknown>;
   } {
     const stats = new Map<string, unknown>();
-    for (const [userId, limiter] of this.limiters.entries()) {
-      stats.set(userId, limiter.getStats());
+    for (const shard of this.shards) {
+      for (const [userId, limiter] of shard) {
+        stats.set(userId, limiter.getStats());
+      }
     }
     return {
-      totalUsers: this.limiters.size,
+      totalUsers: stats.size,
+      evicted: this.evicted,
       limiters: stats,
     };
   }
@@ -24,7 +24,10 @@ import {URL} from 'node:url';
 
 import {McpServer} from '@modelcontextprotocol/sdk/server/mcp.js';
 import {SSEServerTransport} from '@modelcontextprotocol/sdk/server/sse.js';
-import type {CallToolResult} from '@modelcontextprotocol/sdk/types.js';
+import type {
+  CallToolResult,
+  TextContent,
+} from '@modelcontextprotocol/sdk/types.js';
 
 import {
   ensureBrowserConnected,
@@ -37,11 +40,18 @@ import {parseArguments} from './cli.js';
 import {logger} from './logger.js';
 import {McpContext} from './McpContext.js';
 import {McpResponse} from './McpResponse.js';
-import {Mutex} from './Mutex.js';
+import {ToolScheduler} from './ToolScheduler.js';
 import {getAllTools} from './tools/registry.js';
 import type {ToolDefinition} from './tools/ToolDefinition.js';
+import {handleMemoryDebugRequest} from './utils/memoryStats.js';
 import {displaySSEModeInfo} from './utils/modeMessages.js';
 import {setupResponseErrorHandling} from './utils/response-error-handler.js';
+import {handleToolResponse} from './utils/responseStreaming.js';
+import {
+  handleMetricsRequest,
+  instrumentCdp,
+  toolMetrics,
+} from './utils/toolMetrics.js';
 import {VERSION} from './version.js';
 
 const sessions = new Map<
@@ -110,8 +120,10 @@ async function startSSEServer() {
 
   console.log('[SSE] Browser connected');
 
+  // 所有会话共用一个调度器：页面在会话之间共享
+  const toolScheduler = new ToolScheduler();
+
   // 工具注册函数
-  const toolMutex = new Mutex();
   function registerTool(
     mcpServer: McpServer,
     tool: ToolDefinition,
@@ -124,22 +136,33 @@ async function startSSEServer() {
         inputSchema: tool.schema,
         annotations: tool.annotations,
       },
-      async (params): Promise<CallToolResult> => {
-        const guard = await toolMutex.acquire();
+      async (params, extra): Promise<CallToolResult> => {
+        const timer = toolMetrics.startCall(tool.name);
+        let guard: {dispose(): void} | undefined;
         try {
+          guard = await toolScheduler.acquire(tool, params, context);
+          timer.mark('queue');
           const response = new McpResponse();
           await tool.handler({params}, response, context);
-          const content = await response.handle(tool.name, context);
+          timer.mark('handler');
+          const content = await handleToolResponse(
+            response,
+            tool.name,
+            context,
+            extra,
+          );
+          timer.mark('format');
+          timer.end('ok', content);
           return {content};
         } catch (error) {
           const errorText =
             error instanceof Error ? error.message : String(error);
-          return {
-            content: [{type: 'text', text: errorText}],
-            isError: true,
-          };
+          const content: TextContent[] = [{type: 'text', text: errorText}];
+          timer.end('error', content);
+          return {content, isError: true};
         } finally {
-          guard.dispose();
+          timer.end('error');
+          guard?.dispose();
         }
       },
     );
@@ -172,6 +195,16 @@ async function startSSEServer() {
       return;
     }
 
+    // 内存采样（MCP_DEBUG_MEMORY=1 时开放）
+    if (handleMemoryDebugRequest(url, res)) {
+      return;
+    }
+
+    // 工具调用与 CDP 延迟指标（Prometheus 文本格式）
+    if (handleMetricsRequest(url, res)) {
+      return;
+    }
+
     // 测试页面
     if (url.pathname === '/test' || url.pathname === '/') {
       res.writeHead(200, {'Content-Type': 'text/html; charset=utf-8'});
@@ -256,6 +289,7 @@ async function startSSEServer() {
       }
 
       // 创建 Context
+      await instrumentCdp(browser);
       const context = await McpContext.from(browser, logger);
 
       // 从统一注册中心获取所有工具并注册
@@ -14,16 +14,24 @@ import type {
 import z from 'zod';
 
 import type {EnhancedConsoleCollector} from '../collectors/EnhancedConsoleCollector.js';
+import type {UrlMatcher} from '../extension/ExtensionMetadataCache.js';
 import type {
   ExtensionContext,
   ExtensionInfo,
   StorageData,
   StorageType,
 } from '../extension/types.js';
-import type {TraceResult} from '../trace-processing/parse.js';
+import type {RecordedTrace} from '../trace-processing/TraceWorkerPool.js';
 
 import type {ToolCategories} from './categories.js';
 
+/**
+ * - page: the selected page
+ * - browser: browser-wide state, or the extension given by `extensionId`
+ * - context: which pages exist or are selected (select/new/close page)
+ */
+export type ToolScope = 'page' | 'browser' | 'context';
+
 export interface ToolDefinition<Schema extends z.ZodRawShape = z.ZodRawShape> {
   name: string;
   description: string;
@@ -34,6 +42,20 @@ export interface ToolDefinition<Schema extends z.ZodRawShape = z.ZodRawShape> {
      * If true, the tool does not modify its environment.
      */
     readOnlyHint: boolean;
+    /**
+     * If true, the tool only reads browser/context state and may run
+     * concurrently with other concurrency-safe tools (e.g. pipelined stdio
+     * requests). Tools that navigate, select pages or store snapshots must
+     * leave this unset so they run exclusively.
+     */
+    concurrencySafe?: boolean;
+    /**
+     * What the tool operates on, used by ToolScheduler to decide which calls
+     * may run at the same time. Defaults to 'browser' for extension and
+     * browser-info tools and 'page' (the selected page) otherwise. Tools
+     * that open, close or select pages must use 'context'.
+     */
+    scope?: ToolScope;
   };
   schema: Schema;
   handler: (
@@ -52,15 +74,32 @@ export interface ImageContentData {
   mimeType: string;
 }
 
+/**
+ * list_network_requests 的过滤与分页选项，过滤条件之间为“与”
+ */
+export interface NetworkRequestsOptions {
+  pageSize?: number;
+  pageIdx?: number;
+  resourceTypes?: string[];
+  /** 状态类别：`2xx`、`4xx` 等，或 `failed` */
+  statusClasses?: string[];
+  /** URL 主机名（不区分大小写） */
+  hosts?: string[];
+  /** 只包含此时间戳（毫秒）之后收集到的请求 */
+  since?: number;
+  /** 只包含此游标之后的请求，设置后忽略 pageIdx */
+  cursor?: string;
+}
+
 export interface Response {
   appendResponseLine(value: string): void;
   setIncludePages(value: boolean): void;
   setIncludeNetworkRequests(
     value: boolean,
-    options?: {pageSize?: number; pageIdx?: number; resourceTypes?: string[]},
+    options?: NetworkRequestsOptions,
   ): void;
   setIncludeConsoleData(value: boolean): void;
-  setIncludeSnapshot(value: boolean): void;
+  setIncludeSnapshot(value: boolean, options?: {incremental?: boolean}): void;
   attachImage(value: ImageContentData): void;
   attachNetworkRequest(url: string): void;
 }
@@ -71,8 +110,8 @@ export interface Response {
 export type Context = Readonly<{
   isRunningPerformanceTrace(): boolean;
   setIsRunningPerformanceTrace(x: boolean): void;
-  recordedTraces(): TraceResult[];
-  storeTraceRecording(result: TraceResult): void;
+  recordedTraces(): RecordedTrace[];
+  storeTraceRecording(trace: RecordedTrace): void;
   getSelectedPage(): Page;
   getDialog(): Dialog | undefined;
   clearDialog(): void;
@@ -97,6 +136,11 @@ export type Context = Readonly<{
   getBrowser(): Browser;
   getExtensions(includeDisabled?: boolean): Promise<ExtensionInfo[]>;
   getExtensionDetails(extensionId: string): Promise<ExtensionInfo | null>;
+  getExtensionMatchPattern(
+    extension: ExtensionInfo,
+    pattern: string,
+  ): UrlMatcher;
+  invalidateExtensionCache(extensionId: string): void;
   getExtensionContexts(extensionId: string): Promise<ExtensionContext[]>;
   switchToExtensionContext(contextId: string): Promise<Page>;
   evaluateInExtensionContext(
@@ -15,6 +15,7 @@ export const getConnectedBrowser = defineTool({
   annotations: {
     category: ToolCategories.BROWSER_INFO,
     readOnlyHint: true,
+    concurrencySafe: true,
   },
   schema: {},
   handler: async (_request, response, context) => {
@@ -81,6 +82,7 @@ export const listBrowserCapabilities = defineTool({
   annotations: {
     category: ToolCategories.BROWSER_INFO,
     readOnlyHint: true,
+    concurrencySafe: true,
   },
   schema: {},
   handler: async (_request, response, context) => {
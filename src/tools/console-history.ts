@@ -6,6 +6,8 @@
 
 import z from 'zod';
 
+import {decodeCursor, encodeCursor} from '../utils/pagination.js';
+
 import {ToolCategories} from './categories.js';
 import {defineTool} from './ToolDefinition.js';
 
@@ -31,6 +33,7 @@ export const getPageConsoleLogs = defineTool({
 - \`sources\`: Filter by source (page, worker, service-worker, iframe)
 - \`since\`: Only logs after timestamp (milliseconds)
 - \`limit\`: Maximum number of logs to return
+- \`cursor\`: Only logs after a previous response's "Next cursor" (poll for new logs)
 
 **When to use**:
 - ✅ After clicking buttons to see what was logged
@@ -57,6 +60,7 @@ get_page_console_logs({ types: ['error', 'warn'] })  → Only errors and warning
 get_page_console_logs({ sources: ['worker'] })  → Only Worker logs
 get_page_console_logs({ since: Date.now() - 60000 })  → Last minute
 get_page_console_logs({ limit: 10 })  → Last 10 logs
+get_page_console_logs({ cursor: 'c42' })  → Logs that arrived after the previous call
 \`\`\`
 
 **Tip**: Most action tools (click, fill, evaluate_script) now automatically include console logs in their response, so you may not need to call this tool separately.
@@ -94,6 +98,12 @@ get_page_console_logs({ limit: 10 })  → Last 10 logs
       .describe(
         'Maximum number of logs to return. When omitted, returns all logs.',
       ),
+    cursor: z
+      .string()
+      .optional()
+      .describe(
+        'Only return logs after this cursor ("Next cursor" of a previous response), oldest first; with limit, returns the first N of them. Cursors stay valid while new logs arrive.',
+      ),
   },
   handler: async (request, response, context) => {
     const page = context.getSelectedPage();
@@ -103,13 +113,25 @@ get_page_console_logs({ limit: 10 })  → Last 10 logs
 
     if (collector) {
       // 使用增强收集器
-      const {types, sources, since, limit} = request.params;
-
-      // 应用过滤
-      const logs =
-        types || sources || since || limit
-          ? collector.getFilteredLogs({types, sources, since, limit})
-          : collector.getLogs();
+      const {types, sources, since, limit, cursor} = request.params;
+      const after = cursor === undefined ? undefined : decodeCursor(cursor);
+
+      // 用索引过滤，只完整序列化要返回的日志；
+      // 没有游标时 limit 取最新的 N 条，有游标时取游标之后最早的 N 条
+      const result = collector.queryLogs({
+        types,
+        sources,
+        since,
+        limit,
+        after,
+        tail: cursor === undefined,
+      });
+      const logs = await collector.resolveLogs(result.items);
+      // 游标之后还有未返回的匹配日志时从最后一条继续，否则跳到最新一条
+      const hasMore = cursor !== undefined && result.hasMore;
+      const nextSeq = hasMore
+        ? result.seqs.at(-1)!
+        : Math.max(collector.getLastSeq(), after ?? -1);
 
       // 获取统计信息
       const stats = collector.getLogStats();
@@ -119,7 +141,23 @@ get_page_console_logs({ limit: 10 })  → Last 10 logs
       if (logs.length !== stats.total) {
         response.appendResponseLine(` (filtered from ${stats.total})`);
       }
+      const dropped = collector.getDroppedCount();
+      if (dropped > 0) {
+        response.appendResponseLine(
+          ` (${dropped} older messages dropped, collector limit reached)`,
+        );
+      }
+      if (cursor !== undefined && after === undefined) {
+        response.appendResponseLine(
+          ' (invalid cursor, showing logs from the beginning)',
+        );
+      }
       response.appendResponseLine('\n');
+      if (nextSeq >= 0) {
+        response.appendResponseLine(
+          `**Next cursor**: ${encodeCursor(nextSeq)}${hasMore ? ' (more logs available)' : ''}\n`,
+        );
+      }
       response.appendResponseLine(
         `**Source**: CDP Runtime.consoleAPICalled (all contexts)\n`,
       );
@@ -9,7 +9,15 @@ import z from 'zod';
 import {
   FILTERABLE_LOG_SOURCES,
   FILTERABLE_LOG_TYPES,
+  type ConsoleLog,
 } from '../collectors/EnhancedConsoleCollector.js';
+import {
+  decodeCursor,
+  DEFAULT_PAGE_SIZE,
+  encodeCursor,
+  paginate,
+  type PaginationResult,
+} from '../utils/pagination.js';
 import {paginationSchema} from '../utils/paramValidator.js';
 
 import {ToolCategories} from './categories.js';
@@ -30,6 +38,7 @@ export const consoleTool = defineTool({
 **Pagination**:
 - Control page size (default: 20)
 - Navigate pages (0-indexed)
+- Or pass the "Next Cursor" of a previous response as cursor to get the messages after it (stays valid while new messages arrive)
 
 **Examples**:
 - Get all errors: types=['error']
@@ -41,10 +50,12 @@ export const consoleTool = defineTool({
 - ✅ Console messages are automatically collected from all pages
 - ✅ Collection starts when MCP server connects to the browser
 - ✅ Messages accumulate continuously while you use other tools
+- ⚠️ Only the most recent messages per page are kept; older ones are dropped and counted
 - ⚠️ Messages are cleared when page navigates (refresh/URL change)`,
   annotations: {
     category: ToolCategories.DEBUGGING,
     readOnlyHint: true,
+    concurrencySafe: true,
   },
   schema: {
     types: z
@@ -74,6 +85,12 @@ export const consoleTool = defineTool({
         'Maximum number of logs to return. When omitted, returns all logs.',
       ),
     ...paginationSchema,
+    cursor: z
+      .string()
+      .optional()
+      .describe(
+        'Return up to pageSize messages after this cursor ("Next Cursor" of a previous response). Takes precedence over pageIdx.',
+      ),
   },
   handler: async (request, response, context) => {
     const page = context.getSelectedPage();
@@ -86,22 +103,12 @@ export const consoleTool = defineTool({
       return;
     }
 
-    // 应用过滤
-    const filtered = collector.getFilteredLogs({
+    const filters = {
       types: request.params.types,
-      sources: request.params.sources as
-        | Array<'page' | 'worker' | 'service-worker' | 'iframe'>
-        | undefined,
+      sources: request.params.sources,
       since: request.params.since,
-      limit: request.params.limit,
-    });
-
-    // 应用分页
-    const {paginate} = await import('../utils/pagination.js');
-    const paginated = paginate(filtered, {
-      pageSize: request.params.pageSize,
-      pageIdx: request.params.pageIdx,
-    });
+    };
+    const {cursor} = request.params;
 
     // 获取统计信息
     const stats = collector.getLogStats();
@@ -111,13 +118,55 @@ export const consoleTool = defineTool({
     lines.push('## Console Messages');
     lines.push('');
     lines.push(`**Total Messages**: ${stats.total}`);
-    lines.push(`**Filtered**: ${filtered.length}`);
-    lines.push(
-      `**Current Page**: ${paginated.currentPage + 1}/${paginated.totalPages}`,
-    );
-    lines.push(
-      `**Showing**: ${paginated.startIndex + 1}-${paginated.endIndex} of ${filtered.length}`,
-    );
+    const dropped = collector.getDroppedCount();
+    if (dropped > 0) {
+      lines.push(
+        `**Dropped**: ${dropped} older messages (collector limit reached)`,
+      );
+    }
+
+    let paginated: PaginationResult<ConsoleLog> | undefined;
+    // 游标模式下要返回的日志（已完整序列化）
+    let messages: ConsoleLog[] | undefined;
+    if (cursor !== undefined) {
+      // 游标分页：直接从索引取游标之后的一页
+      const after = decodeCursor(cursor);
+      const result = collector.queryLogs({
+        ...filters,
+        after,
+        limit: request.params.pageSize ?? DEFAULT_PAGE_SIZE,
+      });
+      messages = await collector.resolveLogs(result.items);
+      const last = result.hasMore
+        ? result.seqs.at(-1)!
+        : Math.max(collector.getLastSeq(), after ?? -1);
+      lines.push(`**Showing**: ${result.items.length} after the cursor`);
+      if (last >= 0) {
+        lines.push(
+          `**Next Cursor**: ${encodeCursor(last)}${result.hasMore ? '' : ' (no more messages yet)'}`,
+        );
+      }
+      if (after === undefined) {
+        lines.push('⚠️ Invalid cursor provided. Showing first page.');
+      }
+    } else {
+      // 应用过滤和分页
+      const filtered = collector.getFilteredLogs({
+        ...filters,
+        limit: request.params.limit,
+      });
+      paginated = paginate(filtered, {
+        pageSize: request.params.pageSize,
+        pageIdx: request.params.pageIdx,
+      });
+      lines.push(`**Filtered**: ${filtered.length}`);
+      lines.push(
+        `**Current Page**: ${paginated.currentPage + 1}/${paginated.totalPages}`,
+      );
+      lines.push(
+        `**Showing**: ${paginated.startIndex + 1}-${paginated.endIndex} of ${filtered.length}`,
+      );
+    }
     lines.push('');
 
     if (Object.keys(stats.byType).length > 0) {
@@ -136,18 +185,39 @@ export const consoleTool = defineTool({
       lines.push('');
     }
 
-    if (paginated.hasNextPage) {
+    if (paginated?.hasNextPage) {
       lines.push(`**Next Page**: pageIdx=${paginated.currentPage + 1}`);
     }
-    if (paginated.hasPreviousPage) {
+    if (paginated?.hasPreviousPage) {
       lines.push(`**Previous Page**: pageIdx=${paginated.currentPage - 1}`);
     }
 
-    if (paginated.invalidPage) {
+    if (paginated?.invalidPage) {
       lines.push('');
       lines.push('⚠️ Invalid page number provided. Showing first page.');
     }
 
+    if (messages) {
+      // 游标模式只返回游标之后的这一页，不附带整个收集器的内容
+      lines.push('');
+      lines.push('## Messages');
+      lines.push('');
+      if (messages.length === 0) {
+        lines.push('No new console messages after the cursor.');
+      }
+      messages.forEach((log, index) => {
+        const location = log.url ? `${log.url}:${log.lineNumber}` : '<unknown>';
+        const sourceTag = log.source ? ` [${log.source.toUpperCase()}]` : '';
+        lines.push(
+          `### ${index + 1}. [${log.type.toUpperCase()}]${sourceTag} ${location}`,
+        );
+        lines.push(log.text);
+        lines.push('');
+      });
+      response.appendResponseLine(lines.join('\n'));
+      return;
+    }
+
     response.appendResponseLine(lines.join('\n'));
 
     // 仍然使用原有的 setIncludeConsoleData 来显示消息内容
@@ -12,6 +12,7 @@
 
 import z from 'zod';
 
+import type {UrlMatcher} from '../../extension/ExtensionMetadataCache.js';
 import {ToolCategories} from '../categories.js';
 import {defineTool} from '../ToolDefinition.js';
 import {reportExtensionNotFound} from '../utils/ErrorReporting.js';
@@ -221,6 +222,9 @@ export const checkContentScriptInjection = defineTool({
       }
 
       const contentScripts = manifest.content_scripts || [];
+      // match pattern 按扩展 ID + 版本编译一次
+      const compilePattern = (pattern: string) =>
+        context.getExtensionMatchPattern(extension, pattern);
 
       if (contentScripts.length === 0) {
         response.appendResponseLine(`# Content Script Check\n`);
@@ -270,7 +274,12 @@ export const checkContentScriptInjection = defineTool({
         // 如果提供了测试URL，检查是否匹配
         let matchResult;
         if (testUrl) {
-          matchResult = checkUrlMatch(testUrl, matches, excludeMatches);
+          matchResult = checkUrlMatch(
+            testUrl,
+            matches,
+            excludeMatches,
+            compilePattern,
+          );
           matchResults.push({
             rule,
             index: i,
@@ -295,7 +304,11 @@ export const checkContentScriptInjection = defineTool({
           );
           matches.forEach((pattern: string) => {
             if (testUrl) {
-              const matchesUrl = testUrlPattern(testUrl, pattern);
+              const matchesUrl = testUrlPattern(
+                testUrl,
+                pattern,
+                compilePattern,
+              );
               const matchIcon = matchesUrl ? '✅' : '❌';
               response.appendResponseLine(`  - ${matchIcon} \`${pattern}\``);
             } else {
@@ -309,7 +322,11 @@ export const checkContentScriptInjection = defineTool({
             );
             excludeMatches.forEach((pattern: string) => {
               if (testUrl) {
-                const matchesUrl = testUrlPattern(testUrl, pattern);
+                const matchesUrl = testUrlPattern(
+                  testUrl,
+                  pattern,
+                  compilePattern,
+                );
                 const matchIcon = matchesUrl ? '🚫' : '✅';
                 response.appendResponseLine(`  - ${matchIcon} \`${pattern}\``);
               } else {
@@ -458,11 +475,12 @@ export const checkContentScriptInjection = defineTool({
 function checkUrlMatch(
   url: string,
   matches: string[],
-  excludeMatches: string[] = [],
+  excludeMatches: string[],
+  compile: (pattern: string) => UrlMatcher,
 ): {shouldInject: boolean; reason: string} {
   // 检查 exclude_matches
   for (const pattern of excludeMatches) {
-    if (testUrlPattern(url, pattern)) {
+    if (testUrlPattern(url, pattern, compile)) {
       return {
         shouldInject: false,
         reason: `Excluded by pattern: ${pattern}`,
@@ -472,7 +490,7 @@ function checkUrlMatch(
 
   // 检查 matches
   for (const pattern of matches) {
-    if (testUrlPattern(url, pattern)) {
+    if (testUrlPattern(url, pattern, compile)) {
       return {
         shouldInject: true,
         reason: `Matched pattern: ${pattern}`,
@@ -489,82 +507,18 @@ function checkUrlMatch(
 /**
  * 测试 URL 是否匹配模式
  */
-function testUrlPattern(url: string, pattern: string): boolean {
+function testUrlPattern(
+  url: string,
+  pattern: string,
+  compile: (pattern: string) => UrlMatcher,
+): boolean {
   try {
-    // 解析 URL
-    const urlObj = new URL(url);
-
-    // <all_urls> 匹配所有
-    if (pattern === '<all_urls>') {
-      return (
-        urlObj.protocol === 'http:' ||
-        urlObj.protocol === 'https:' ||
-        urlObj.protocol === 'file:'
-      );
-    }
-
-    // 解析 pattern: scheme://host/path
-    const patternParts = pattern.match(
-      /^(\*|https?|file|ftp):\/\/([^/]+)(\/.*)$/,
-    );
-    if (!patternParts) {
-      return false;
-    }
-
-    const [, schemePattern, hostPattern, pathPattern] = patternParts;
-
-    // 检查 scheme
-    const urlScheme = urlObj.protocol.slice(0, -1); // 移除 ':'
-    if (schemePattern !== '*' && schemePattern !== urlScheme) {
-      return false;
-    }
-
-    // 检查 host
-    if (!matchHost(urlObj.hostname, hostPattern)) {
-      return false;
-    }
-
-    // 检查 path
-    if (!matchPath(urlObj.pathname, pathPattern)) {
-      return false;
-    }
-
-    return true;
+    return compile(pattern)(new URL(url));
   } catch (_e) {
     return false;
   }
 }
 
-/**
- * 匹配 host
- */
-function matchHost(host: string, pattern: string): boolean {
-  if (pattern === '*') {
-    return true;
-  }
-
-  // *.example.com 匹配 example.com 和所有子域
-  if (pattern.startsWith('*.')) {
-    const baseDomain = pattern.substring(2);
-    return host === baseDomain || host.endsWith('.' + baseDomain);
-  }
-
-  return host === pattern;
-}
-
-/**
- * 匹配 path
- */
-function matchPath(path: string, pattern: string): boolean {
-  // 将 pattern 转换为正则表达式
-  const regexPattern = pattern
-    .replace(/[.+?^${}()|[\]\\]/g, '\\$&') // 转义特殊字符
-    .replace(/\*/g, '.*'); // * 匹配任意字符
-
-  const regex = new RegExp('^' + regexPattern + '$');
-  return regex.test(path);
-}
-
 /**
  * 生成调试建议
  */
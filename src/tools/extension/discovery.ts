@@ -24,6 +24,7 @@ export const listExtensions = defineTool({
   annotations: {
     category: ToolCategories.EXTENSION_DISCOVERY,
     readOnlyHint: true,
+    concurrencySafe: true,
   },
   schema: {
     includeDisabled: z
@@ -271,6 +272,7 @@ Use \`list_extensions\` first to get the extension ID.`,
   annotations: {
     category: ToolCategories.EXTENSION_DISCOVERY,
     readOnlyHint: true,
+    concurrencySafe: true,
   },
   schema: {
     extensionId: z
@@ -664,6 +664,8 @@ Supports cache strategies: auto (default), force-clear, preserve, disable. Use f
   annotations: {
     category: ToolCategories.EXTENSION_LIFECYCLE,
     readOnlyHint: false,
+    // 会临时打开页面，改变页面列表
+    scope: 'context',
   },
   schema: {
     extensionId: z
@@ -1067,6 +1069,8 @@ Supports cache strategies: auto (default), force-clear, preserve, disable. Use f
           `[reload_extension] ✅ Disk reload successful:`,
           reloadResult,
         );
+        // manifest 可能已变化（版本号不一定改变）
+        context.invalidateExtensionCache(extensionId);
         response.appendResponseLine(
           '✅ Extension completely reloaded from disk\n',
         );
@@ -1364,6 +1368,8 @@ export const clearExtensionErrors = defineTool({
   annotations: {
     category: ToolCategories.EXTENSION_DEBUGGING,
     readOnlyHint: false, // Clears data (side effect)
+    // 会临时打开页面，改变页面列表
+    scope: 'context',
   },
   schema: {
     extensionId: z
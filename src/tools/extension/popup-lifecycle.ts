@@ -60,6 +60,8 @@ For most testing, both work fine.
   annotations: {
     category: ToolCategories.EXTENSION_INTERACTION,
     readOnlyHint: false, // 有副作用：打开 popup
+    // 会新建页面，改变页面列表，需要独占上下文
+    scope: 'context',
   },
   schema: {
     extensionId: z
@@ -547,6 +549,8 @@ This tool is useful for programmatic control.
   annotations: {
     category: ToolCategories.EXTENSION_INTERACTION,
     readOnlyHint: false, // 有副作用：关闭 popup
+    // 通过 context.closePage 关闭页面并重置选中页，与 close_page 一样独占上下文
+    scope: 'context',
   },
   schema: {
     extensionId: z
@@ -60,6 +60,8 @@ export const getExtensionRuntimeErrors = defineTool({
   annotations: {
     category: ToolCategories.EXTENSION_DEBUGGING,
     readOnlyHint: true,
+    // 会临时打开页面，改变页面列表
+    scope: 'context',
   },
   schema: {
     extensionId: z
@@ -11,7 +11,6 @@
 
 import z from 'zod';
 
-import {ExtensionHelper} from '../../extension/ExtensionHelper.js';
 import {ToolCategories} from '../categories.js';
 import {defineTool} from '../ToolDefinition.js';
 
@@ -127,8 +126,6 @@ MV3 Service Workers become inactive after ~30 seconds. When inactive:
         );
       }
 
-      // Activate Service Worker using CDP API
-      const helper = new ExtensionHelper(context.getBrowser());
       const results: Array<{
         id: string;
         name: string;
@@ -204,7 +201,7 @@ MV3 Service Workers become inactive after ~30 seconds. When inactive:
 
       // Activate target extensions
       for (const target of targetExtensions) {
-        const result = await helper.activateServiceWorker(target.id);
+        const result = await context.activateServiceWorker(target.id);
 
         results.push({
           id: target.id,
@@ -34,12 +34,18 @@ const FILTERABLE_RESOURCE_TYPES: readonly [ResourceType, ...ResourceType[]] = [
   'other',
 ];
 
+const STATUS_CLASSES = ['1xx', '2xx', '3xx', '4xx', '5xx', 'failed'] as const;
+
 export const listNetworkRequests = defineTool({
   name: 'list_network_requests',
-  description: `List all requests for the currently selected page since the last navigation.`,
+  description: `List all requests for the currently selected page since the last navigation.
+
+Filters (resourceTypes, statusClasses, hosts, since) are combined with AND and answered from per-page indexes.
+To follow new requests, pass the "Next cursor" from a previous response as cursor: it stays valid while new requests arrive.`,
   annotations: {
     category: ToolCategories.NETWORK,
     readOnlyHint: true,
+    concurrencySafe: true,
   },
   schema: {
     ...paginationSchema,
@@ -49,12 +55,40 @@ export const listNetworkRequests = defineTool({
       .describe(
         'Filter requests to only return requests of the specified resource types. When omitted or empty, returns all requests.',
       ),
+    statusClasses: z
+      .array(z.enum(STATUS_CLASSES))
+      .optional()
+      .describe(
+        'Filter by response status class. "failed" matches requests that failed without a response. Pending requests never match.',
+      ),
+    hosts: z
+      .array(z.string())
+      .optional()
+      .describe(
+        'Filter by URL host name, e.g. "api.example.com" (exact match, case-insensitive).',
+      ),
+    since: z
+      .number()
+      .optional()
+      .describe(
+        'Only return requests collected at or after this timestamp (milliseconds since epoch).',
+      ),
+    cursor: z
+      .string()
+      .optional()
+      .describe(
+        'Return up to pageSize requests collected after this cursor ("Next cursor" of a previous response). Takes precedence over pageIdx.',
+      ),
   },
   handler: async (request, response) => {
     response.setIncludeNetworkRequests(true, {
       pageSize: request.params.pageSize,
       pageIdx: request.params.pageIdx,
       resourceTypes: request.params.resourceTypes,
+      statusClasses: request.params.statusClasses,
+      hosts: request.params.hosts,
+      since: request.params.since,
+      cursor: request.params.cursor,
     });
   },
 });
@@ -77,6 +111,7 @@ You can get all requests by calling ${listNetworkRequests.name}.`,
   annotations: {
     category: ToolCategories.NETWORK,
     readOnlyHint: true,
+    concurrencySafe: true,
   },
   schema: {
     id: z
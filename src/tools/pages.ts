@@ -18,6 +18,8 @@ export const listPages = defineTool({
   annotations: {
     category: ToolCategories.NAVIGATION_AUTOMATION,
     readOnlyHint: true,
+    concurrencySafe: true,
+    scope: 'browser',
   },
   schema: {},
   handler: async (_request, response) => {
@@ -33,6 +35,7 @@ export const selectPage = defineTool({
   annotations: {
     category: ToolCategories.NAVIGATION_AUTOMATION,
     readOnlyHint: true,
+    scope: 'context',
   },
   schema: {
     pageIdx: z
@@ -55,6 +58,7 @@ export const closePage = defineTool({
   annotations: {
     category: ToolCategories.NAVIGATION_AUTOMATION,
     readOnlyHint: false,
+    scope: 'context',
   },
   schema: {
     pageIdx: z
@@ -85,6 +89,7 @@ export const newPage = defineTool({
   annotations: {
     category: ToolCategories.NAVIGATION_AUTOMATION,
     readOnlyHint: false,
+    scope: 'context',
   },
   schema: {
     url: z.string().describe('URL to load in a new page.'),
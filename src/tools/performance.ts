@@ -9,12 +9,7 @@ import z from 'zod';
 
 import {logger} from '../logger.js';
 import type {InsightName} from '../trace-processing/parse.js';
-import {
-  getInsightOutput,
-  getTraceSummary,
-  parseRawTraceBuffer,
-  traceResultIsSuccess,
-} from '../trace-processing/parse.js';
+import {getTraceWorkerPool} from '../trace-processing/TraceWorkerPool.js';
 
 import {ToolCategories} from './categories.js';
 import type {Context, Response} from './ToolDefinition.js';
@@ -48,6 +43,8 @@ export const startTrace = defineTool({
       return;
     }
     context.setIsRunningPerformanceTrace(true);
+    // 录制期间启动解析 worker，停止时无需等待模块加载
+    getTraceWorkerPool().warmUp();
 
     const page = context.getSelectedPage();
     const pageUrlForTracing = page.url();
@@ -143,8 +140,7 @@ export const analyzeInsight = defineTool({
       return;
     }
 
-    const insightOutput = getInsightOutput(
-      lastRecording,
+    const insightOutput = await lastRecording.getInsightOutput(
       request.params.insightName as InsightName,
     );
     if ('error' in insightOutput) {
@@ -163,17 +159,16 @@ async function stopTracingAndAppendOutput(
 ): Promise<void> {
   try {
     const traceEventsBuffer = await page.tracing.stop();
-    const result = await parseRawTraceBuffer(traceEventsBuffer);
+    const result = await getTraceWorkerPool().parse(traceEventsBuffer);
     response.appendResponseLine('The performance trace has been stopped.');
-    if (traceResultIsSuccess(result)) {
-      context.storeTraceRecording(result);
-      const traceSummaryText = getTraceSummary(result);
-      response.appendResponseLine(traceSummaryText);
-    } else {
+    if ('error' in result) {
       response.appendResponseLine(
         'There was an unexpected error parsing the trace:',
       );
       response.appendResponseLine(result.error);
+    } else {
+      context.storeTraceRecording(result);
+      response.appendResponseLine(result.summary);
     }
   } catch (e) {
     const errorText = e instanceof Error ? e.message : JSON.stringify(e);
@@ -18,9 +18,18 @@ identifier (uid). Always use the latest snapshot. Prefer taking a snapshot over
     category: ToolCategories.DEBUGGING,
     readOnlyHint: true,
   },
-  schema: {},
-  handler: async (_request, response) => {
-    response.setIncludeSnapshot(true);
+  schema: {
+    incremental: z
+      .boolean()
+      .optional()
+      .describe(
+        'Only return what changed since the previous snapshot of this page (added, removed and changed elements). Unchanged elements keep their uids. Returns the full snapshot if there is no previous snapshot or most of the page changed.',
+      ),
+  },
+  handler: async (request, response) => {
+    response.setIncludeSnapshot(true, {
+      incremental: request.params.incremental,
+    });
   },
 });
 
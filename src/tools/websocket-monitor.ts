@@ -11,19 +11,24 @@
 import type {CDPSession} from 'puppeteer-core';
 import z from 'zod';
 
+import {
+  isControlFrame,
+  WebSocketCaptureFile,
+  type WebSocketConnectionStats,
+  type WebSocketFrameInput,
+  WebSocketFrameStore,
+} from '../collectors/WebSocketFrameStore.js';
+
 import {ToolCategories} from './categories.js';
 import {defineTool} from './ToolDefinition.js';
 
 /**
- * WebSocket 帧数据
+ * CDP 帧事件
  */
-interface WebSocketFrame {
-  direction: 'sent' | 'received';
-  timestamp: number;
+interface WebSocketFrameEvent {
   requestId: string;
-  payloadData: string;
-  opcode: number;
-  mask: boolean;
+  timestamp: number;
+  response: {opcode: number; payloadData: string; mask: boolean};
 }
 
 /**
@@ -38,6 +43,40 @@ const OPCODE_NAMES: Record<number, string> = {
   10: 'pong',
 };
 
+/** Frame Details 中最多显示的帧数 */
+const MAX_FRAME_DETAILS = 50;
+
+function formatBytes(bytes: number): string {
+  if (bytes < 1024) {
+    return `${bytes} B`;
+  }
+  if (bytes < 1024 * 1024) {
+    return `${(bytes / 1024).toFixed(1)} KB`;
+  }
+  return `${(bytes / 1024 / 1024).toFixed(1)} MB`;
+}
+
+function formatOpcodes(opcodes: Record<number, number>): string {
+  return Object.entries(opcodes)
+    .map(
+      ([opcode, count]) =>
+        `${OPCODE_NAMES[Number(opcode)] || `unknown(${opcode})`} ${count}`,
+    )
+    .join(', ');
+}
+
+function formatRates(
+  stats: Pick<
+    WebSocketConnectionStats,
+    'sentFrames' | 'receivedFrames' | 'sentBytes' | 'receivedBytes'
+  >,
+  seconds: number,
+): string {
+  const frames = stats.sentFrames + stats.receivedFrames;
+  const bytes = stats.sentBytes + stats.receivedBytes;
+  return `${(frames / seconds).toFixed(1)} frames/s, ${formatBytes(bytes / seconds)}/s`;
+}
+
 export const monitorWebSocketTraffic = defineTool({
   name: 'monitor_websocket_traffic',
   description: `Monitor WebSocket frame traffic on the selected page.
@@ -51,6 +90,7 @@ export const monitorWebSocketTraffic = defineTool({
 - Frame type (text/binary/ping/pong/close)
 - Timestamps
 - Frame size
+- Per-connection frame counts, bytes, rates and frame type histogram
 
 **Use cases**:
 - Debug WebSocket-based applications (chat, gaming, real-time data)
@@ -65,9 +105,10 @@ which provide access to the actual frame data that HTTPRequest API does not expo
 
 **⚠️ Important**:
 - WebSocket connection must be established BEFORE starting monitoring
-- Monitoring is time-limited to avoid memory issues
-- Large payloads are automatically truncated for display
+- Monitoring is time-limited; only the most recent \`maxFrames\` frames are kept, but the summary counts every frame
+- Stored payloads are truncated to a preview plus a hash of the full payload; use \`filePath\` to keep full payloads
 - Binary frames are shown in base64 encoding
+- Control frames (ping/pong/close) are ignored entirely, including in the summary, unless \`includeControlFrames\` is true
 
 **Tip**: Use \`list_network_requests\` with \`resourceTypes: ["websocket"]\` first to check if WebSocket connections exist.
 
@@ -91,22 +132,34 @@ which provide access to the actual frame data that HTTPRequest API does not expo
       ),
     maxFrames: z
       .number()
+      .int()
       .positive()
       .optional()
       .default(100)
-      .describe('Maximum number of frames to capture. Default is 100.'),
+      .describe(
+        'Maximum number of frames to keep for display (the most recent ones). The summary still counts every frame. Default is 100.',
+      ),
     includeControlFrames: z
       .boolean()
       .optional()
       .default(false)
-      .describe('Include control frames (ping/pong/close). Default is false.'),
+      .describe(
+        'Include control frames (ping/pong/close) in the frames and the summary. Default is false.',
+      ),
+    filePath: z
+      .string()
+      .optional()
+      .describe(
+        'The absolute path, or a path relative to the current working directory, to stream every captured frame (with the full payload) to as JSON Lines.',
+      ),
   },
   handler: async (request, response, context) => {
-    const {duration, filterUrl, maxFrames, includeControlFrames} =
+    const {duration, filterUrl, maxFrames, includeControlFrames, filePath} =
       request.params;
 
     const page = context.getSelectedPage();
     let client: CDPSession | null = null;
+    let captureFile: WebSocketCaptureFile | null = null;
 
     try {
       // 1. 创建 CDP Session
@@ -115,104 +168,50 @@ which provide access to the actual frame data that HTTPRequest API does not expo
       // 2. 启用 Network 域
       await client.send('Network.enable');
 
-      const frames: WebSocketFrame[] = [];
-      const websocketUrls = new Map<string, string>();
+      const store = new WebSocketFrameStore(maxFrames);
+      if (filePath) {
+        captureFile = new WebSocketCaptureFile(filePath);
+      }
+      // requestId → URL 是否匹配 filterUrl（URL 未知的连接不过滤）
+      const urlFilter = filterUrl?.toLowerCase();
+      const matchesFilter = new Map<string, boolean>();
+      let capturing = true;
 
       // 3. 监听 WebSocket 创建事件（获取 URL）
       client.on(
         'Network.webSocketCreated',
         (event: {requestId: string; url: string}) => {
-          websocketUrls.set(event.requestId, event.url);
+          store.setUrl(event.requestId, event.url);
+          matchesFilter.set(
+            event.requestId,
+            !urlFilter || event.url.toLowerCase().includes(urlFilter),
+          );
         },
       );
 
-      // 4. 监听接收帧事件
-      client.on(
-        'Network.webSocketFrameReceived',
-        (event: {
-          requestId: string;
-          timestamp: number;
-          response: {opcode: number; payloadData: string; mask: boolean};
-        }) => {
-          const url = websocketUrls.get(event.requestId);
-
-          // URL 过滤
+      // 4. 监听收发帧事件：未开启 includeControlFrames 时控制帧既不保留也不计入统计
+      const onFrame =
+        (direction: 'sent' | 'received') => (event: WebSocketFrameEvent) => {
           if (
-            filterUrl &&
-            url &&
-            !url.toLowerCase().includes(filterUrl.toLowerCase())
+            !capturing ||
+            matchesFilter.get(event.requestId) === false ||
+            (!includeControlFrames && isControlFrame(event.response.opcode))
           ) {
             return;
           }
-
-          // 控制帧过滤
-          const opcode = event.response.opcode;
-          if (
-            !includeControlFrames &&
-            (opcode === 8 || opcode === 9 || opcode === 10)
-          ) {
-            return;
-          }
-
-          // 限制数量
-          if (frames.length >= maxFrames) {
-            return;
-          }
-
-          frames.push({
-            direction: 'received',
+          const frame: WebSocketFrameInput = {
+            connectionId: event.requestId,
+            direction,
             timestamp: event.timestamp,
-            requestId: event.requestId,
-            payloadData: event.response.payloadData,
             opcode: event.response.opcode,
             mask: event.response.mask,
-          });
-        },
-      );
-
-      // 5. 监听发送帧事件
-      client.on(
-        'Network.webSocketFrameSent',
-        (event: {
-          requestId: string;
-          timestamp: number;
-          response: {opcode: number; payloadData: string; mask: boolean};
-        }) => {
-          const url = websocketUrls.get(event.requestId);
-
-          // URL 过滤
-          if (
-            filterUrl &&
-            url &&
-            !url.toLowerCase().includes(filterUrl.toLowerCase())
-          ) {
-            return;
-          }
-
-          // 控制帧过滤
-          const opcode = event.response.opcode;
-          if (
-            !includeControlFrames &&
-            (opcode === 8 || opcode === 9 || opcode === 10)
-          ) {
-            return;
-          }
-
-          // 限制数量
-          if (frames.length >= maxFrames) {
-            return;
-          }
-
-          frames.push({
-            direction: 'sent',
-            timestamp: event.timestamp,
-            requestId: event.requestId,
             payloadData: event.response.payloadData,
-            opcode: event.response.opcode,
-            mask: event.response.mask,
-          });
-        },
-      );
+          };
+          store.add(frame);
+          captureFile?.write(frame, store.getUrl(frame.connectionId));
+        };
+      client.on('Network.webSocketFrameReceived', onFrame('received'));
+      client.on('Network.webSocketFrameSent', onFrame('sent'));
 
       response.appendResponseLine(`# WebSocket Traffic Monitor\n`);
       response.appendResponseLine(`**Monitoring Duration**: ${duration}ms`);
@@ -224,22 +223,43 @@ which provide access to the actual frame data that HTTPRequest API does not expo
       );
       response.appendResponseLine('⏳ Capturing frames...\n');
 
-      // 6. 等待指定时间
+      // 5. 等待指定时间
+      const started = performance.now();
       await new Promise(resolve => setTimeout(resolve, duration));
+      capturing = false;
+      const seconds = Math.max((performance.now() - started) / 1000, 0.001);
 
-      // 7. 格式化输出
+      // 6. 格式化输出（统计来自累计值，不遍历帧）
+      const totals = store.totals();
+      const totalFrames = totals.sentFrames + totals.receivedFrames;
       response.appendResponseLine(`\n## Capture Summary\n`);
-      response.appendResponseLine(`**Total Frames**: ${frames.length}`);
-
-      const sentCount = frames.filter(f => f.direction === 'sent').length;
-      const receivedCount = frames.filter(
-        f => f.direction === 'received',
-      ).length;
+      response.appendResponseLine(`**Total Frames**: ${totalFrames}`);
+      response.appendResponseLine(
+        `- 📤 **Sent**: ${totals.sentFrames} (${formatBytes(totals.sentBytes)})`,
+      );
+      response.appendResponseLine(
+        `- 📥 **Received**: ${totals.receivedFrames} (${formatBytes(totals.receivedBytes)})`,
+      );
+      response.appendResponseLine(
+        `- **Rate**: ${formatRates(totals, seconds)}\n`,
+      );
 
-      response.appendResponseLine(`- 📤 **Sent**: ${sentCount}`);
-      response.appendResponseLine(`- 📥 **Received**: ${receivedCount}\n`);
+      if (captureFile) {
+        try {
+          await captureFile.close();
+          response.appendResponseLine(
+            `**Output File**: ${captureFile.filename} (${captureFile.written} frames written${captureFile.dropped ? `, ${captureFile.dropped} dropped because the disk could not keep up` : ''})\n`,
+          );
+        } catch (error) {
+          response.appendResponseLine(
+            `**Output File**: ⚠️ ${error instanceof Error ? error.message : String(error)}\n`,
+          );
+        } finally {
+          captureFile = null;
+        }
+      }
 
-      if (frames.length === 0) {
+      if (totalFrames === 0) {
         response.appendResponseLine(
           '*No WebSocket frames captured during monitoring period.*\n',
         );
@@ -267,27 +287,39 @@ which provide access to the actual frame data that HTTPRequest API does not expo
         return;
       }
 
-      // 按类型分组统计
-      const byType = frames.reduce(
-        (acc, f) => {
-          const typeName = OPCODE_NAMES[f.opcode] || `unknown(${f.opcode})`;
-          acc[typeName] = (acc[typeName] || 0) + 1;
-          return acc;
-        },
-        {} as Record<string, number>,
-      );
-
       response.appendResponseLine('**Frame Types**:');
-      for (const [type, count] of Object.entries(byType)) {
-        response.appendResponseLine(`- **${type}**: ${count}`);
+      for (const [opcode, count] of Object.entries(totals.opcodes)) {
+        const typeName =
+          OPCODE_NAMES[Number(opcode)] || `unknown(${opcode})`;
+        response.appendResponseLine(`- **${typeName}**: ${count}`);
       }
       response.appendResponseLine('');
 
-      // 8. 显示帧详情
-      response.appendResponseLine('## Frame Details\n');
+      // 7. 每个连接的统计
+      response.appendResponseLine('## Connections\n');
+      for (const stats of store.connections()) {
+        response.appendResponseLine(`### ${stats.url ?? stats.connectionId}`);
+        response.appendResponseLine(
+          `- 📤 **Sent**: ${stats.sentFrames} (${formatBytes(stats.sentBytes)})`,
+        );
+        response.appendResponseLine(
+          `- 📥 **Received**: ${stats.receivedFrames} (${formatBytes(stats.receivedBytes)})`,
+        );
+        response.appendResponseLine(
+          `- **Rate**: ${formatRates(stats, seconds)}`,
+        );
+        response.appendResponseLine(
+          `- **Frame Types**: ${formatOpcodes(stats.opcodes)}`,
+        );
+        response.appendResponseLine('');
+      }
 
-      for (let i = 0; i < Math.min(frames.length, 50); i++) {
-        const frame = frames[i];
+      // 8. 显示最近的帧详情
+      const frames = store.toArray(MAX_FRAME_DETAILS);
+      if (frames.length > 0) {
+        response.appendResponseLine('## Frame Details\n');
+      }
+      for (const frame of frames) {
         const icon = frame.direction === 'sent' ? '📤' : '📥';
         const time = new Date(frame.timestamp * 1000).toLocaleTimeString();
         const typeName = OPCODE_NAMES[frame.opcode] || `opcode ${frame.opcode}`;
@@ -297,18 +329,19 @@ which provide access to the actual frame data that HTTPRequest API does not expo
         );
         response.appendResponseLine(`**Type**: ${typeName}`);
         response.appendResponseLine(`**Masked**: ${frame.mask ? 'Yes' : 'No'}`);
+        response.appendResponseLine(
+          `**Size**: ${formatBytes(frame.size)} (hash ${frame.hash})`,
+        );
 
-        // 限制 payload 显示长度
-        let payload = frame.payloadData;
-        const isLarge = payload.length > 200;
-        if (isLarge) {
-          payload = payload.substring(0, 200) + '... (truncated)';
-        }
+        // 只保留了预览，完整 payload 见 filePath
+        const payload = frame.truncated
+          ? frame.preview + '... (truncated)'
+          : frame.preview;
 
         // 尝试解析 JSON (text frame)
-        if (frame.opcode === 1) {
+        if (frame.opcode === 1 && !frame.truncated) {
           try {
-            const parsed = JSON.parse(frame.payloadData);
+            const parsed = JSON.parse(frame.preview);
             response.appendResponseLine('**Payload** (JSON):');
             response.appendResponseLine('```json');
             response.appendResponseLine(JSON.stringify(parsed, null, 2));
@@ -316,10 +349,12 @@ which provide access to the actual frame data that HTTPRequest API does not expo
           } catch {
             response.appendResponseLine(`**Payload** (text): ${payload}`);
           }
+        } else if (frame.opcode === 1) {
+          response.appendResponseLine(`**Payload** (text): ${payload}`);
         } else if (frame.opcode === 2) {
           // Binary frame
           response.appendResponseLine(
-            `**Payload** (binary, ${frame.payloadData.length} bytes): ${payload.substring(0, 50)}...`,
+            `**Payload** (binary, ${frame.size} bytes): ${frame.preview.substring(0, 50)}...`,
           );
         } else {
           response.appendResponseLine(`**Payload**: ${payload}`);
@@ -328,9 +363,9 @@ which provide access to the actual frame data that HTTPRequest API does not expo
         response.appendResponseLine('');
       }
 
-      if (frames.length > 50) {
+      if (store.totalFrames > frames.length) {
         response.appendResponseLine(
-          `\n*Showing first 50 of ${frames.length} frames*`,
+          `\n*Showing the last ${frames.length} of ${store.totalFrames} captured frames*`,
         );
       }
 
@@ -344,13 +379,16 @@ which provide access to the actual frame data that HTTPRequest API does not expo
       response.appendResponseLine(
         '- Set `includeControlFrames: true` to see ping/pong activity',
       );
+      response.appendResponseLine(
+        '- Set `filePath` to save full payloads of every captured frame',
+      );
     } catch (error) {
       // ✅ Following navigate_page_history pattern: simple error message
       response.appendResponseLine(
         `Unable to monitor WebSocket traffic. ${error instanceof Error ? error.message : String(error)}`,
       );
     } finally {
-      // 9. 清理 CDP Session
+      // 9. 清理 CDP Session 和输出文件
       if (client) {
         try {
           await client.detach();
@@ -358,6 +396,9 @@ which provide access to the actual frame data that HTTPRequest API does not expo
           // Session 可能已断开，忽略错误
         }
       }
+      await captureFile?.close().catch(() => {
+        // 已经在报告错误，忽略文件的关闭错误
+      });
     }
 
     response.setIncludePages(true);
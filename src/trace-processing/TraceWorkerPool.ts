@@ -0,0 +1,443 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+import {Worker} from 'node:worker_threads';
+
+import {logger} from '../logger.js';
+
+import type {
+  InsightName,
+  InsightOutput,
+  TraceParseError,
+  TraceResult,
+} from './parse.js';
+import {
+  getInsightOutput,
+  getTraceSummary,
+  parseRawTraceBuffer,
+  traceResultIsSuccess,
+} from './parse.js';
+
+/**
+ * 需要 worker 回复的请求
+ */
+export type TraceWorkerJob =
+  | {type: 'parse'; traceId: string; buffer: Uint8Array | undefined}
+  | {type: 'insight'; traceId: string; insightName: InsightName};
+
+/**
+ * 主线程 → worker 的消息
+ */
+export type TraceWorkerRequest =
+  | (TraceWorkerJob & {id: number})
+  | {type: 'release'; traceId: string};
+
+/**
+ * worker → 主线程的消息；启动完成（模块加载完毕）时先发送 ready
+ */
+export type TraceWorkerResponse =
+  | {type: 'ready'}
+  | {id: number; result: TraceParseReply | InsightOutput}
+  | {id: number; error: string};
+
+export type TraceParseReply = {summary: string} | TraceParseError;
+
+export interface TraceWorkerPoolStats {
+  /** 当前运行的 worker 数 */
+  workers: number;
+  /** 已发出、尚未返回的解析 / insight 请求数 */
+  pending: number;
+  /** 保留在 worker 中的已解析 trace 数 */
+  traces: number;
+  parses: number;
+  parseErrors: number;
+  /** 发往 worker 的 insight 格式化请求数（命中 RecordedTrace 缓存的不计入） */
+  insightRequests: number;
+  /** 因超出 MAX_RETAINED_TRACES 而释放的 trace 数 */
+  evictions: number;
+  /** worker 启动失败后改为在主线程解析 */
+  inProcess: boolean;
+}
+
+/**
+ * 默认 worker 数；MCP_TRACE_WORKERS=0 时在主线程解析
+ */
+export const DEFAULT_TRACE_WORKERS = 1;
+
+/**
+ * 整个进程最多保留的已解析 trace 数（多租户下所有会话共享）
+ */
+export const MAX_RETAINED_TRACES = 8;
+
+const WORKER_URL = new URL('./trace-worker.js', import.meta.url);
+
+function readTraceWorkersEnv(): number {
+  const value = parseInt(process.env.MCP_TRACE_WORKERS ?? '', 10);
+  return Number.isFinite(value) && value >= 0 ? value : DEFAULT_TRACE_WORKERS;
+}
+
+function errorText(error: unknown): string {
+  return error instanceof Error ? error.message : String(error);
+}
+
+/**
+ * 一次已解析的 trace 录制
+ *
+ * summary 在解析时已生成；insight 输出按名称缓存，重复的
+ * performance_analyze_insight 调用直接返回缓存的文本。
+ */
+export class RecordedTrace {
+  readonly id: string;
+  readonly summary: string;
+  #loadInsight: (insightName: InsightName) => Promise<InsightOutput>;
+  #onRelease?: () => void;
+  #insights = new Map<string, Promise<InsightOutput>>();
+  #released = false;
+
+  constructor(
+    id: string,
+    summary: string,
+    loadInsight: (insightName: InsightName) => Promise<InsightOutput>,
+    onRelease?: () => void,
+  ) {
+    this.id = id;
+    this.summary = summary;
+    this.#loadInsight = loadInsight;
+    this.#onRelease = onRelease;
+  }
+
+  /**
+   * 包装主线程解析得到的 TraceResult
+   */
+  static fromTraceResult(result: TraceResult, id = 'local'): RecordedTrace {
+    return new RecordedTrace(id, getTraceSummary(result), async insightName =>
+      getInsightOutput(result, insightName),
+    );
+  }
+
+  get released(): boolean {
+    return this.#released;
+  }
+
+  async getInsightOutput(insightName: InsightName): Promise<InsightOutput> {
+    const cached = this.#insights.get(insightName);
+    if (cached) {
+      return await cached;
+    }
+    if (this.#released) {
+      return {
+        error:
+          'This trace is no longer available. Record a new performance trace to analyze its Insights.',
+      };
+    }
+    const output = this.#loadInsight(insightName).catch(
+      (error: unknown): InsightOutput => {
+        // worker 异常退出等失败不缓存，下次重试
+        this.#insights.delete(insightName);
+        return {error: errorText(error)};
+      },
+    );
+    this.#insights.set(insightName, output);
+    return await output;
+  }
+
+  /**
+   * 释放 worker 中保留的解析结果；已缓存的 insight 输出仍可使用
+   */
+  release(): void {
+    if (this.#released) {
+      return;
+    }
+    this.#released = true;
+    this.#onRelease?.();
+  }
+}
+
+interface PendingJob {
+  resolve: (value: TraceParseReply | InsightOutput) => void;
+  reject: (error: Error) => void;
+}
+
+interface WorkerHandle {
+  worker: Worker;
+  ready: Promise<void>;
+  pending: Map<number, PendingJob>;
+  traces: Set<string>;
+}
+
+/**
+ * trace 解析 worker 池
+ *
+ * DevTools TraceEngine 解析一次录制需要几百毫秒到数秒的同步计算，
+ * 在主线程上运行时会阻塞其他工具调用和传输层心跳。这里把解码、
+ * JSON.parse、TraceEngine 解析和 insight 格式化都放到 worker_threads 中：
+ * - 解析结果保留在负责解析的 worker 中，insight 请求发往同一个 worker
+ * - 主线程只拿到 summary 文本，insight 输出由 RecordedTrace 按名称缓存
+ * - 最多保留 MAX_RETAINED_TRACES 个 trace，超出时释放最早的
+ * - worker 在第一次使用时启动（performance_start_trace 会预热）；
+ *   启动失败时退回主线程解析
+ *
+ * worker 数由 MCP_TRACE_WORKERS 控制（默认 1，0 表示在主线程解析）。
+ */
+export class TraceWorkerPool {
+  #size: number;
+  #workers: WorkerHandle[] = [];
+  #traces = new Map<string, {handle: WorkerHandle; trace: RecordedTrace}>();
+  #nextJobId = 1;
+  #nextTraceId = 1;
+  #inProcess: boolean;
+  #stats = {
+    parses: 0,
+    parseErrors: 0,
+    insightRequests: 0,
+    evictions: 0,
+  };
+
+  constructor(size = readTraceWorkersEnv()) {
+    this.#size = size;
+    this.#inProcess = size === 0;
+  }
+
+  /**
+   * 提前启动一个 worker，使其在录制结束前完成模块加载
+   */
+  warmUp(): void {
+    if (!this.#inProcess && this.#workers.length === 0) {
+      this.#spawn();
+    }
+  }
+
+  /**
+   * 解析 Tracing.stop() 返回的原始 buffer
+   *
+   * buffer 独占底层 ArrayBuffer 时会转移给 worker，调用后不可再使用。
+   */
+  async parse(
+    buffer: Uint8Array | undefined,
+  ): Promise<RecordedTrace | TraceParseError> {
+    this.#stats.parses++;
+    const traceId = `trace-${this.#nextTraceId++}`;
+    const result = this.#inProcess
+      ? await this.#parseInProcess(traceId, buffer)
+      : await this.#parseInWorker(traceId, buffer);
+    if ('error' in result) {
+      this.#stats.parseErrors++;
+    }
+    return result;
+  }
+
+  getStats(): TraceWorkerPoolStats {
+    let pending = 0;
+    for (const handle of this.#workers) {
+      pending += handle.pending.size;
+    }
+    return {
+      ...this.#stats,
+      workers: this.#workers.length,
+      pending,
+      traces: this.#traces.size,
+      inProcess: this.#inProcess,
+    };
+  }
+
+  /**
+   * 终止所有 worker；未完成的请求以错误结束
+   */
+  async dispose(): Promise<void> {
+    const workers = this.#workers;
+    this.#workers = [];
+    for (const {trace} of this.#traces.values()) {
+      trace.release();
+    }
+    this.#traces.clear();
+    await Promise.all(workers.map(handle => handle.worker.terminate()));
+  }
+
+  async #parseInProcess(
+    traceId: string,
+    buffer: Uint8Array | undefined,
+  ): Promise<RecordedTrace | TraceParseError> {
+    const result = await parseRawTraceBuffer(buffer);
+    if (!traceResultIsSuccess(result)) {
+      return result;
+    }
+    return RecordedTrace.fromTraceResult(result, traceId);
+  }
+
+  async #parseInWorker(
+    traceId: string,
+    buffer: Uint8Array | undefined,
+  ): Promise<RecordedTrace | TraceParseError> {
+    const handle = this.#pickWorker();
+    try {
+      await handle.ready;
+    } catch (error) {
+      logger(
+        `Trace worker failed to start, parsing on the main thread: ${errorText(error)}`,
+      );
+      this.#inProcess = true;
+      return await this.#parseInProcess(traceId, buffer);
+    }
+
+    // 只转移独占的 ArrayBuffer；Buffer 池中的切片会被复制
+    const transfer =
+      buffer?.buffer instanceof ArrayBuffer &&
+      buffer.byteOffset === 0 &&
+      buffer.byteLength === buffer.buffer.byteLength
+        ? [buffer.buffer]
+        : [];
+    let reply: TraceParseReply;
+    try {
+      reply = (await this.#send(
+        handle,
+        {type: 'parse', traceId, buffer},
+        transfer,
+      )) as TraceParseReply;
+    } catch (error) {
+      return {error: `Trace worker failed: ${errorText(error)}`};
+    }
+    if ('error' in reply) {
+      return reply;
+    }
+
+    handle.traces.add(traceId);
+    const trace = new RecordedTrace(
+      traceId,
+      reply.summary,
+      async insightName => {
+        this.#stats.insightRequests++;
+        return (await this.#send(handle, {
+          type: 'insight',
+          traceId,
+          insightName,
+        })) as InsightOutput;
+      },
+      () => this.#release(traceId),
+    );
+    this.#traces.set(traceId, {handle, trace});
+    this.#evict();
+    return trace;
+  }
+
+  #pickWorker(): WorkerHandle {
+    const idle = this.#workers.find(handle => handle.pending.size === 0);
+    if (idle) {
+      return idle;
+    }
+    if (this.#workers.length < this.#size) {
+      return this.#spawn();
+    }
+    return this.#workers.reduce((least, handle) =>
+      handle.pending.size < least.pending.size ? handle : least,
+    );
+  }
+
+  #spawn(): WorkerHandle {
+    const worker = new Worker(WORKER_URL);
+    // worker 空闲时不阻止进程退出
+    worker.unref();
+    const handle: WorkerHandle = {
+      worker,
+      ready: new Promise<void>((resolve, reject) => {
+        worker.once('message', () => resolve());
+        worker.once('error', reject);
+        worker.once('exit', code =>
+          reject(new Error(`Trace worker exited with code ${code}`)),
+        );
+      }),
+      pending: new Map(),
+      traces: new Set(),
+    };
+    // 启动失败由 parse 处理
+    handle.ready.catch(() => undefined);
+
+    worker.on('message', (message: TraceWorkerResponse) => {
+      if (!('id' in message)) {
+        return;
+      }
+      const job = handle.pending.get(message.id);
+      if (!job) {
+        return;
+      }
+      handle.pending.delete(message.id);
+      if ('result' in message) {
+        job.resolve(message.result);
+      } else {
+        job.reject(new Error(message.error));
+      }
+    });
+    worker.on('error', error => {
+      logger(`Trace worker error: ${errorText(error)}`);
+    });
+    worker.on('exit', code => {
+      this.#removeWorker(handle, new Error(`Trace worker exited (${code})`));
+    });
+    this.#workers.push(handle);
+    return handle;
+  }
+
+  #send(
+    handle: WorkerHandle,
+    job: TraceWorkerJob,
+    transfer: ArrayBuffer[] = [],
+  ): Promise<TraceParseReply | InsightOutput> {
+    const id = this.#nextJobId++;
+    return new Promise((resolve, reject) => {
+      if (!this.#workers.includes(handle)) {
+        reject(new Error('Trace worker is no longer running'));
+        return;
+      }
+      handle.pending.set(id, {resolve, reject});
+      const request: TraceWorkerRequest = {...job, id};
+      handle.worker.postMessage(request, transfer);
+    });
+  }
+
+  #release(traceId: string): void {
+    const entry = this.#traces.get(traceId);
+    if (!entry) {
+      return;
+    }
+    this.#traces.delete(traceId);
+    entry.handle.traces.delete(traceId);
+    if (this.#workers.includes(entry.handle)) {
+      const message: TraceWorkerRequest = {type: 'release', traceId};
+      entry.handle.worker.postMessage(message);
+    }
+  }
+
+  #evict(): void {
+    // Map 按插入顺序迭代，最先解析的 trace 最先释放
+    for (const {trace} of this.#traces.values()) {
+      if (this.#traces.size <= MAX_RETAINED_TRACES) {
+        break;
+      }
+      this.#stats.evictions++;
+      trace.release();
+    }
+  }
+
+  #removeWorker(handle: WorkerHandle, reason: Error): void {
+    this.#workers = this.#workers.filter(h => h !== handle);
+    for (const job of handle.pending.values()) {
+      job.reject(reason);
+    }
+    handle.pending.clear();
+    for (const traceId of handle.traces) {
+      this.#traces.get(traceId)?.trace.release();
+    }
+  }
+}
+
+let sharedPool: TraceWorkerPool | undefined;
+
+/**
+ * 进程内共享的 trace 解析池
+ */
+export function getTraceWorkerPool(): TraceWorkerPool {
+  sharedPool ??= new TraceWorkerPool();
+  return sharedPool;
+}
@@ -0,0 +1,100 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+/**
+ * trace 解析 worker（由 TraceWorkerPool 启动）
+ *
+ * 解析结果按 traceId 保留在本线程，直到主线程发送 release。
+ * TraceEngine 实例是模块级共享的，解析请求按到达顺序串行执行。
+ */
+
+import '../polyfill.js';
+
+import {parentPort} from 'node:worker_threads';
+
+import type {InsightName, InsightOutput, TraceResult} from './parse.js';
+import {
+  getInsightOutput,
+  getTraceSummary,
+  parseRawTraceBuffer,
+  traceResultIsSuccess,
+} from './parse.js';
+import type {
+  TraceParseReply,
+  TraceWorkerRequest,
+  TraceWorkerResponse,
+} from './TraceWorkerPool.js';
+
+if (!parentPort) {
+  throw new Error('trace-worker must be started as a worker thread');
+}
+const port = parentPort;
+
+const traces = new Map<string, TraceResult>();
+let parseQueue: Promise<void> = Promise.resolve();
+
+function reply(message: TraceWorkerResponse): void {
+  port.postMessage(message);
+}
+
+async function parse(
+  traceId: string,
+  buffer: Uint8Array | undefined,
+): Promise<TraceParseReply> {
+  const result = await parseRawTraceBuffer(buffer);
+  if (!traceResultIsSuccess(result)) {
+    return result;
+  }
+  traces.set(traceId, result);
+  return {summary: getTraceSummary(result)};
+}
+
+function insight(traceId: string, insightName: InsightName): InsightOutput {
+  const result = traces.get(traceId);
+  if (!result) {
+    return {
+      error:
+        'This trace is no longer available. Record a new performance trace to analyze its Insights.',
+    };
+  }
+  return getInsightOutput(result, insightName);
+}
+
+port.on('message', (request: TraceWorkerRequest) => {
+  switch (request.type) {
+    case 'parse': {
+      const {id, traceId, buffer} = request;
+      parseQueue = parseQueue.then(async () => {
+        try {
+          reply({id, result: await parse(traceId, buffer)});
+        } catch (error) {
+          reply({
+            id,
+            error: error instanceof Error ? error.message : String(error),
+          });
+        }
+      });
+      break;
+    }
+    case 'insight': {
+      const {id, traceId, insightName} = request;
+      try {
+        reply({id, result: insight(traceId, insightName)});
+      } catch (error) {
+        reply({
+          id,
+          error: error instanceof Error ? error.message : String(error),
+        });
+      }
+      break;
+    }
+    case 'release':
+      traces.delete(request.traceId);
+      break;
+  }
+});
+
+reply({type: 'ready'});
@@ -61,3 +61,11 @@ export function checkNodeVersion(): void {
     process.exit(1);
   }
 }
+
+/**
+ * 读取正整数环境变量，未设置或非法时返回 fallback
+ */
+export function readPositiveIntEnv(name: string, fallback: number): number {
+  const value = parseInt(process.env[name] ?? '', 10);
+  return Number.isFinite(value) && value > 0 ? value : fallback;
+}
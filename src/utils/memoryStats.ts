@@ -0,0 +1,94 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+import type http from 'node:http';
+import v8 from 'node:v8';
+
+/**
+ * 进程内存采样（用于长时间运行的泄漏测试）
+ *
+ * 设置环境变量 MCP_DEBUG_MEMORY=1 后：
+ * - HTTP 类服务器开放 GET /debug/memory，返回一次采样（?gc=1 时先执行一次 GC）
+ * - stdio 服务器每隔 MCP_DEBUG_MEMORY_INTERVAL 毫秒（默认 1000）向 stderr 输出：
+ *   [memory] {"at":12.5,"rss":81234944,"heapUsed":23456789,...}
+ * 单位为字节，at 为进程运行秒数。test-soak.py 使用这些数据判断内存是否无界增长。
+ * GC 需要以 --expose-gc 启动 Node；未开启时 gc 字段为 false。
+ */
+
+const PREFIX = '[memory]';
+const DEFAULT_INTERVAL = 1000;
+
+export const memoryDebugEnabled = process.env.MCP_DEBUG_MEMORY === '1';
+
+export interface MemoryStats {
+  at: number;
+  rss: number;
+  heapUsed: number;
+  heapTotal: number;
+  external: number;
+  arrayBuffers: number;
+  heapLimit: number;
+  gc: boolean;
+}
+
+/**
+ * 采样一次内存；forceGc 为 true 且可用时先执行完整 GC，减少采样噪声
+ */
+export function getMemoryStats(forceGc = false): MemoryStats {
+  const gc = (globalThis as {gc?: () => void}).gc;
+  if (forceGc && gc) {
+    gc();
+  }
+  const usage = process.memoryUsage();
+  return {
+    at: Math.round(process.uptime() * 1000) / 1000,
+    rss: usage.rss,
+    heapUsed: usage.heapUsed,
+    heapTotal: usage.heapTotal,
+    external: usage.external,
+    arrayBuffers: usage.arrayBuffers,
+    heapLimit: v8.getHeapStatistics().heap_size_limit,
+    gc: Boolean(forceGc && gc),
+  };
+}
+
+/**
+ * 处理 GET /debug/memory；未开启 MCP_DEBUG_MEMORY 或路径不匹配时返回 false
+ */
+export function handleMemoryDebugRequest(
+  url: URL,
+  res: http.ServerResponse,
+): boolean {
+  if (!memoryDebugEnabled || url.pathname !== '/debug/memory') {
+    return false;
+  }
+  const stats = getMemoryStats(url.searchParams.get('gc') === '1');
+  res.writeHead(200, {'Content-Type': 'application/json'});
+  res.end(JSON.stringify(stats));
+  return true;
+}
+
+/**
+ * stdio 模式下定期把采样写到 stderr；未开启时不做任何事
+ */
+export function startMemoryReporter(): void {
+  if (!memoryDebugEnabled) {
+    return;
+  }
+  const interval =
+    Number(process.env.MCP_DEBUG_MEMORY_INTERVAL) || DEFAULT_INTERVAL;
+  const report = () => {
+    try {
+      process.stderr.write(
+        `${PREFIX} ${JSON.stringify(getMemoryStats(true))}\n`,
+      );
+    } catch {
+      // stderr 已关闭时忽略
+    }
+  };
+  report();
+  setInterval(report, interval).unref();
+}
@@ -20,7 +20,7 @@ export interface PaginationResult<Item> {
   invalidPage: boolean;
 }
 
-const DEFAULT_PAGE_SIZE = 20;
+export const DEFAULT_PAGE_SIZE = 20;
 
 export function paginate<Item>(
   items: readonly Item[],
@@ -85,3 +85,19 @@ function resolvePageIndex(
 
   return {currentPage: pageIdx, invalidPage: false};
 }
+
+/**
+ * 游标分页：游标记录最后一条已返回元素的序号（见 IndexedBuffer）。
+ * 序号不会复用，新元素到达、旧元素被淘汰后游标依然有效。
+ */
+export function encodeCursor(seq: number): string {
+  return `c${seq}`;
+}
+
+/**
+ * 解析 encodeCursor() 生成的游标，格式不对时返回 undefined
+ */
+export function decodeCursor(cursor: string): number | undefined {
+  const match = /^c(\d+)$/.exec(cursor);
+  return match ? Number(match[1]) : undefined;
+}
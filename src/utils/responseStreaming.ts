@@ -0,0 +1,45 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+import type {RequestHandlerExtra} from '@modelcontextprotocol/sdk/shared/protocol.js';
+import type {
+  ImageContent,
+  ServerNotification,
+  ServerRequest,
+  TextContent,
+} from '@modelcontextprotocol/sdk/types.js';
+
+import {
+  getResponseStreamingConfig,
+  STREAM_META_KEY,
+} from '../config/ResponseStreaming.js';
+import type {McpContext} from '../McpContext.js';
+import type {McpResponse} from '../McpResponse.js';
+
+/**
+ * 生成工具响应；客户端请求了流式发送时，大响应的文本通过同一请求的
+ * notifications/progress 分块发送（HTTP 传输下写在该请求的 SSE 流上）。
+ */
+export async function handleToolResponse(
+  response: McpResponse,
+  toolName: string,
+  context: McpContext,
+  extra: RequestHandlerExtra<ServerRequest, ServerNotification>,
+): Promise<Array<TextContent | ImageContent>> {
+  const progressToken = extra._meta?.progressToken;
+  if (progressToken === undefined || extra._meta?.[STREAM_META_KEY] !== true) {
+    return response.handle(toolName, context);
+  }
+  const {threshold, chunkSize} = getResponseStreamingConfig();
+  return response.handleStreaming(toolName, context, {
+    threshold,
+    chunkSize,
+    write: (chunk, sent) =>
+      extra.sendNotification({
+        method: 'notifications/progress',
+        params: {progressToken, progress: sent, message: chunk},
+      }),
+  });
+}
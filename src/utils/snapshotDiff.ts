@@ -0,0 +1,171 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+import type {TextSnapshotNode} from '../McpContext.js';
+
+/**
+ * 同一页面两次快照之间的差异。
+ *
+ * 新快照中能与上一次快照对应上的节点沿用旧的 uid，因此 changed 中的 uid
+ * 对调用方来说是已知的；added 只记录新增子树的根节点。
+ */
+export interface TextSnapshotDiff {
+  baseSnapshotId: string;
+  added: Array<{parentId: string; node: TextSnapshotNode}>;
+  removed: TextSnapshotNode[];
+  changed: TextSnapshotNode[];
+  // 差异涉及的节点总数（新增/删除按整棵子树计）
+  size: number;
+}
+
+// 不参与比较的字段：uid、子节点和句柄获取函数
+const IGNORED_KEYS = new Set(['id', 'children', 'elementHandle']);
+
+function hasSameAttributes(a: TextSnapshotNode, b: TextSnapshotNode): boolean {
+  const keys = new Set([...Object.keys(a), ...Object.keys(b)]);
+  for (const key of keys) {
+    if (IGNORED_KEYS.has(key) || key === 'backendNodeId') {
+      continue;
+    }
+    if (
+      a[key as keyof TextSnapshotNode] !== b[key as keyof TextSnapshotNode]
+    ) {
+      return false;
+    }
+  }
+  return true;
+}
+
+function countNodes(node: TextSnapshotNode): number {
+  let count = 1;
+  for (const child of node.children) {
+    count += countNodes(child);
+  }
+  return count;
+}
+
+function matchKey(node: TextSnapshotNode): string {
+  return `${node.role}\u0000${node.name ?? ''}`;
+}
+
+/**
+ * 把两组子节点一一对应：先按 role + name 依次匹配；剩下的再按 role 匹配
+ * 位置最接近的节点（对应文本变化的节点，例如计数按钮）。
+ */
+function matchChildren(
+  previous: TextSnapshotNode[],
+  next: TextSnapshotNode[],
+): Map<TextSnapshotNode, TextSnapshotNode> {
+  const matches = new Map<TextSnapshotNode, TextSnapshotNode>();
+  const queues = new Map<string, TextSnapshotNode[]>();
+  for (const node of previous) {
+    const key = matchKey(node);
+    const queue = queues.get(key);
+    if (queue) {
+      queue.push(node);
+    } else {
+      queues.set(key, [node]);
+    }
+  }
+  for (const node of next) {
+    const candidate = queues.get(matchKey(node))?.shift();
+    if (candidate) {
+      matches.set(node, candidate);
+    }
+  }
+  if (matches.size === next.length || matches.size === previous.length) {
+    return matches;
+  }
+
+  const used = new Set(matches.values());
+  const unmatched = previous
+    .map((node, index) => ({node, index}))
+    .filter(({node}) => !used.has(node));
+  next.forEach((node, index) => {
+    if (matches.has(node)) {
+      return;
+    }
+    let best = -1;
+    for (let i = 0; i < unmatched.length; i++) {
+      if (
+        unmatched[i].node.role === node.role &&
+        (best === -1 ||
+          Math.abs(unmatched[i].index - index) <
+            Math.abs(unmatched[best].index - index))
+      ) {
+        best = i;
+      }
+    }
+    if (best !== -1) {
+      matches.set(node, unmatched[best].node);
+      unmatched.splice(best, 1);
+    }
+  });
+  return matches;
+}
+
+/**
+ * 让新快照尽量沿用上一次快照的 uid，并返回两者的差异。
+ *
+ * 会直接修改 next 中匹配节点的 id；previous 不变。根节点角色不同
+ * （整个文档被替换）时返回 null，此时 next 保持全新的 uid。
+ */
+export function reconcileSnapshot(
+  previous: TextSnapshotNode,
+  next: TextSnapshotNode,
+  baseSnapshotId: string,
+): TextSnapshotDiff | null {
+  if (previous.role !== next.role) {
+    return null;
+  }
+  const diff: TextSnapshotDiff = {
+    baseSnapshotId,
+    added: [],
+    removed: [],
+    changed: [],
+    size: 0,
+  };
+
+  const visit = (before: TextSnapshotNode, after: TextSnapshotNode) => {
+    after.id = before.id;
+    if (!hasSameAttributes(before, after)) {
+      diff.changed.push(after);
+      diff.size++;
+    }
+    const matches = matchChildren(before.children, after.children);
+    for (const child of after.children) {
+      const match = matches.get(child);
+      if (match) {
+        visit(match, child);
+      } else {
+        diff.added.push({parentId: after.id, node: child});
+        diff.size += countNodes(child);
+      }
+    }
+    const kept = new Set(matches.values());
+    for (const child of before.children) {
+      if (!kept.has(child)) {
+        diff.removed.push(child);
+        diff.size += countNodes(child);
+      }
+    }
+  };
+  visit(previous, next);
+  return diff;
+}
+
+export function indexSnapshot(
+  root: TextSnapshotNode,
+): Map<string, TextSnapshotNode> {
+  const idToNode = new Map<string, TextSnapshotNode>();
+  const visit = (node: TextSnapshotNode) => {
+    idToNode.set(node.id, node);
+    for (const child of node.children) {
+      visit(child);
+    }
+  };
+  visit(root);
+  return idToNode;
+}
@@ -0,0 +1,69 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+import {performance} from 'node:perf_hooks';
+
+/**
+ * 启动阶段计时
+ *
+ * 设置环境变量 MCP_STARTUP_PROFILE=1 后，每个阶段结束时向 stderr 输出一行：
+ *   [startup] {"phase":"toolRegistry","start":412.3,"duration":18.7}
+ *   [startup] {"event":"ready","at":455.1}
+ * 时间单位为毫秒，相对进程启动时刻（performance.timeOrigin）。
+ * test-startup.py 解析这些行得到分阶段耗时；未开启时不输出任何内容。
+ */
+
+const PREFIX = '[startup]';
+const enabled = process.env.MCP_STARTUP_PROFILE === '1';
+
+const started = new Map<string, number>();
+const finished = new Set<string>();
+
+function emit(record: Record<string, string | number>): void {
+  try {
+    process.stderr.write(`${PREFIX} ${JSON.stringify(record)}\n`);
+  } catch {
+    // stderr 已关闭时忽略
+  }
+}
+
+function round(ms: number): number {
+  return Math.round(ms * 1000) / 1000;
+}
+
+/**
+ * 开始一个阶段。每个阶段只记录第一次（例如首次工具调用时的浏览器连接）
+ */
+export function beginStartupPhase(phase: string): void {
+  if (!enabled || finished.has(phase) || started.has(phase)) {
+    return;
+  }
+  started.set(phase, performance.now());
+}
+
+/**
+ * 结束阶段并输出耗时；没有对应的 begin 时不输出
+ */
+export function endStartupPhase(phase: string): void {
+  const start = started.get(phase);
+  if (start === undefined) {
+    return;
+  }
+  started.delete(phase);
+  finished.add(phase);
+  emit({phase, start: round(start), duration: round(performance.now() - start)});
+}
+
+/**
+ * 记录一个时间点（例如 entry、ready）
+ */
+export function markStartup(event: string): void {
+  if (!enabled || finished.has(event)) {
+    return;
+  }
+  finished.add(event);
+  emit({event, at: round(performance.now())});
+}
@@ -0,0 +1,365 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+import http from 'node:http';
+import {performance} from 'node:perf_hooks';
+
+import type {
+  ImageContent,
+  TextContent,
+} from '@modelcontextprotocol/sdk/types.js';
+import type {Browser} from 'puppeteer-core';
+
+import {logger} from '../logger.js';
+
+/**
+ * 工具调用与 CDP 命令的延迟指标（Prometheus 文本格式）
+ *
+ * - SSE / Streamable HTTP 服务器开放 GET /metrics
+ * - stdio 服务器设置 MCP_METRICS_PORT 后在 127.0.0.1 上开放同样的 /metrics
+ *
+ * 每次工具调用按阶段计时，用来区分时间花在排队、CDP 还是格式化上：
+ * - queue:   等待浏览器连接和调度锁（src/ToolScheduler.ts）
+ * - handler: 工具本身（主要是 CDP 往返）
+ * - format:  生成响应文本（含快照、流式发送）
+ * 另外记录响应字节数、在途调用数和每个 CDP 方法的往返时间。
+ * test-load.py --metrics 在压测前后各抓取一次并输出差值报告。
+ */
+
+// 秒
+const DURATION_BUCKETS = [
+  0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30,
+];
+// 字节
+const SIZE_BUCKETS = [
+  256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216,
+];
+
+export type ToolPhase = 'queue' | 'handler' | 'format';
+export type ToolCallStatus = 'ok' | 'error';
+
+type Labels = Record<string, string>;
+
+function escapeLabel(value: string): string {
+  return value
+    .replace(/\\/g, '\\\\')
+    .replace(/"/g, '\\"')
+    .replace(/\n/g, '\\n');
+}
+
+function formatLabels(labels: Labels, extra?: [string, string]): string {
+  const entries = Object.entries(labels);
+  if (extra) {
+    entries.push(extra);
+  }
+  if (entries.length === 0) {
+    return '';
+  }
+  const pairs = entries.map(([key, value]) => `${key}="${escapeLabel(value)}"`);
+  return `{${pairs.join(',')}}`;
+}
+
+/**
+ * 固定分桶的直方图；counts 不累积，最后一个桶为 +Inf
+ */
+export class Histogram {
+  readonly buckets: readonly number[];
+  readonly counts: number[];
+  sum = 0;
+  count = 0;
+
+  constructor(buckets: readonly number[]) {
+    this.buckets = buckets;
+    this.counts = new Array(buckets.length + 1).fill(0);
+  }
+
+  observe(value: number): void {
+    let index = 0;
+    while (index < this.buckets.length && value > this.buckets[index]) {
+      index++;
+    }
+    this.counts[index]++;
+    this.sum += value;
+    this.count++;
+  }
+}
+
+class Counter {
+  value = 0;
+}
+
+/**
+ * 同名指标按标签组合分成多个序列
+ */
+class MetricFamily<T extends Counter | Histogram> {
+  readonly #name: string;
+  readonly #help: string;
+  readonly #type: 'counter' | 'gauge' | 'histogram';
+  readonly #create: () => T;
+  readonly #series = new Map<string, {labels: Labels; value: T}>();
+
+  constructor(
+    name: string,
+    help: string,
+    type: 'counter' | 'gauge' | 'histogram',
+    create: () => T,
+  ) {
+    this.#name = name;
+    this.#help = help;
+    this.#type = type;
+    this.#create = create;
+  }
+
+  get(labels: Labels): T {
+    const key = Object.values(labels).join('\u0000');
+    let entry = this.#series.get(key);
+    if (!entry) {
+      entry = {labels, value: this.#create()};
+      this.#series.set(key, entry);
+    }
+    return entry.value;
+  }
+
+  *render(): Iterable<string> {
+    const name = this.#name;
+    yield `# HELP ${name} ${this.#help}`;
+    yield `# TYPE ${name} ${this.#type}`;
+    for (const {labels, value} of this.#series.values()) {
+      if (value instanceof Histogram) {
+        let cumulative = 0;
+        for (let i = 0; i < value.counts.length; i++) {
+          cumulative += value.counts[i];
+          const le =
+            i < value.buckets.length ? String(value.buckets[i]) : '+Inf';
+          yield `${name}_bucket${formatLabels(labels, ['le', le])} ${cumulative}`;
+        }
+        yield `${name}_sum${formatLabels(labels)} ${value.sum}`;
+        yield `${name}_count${formatLabels(labels)} ${value.count}`;
+      } else {
+        yield `${name}${formatLabels(labels)} ${value.value}`;
+      }
+    }
+  }
+}
+
+function responseBytes(content: Array<TextContent | ImageContent>): number {
+  let bytes = 0;
+  for (const item of content) {
+    bytes +=
+      item.type === 'text'
+        ? Buffer.byteLength(item.text)
+        : Buffer.byteLength(item.data);
+  }
+  return bytes;
+}
+
+/**
+ * 一次工具调用的计时器：mark(phase) 记录从上一个标记到现在的耗时
+ */
+export class ToolCallTimer {
+  readonly #metrics: ToolMetrics;
+  readonly #tool: string;
+  readonly #start = performance.now();
+  #last = this.#start;
+  #ended = false;
+
+  constructor(metrics: ToolMetrics, tool: string) {
+    this.#metrics = metrics;
+    this.#tool = tool;
+    metrics.inFlight.get({tool}).value++;
+  }
+
+  mark(phase: ToolPhase): void {
+    const now = performance.now();
+    this.#metrics.phaseDuration
+      .get({tool: this.#tool, phase})
+      .observe((now - this.#last) / 1000);
+    this.#last = now;
+  }
+
+  /**
+   * 结束计时；重复调用无效果（便于在 finally 中兜底）
+   */
+  end(
+    status: ToolCallStatus,
+    content?: Array<TextContent | ImageContent>,
+  ): void {
+    if (this.#ended) {
+      return;
+    }
+    this.#ended = true;
+    const tool = this.#tool;
+    this.#metrics.inFlight.get({tool}).value--;
+    this.#metrics.calls.get({tool, status}).value++;
+    this.#metrics.duration
+      .get({tool})
+      .observe((performance.now() - this.#start) / 1000);
+    if (content) {
+      this.#metrics.responseSize.get({tool}).observe(responseBytes(content));
+    }
+  }
+}
+
+export class ToolMetrics {
+  readonly calls = new MetricFamily(
+    'mcp_tool_calls_total',
+    'Completed tool calls.',
+    'counter',
+    () => new Counter(),
+  );
+  readonly inFlight = new MetricFamily(
+    'mcp_tool_in_flight',
+    'Tool calls currently running or queued.',
+    'gauge',
+    () => new Counter(),
+  );
+  readonly duration = new MetricFamily(
+    'mcp_tool_duration_seconds',
+    'End-to-end tool call duration.',
+    'histogram',
+    () => new Histogram(DURATION_BUCKETS),
+  );
+  readonly phaseDuration = new MetricFamily(
+    'mcp_tool_phase_duration_seconds',
+    'Tool call duration by phase (queue, handler, format).',
+    'histogram',
+    () => new Histogram(DURATION_BUCKETS),
+  );
+  readonly responseSize = new MetricFamily(
+    'mcp_tool_response_bytes',
+    'Tool response size.',
+    'histogram',
+    () => new Histogram(SIZE_BUCKETS),
+  );
+  readonly cdpDuration = new MetricFamily(
+    'mcp_cdp_command_duration_seconds',
+    'CDP command round-trip time.',
+    'histogram',
+    () => new Histogram(DURATION_BUCKETS),
+  );
+  readonly cdpErrors = new MetricFamily(
+    'mcp_cdp_command_errors_total',
+    'CDP commands that returned an error.',
+    'counter',
+    () => new Counter(),
+  );
+
+  startCall(tool: string): ToolCallTimer {
+    return new ToolCallTimer(this, tool);
+  }
+
+  observeCdp(method: string, seconds: number, failed: boolean): void {
+    this.cdpDuration.get({method}).observe(seconds);
+    if (failed) {
+      this.cdpErrors.get({method}).value++;
+    }
+  }
+
+  render(): string {
+    const lines: string[] = [];
+    for (const family of [
+      this.calls,
+      this.inFlight,
+      this.duration,
+      this.phaseDuration,
+      this.responseSize,
+      this.cdpDuration,
+      this.cdpErrors,
+    ]) {
+      lines.push(...family.render());
+    }
+    return lines.join('\n') + '\n';
+  }
+}
+
+export const toolMetrics = new ToolMetrics();
+
+type RawSend = (
+  callbacks: unknown,
+  method: string,
+  ...rest: unknown[]
+) => Promise<unknown>;
+
+const instrumentedConnections = new WeakSet<object>();
+
+/**
+ * 给浏览器的 CDP 连接加上往返计时
+ *
+ * 页面和 worker 的会话都经由 Connection._rawSend 发送命令（puppeteer 内部
+ * API），因此只需包装一次。该方法不存在时静默跳过，只是缺少 CDP 指标。
+ */
+export async function instrumentCdp(browser: Browser): Promise<void> {
+  try {
+    const session = await browser.target().createCDPSession();
+    const connection = session.connection() as
+      | (object & {_rawSend?: RawSend})
+      | undefined;
+    await session.detach().catch(() => undefined);
+    if (
+      !connection ||
+      typeof connection._rawSend !== 'function' ||
+      instrumentedConnections.has(connection)
+    ) {
+      return;
+    }
+    instrumentedConnections.add(connection);
+    const rawSend = connection._rawSend;
+    connection._rawSend = function (callbacks, method, ...rest) {
+      const start = performance.now();
+      const settle = (failed: boolean) =>
+        toolMetrics.observeCdp(
+          method,
+          (performance.now() - start) / 1000,
+          failed,
+        );
+      const result = rawSend.call(this, callbacks, method, ...rest);
+      result.then(
+        () => settle(false),
+        () => settle(true),
+      );
+      return result;
+    };
+  } catch (error) {
+    logger(`CDP metrics unavailable: ${(error as Error).message}`);
+  }
+}
+
+/**
+ * 处理 GET /metrics；路径不匹配时返回 false
+ */
+export function handleMetricsRequest(
+  url: URL,
+  res: http.ServerResponse,
+): boolean {
+  if (url.pathname !== '/metrics') {
+    return false;
+  }
+  res.writeHead(200, {'Content-Type': 'text/plain; version=0.0.4'});
+  res.end(toolMetrics.render());
+  return true;
+}
+
+/**
+ * stdio 模式：设置 MCP_METRICS_PORT 时在 127.0.0.1 上开放 /metrics
+ */
+export function startMetricsServer(): void {
+  const port = parseInt(process.env.MCP_METRICS_PORT ?? '', 10);
+  if (!Number.isFinite(port) || port <= 0) {
+    return;
+  }
+  const server = http.createServer((req, res) => {
+    const url = new URL(req.url ?? '/', `http://${req.headers.host}`);
+    if (!handleMetricsRequest(url, res)) {
+      res.writeHead(404);
+      res.end();
+    }
+  });
+  server.on('error', error => {
+    logger(`Metrics server error: ${error.message}`);
+  });
+  server.listen(port, '127.0.0.1');
+  server.unref();
+}
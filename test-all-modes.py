@@ -1,20 +1,25 @@
 #!/usr/bin/env python3
 """综合测试所有 MCP 传输模式"""
 
-import json
+import asyncio
 import subprocess
 import sys
 import time
 import requests
-import select
 from typing import Dict, List, Any, Optional
 
+from mcp_client import StdioClient, McpError, TransportClosed
+
 # 测试配置
 CHROME_URL = "http://127.0.0.1:9222"
 SSE_PORT = 32122
 HTTP_PORT = 32123
 MULTI_TENANT_PORT = 32122
 
+# 冷启动预算：stdio 为 spawn 到 initialize 响应，SSE/HTTP 为 spawn 到 /health 返回 200
+STARTUP_BUDGET_MS = 5000
+STARTUP_TIMEOUT = 30
+
 # 测试结果
 results = {
     "stdio": {"status": "pending", "tools": 0, "tests": []},
@@ -50,125 +55,85 @@ def check_chrome():
     print_test("Chrome 可访问", "fail", "请启动 Chrome: google-chrome --remote-debugging-port=9222")
     return False
 
+def wait_for_health(process: subprocess.Popen, port: int, started_at: float) -> Optional[float]:
+    """轮询 /health 直到服务器就绪，返回冷启动耗时（毫秒）；进程退出或超时返回 None"""
+    deadline = started_at + STARTUP_TIMEOUT
+    while process.poll() is None and time.perf_counter() < deadline:
+        try:
+            if requests.get(f'http://localhost:{port}/health', timeout=1).status_code == 200:
+                return (time.perf_counter() - started_at) * 1000
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.05)
+    return None
+
+def record_cold_start(mode_result: Dict[str, Any], startup_ms: float):
+    """记录冷启动时间并与预算比较"""
+    mode_result["startup_ms"] = round(startup_ms, 1)
+    status = "pass" if startup_ms <= STARTUP_BUDGET_MS else "fail"
+    print_test("冷启动", status, f"{startup_ms:.0f}ms (预算 {STARTUP_BUDGET_MS}ms)")
+    mode_result["tests"].append({"name": "cold_start", "status": status})
+
 def test_stdio_mode():
     """测试 stdio 模式"""
     print_section("Phase 2: stdio 模式测试")
-    
-    mode_result = results["stdio"]
-    
+    asyncio.run(_test_stdio_mode(results["stdio"]))
+
+async def _test_stdio_mode(mode_result: Dict[str, Any]):
     # 启动服务器
     print("启动 stdio 服务器...")
-    process = subprocess.Popen(
-        ['node', 'build/src/index.js', '--browserUrl', CHROME_URL],
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        bufsize=1
-    )
-    
-    time.sleep(2)
-    
-    if process.poll() is not None:
-        print_test("服务器启动", "fail", "进程已退出")
-        mode_result["status"] = "failed"
-        return
+    client = StdioClient(browser_url=CHROME_URL, timeout=5)
+    await client.start()
     
-    print_test("服务器启动", "pass", f"PID: {process.pid}")
+    print_test("服务器启动", "pass", f"PID: {client.pid}")
     
     try:
         # 测试 initialize
         print("\n测试 1: initialize 请求")
-        initialize_request = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "initialize",
-            "params": {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {},
-                "clientInfo": {"name": "test-client", "version": "1.0.0"}
-            }
-        }
-        
-        process.stdin.write(json.dumps(initialize_request) + "\n")
-        process.stdin.flush()
-        
-        ready = select.select([process.stdout], [], [], 5)
-        if ready[0]:
-            response_line = process.stdout.readline()
-            response = json.loads(response_line)
-            if 'result' in response and 'capabilities' in response['result']:
-                print_test("initialize", "pass", f"协议版本: {response['result'].get('protocolVersion', 'N/A')}")
-                mode_result["tests"].append({"name": "initialize", "status": "pass"})
-            else:
-                print_test("initialize", "fail", "响应格式异常")
-                mode_result["tests"].append({"name": "initialize", "status": "fail"})
-        else:
+        try:
+            result = await client.initialize()
+            print_test("initialize", "pass", f"协议版本: {result.get('protocolVersion', 'N/A')}")
+            mode_result["tests"].append({"name": "initialize", "status": "pass"})
+            record_cold_start(mode_result, client.startup_time * 1000)
+        except asyncio.TimeoutError:
             print_test("initialize", "fail", "响应超时")
             mode_result["tests"].append({"name": "initialize", "status": "fail"})
+        except (McpError, TransportClosed) as e:
+            print_test("initialize", "fail", f"响应异常: {e}")
+            mode_result["tests"].append({"name": "initialize", "status": "fail"})
         
         # 测试 tools/list
         print("\n测试 2: tools/list 请求")
-        tools_request = {
-            "jsonrpc": "2.0",
-            "id": 2,
-            "method": "tools/list",
-            "params": {}
-        }
-        
-        process.stdin.write(json.dumps(tools_request) + "\n")
-        process.stdin.flush()
-        
-        ready = select.select([process.stdout], [], [], 5)
-        if ready[0]:
-            response_line = process.stdout.readline()
-            response = json.loads(response_line)
-            if 'result' in response and 'tools' in response['result']:
-                tools = response['result']['tools']
-                mode_result["tools"] = len(tools)
-                print_test("tools/list", "pass", f"工具数量: {len(tools)}")
-                mode_result["tests"].append({"name": "tools/list", "status": "pass"})
-                
-                # 显示前5个工具
-                print(f"   前5个工具: {[t['name'] for t in tools[:5]]}")
-            else:
-                print_test("tools/list", "fail", "响应格式异常")
-                mode_result["tests"].append({"name": "tools/list", "status": "fail"})
-        else:
+        try:
+            tools = await client.list_tools()
+            mode_result["tools"] = len(tools)
+            print_test("tools/list", "pass", f"工具数量: {len(tools)}")
+            mode_result["tests"].append({"name": "tools/list", "status": "pass"})
+            
+            # 显示前5个工具
+            print(f"   前5个工具: {[t['name'] for t in tools[:5]]}")
+        except asyncio.TimeoutError:
             print_test("tools/list", "fail", "响应超时")
             mode_result["tests"].append({"name": "tools/list", "status": "fail"})
+        except (McpError, TransportClosed) as e:
+            print_test("tools/list", "fail", f"响应异常: {e}")
+            mode_result["tests"].append({"name": "tools/list", "status": "fail"})
         
         # 测试核心工具: list_pages
         print("\n测试 3: tools/call - list_pages")
-        call_request = {
-            "jsonrpc": "2.0",
-            "id": 3,
-            "method": "tools/call",
-            "params": {
-                "name": "list_pages",
-                "arguments": {}
-            }
-        }
-        
-        process.stdin.write(json.dumps(call_request) + "\n")
-        process.stdin.flush()
-        
-        ready = select.select([process.stdout], [], [], 5)
-        if ready[0]:
-            response_line = process.stdout.readline()
-            response = json.loads(response_line)
-            if 'result' in response:
-                print_test("list_pages", "pass", "成功获取页面列表")
-                mode_result["tests"].append({"name": "list_pages", "status": "pass"})
-            else:
-                print_test("list_pages", "fail", f"错误: {response.get('error', {}).get('message', 'Unknown')}")
-                mode_result["tests"].append({"name": "list_pages", "status": "fail"})
-        else:
+        try:
+            await client.call_tool("list_pages")
+            print_test("list_pages", "pass", "成功获取页面列表")
+            mode_result["tests"].append({"name": "list_pages", "status": "pass"})
+        except asyncio.TimeoutError:
             print_test("list_pages", "fail", "响应超时")
             mode_result["tests"].append({"name": "list_pages", "status": "fail"})
+        except (McpError, TransportClosed) as e:
+            print_test("list_pages", "fail", f"错误: {e}")
+            mode_result["tests"].append({"name": "list_pages", "status": "fail"})
         
         # 检查服务器状态
-        if process.poll() is None:
+        if client.is_running():
             print_test("服务器稳定性", "pass", "服务器仍在运行")
             mode_result["status"] = "passed"
         else:
@@ -177,12 +142,7 @@ def test_stdio_mode():
         
     finally:
         print("\n关闭服务器...")
-        process.terminate()
-        try:
-            process.wait(timeout=3)
-        except subprocess.TimeoutExpired:
-            process.kill()
-            process.wait()
+        await client.close()
         print_test("服务器关闭", "pass", "已清理")
 
 def test_sse_mode():
@@ -193,6 +153,7 @@ def test_sse_mode():
     
     # 启动服务器
     print("启动 SSE 服务器...")
+    started_at = time.perf_counter()
     process = subprocess.Popen(
         ['node', 'build/src/index.js', '--transport', 'sse', '--port', str(SSE_PORT), '--browserUrl', CHROME_URL],
         stdout=subprocess.PIPE,
@@ -200,14 +161,17 @@ def test_sse_mode():
         text=True
     )
     
-    time.sleep(3)
-    
-    if process.poll() is not None:
-        print_test("服务器启动", "fail", "进程已退出")
+    startup_ms = wait_for_health(process, SSE_PORT, started_at)
+    if startup_ms is None:
+        detail = "进程已退出" if process.poll() is not None else f"{STARTUP_TIMEOUT}s 内未就绪"
+        print_test("服务器启动", "fail", detail)
         mode_result["status"] = "failed"
+        process.kill()
+        process.wait()
         return
     
     print_test("服务器启动", "pass", f"PID: {process.pid}, Port: {SSE_PORT}")
+    record_cold_start(mode_result, startup_ms)
     
     try:
         # 测试健康检查
@@ -269,6 +233,7 @@ def test_http_mode():
     
     # 启动服务器
     print("启动 HTTP 服务器...")
+    started_at = time.perf_counter()
     process = subprocess.Popen(
         ['node', 'build/src/index.js', '--transport', 'streamable', '--port', str(HTTP_PORT), '--browserUrl', CHROME_URL],
         stdout=subprocess.PIPE,
@@ -276,14 +241,17 @@ def test_http_mode():
         text=True
     )
     
-    time.sleep(3)
-    
-    if process.poll() is not None:
-        print_test("服务器启动", "fail", "进程已退出")
+    startup_ms = wait_for_health(process, HTTP_PORT, started_at)
+    if startup_ms is None:
+        detail = "进程已退出" if process.poll() is not None else f"{STARTUP_TIMEOUT}s 内未就绪"
+        print_test("服务器启动", "fail", detail)
         mode_result["status"] = "failed"
+        process.kill()
+        process.wait()
         return
     
     print_test("服务器启动", "pass", f"PID: {process.pid}, Port: {HTTP_PORT}")
+    record_cold_start(mode_result, startup_ms)
     
     try:
         # 测试健康检查
@@ -351,6 +319,8 @@ def print_summary():
         print(f"\n{status_icon} {mode.upper()} 模式:")
         print(f"   状态: {result['status']}")
         print(f"   工具数: {result['tools']}")
+        if "startup_ms" in result:
+            print(f"   冷启动: {result['startup_ms']:.0f}ms")
         print(f"   测试数: {len(result['tests'])}")
         
         for test in result['tests']:
@@ -386,7 +356,7 @@ def main():
     
     # Phase 5: Multi-tenant 模式（暂时跳过，需要更复杂的设置）
     print_section("Phase 5: Multi-tenant 模式测试")
-    print("⏭️  跳过 Multi-tenant 测试（需要独立配置）")
+    print("⏭️  跳过 Multi-tenant 测试（需要独立配置，规模测试见 test-multi-tenant-scale.py）")
     results["multi_tenant"]["status"] = "skipped"
     
     # 打印总结
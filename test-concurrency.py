@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""工具调度并发测试：互不冲突的调用应并发执行，冲突的调用仍然串行且响应不串台
+
+服务器按工具的作用范围调度调用（src/ToolScheduler.ts）：
+- browser 级工具（list_pages、get_connected_browser、扩展工具）不等待页面上的调用
+- 同一页面上的非只读调用（evaluate_script、click ...）互斥
+- select_page / new_page / close_page 等待上下文中所有调用结束
+
+三项检查：
+1. 慢 evaluate_script 在途时，browser 级调用的延迟应接近空闲时，而不是等到慢调用结束
+2. 同一页面上的两个慢 evaluate_script 并发发出，总耗时应约为单个的 2 倍（仍然串行）
+3. 混合并发突发：每个响应的标题与所调用的工具一致，list_pages 恰好一个 [selected]，
+   take_snapshot 中的 uid 使用同一个快照前缀
+
+慢调用在页面中 await setTimeout(--slow-ms)；使用 --fake-cdp 时改为给
+Runtime.callFunctionOn 加上同样的延迟（替身不执行脚本）。
+
+用法：
+    python3 test-concurrency.py --fake-cdp
+    python3 test-concurrency.py --transport streamable --slow-ms 1000 --burst 50
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from fake_cdp import add_fake_cdp_arguments, fake_chrome_from_args
+from mcp_bench import summarize, write_json
+from mcp_client import McpClient, ServerProcess, StdioClient, create_client, run, tool_text
+
+CHROME_URL = "http://127.0.0.1:9222"
+FAST_TOOLS = ["list_pages", "get_connected_browser"]
+BURST_TOOLS: List[Tuple[str, Dict[str, Any]]] = [
+    ("list_pages", {}),
+    ("take_snapshot", {}),
+    ("list_console_messages", {"pageSize": 20}),
+    ("list_network_requests", {"pageSize": 20}),
+    ("evaluate_script", {"function": "() => document.title"}),
+    ("get_connected_browser", {}),
+]
+SNAPSHOT_UID = re.compile(r"uid=(\d+)_\d+")
+
+
+def print_section(title: str):
+    """打印章节标题"""
+    print(f"\n{'='*70}")
+    print(f"  {title}")
+    print(f"{'='*70}\n")
+
+
+def slow_script(slow_ms: float) -> str:
+    return f"async () => {{ await new Promise(r => setTimeout(r, {slow_ms:g})); return 1; }}"
+
+
+async def timed_call(client: McpClient, tool: str, arguments: Dict[str, Any],
+                     timeout: float) -> Tuple[float, Dict[str, Any]]:
+    start = time.perf_counter()
+    result = await client.call_tool(tool, arguments, timeout=timeout)
+    return (time.perf_counter() - start) * 1000, result
+
+
+async def fast_latencies(client: McpClient, rounds: int, timeout: float) -> List[float]:
+    latencies = []
+    for i in range(rounds):
+        elapsed, _ = await timed_call(client, FAST_TOOLS[i % len(FAST_TOOLS)], {}, timeout)
+        latencies.append(elapsed)
+    return latencies
+
+
+async def check_fast_during_slow(client: McpClient, args) -> Dict[str, Any]:
+    """检查 1：慢调用在途时 browser 级调用的延迟"""
+    idle = await fast_latencies(client, args.rounds, args.timeout)
+    slow = asyncio.create_task(
+        timed_call(client, "evaluate_script", {"function": slow_script(args.slow_ms)}, args.timeout))
+    # 让慢调用先拿到页面锁
+    await asyncio.sleep(args.slow_ms / 1000 / 10)
+    busy = await fast_latencies(client, args.rounds, args.timeout)
+    slow_elapsed, _ = await slow
+    idle_summary, busy_summary = summarize(idle), summarize(busy)
+    return {
+        "idle_ms": idle_summary,
+        "busy_ms": busy_summary,
+        "slow_ms": slow_elapsed,
+        # 全局互斥时第一个快调用要等慢调用结束
+        "blocked": busy_summary["max"] > args.slow_ms / 2,
+    }
+
+
+async def check_same_page_serialized(client: McpClient, args) -> Dict[str, Any]:
+    """检查 2：同一页面上两个非只读调用串行执行"""
+    single, _ = await timed_call(client, "evaluate_script",
+                                 {"function": slow_script(args.slow_ms)}, args.timeout)
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        client.call_tool("evaluate_script", {"function": slow_script(args.slow_ms)},
+                         timeout=args.timeout)
+        for _ in range(2)
+    ])
+    pair = (time.perf_counter() - start) * 1000
+    return {"single_ms": single, "pair_ms": pair, "serialized": pair >= single * 1.8}
+
+
+def response_problems(tool: str, result: Dict[str, Any]) -> List[str]:
+    if result.get("isError"):
+        return [f"{tool}: 返回错误 {tool_text(result)[:120]!r}"]
+    text = tool_text(result)
+    problems = []
+    header = text.split("\n", 1)[0]
+    if header != f"# {tool} response":
+        problems.append(f"{tool}: 响应标题为 {header!r}")
+    if tool == "list_pages" and text.count("[selected]") != 1:
+        problems.append(f"{tool}: 有 {text.count('[selected]')} 个 [selected] 页面")
+    if tool == "take_snapshot":
+        prefixes = set(SNAPSHOT_UID.findall(text))
+        if len(prefixes) > 1:
+            problems.append(f"{tool}: 快照混用了多个 uid 前缀 {sorted(prefixes)}")
+    return problems
+
+
+async def check_burst_integrity(client: McpClient, args) -> Dict[str, Any]:
+    """检查 3：混合并发突发的响应完整性"""
+    calls = [BURST_TOOLS[i % len(BURST_TOOLS)] for i in range(args.burst)]
+    start = time.perf_counter()
+    results = await asyncio.gather(*[
+        client.call_tool(tool, arguments, timeout=args.timeout) for tool, arguments in calls
+    ], return_exceptions=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    problems: List[str] = []
+    for (tool, _), result in zip(calls, results):
+        if isinstance(result, BaseException):
+            problems.append(f"{tool}: {type(result).__name__}: {result}")
+        else:
+            problems.extend(response_problems(tool, result))
+    return {"calls": len(calls), "elapsed_ms": elapsed, "problems": problems}
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="工具调度并发测试")
+    parser.add_argument("--transport", "-t", default="stdio", choices=["stdio", "sse", "streamable"])
+    parser.add_argument("--slow-ms", type=float, default=500.0, help="慢 evaluate_script 的耗时（毫秒）")
+    parser.add_argument("--rounds", "-n", type=int, default=5, help="检查 1 中快调用的次数")
+    parser.add_argument("--burst", type=int, default=60, help="检查 3 中并发发出的调用数")
+    parser.add_argument("--timeout", type=float, default=60.0, help="单个请求超时（秒）")
+    parser.add_argument("--browser-url", default=os.environ.get("CHROME_URL", CHROME_URL))
+    parser.add_argument("--port", type=int, help="启动服务器使用的端口")
+    parser.add_argument("--json", help="把结果写入 JSON 文件（- 表示 stdout）")
+    parser.add_argument("--fake-cdp", action="store_true", help="使用本地 CDP 替身代替真实 Chrome")
+    add_fake_cdp_arguments(parser.add_argument_group("CDP 替身（--fake-cdp）"), prefix="fake-")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    fake_chrome = None
+    if args.fake_cdp:
+        if not any(m.startswith("Runtime.callFunctionOn=") for m in args.fake_method_latency):
+            args.fake_method_latency.append(f"Runtime.callFunctionOn={args.slow_ms:g}")
+        fake_chrome = fake_chrome_from_args(args, prefix="fake-")
+        await fake_chrome.start()
+        args.browser_url = fake_chrome.browser_url
+        print(f"✅ CDP 替身已启动: {fake_chrome.browser_url}")
+
+    server: Optional[ServerProcess] = None
+    client: Optional[McpClient] = None
+    try:
+        print_section(f"{args.transport} 模式工具调度并发测试")
+        if args.transport == "stdio":
+            client = StdioClient(browser_url=args.browser_url, timeout=args.timeout)
+        else:
+            server = ServerProcess(args.transport, port=args.port, browser_url=args.browser_url)
+            await server.start()
+            print(f"✅ 服务器已启动 (PID: {server.pid}, Port: {server.port})")
+            client = create_client(args.transport, base_url=server.base_url, timeout=args.timeout)
+        await client.start()
+        await client.initialize({"name": "concurrency-test", "version": "1.0.0"})
+        await client.call_tool("list_pages", timeout=args.timeout)
+
+        print(f"⏳ 检查 1: 慢调用（{args.slow_ms:g}ms）在途时的 {', '.join(FAST_TOOLS)}")
+        fast = await check_fast_during_slow(client, args)
+        print("⏳ 检查 2: 同一页面上的两个慢 evaluate_script")
+        serial = await check_same_page_serialized(client, args)
+        print(f"⏳ 检查 3: {args.burst} 个混合调用并发突发")
+        burst = await check_burst_integrity(client, args)
+    finally:
+        if client:
+            await client.close()
+        if server:
+            await server.stop()
+        if fake_chrome:
+            await fake_chrome.stop()
+
+    print_section("判定")
+    problems: List[str] = []
+    speedup = fast["slow_ms"] / max(fast["busy_ms"]["p50"], 1e-6)
+    print(f"ℹ️  快调用 p50: 空闲 {fast['idle_ms']['p50']:.1f}ms，慢调用在途 "
+          f"{fast['busy_ms']['p50']:.1f}ms（max {fast['busy_ms']['max']:.1f}ms），"
+          f"相对慢调用 {fast['slow_ms']:.0f}ms 快 {speedup:.1f}x")
+    if fast["blocked"]:
+        problems.append("browser 级调用被在途的页面调用阻塞")
+    print(f"ℹ️  evaluate_script: 单个 {serial['single_ms']:.0f}ms，两个并发 {serial['pair_ms']:.0f}ms")
+    if not serial["serialized"]:
+        problems.append("同一页面上的两个 evaluate_script 没有串行执行")
+    print(f"ℹ️  突发: {burst['calls']} 个调用耗时 {burst['elapsed_ms']:.0f}ms")
+    problems.extend(burst["problems"])
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print("✅ 调度正常：不冲突的调用并发执行，冲突的调用串行，响应完整")
+
+    if args.json:
+        write_json(args.json, {
+            "config": {
+                "transport": args.transport, "slowMs": args.slow_ms, "rounds": args.rounds,
+                "burst": args.burst, "browserUrl": args.browser_url, "fakeCdp": args.fake_cdp,
+            },
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "fastDuringSlow": fast,
+            "samePage": serial,
+            "burst": burst,
+            "problems": problems,
+        })
+
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(main()))
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""console 日志摄取吞吐：日志密集的页面下 EnhancedConsoleCollector 的摄取速度与读取开销
+
+用 fake_cdp.FakeChrome 一次推送 --events 条 Runtime.consoleAPICalled，每条附带一个
+--depth 层、每层 --width 个属性的对象参数（--depth 0 只有基本类型参数）。对每个 --build：
+1. 每轮推送一批事件，轮询 get_page_console_logs 直到全部摄取（含被淘汰的条数），
+   记录摄取速率和期间 CDP 替身收到的 Runtime.getProperties 次数
+2. 调用两次 get_page_console_logs（limit=--read）：第 1 次完整序列化要返回的日志，
+   第 2 次命中缓存
+
+轮询使用一个不会出现的日志类型过滤，不触发任何日志的序列化。
+给出多个 --build 时可对比改动前后（例如 --build ../baseline --build .）。
+
+用法：
+    python3 test-console-ingest.py
+    python3 test-console-ingest.py --events 5000 --depth 3 --fake-latency 1 --build ../baseline --build .
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from fake_cdp import add_fake_cdp_arguments, fake_chrome_from_args
+from mcp_bench import LatencyRecorder, format_table, write_json
+from mcp_client import McpError, StdioClient, TransportClosed, run, tool_text
+
+GET_LOGS = "get_page_console_logs"
+# 轮询时的类型过滤：CDP 替身不会产生 count 类型的日志，响应里只有统计
+PROBE_TYPE = "count"
+
+TOTAL = re.compile(r"\*\*Total\*\*: (\d+) messages")
+FILTERED_FROM = re.compile(r"filtered from (\d+)")
+DROPPED = re.compile(r"(\d+) older messages dropped")
+
+
+def print_section(title: str):
+    print(f"\n{'=' * 70}\n  {title}\n{'=' * 70}")
+
+
+def match_int(pattern: re.Pattern, text: str) -> int:
+    match = pattern.search(text)
+    return int(match.group(1)) if match else 0
+
+
+async def ingested(client: StdioClient, args) -> int:
+    """收集器至今摄取的条数（保留的 + 被淘汰的）"""
+    result = await client.call_tool(GET_LOGS, {"types": [PROBE_TYPE]}, timeout=args.timeout)
+    text = tool_text(result)
+    if "Legacy Mode" in text:
+        raise McpError(-1, "增强收集器不可用（Legacy Mode）")
+    kept = match_int(FILTERED_FROM, text) or match_int(TOTAL, text)
+    return kept + match_int(DROPPED, text)
+
+
+async def wait_ingested(client: StdioClient, target: int, args) -> bool:
+    deadline = time.monotonic() + args.ingest_timeout
+    while time.monotonic() < deadline:
+        if await ingested(client, args) >= target:
+            return True
+        await asyncio.sleep(args.poll / 1000)
+    return False
+
+
+async def run_build(build: str, chrome, args) -> Dict[str, Any]:
+    client = StdioClient(browser_url=chrome.browser_url, cwd=os.path.abspath(build),
+                         timeout=args.timeout)
+    page = next(t for t in chrome.targets.values() if t.type == "page")
+    counts = chrome.command_counts
+    rounds: List[Dict[str, Any]] = []
+    reads = LatencyRecorder()
+    read_calls: Dict[str, int] = {}
+    timed_out = False
+    try:
+        await client.start()
+        await client.initialize()
+        await client.call_tool("list_pages", timeout=args.timeout)
+
+        # 预热：确认增强收集器已经挂到页面上
+        base = await ingested(client, args)
+        chrome.emit_console_burst(page, 1)
+        if not await wait_ingested(client, base + 1, args):
+            raise McpError(-1, "预热日志未被摄取")
+
+        for _ in range(args.rounds):
+            base = await ingested(client, args)
+            before = counts["Runtime.getProperties"]
+            start = time.perf_counter()
+            chrome.emit_console_burst(page, args.events, depth=args.depth, width=args.width)
+            done = await wait_ingested(client, base + args.events, args)
+            elapsed = time.perf_counter() - start
+            timed_out = timed_out or not done
+            rounds.append({
+                "seconds": elapsed,
+                "eventsPerSec": args.events / elapsed if done else 0.0,
+                "getProperties": counts["Runtime.getProperties"] - before,
+                "complete": done,
+            })
+
+        for label in ("1st read", "cached read"):
+            before = counts["Runtime.getProperties"]
+            start = time.perf_counter()
+            try:
+                await client.call_tool(GET_LOGS, {"limit": args.read}, timeout=args.timeout)
+            except (McpError, asyncio.TimeoutError) as e:
+                reads.record(label, time.perf_counter() - start, error=type(e).__name__)
+            else:
+                reads.record(label, time.perf_counter() - start)
+            read_calls[label] = counts["Runtime.getProperties"] - before
+    finally:
+        await client.close()
+    reads.finish()
+
+    events = args.events * len(rounds)
+    seconds = sum(r["seconds"] for r in rounds)
+    return {
+        "build": build,
+        "rounds": rounds,
+        "eventsPerSec": events / seconds if seconds and not timed_out else 0.0,
+        "ingestGetProperties": sum(r["getProperties"] for r in rounds),
+        "reads": reads.summary(),
+        "readGetProperties": read_calls,
+        "timedOut": timed_out,
+    }
+
+
+def format_results(results: List[Dict[str, Any]], args) -> str:
+    events = args.events * args.rounds
+    lines = [f"{'build':<24}{'events/s':>12}{'getProps/event':>16}"
+             f"{'1st read':>12}{'cached':>10}{'read getProps':>15}"]
+    for r in results:
+        first = r["reads"].get("1st read", {}).get("p50", 0.0)
+        cached = r["reads"].get("cached read", {}).get("p50", 0.0)
+        rate = f"{r['eventsPerSec']:,.0f}" if not r["timedOut"] else "timeout"
+        lines.append(f"{r['build'][-23:]:<24}{rate:>12}{r['ingestGetProperties'] / events:>16.2f}"
+                     f"{first:>10.1f}ms{cached:>8.1f}ms"
+                     f"{r['readGetProperties'].get('1st read', 0):>15}")
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[List[str]]):
+    parser = argparse.ArgumentParser(description="console 日志摄取吞吐（使用 CDP 替身）")
+    parser.add_argument("--build", action="append", default=[],
+                        help="包含 build/src/index.js 的目录（可重复，默认当前目录）")
+    parser.add_argument("--events", type=int, default=2000, help="每轮推送的事件数")
+    parser.add_argument("--rounds", type=int, default=3, help="推送轮数")
+    parser.add_argument("--depth", type=int, default=3, help="对象参数的嵌套层数（0 表示不带对象）")
+    parser.add_argument("--width", type=int, default=4, help="对象每层的属性数")
+    parser.add_argument("--read", type=int, default=100, help="读取阶段返回的日志条数")
+    parser.add_argument("--poll", type=float, default=20.0, help="摄取进度轮询间隔（毫秒）")
+    parser.add_argument("--ingest-timeout", type=float, default=120.0, help="每轮摄取的超时（秒）")
+    parser.add_argument("--timeout", type=float, default=60.0, help="单次调用超时（秒）")
+    parser.add_argument("--json", help="把结果写入 JSON 文件（- 表示 stdout）")
+    add_fake_cdp_arguments(parser.add_argument_group("CDP 替身"), prefix="fake-")
+    args = parser.parse_args(argv)
+    args.build = args.build or ["."]
+    return args
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    chrome = fake_chrome_from_args(args, prefix="fake-")
+    await chrome.start()
+    print(f"✅ CDP 替身已启动: {chrome.browser_url}")
+    print(f"每轮 {args.events} 条事件 × {args.rounds} 轮，对象参数 depth={args.depth} width={args.width}")
+
+    results: List[Dict[str, Any]] = []
+    try:
+        for build in args.build:
+            print_section(build)
+            result = await run_build(build, chrome, args)
+            results.append(result)
+            for i, r in enumerate(result["rounds"], 1):
+                status = f"{r['eventsPerSec']:,.0f} events/s" if r["complete"] else "超时"
+                print(f"  第 {i} 轮: {r['seconds'] * 1000:.0f}ms  {status}  "
+                      f"getProperties={r['getProperties']}")
+            print(format_table(result["reads"], f"{GET_LOGS}(limit={args.read})"))
+    except (McpError, TransportClosed, asyncio.TimeoutError) as e:
+        print(f"❌ 测试失败: {e}")
+        return 1
+    finally:
+        await chrome.stop()
+
+    print_section("汇总")
+    print(format_results(results, args))
+
+    if args.json:
+        write_json(args.json, {
+            "config": {
+                "builds": args.build, "events": args.events, "rounds": args.rounds,
+                "depth": args.depth, "width": args.width, "read": args.read,
+                "fakeLatencyMs": args.fake_latency,
+            },
+            "results": results,
+        })
+
+    return 1 if any(r["timedOut"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(main()))
@@ -1,11 +1,20 @@
 #!/usr/bin/env python3
-"""测试核心工具功能"""
+"""测试核心工具功能
 
-import json
-import subprocess
+另外对比完整快照与增量快照（take_snapshot incremental=true）的响应字节数和延迟。
+
+用法：
+    python3 test-core-tools.py
+    python3 test-core-tools.py --snapshot-rounds 50 --snapshot-mutate --json snapshot.json
+"""
+
+import argparse
+import asyncio
 import sys
 import time
-import select
+
+from mcp_bench import summarize, write_json
+from mcp_client import StdioClient, McpError, TransportClosed, run, tool_text
 
 # 核心工具列表
 CORE_TOOLS = [
@@ -15,27 +24,48 @@ CORE_TOOLS = [
     {"name": "take_snapshot", "args": {}},
 ]
 
-def send_request(process, method, params):
-    """发送 MCP 请求"""
-    request_id = int(time.time() * 1000)
-    request = {
-        "jsonrpc": "2.0",
-        "id": request_id,
-        "method": method,
-        "params": params
-    }
-    
-    process.stdin.write(json.dumps(request) + "\n")
-    process.stdin.flush()
-    
-    # 等待响应
-    ready = select.select([process.stdout], [], [], 10)
-    if ready[0]:
-        response_line = process.stdout.readline()
-        return json.loads(response_line)
-    return None
-
-def test_tools():
+# 每轮修改页面上的一个节点，模拟"点击后再快照"
+MUTATE_SCRIPT = """() => {
+  let el = document.getElementById('__mcp_snapshot_bench');
+  if (!el) {
+    el = document.createElement('output');
+    el.id = '__mcp_snapshot_bench';
+    document.body.append(el);
+  }
+  el.textContent = 'tick ' + Date.now();
+  return true;
+}"""
+
+
+async def bench_snapshots(client: StdioClient, rounds: int, mutate: bool):
+    """依次测完整快照和增量快照：每种模式先预热一次，再测 rounds 次"""
+    results = {}
+    for mode, args in (("full", {}), ("incremental", {"incremental": True})):
+        await client.call_tool("take_snapshot", args)
+        latencies = []
+        sizes = []
+        for _ in range(rounds):
+            if mutate:
+                await client.call_tool("evaluate_script", {"function": MUTATE_SCRIPT})
+            start = time.perf_counter()
+            result = await client.call_tool("take_snapshot", args)
+            latencies.append((time.perf_counter() - start) * 1000)
+            sizes.append(len(tool_text(result).encode("utf-8")))
+        results[mode] = {"latency_ms": summarize(latencies), "bytes": summarize(sizes)}
+
+    print(f"{'mode':<14}{'bytes(mean)':>14}{'bytes(max)':>12}{'p50':>10}{'p95':>10}")
+    for mode, row in results.items():
+        print(f"{mode:<14}{row['bytes']['mean']:>14.0f}{row['bytes']['max']:>12.0f}"
+              f"{row['latency_ms']['p50']:>8.1f}ms{row['latency_ms']['p95']:>8.1f}ms")
+    full, incremental = results["full"], results["incremental"]
+    if incremental["bytes"]["mean"] and incremental["latency_ms"]["p50"]:
+        print(f"\n增量快照: 字节数为完整快照的 "
+              f"{incremental['bytes']['mean'] / full['bytes']['mean'] * 100:.1f}%，"
+              f"p50 延迟 {full['latency_ms']['p50'] / incremental['latency_ms']['p50']:.1f}x")
+    return results
+
+
+async def test_tools(args):
     """测试工具"""
     print("="*70)
     print("  stdio 模式核心工具测试")
@@ -44,37 +74,19 @@ def test_tools():
     
     # 启动服务器
     print("启动 stdio 服务器...")
-    process = subprocess.Popen(
-        ['node', 'build/src/index.js', '--browserUrl', 'http://127.0.0.1:9222'],
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        bufsize=1
-    )
-    
-    time.sleep(2)
-    
-    if process.poll() is not None:
-        print("❌ 服务器启动失败")
-        return False
-    
-    print(f"✅ 服务器已启动 (PID: {process.pid})\n")
+    client = StdioClient(browser_url=args.browser_url, timeout=10)
+    await client.start()
     
     try:
         # Initialize
         print("初始化连接...")
-        response = send_request(process, "initialize", {
-            "protocolVersion": "2024-11-05",
-            "capabilities": {},
-            "clientInfo": {"name": "test-client", "version": "1.0.0"}
-        })
-        
-        if not response or 'result' not in response:
-            print("❌ 初始化失败")
+        try:
+            await client.initialize()
+        except (McpError, TransportClosed, asyncio.TimeoutError) as e:
+            print(f"❌ 初始化失败: {e}")
             return False
         
-        print("✅ 初始化成功\n")
+        print(f"✅ 初始化成功 (PID: {client.pid})\n")
         
         # 测试工具
         passed = 0
@@ -82,44 +94,62 @@ def test_tools():
         
         for tool in CORE_TOOLS:
             print(f"测试: {tool['name']}")
-            response = send_request(process, "tools/call", {
-                "name": tool['name'],
-                "arguments": tool['args']
-            })
-            
-            if response and 'result' in response:
+            try:
+                result = await client.call_tool(tool['name'], tool['args'])
+            except asyncio.TimeoutError:
+                print(f"❌ {tool['name']} - 失败: Timeout")
+                failed += 1
+            except (McpError, TransportClosed) as e:
+                print(f"❌ {tool['name']} - 失败: {e}")
+                failed += 1
+            else:
                 print(f"✅ {tool['name']} - 成功")
                 # 显示部分结果
-                result = response['result']
-                if 'content' in result and result['content']:
-                    content = result['content'][0]
-                    if 'text' in content:
-                        text = content['text'][:200]
-                        print(f"   结果: {text}...")
+                text = tool_text(result)[:200]
+                if text:
+                    print(f"   结果: {text}...")
                 passed += 1
-            else:
-                error_msg = response.get('error', {}).get('message', 'Unknown') if response else 'Timeout'
-                print(f"❌ {tool['name']} - 失败: {error_msg}")
-                failed += 1
             print()
         
         # 总结
         print("="*70)
         print(f"测试完成: {passed}/{len(CORE_TOOLS)} 通过")
         print("="*70)
-        
+
+        if args.snapshot_rounds > 0:
+            print(f"\n完整快照 vs 增量快照（{args.snapshot_rounds} 轮"
+                  f"{'，每轮修改页面' if args.snapshot_mutate else ''}）")
+            try:
+                results = await bench_snapshots(client, args.snapshot_rounds, args.snapshot_mutate)
+            except (McpError, TransportClosed, asyncio.TimeoutError) as e:
+                print(f"❌ 快照对比失败: {e}")
+                failed += 1
+            else:
+                if args.json:
+                    write_json(args.json, {
+                        "rounds": args.snapshot_rounds,
+                        "mutate": args.snapshot_mutate,
+                        "snapshot": results,
+                    })
+
         return failed == 0
         
     finally:
         print("\n关闭服务器...")
-        process.terminate()
-        try:
-            process.wait(timeout=3)
-        except subprocess.TimeoutExpired:
-            process.kill()
-            process.wait()
+        await client.close()
         print("✅ 已清理")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="stdio 模式核心工具测试")
+    parser.add_argument("--browser-url", default="http://127.0.0.1:9222")
+    parser.add_argument("--snapshot-rounds", type=int, default=10,
+                        help="快照对比的轮数（0 表示跳过）")
+    parser.add_argument("--snapshot-mutate", action="store_true",
+                        help="每轮快照前用 evaluate_script 修改页面上的一个节点")
+    parser.add_argument("--json", help="把快照对比结果写入 JSON 文件（- 表示 stdout）")
+    return parser.parse_args()
+
+
 if __name__ == '__main__':
-    success = test_tools()
-    sys.exit(0 if success else 1)
+    success = run(test_tools(parse_args()))
+    sys.exit(0 if success is True else 1)
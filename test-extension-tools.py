@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""扩展工具逐次调用延迟：固定的工具序列反复执行，对比冷调用和热调用
+
+每一轮按顺序调用（默认 --tools contexts）：
+- list_extension_contexts:  查找扩展的所有 target
+- evaluate_in_extension:    在 Service Worker 中求值（不捕获日志）
+- get_background_logs:      附加到 Service Worker 捕获 --log-duration 毫秒的 console
+
+第 1 轮需要发现 target 并附加 CDP session；之后的轮次复用扩展 target 的
+session 池和 target 列表（src/cdp/ExtensionSessionPool.ts），target 销毁时才失效。
+--tools 可以换成扩展发现类工具（list_extensions、get_extension_details、
+inspect_extension_manifest、check_content_script_injection），它们复用按扩展 ID + 版本
+缓存的 manifest、match pattern 和扩展列表（src/extension/ExtensionMetadataCache.ts）。
+输出第 1 轮与后续轮次每个工具的延迟；使用 CDP 替身时还输出每轮的
+Target.getTargets / Target.attachToTarget / Target.detachFromTarget 次数。
+在改动前后的提交上各运行一次即可对比。
+
+用法：
+    python3 test-extension-tools.py --fake-cdp --fake-latency 2 --rounds 30
+    python3 test-extension-tools.py --fake-cdp --tools discovery
+    python3 test-extension-tools.py --extension-id <32 位 ID>   # 真实 Chrome（CHROME_URL）
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from fake_cdp import add_fake_cdp_arguments, fake_chrome_from_args
+from mcp_bench import LatencyRecorder, format_table, summarize, write_json
+from mcp_client import McpError, StdioClient, TransportClosed, run
+
+CHROME_URL = "http://127.0.0.1:9222"
+
+SEQUENCES = {
+    "contexts": ["list_extension_contexts", "evaluate_in_extension", "get_background_logs"],
+    "discovery": ["list_extensions", "get_extension_details", "inspect_extension_manifest",
+                  "check_content_script_injection"],
+}
+
+# 替身上统计的 target 发现 / 附加命令
+TARGET_METHODS = ["Target.getTargets", "Target.attachToTarget", "Target.detachFromTarget"]
+
+
+def tool_args(tool: str, extension_id: str, args) -> Dict[str, Any]:
+    if tool == "evaluate_in_extension":
+        return {"extensionId": extension_id, "code": "chrome.runtime.id", "captureLogs": False}
+    if tool == "get_background_logs":
+        return {"extensionId": extension_id, "duration": args.log_duration}
+    if tool == "list_extensions":
+        return {}
+    if tool == "check_content_script_injection":
+        return {"extensionId": extension_id, "testUrl": "https://example.com/"}
+    return {"extensionId": extension_id}
+
+
+def print_section(title: str):
+    print(f"\n{'=' * 70}\n  {title}\n{'=' * 70}")
+
+
+async def run_rounds(client: StdioClient, extension_id: str, args,
+                     counts: Optional[Counter]) -> Dict[str, Any]:
+    """执行 --rounds 轮工具序列，第 1 轮单独记录"""
+    cold = LatencyRecorder()
+    warm = LatencyRecorder()
+    per_round: List[Dict[str, int]] = []
+    for round_index in range(args.rounds):
+        recorder = cold if round_index == 0 else warm
+        before = Counter(counts) if counts is not None else None
+        for tool in args.tools:
+            start = time.perf_counter()
+            try:
+                await client.call_tool(tool, tool_args(tool, extension_id, args), timeout=args.timeout)
+            except (McpError, TransportClosed, asyncio.TimeoutError) as e:
+                recorder.record(tool, time.perf_counter() - start, error=type(e).__name__)
+            else:
+                recorder.record(tool, time.perf_counter() - start)
+        if counts is not None:
+            per_round.append({method: counts[method] - before[method] for method in TARGET_METHODS})
+    cold.finish()
+    warm.finish()
+    return {"cold": cold, "warm": warm, "targetCommands": per_round}
+
+
+def format_comparison(tools: List[str], cold: Dict[str, Dict[str, Any]],
+                      warm: Dict[str, Dict[str, Any]]) -> str:
+    lines = [f"{'tool':<32}{'cold':>10}{'warm p50':>12}{'warm p99':>12}{'speedup':>10}"]
+    for tool in tools:
+        if tool not in cold or tool not in warm:
+            continue
+        first = cold[tool]["p50"]
+        p50 = warm[tool]["p50"]
+        speedup = f"{first / p50:.1f}x" if p50 else "-"
+        lines.append(f"{tool:<32}{first:>8.1f}ms{p50:>10.1f}ms{warm[tool]['p99']:>10.1f}ms{speedup:>10}")
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[List[str]]):
+    parser = argparse.ArgumentParser(description="扩展工具冷 / 热调用延迟")
+    parser.add_argument("--tools", default="contexts",
+                        help=f"工具序列：{' / '.join(SEQUENCES)}，或逗号分隔的工具名")
+    parser.add_argument("--rounds", type=int, default=20, help="工具序列执行轮数（第 1 轮为冷调用）")
+    parser.add_argument("--log-duration", type=int, default=200,
+                        help="get_background_logs 的捕获时长（毫秒）")
+    parser.add_argument("--extension-id", help="扩展 ID（默认使用第一个扩展）")
+    parser.add_argument("--timeout", type=float, default=30.0, help="单次调用超时（秒）")
+    parser.add_argument("--browser-url", default=os.environ.get("CHROME_URL", CHROME_URL))
+    parser.add_argument("--json", help="把结果写入 JSON 文件（- 表示 stdout）")
+    parser.add_argument("--fake-cdp", action="store_true", help="使用本地 CDP 替身代替真实 Chrome")
+    add_fake_cdp_arguments(parser.add_argument_group("CDP 替身（--fake-cdp）"), prefix="fake-")
+    args = parser.parse_args(argv)
+    args.tools = SEQUENCES.get(args.tools) or [t.strip() for t in args.tools.split(",") if t.strip()]
+    if args.fake_cdp:
+        args.fake_extensions = max(args.fake_extensions, 1)
+    elif not args.extension_id:
+        parser.error("真实 Chrome 需要 --extension-id")
+    return args
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    fake_chrome = None
+    counts: Optional[Counter] = None
+    extension_id = args.extension_id
+    if args.fake_cdp:
+        fake_chrome = fake_chrome_from_args(args, prefix="fake-")
+        await fake_chrome.start()
+        args.browser_url = fake_chrome.browser_url
+        counts = fake_chrome.command_counts
+        extension_id = extension_id or fake_chrome.extensions[0]["id"]
+        print(f"✅ CDP 替身已启动: {fake_chrome.browser_url}（{args.fake_extensions} 个扩展）")
+
+    client = StdioClient(browser_url=args.browser_url, timeout=args.timeout)
+    try:
+        await client.start()
+        await client.initialize()
+        # 连接浏览器，避免把首次连接计入第 1 轮
+        await client.call_tool("list_pages", timeout=args.timeout)
+
+        print_section(f"扩展 {extension_id}: {args.rounds} 轮 × {', '.join(args.tools)}")
+        result = await run_rounds(client, extension_id, args, counts)
+    except (McpError, TransportClosed, asyncio.TimeoutError) as e:
+        print(f"❌ 测试失败: {e}")
+        return 1
+    finally:
+        await client.close()
+        if fake_chrome:
+            await fake_chrome.stop()
+
+    cold = result["cold"].summary()
+    warm = result["warm"].summary()
+    print(format_table(cold, "第 1 轮（冷）"))
+    if args.rounds > 1:
+        print()
+        print(format_table(warm, f"第 2-{args.rounds} 轮（热）"))
+        print()
+        print(format_comparison(args.tools, cold, warm))
+
+    per_round = result["targetCommands"]
+    if per_round:
+        print("\n每轮 target 命令数（CDP 替身统计）:")
+        print(f"{'':<24}{'第 1 轮':>10}{'之后每轮':>12}")
+        for method in TARGET_METHODS:
+            later = summarize(r[method] for r in per_round[1:]) if len(per_round) > 1 else None
+            later_text = f"{later['mean']:>12.1f}" if later else f"{'-':>12}"
+            print(f"{method:<24}{per_round[0][method]:>10}{later_text}")
+
+    if args.json:
+        write_json(args.json, {
+            "config": {
+                "rounds": args.rounds, "tools": args.tools, "logDuration": args.log_duration,
+                "extensionId": extension_id, "browserUrl": args.browser_url,
+                "fakeCdp": args.fake_cdp,
+            },
+            "cold": cold,
+            "warm": warm,
+            "targetCommands": per_round,
+        })
+
+    return 1 if cold["ALL"]["errors"] + warm["ALL"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(main()))
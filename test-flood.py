@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""收集器洪泛测试：页面持续刷 console / network 事件时，服务器内存应保持平稳
+
+用 fake_cdp.FakeChrome 以很高的速率向页面推送 Runtime.consoleAPICalled 和
+Network.requestWillBeSent，stdio 服务器以较小的收集器上限启动：
+    MCP_COLLECTOR_MAX_PER_PAGE / MCP_COLLECTOR_MAX_TOTAL（src/config/CollectorLimits.ts）
+期间定期调用 list_console_messages / list_network_requests，检查：
+- 每页保留的条数从不超过上限
+- 响应中报告了被淘汰的条数（Dropped）
+- 缓冲区填满后 heapUsed 的增长不超过 --max-heap-growth
+
+用法：
+    python3 test-flood.py
+    python3 test-flood.py --console-rate 5000 --network-rate 1000 --duration 120 --max-per-page 1000
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from fake_cdp import FakeChrome
+from mcp_bench import MB, MEMORY_WINDOW, MemoryTrace, format_growth, memory_debug_env, write_json
+from mcp_client import StdioClient, run, tool_text
+
+CONSOLE_TOTAL = re.compile(r"\*\*Total Messages\*\*: (\d+)")
+CONSOLE_DROPPED = re.compile(r"\*\*Dropped\*\*: (\d+)")
+NETWORK_TOTAL = re.compile(r"Showing \d+-\d+ of (\d+)")
+NETWORK_DROPPED = re.compile(r"(\d+) older requests were dropped")
+
+
+def print_section(title: str):
+    """打印章节标题"""
+    print(f"\n{'='*70}")
+    print(f"  {title}")
+    print(f"{'='*70}\n")
+
+
+def match_int(pattern: re.Pattern, text: str) -> int:
+    match = pattern.search(text)
+    return int(match.group(1)) if match else 0
+
+
+async def poll_collectors(client: StdioClient) -> Dict[str, int]:
+    """读取选中页面当前保留和已淘汰的条数"""
+    console = tool_text(await client.call_tool("list_console_messages", {"pageSize": 1}))
+    network = tool_text(await client.call_tool("list_network_requests", {"pageSize": 1}))
+    return {
+        "console": match_int(CONSOLE_TOTAL, console),
+        "consoleDropped": match_int(CONSOLE_DROPPED, console),
+        "network": match_int(NETWORK_TOTAL, network),
+        "networkDropped": match_int(NETWORK_DROPPED, network),
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="收集器洪泛测试（使用 CDP 替身）")
+    parser.add_argument("--duration", "-d", type=float, default=60.0, help="洪泛时长（秒）")
+    parser.add_argument("--pages", type=int, default=1, help="同时刷事件的页面数")
+    parser.add_argument("--console-rate", type=float, default=2000.0, help="每页每秒 console 事件数")
+    parser.add_argument("--network-rate", type=float, default=500.0, help="每页每秒网络请求数")
+    parser.add_argument("--max-per-page", type=int, default=500, help="MCP_COLLECTOR_MAX_PER_PAGE")
+    parser.add_argument("--max-total", type=int, default=5000, help="MCP_COLLECTOR_MAX_TOTAL")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="查询收集器的间隔（秒）")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="内存采样间隔（秒）")
+    parser.add_argument("--max-heap-growth", type=float, default=32.0,
+                        help="缓冲区填满后 heapUsed 增长上限（MB）")
+    parser.add_argument("--timeout", type=float, default=60.0, help="单个请求超时（秒）")
+    parser.add_argument("--json", help="把结果写入 JSON 文件（- 表示 stdout）")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    chrome = FakeChrome(pages=args.pages, console_rate=args.console_rate,
+                        network_rate=args.network_rate)
+    await chrome.start()
+
+    print_section("收集器洪泛测试")
+    print(f"CDP 替身: {chrome.browser_url}（{args.pages} 页，每页 {args.console_rate:g} console/s、"
+          f"{args.network_rate:g} request/s）")
+    print(f"收集器上限: 每页 {args.max_per_page}，总计 {args.max_total}\n")
+
+    trace = MemoryTrace()
+    env = {
+        **os.environ,
+        **memory_debug_env(args.sample_interval),
+        "MCP_COLLECTOR_MAX_PER_PAGE": str(args.max_per_page),
+        "MCP_COLLECTOR_MAX_TOTAL": str(args.max_total),
+    }
+    client = StdioClient(browser_url=chrome.browser_url, env=env,
+                         on_stderr=trace.add_line, timeout=args.timeout)
+    polls: List[Dict[str, Any]] = []
+    problems: List[str] = []
+    try:
+        await client.start()
+        await client.initialize({"name": "flood-test", "version": "1.0.0"})
+        await client.call_tool("list_pages")
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+        while time.perf_counter() < deadline:
+            counts = await poll_collectors(client)
+            trace.calls += 2
+            counts["at"] = round(time.perf_counter() - started, 3)
+            polls.append(counts)
+            # 缓冲区第一次填满之后的采样才用于判断增长
+            if not trace.warmup_calls and counts["console"] >= args.max_per_page:
+                trace.warmup_calls = trace.calls
+            if counts["console"] > args.max_per_page or counts["network"] > args.max_per_page:
+                problems.append(f"{counts['at']:.1f}s 超出每页上限: console {counts['console']}, "
+                                f"network {counts['network']}")
+            print(f"   {counts['at']:6.1f}s  console {counts['console']:>6} (dropped "
+                  f"{counts['consoleDropped']:>7})  network {counts['network']:>6} (dropped "
+                  f"{counts['networkDropped']:>7})"
+                  + (f"  heap {trace.samples[-1]['heapUsed'] / MB:.1f}MB" if trace.samples else ""))
+            await asyncio.sleep(args.poll_interval)
+        await asyncio.sleep(args.sample_interval * (MEMORY_WINDOW + 0.5))
+    finally:
+        await client.close()
+        await chrome.stop()
+
+    print_section("判定")
+    last = polls[-1] if polls else {}
+    if not last.get("consoleDropped"):
+        problems.append("list_console_messages 没有报告被淘汰的消息（上限未生效或事件未到达）")
+    if not last.get("networkDropped"):
+        problems.append("list_network_requests 没有报告被淘汰的请求（上限未生效或事件未到达）")
+    heap = trace.growth("heapUsed")
+    print(format_growth("heap", heap, args.max_heap_growth))
+    if heap is None:
+        problems.append("内存采样不足")
+    elif heap["growth_mb"] > args.max_heap_growth:
+        problems.append(f"heapUsed 增长 {heap['growth_mb']:.1f}MB")
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print("✅ 收集器保持在上限内，内存平稳")
+
+    if args.json:
+        write_json(args.json, {
+            "config": {
+                "duration": args.duration, "pages": args.pages,
+                "consoleRate": args.console_rate, "networkRate": args.network_rate,
+                "maxPerPage": args.max_per_page, "maxTotal": args.max_total,
+            },
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "heap": heap,
+            "rss": trace.growth("rss"),
+            "polls": polls,
+            "samples": trace.samples,
+            "problems": problems,
+        })
+
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(main()))
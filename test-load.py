@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""并发负载测试：N 个客户端 × 每客户端 M req/s 的 tools/call
+
+覆盖 stdio / SSE / Streamable HTTP / Multi-tenant 四种模式，按工具输出
+p50/p95/p99 延迟、吞吐量和错误率。
+
+用法：
+    python3 test-load.py --transport all --clients 4 --rate 5 --duration 30
+    python3 test-load.py --transport sse --base-url http://127.0.0.1:32122   # 复用已运行的服务器
+    python3 test-load.py --transport streamable --rate 0 --json result.json  # 闭环压测，尽可能快
+    python3 test-load.py --fake-cdp --fake-pages 200 --fake-latency 1          # 不需要真实 Chrome
+    python3 test-load.py --transport sse --metrics                               # 附带服务器端耗时分解
+
+说明：
+- stdio 只有一条管道，N 个客户端复用同一个服务器进程，并发请求在管道上交错在途。
+- --rate 0 表示闭环模式：每个客户端上一个请求返回后立即发送下一个。
+- --rate > 0 为开环模式：按固定节奏发送，不等待前一个响应（受 --max-in-flight 限制）。
+- 冷启动时间：stdio 为 spawn 到 initialize 响应，其它模式为 spawn 到 /health 返回 200；
+  超过 --startup-budget 时该模式计为失败。
+- --fake-cdp 在进程内启动 fake_cdp.FakeChrome 代替 Chrome，测得的是服务器自身开销。
+- --metrics 在压测前后各抓取一次服务器的 /metrics（stdio 通过 MCP_METRICS_PORT 开放），
+  输出每个工具在排队 / 工具处理 / 格式化上的平均耗时、响应大小和最耗时的 CDP 方法。
+  multi-tenant 的 /metrics 是另一套 JSON 格式，不参与。
+- multi-tenant 模式总是报告压测期间每次工具调用的存储写操作数（/metrics 中的 usage：
+  工具调用计数和最近连接时间合并后批量写入，见 src/multi-tenant/storage/UsageBuffer.ts）。
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from fake_cdp import add_fake_cdp_arguments, fake_chrome_from_args
+from mcp_bench import (
+    LatencyRecorder, check_budget, format_budget, format_metrics_report, format_table,
+    metrics_delta, metrics_env, parse_metrics, summarize_metrics, write_json,
+)
+from mcp_client import (
+    McpClient, McpError, ServerProcess, TransportClosed,
+    create_client, http_request, register_tenant, run,
+)
+
+CHROME_URL = "http://127.0.0.1:9222"
+
+# 默认工具组合（只读或无副作用）
+DEFAULT_TOOLS = ["list_pages", "take_snapshot", "evaluate_script", "list_console_messages"]
+
+TOOL_ARGS: Dict[str, Dict[str, Any]] = {
+    "evaluate_script": {"function": "() => document.title"},
+    "list_console_messages": {"pageSize": 20},
+    "list_network_requests": {"pageSize": 20},
+}
+
+ALL_MODES = ["stdio", "sse", "streamable", "multi-tenant"]
+# 开放 Prometheus 格式 /metrics 的模式
+METRICS_MODES = ["stdio", "sse", "streamable"]
+DEFAULT_METRICS_PORT = 32125
+
+
+def print_section(title: str):
+    """打印章节标题"""
+    print(f"\n{'='*70}")
+    print(f"  {title}")
+    print(f"{'='*70}\n")
+
+
+def classify_error(error: BaseException) -> str:
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    if isinstance(error, McpError):
+        return f"rpc:{error.code}"
+    if isinstance(error, TransportClosed):
+        return "transport"
+    return type(error).__name__
+
+
+async def timed_call(client: McpClient, tool: str, recorder: LatencyRecorder, timeout: float):
+    """执行一次 tools/call 并记录耗时；isError 结果也计为错误"""
+    start = time.perf_counter()
+    error: Optional[str] = None
+    try:
+        result = await client.call_tool(tool, TOOL_ARGS.get(tool, {}), timeout=timeout)
+        if result.get("isError"):
+            error = "tool_error"
+    except Exception as e:  # noqa: BLE001 - 所有失败都计入统计
+        error = classify_error(e)
+    recorder.record(tool, time.perf_counter() - start, error)
+
+
+async def client_worker(index: int, client: McpClient, tools: List[str], args,
+                        recorder: LatencyRecorder, deadline: float):
+    """单个逻辑客户端：按 rate 开环发送，或闭环连续发送"""
+    # 每个客户端从不同工具开始，避免所有客户端同时打同一个工具
+    cycle = itertools.islice(itertools.cycle(tools), index % len(tools), None)
+
+    if args.rate <= 0:
+        while time.perf_counter() < deadline:
+            await timed_call(client, next(cycle), recorder, args.timeout)
+        return
+
+    interval = 1.0 / args.rate
+    limiter = asyncio.Semaphore(args.max_in_flight)
+    pending = set()
+    next_at = time.perf_counter()
+
+    async def fire(tool: str):
+        try:
+            await timed_call(client, tool, recorder, args.timeout)
+        finally:
+            limiter.release()
+
+    while next_at < deadline:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await limiter.acquire()
+        task = asyncio.create_task(fire(next(cycle)))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        next_at += interval
+    await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def scrape_metrics(base_url: str) -> Optional[Dict[Any, float]]:
+    """抓取 /metrics；服务器不支持时返回 None"""
+    try:
+        response = await http_request(f"{base_url}/metrics", timeout=10)
+    except (OSError, asyncio.TimeoutError, ValueError, TransportClosed):
+        return None
+    if response.status != 200 or not response.headers.get("content-type", "").startswith("text/plain"):
+        return None
+    return parse_metrics(response.text())
+
+
+async def scrape_usage(base_url: str) -> Optional[Dict[str, Any]]:
+    """读取 multi-tenant /metrics 中的使用统计写入计数；不可用时返回 None"""
+    try:
+        response = await http_request(f"{base_url}/metrics", timeout=10)
+        return response.json().get("usage") if response.status == 200 else None
+    except (OSError, asyncio.TimeoutError, ValueError, TransportClosed):
+        return None
+
+
+def usage_delta(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    tool_calls = after["toolCalls"] - before["toolCalls"]
+    writes = after["flushes"] - before["flushes"]
+    return {
+        "toolCalls": tool_calls,
+        "writes": writes,
+        "writesPerCall": writes / tool_calls if tool_calls else None,
+        "failedFlushes": after["failedFlushes"] - before["failedFlushes"],
+        "pending": after["pending"],
+    }
+
+
+def metrics_url(mode: str, args, server: Optional[ServerProcess]) -> Optional[str]:
+    if not args.metrics or mode not in METRICS_MODES:
+        return None
+    if mode == "stdio":
+        return f"http://127.0.0.1:{args.metrics_port}"
+    return args.base_url or (server.base_url if server else None)
+
+
+async def open_clients(mode: str, args, server: Optional[ServerProcess]) -> List[McpClient]:
+    """为指定模式建立 N 个已初始化的客户端（stdio 复用同一个）"""
+    base_url = args.base_url or (server.base_url if server else None)
+
+    if mode == "stdio":
+        env = {**os.environ, **metrics_env(args.metrics_port)} if args.metrics else None
+        client = create_client("stdio", browser_url=args.browser_url, env=env, timeout=args.timeout)
+        await client.start()
+        await client.initialize({"name": "load-test", "version": "1.0.0"})
+        return [client] * args.clients
+
+    tokens: List[Optional[str]] = [None] * args.clients
+    if mode == "multi-tenant":
+        stamp = int(time.time() * 1000)
+        tenants = await asyncio.gather(*[
+            register_tenant(base_url, args.browser_url, f"load-{stamp}-{i}@example.com")
+            for i in range(args.clients)
+        ])
+        tokens = [tenant["token"] for tenant in tenants]
+
+    clients = [
+        create_client(mode, base_url=base_url, token=token, timeout=args.timeout)
+        for token in tokens
+    ]
+    for client in clients:
+        await client.start()
+    await asyncio.gather(*[
+        client.initialize({"name": f"load-test-{i}", "version": "1.0.0"})
+        for i, client in enumerate(clients)
+    ])
+    return clients
+
+
+async def run_mode(mode: str, args) -> Dict[str, Any]:
+    """对一种模式执行负载测试，返回统计结果"""
+    print_section(f"{mode} 模式负载测试")
+
+    server: Optional[ServerProcess] = None
+    data_dir: Optional[tempfile.TemporaryDirectory] = None
+    if mode != "stdio" and not args.base_url:
+        env = {}
+        if mode == "multi-tenant":
+            data_dir = tempfile.TemporaryDirectory(prefix="mcp-load-")
+            env["DATA_DIR"] = data_dir.name
+        server = ServerProcess(mode, port=args.port, browser_url=args.browser_url, env=env)
+        print(f"启动 {mode} 服务器...")
+        await server.start()
+        print(f"✅ 服务器已启动 (PID: {server.pid}, Port: {server.port})")
+
+    clients: List[McpClient] = []
+    try:
+        clients = await open_clients(mode, args, server)
+        print(f"✅ {args.clients} 个客户端已初始化")
+
+        startup = server.startup_time if server else getattr(clients[0], "startup_time", None)
+        cold_start = check_budget(None if startup is None else startup * 1000, args.startup_budget)
+        print(format_budget("冷启动", cold_start))
+
+        rate = f"{args.rate} req/s/客户端" if args.rate > 0 else "闭环"
+        print(f"⏳ 压测 {args.duration}s（{rate}，工具: {', '.join(args.tools)}）...")
+
+        # 预热：每个工具调用一次，不计入统计
+        warmup = LatencyRecorder()
+        for tool in args.tools:
+            await timed_call(clients[0], tool, warmup, args.timeout)
+
+        metrics_base = metrics_url(mode, args, server)
+        before = await scrape_metrics(metrics_base) if metrics_base else None
+        base_url = args.base_url or (server.base_url if server else None)
+        usage_before = await scrape_usage(base_url) if mode == "multi-tenant" else None
+
+        recorder = LatencyRecorder()
+        deadline = time.perf_counter() + args.duration
+        await asyncio.gather(*[
+            client_worker(i, client, args.tools, args, recorder, deadline)
+            for i, client in enumerate(clients)
+        ])
+        recorder.finish()
+
+        rows = recorder.summary()
+        print()
+        print(format_table(rows, f"{mode}: {args.clients} clients, {recorder.elapsed:.1f}s"))
+
+        metrics = None
+        if metrics_base:
+            after = await scrape_metrics(metrics_base)
+            if before is None or after is None:
+                print(f"\n⚠️  无法从 {metrics_base}/metrics 读取指标")
+            else:
+                metrics = summarize_metrics(metrics_delta(before, after))
+                print("\n服务器端耗时分解（/metrics 增量）:")
+                print(format_metrics_report(metrics))
+
+        storage_writes = None
+        if usage_before is not None:
+            usage_after = await scrape_usage(base_url)
+            if usage_after is not None:
+                storage_writes = usage_delta(usage_before, usage_after)
+                per_call = storage_writes["writesPerCall"]
+                per_call_text = f"{per_call:.4f}" if per_call is not None else "n/a"
+                print(f"\n存储写入: {storage_writes['writes']} 次 / {storage_writes['toolCalls']} 次工具调用"
+                      f"（每次调用 {per_call_text}，未写入 {storage_writes['pending']}，"
+                      f"失败 {storage_writes['failedFlushes']}）")
+        return {"mode": mode, "status": "ok", "elapsed": recorder.elapsed,
+                "coldStart": cold_start, "tools": rows, "metrics": metrics,
+                "storageWrites": storage_writes}
+    except Exception as e:  # noqa: BLE001 - 单个模式失败不影响其它模式
+        print(f"❌ {mode} 模式失败: {e}")
+        if server and server.output:
+            print("   服务器输出（最后 10 行）:")
+            for line in server.output[-10:]:
+                print(f"   {line}")
+        return {"mode": mode, "status": "failed", "error": str(e)}
+    finally:
+        for client in {id(c): c for c in clients}.values():
+            await client.close()
+        if server:
+            await server.stop()
+        if data_dir:
+            data_dir.cleanup()
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="MCP 服务器并发负载测试")
+    parser.add_argument("--transport", "-t", default="all", choices=ALL_MODES + ["all"],
+                        help="测试的传输模式（默认 all）")
+    parser.add_argument("--clients", "-c", type=int, default=4, help="并发客户端数 N")
+    parser.add_argument("--rate", "-r", type=float, default=5.0,
+                        help="每客户端每秒请求数 M；0 为闭环模式")
+    parser.add_argument("--duration", "-d", type=float, default=20.0, help="压测时长（秒）")
+    parser.add_argument("--tools", default=",".join(DEFAULT_TOOLS), help="逗号分隔的工具名")
+    parser.add_argument("--timeout", type=float, default=60.0, help="单个请求超时（秒）")
+    parser.add_argument("--startup-budget", type=float, default=5000.0,
+                        help="冷启动预算（毫秒），超出则该模式失败")
+    parser.add_argument("--max-in-flight", type=int, default=32, help="开环模式下每客户端最大在途请求数")
+    parser.add_argument("--browser-url", default=os.environ.get("CHROME_URL", CHROME_URL))
+    parser.add_argument("--port", type=int, help="启动服务器使用的端口")
+    parser.add_argument("--base-url", help="连接已运行的服务器，而不是自行启动")
+    parser.add_argument("--json", help="把结果写入 JSON 文件（- 表示 stdout）")
+    parser.add_argument("--metrics", action="store_true",
+                        help="压测前后抓取服务器 /metrics 并输出耗时分解")
+    parser.add_argument("--metrics-port", type=int, default=DEFAULT_METRICS_PORT,
+                        help="stdio 模式下服务器开放 /metrics 的端口（MCP_METRICS_PORT）")
+    parser.add_argument("--fake-cdp", action="store_true", help="使用本地 CDP 替身代替真实 Chrome")
+    add_fake_cdp_arguments(parser.add_argument_group("CDP 替身（--fake-cdp）"), prefix="fake-")
+    args = parser.parse_args(argv)
+    args.tools = [t.strip() for t in args.tools.split(",") if t.strip()]
+    if args.base_url and args.transport == "all":
+        parser.error("--base-url 只能与单个 --transport 一起使用")
+    if args.base_url and args.fake_cdp:
+        parser.error("--fake-cdp 不能与 --base-url 一起使用（已运行的服务器连接的是它自己的浏览器）")
+    return args
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    modes = ALL_MODES if args.transport == "all" else [args.transport]
+
+    fake_chrome = None
+    if args.fake_cdp:
+        fake_chrome = fake_chrome_from_args(args, prefix="fake-")
+        await fake_chrome.start()
+        args.browser_url = fake_chrome.browser_url
+        print(f"✅ CDP 替身已启动: {fake_chrome.browser_url}（{args.fake_pages} 个页面）")
+
+    try:
+        results = [await run_mode(mode, args) for mode in modes]
+    finally:
+        if fake_chrome:
+            await fake_chrome.stop()
+
+    if args.json:
+        write_json(args.json, {
+            "config": {
+                "clients": args.clients, "rate": args.rate, "duration": args.duration,
+                "tools": args.tools, "browserUrl": args.browser_url, "fakeCdp": args.fake_cdp,
+                "startupBudgetMs": args.startup_budget, "metrics": args.metrics,
+            },
+            "results": results,
+        })
+
+    failed = [r["mode"] for r in results
+              if r["status"] != "ok" or r["coldStart"]["status"] == "fail"]
+    print_section("负载测试总结")
+    for result in results:
+        if result["status"] == "ok":
+            total = result["tools"]["ALL"]
+            icon = "❌" if result["mode"] in failed else "✅"
+            startup = result["coldStart"]["value_ms"]
+            startup_text = f"cold {startup:.0f}ms  " if startup is not None else ""
+            print(f"{icon} {result['mode']:<14} {startup_text}{total['count']:>7} req  "
+                  f"p99 {total['p99']:.1f}ms  {total['throughput']:.1f} req/s  "
+                  f"err {total['error_rate'] * 100:.1f}%")
+        else:
+            print(f"❌ {result['mode']:<14} {result['error']}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(main()))
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""多租户规模测试：数百个用户、浏览器和并发 SSE 会话
+
+生产环境运行的是 multi-tenant 模式（src/multi-tenant/server-multi-tenant.ts），
+这里按真实流程逐步放大：
+1. 注册：POST /api/v2/users 注册 --users 个用户，并为每个用户
+   POST /api/v2/users/{id}/browsers 绑定一个浏览器（轮流指向 --fake-browsers 个 CDP 替身）
+2. 建立会话：并发打开 --users 个 GET /api/v2/sse?token=... 会话并完成 initialize
+3. 工具调用：每个会话通过 /message 发送 --calls 个 tools/call，所有会话同时进行
+
+报告注册和会话建立延迟、每个工具的请求延迟，以及每个会话占用的服务器内存：
+服务器以 MCP_DEBUG_MEMORY=1 启动，在注册后、会话建立后、调用结束后各请求一次
+GET /debug/memory?gc=1，(会话建立后 - 注册后) / 会话数 即每个会话的常驻开销。
+
+--duration 改为在给定时间内持续调用，并按 --window 秒分窗口输出 p99；配合
+--health-interval 缩短连接池健康检查周期，可以看到 p99 是否随检查轮次起伏
+（src/multi-tenant/core/BrowserConnectionPool.ts）。结束时从 /health 读取健康检查开销。
+
+用法：
+    python3 test-multi-tenant-scale.py --users 200
+    python3 test-multi-tenant-scale.py --users 500 --fake-browsers 10 --calls 20 --json scale.json
+    python3 test-multi-tenant-scale.py --browser-url http://127.0.0.1:9222   # 所有用户绑定同一个真实 Chrome
+    python3 test-multi-tenant-scale.py --users 300 --fake-browsers 300 --duration 60 --health-interval 10
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from fake_cdp import FakeChrome, add_fake_cdp_arguments, fake_chrome_from_args
+from mcp_bench import MB, LatencyRecorder, format_table, memory_debug_env, summarize, write_json
+from mcp_client import (
+    McpClient, ServerProcess, create_client, http_request, register_tenant, run,
+)
+
+DEFAULT_TOOLS = ["list_pages", "take_snapshot", "evaluate_script", "list_console_messages"]
+
+TOOL_ARGS: Dict[str, Dict[str, Any]] = {
+    "evaluate_script": {"function": "() => document.title"},
+    "list_console_messages": {"pageSize": 20},
+    "list_network_requests": {"pageSize": 20},
+}
+
+
+def print_section(title: str):
+    """打印章节标题"""
+    print(f"\n{'='*70}")
+    print(f"  {title}")
+    print(f"{'='*70}\n")
+
+
+async def sample_memory(base_url: str) -> Optional[Dict[str, Any]]:
+    try:
+        response = await http_request(f"{base_url}/debug/memory?gc=1", timeout=30)
+        return response.json() if response.status == 200 else None
+    except (OSError, asyncio.TimeoutError, ValueError):
+        return None
+
+
+def per_session(before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]],
+                sessions: int) -> Optional[Dict[str, float]]:
+    """两次采样之间每个会话平均增加的内存（KB）"""
+    if not before or not after or sessions == 0:
+        return None
+    return {key: (after[key] - before[key]) / sessions / 1024 for key in ("rss", "heapUsed")}
+
+
+async def timed(recorder: LatencyRecorder, key: str, coro) -> Any:
+    """执行 coro 并记录耗时；失败时记录错误类型并返回 None"""
+    start = time.perf_counter()
+    try:
+        result = await coro
+    except Exception as e:  # noqa: BLE001 - 所有失败都计入统计
+        recorder.record(key, time.perf_counter() - start, type(e).__name__)
+        return None
+    error = "tool_error" if isinstance(result, dict) and result.get("isError") else None
+    recorder.record(key, time.perf_counter() - start, error)
+    return result
+
+
+async def register_all(base_url: str, browser_urls: List[str], args,
+                       recorder: LatencyRecorder) -> List[Optional[str]]:
+    """注册用户并绑定浏览器，返回每个用户的 token（失败为 None）"""
+    stamp = int(time.time() * 1000)
+    limit = asyncio.Semaphore(args.concurrency)
+
+    async def register(i: int) -> Optional[str]:
+        async with limit:
+            tenant = await timed(recorder, "register+bind", register_tenant(
+                base_url, browser_urls[i % len(browser_urls)], f"scale-{stamp}-{i}@example.com",
+                timeout=args.timeout))
+        return tenant["token"] if tenant else None
+
+    return await asyncio.gather(*[register(i) for i in range(args.users)])
+
+
+async def open_sessions(base_url: str, tokens: List[Optional[str]], args,
+                        recorder: LatencyRecorder) -> List[McpClient]:
+    """并发建立 SSE 会话（GET /api/v2/sse + initialize），返回成功的客户端"""
+    limit = asyncio.Semaphore(args.concurrency)
+
+    async def connect(i: int, token: str) -> Optional[McpClient]:
+        client = create_client("multi-tenant", base_url=base_url, token=token, timeout=args.timeout)
+
+        async def setup():
+            await client.start()
+            await client.initialize({"name": f"scale-test-{i}", "version": "1.0.0"})
+            return client
+
+        async with limit:
+            if await timed(recorder, "session", setup()) is None:
+                await client.close()
+                return None
+        return client
+
+    clients = await asyncio.gather(*[
+        connect(i, token) for i, token in enumerate(tokens) if token
+    ])
+    return [client for client in clients if client]
+
+
+async def session_worker(index: int, client: McpClient, args, recorder: LatencyRecorder,
+                         timeline: List[Tuple[float, float]], deadline: Optional[float]):
+    """发送 --calls 次调用；有 deadline 时改为持续调用到 deadline"""
+    n = 0
+    while (time.perf_counter() < deadline) if deadline else (n < args.calls):
+        tool = args.tools[(index + n) % len(args.tools)]
+        start = time.perf_counter()
+        await timed(recorder, tool, client.call_tool(tool, TOOL_ARGS.get(tool, {}), timeout=args.timeout))
+        end = time.perf_counter()
+        timeline.append((end, end - start))
+        n += 1
+
+
+def window_stats(timeline: List[Tuple[float, float]], origin: float,
+                 window: float) -> List[Dict[str, float]]:
+    """按完成时间分窗口统计延迟（毫秒）"""
+    buckets: Dict[int, List[float]] = {}
+    for finished, seconds in timeline:
+        buckets.setdefault(int((finished - origin) // window), []).append(seconds * 1000)
+    return [{"start_s": index * window, **summarize(values)}
+            for index, values in sorted(buckets.items())]
+
+
+def format_windows(windows: List[Dict[str, float]]) -> str:
+    lines = [f"{'window':>10}{'count':>8}{'p50':>10}{'p99':>10}{'max':>10}"]
+    for w in windows:
+        lines.append(f"{w['start_s']:>9.0f}s{w['count']:>8}{w['p50']:>8.1f}ms"
+                     f"{w['p99']:>8.1f}ms{w['max']:>8.1f}ms")
+    return "\n".join(lines)
+
+
+async def health_check_stats(base_url: str) -> Optional[Dict[str, Any]]:
+    """/health 中连接池的健康检查开销"""
+    try:
+        response = await http_request(f"{base_url}/health", timeout=10)
+        return response.json().get("browsers", {}).get("healthChecks") if response.status == 200 else None
+    except (OSError, asyncio.TimeoutError, ValueError):
+        return None
+
+
+def format_health_checks(stats: Dict[str, Any]) -> str:
+    checked = stats["checked"]
+    mean = stats["checkMs"]["total"] / checked if checked else 0.0
+    text = (f"ℹ️  健康检查: {stats['cycles']} 轮，检查 {checked} 次（跳过 {stats['skipped']}，"
+            f"失败 {stats['failed']}），单次平均 {mean:.1f}ms / 最长 {stats['checkMs']['max']:.1f}ms")
+    last = stats.get("lastCycle")
+    if last:
+        text += f"；最近一轮 {last['durationMs'] / 1000:.1f}s 检查 {last['checked']} 跳过 {last['skipped']}"
+    return text
+
+
+def format_memory(name: str, sample: Optional[Dict[str, Any]]) -> str:
+    if not sample:
+        return f"⚠️  {name}: 无法读取 /debug/memory"
+    return f"ℹ️  {name:<10} rss {sample['rss'] / MB:8.1f}MB  heap {sample['heapUsed'] / MB:8.1f}MB"
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="多租户规模测试")
+    parser.add_argument("--users", "-n", type=int, default=100, help="用户数（每个用户一个浏览器和一个会话）")
+    parser.add_argument("--calls", type=int, default=10, help="每个会话的工具调用数")
+    parser.add_argument("--duration", type=float, default=0.0,
+                        help="持续调用的秒数（大于 0 时代替 --calls）")
+    parser.add_argument("--window", type=float, default=5.0, help="分窗口统计 p99 的窗口长度（秒）")
+    parser.add_argument("--health-interval", type=float,
+                        help="服务器连接池健康检查周期（秒，默认使用服务器配置）")
+    parser.add_argument("--concurrency", type=int, default=50, help="注册和建立会话时的最大并发数")
+    parser.add_argument("--tools", default=",".join(DEFAULT_TOOLS), help="逗号分隔的工具名")
+    parser.add_argument("--timeout", type=float, default=60.0, help="单个请求超时（秒）")
+    parser.add_argument("--port", type=int, help="multi-tenant 服务器端口")
+    parser.add_argument("--browser-url", help="所有用户绑定到这个浏览器，而不是启动 CDP 替身")
+    parser.add_argument("--fake-browsers", type=int, default=4, help="CDP 替身数量，用户轮流绑定")
+    parser.add_argument("--json", help="把结果写入 JSON 文件（- 表示 stdout）")
+    add_fake_cdp_arguments(parser.add_argument_group("CDP 替身"), prefix="fake-")
+    args = parser.parse_args(argv)
+    args.tools = [t.strip() for t in args.tools.split(",") if t.strip()]
+    return args
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    fake_chromes: List[FakeChrome] = []
+    server: Optional[ServerProcess] = None
+    clients: List[McpClient] = []
+    data_dir = tempfile.TemporaryDirectory(prefix="mcp-scale-")
+    memory: Dict[str, Optional[Dict[str, Any]]] = {}
+    setup = LatencyRecorder()
+    calls = LatencyRecorder()
+    timeline: List[Tuple[float, float]] = []
+    health_checks: Optional[Dict[str, Any]] = None
+    env = {**memory_debug_env(60), "DATA_DIR": data_dir.name}
+    if args.health_interval:
+        env["MCP_BROWSER_HEALTH_CHECK_INTERVAL"] = str(int(args.health_interval * 1000))
+
+    try:
+        if args.browser_url:
+            browser_urls = [args.browser_url]
+        else:
+            for _ in range(args.fake_browsers):
+                chrome = fake_chrome_from_args(args, prefix="fake-")
+                await chrome.start()
+                fake_chromes.append(chrome)
+            browser_urls = [chrome.browser_url for chrome in fake_chromes]
+            print(f"✅ {len(fake_chromes)} 个 CDP 替身已启动")
+
+        server = ServerProcess("multi-tenant", port=args.port, env=env)
+        await server.start()
+        print(f"✅ 服务器已启动 (PID: {server.pid}, Port: {server.port}, "
+              f"冷启动 {server.startup_time * 1000:.0f}ms)")
+        memory["idle"] = await sample_memory(server.base_url)
+
+        print_section(f"1. 注册 {args.users} 个用户并绑定浏览器")
+        tokens = await register_all(server.base_url, browser_urls, args, setup)
+        registered = sum(1 for token in tokens if token)
+        print(f"✅ {registered}/{args.users} 个用户注册成功")
+        memory["registered"] = await sample_memory(server.base_url)
+
+        print_section(f"2. 建立 {registered} 个并发 SSE 会话")
+        start = time.perf_counter()
+        clients = await open_sessions(server.base_url, tokens, args, setup)
+        print(f"✅ {len(clients)}/{registered} 个会话已建立，耗时 {time.perf_counter() - start:.1f}s")
+        memory["sessions"] = await sample_memory(server.base_url)
+
+        amount = f"{args.duration:g}s 持续调用" if args.duration > 0 else f"{args.calls} 次工具调用"
+        print_section(f"3. {len(clients)} 个会话 × {amount}")
+        calls = LatencyRecorder()
+        deadline = calls.started_at + args.duration if args.duration > 0 else None
+        await asyncio.gather(*[
+            session_worker(i, client, args, calls, timeline, deadline)
+            for i, client in enumerate(clients)
+        ])
+        calls.finish()
+        memory["calls"] = await sample_memory(server.base_url)
+        health_checks = await health_check_stats(server.base_url)
+    finally:
+        for client in clients:
+            await client.close()
+        if server:
+            await server.stop()
+        for chrome in fake_chromes:
+            await chrome.stop()
+        data_dir.cleanup()
+
+    setup_rows = setup.summary()
+    call_rows = calls.summary()
+    print_section("结果")
+    print(format_table(setup_rows, f"会话建立: {args.users} users"))
+    print()
+    print(format_table(call_rows, f"工具调用: {len(clients)} sessions, {calls.elapsed:.1f}s"))
+    windows = window_stats(timeline, calls.started_at, args.window)
+    if len(windows) > 1:
+        print(f"\n按 {args.window:g}s 窗口的调用延迟:")
+        print(format_windows(windows))
+        p99s = sorted(w["p99"] for w in windows)
+        print(f"ℹ️  窗口 p99: 最低 {p99s[0]:.1f}ms，中位 {p99s[len(p99s) // 2]:.1f}ms，最高 {p99s[-1]:.1f}ms")
+    print()
+    if health_checks:
+        print(format_health_checks(health_checks))
+    for name in ("idle", "registered", "sessions", "calls"):
+        print(format_memory(name, memory.get(name)))
+    session_cost = per_session(memory.get("registered"), memory.get("sessions"), len(clients))
+    call_cost = per_session(memory.get("registered"), memory.get("calls"), len(clients))
+    if session_cost:
+        after_calls = (f"（调用后 rss {call_cost['rss']:.0f}KB  heap {call_cost['heapUsed']:.0f}KB）"
+                       if call_cost else "")
+        print(f"ℹ️  每个会话: rss {session_cost['rss']:.0f}KB  heap {session_cost['heapUsed']:.0f}KB"
+              f"{after_calls}")
+
+    failed_sessions = args.users - len(clients)
+    call_errors = call_rows["ALL"]["errors"]
+    if failed_sessions:
+        print(f"❌ {failed_sessions} 个用户没有建立会话")
+    if call_errors:
+        print(f"❌ {call_errors} 次工具调用失败")
+    if not failed_sessions and not call_errors:
+        print("✅ 所有会话和调用均成功")
+
+    if args.json:
+        write_json(args.json, {
+            "config": {
+                "users": args.users, "calls": args.calls, "concurrency": args.concurrency,
+                "duration": args.duration, "window": args.window,
+                "healthInterval": args.health_interval,
+                "tools": args.tools, "browserUrls": browser_urls,
+            },
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "coldStartMs": server.startup_time * 1000 if server and server.startup_time else None,
+            "setup": setup_rows,
+            "calls": call_rows,
+            "windows": windows,
+            "healthChecks": health_checks,
+            "memory": memory,
+            "perSessionKb": session_cost,
+            "perSessionAfterCallsKb": call_cost,
+        })
+
+    return 1 if failed_sessions or call_errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(main()))
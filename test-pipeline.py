@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""stdio 流水线 / 批量请求测试
+
+同一条 stdio 管道上用三种方式发送相同的一组只读 tools/call：
+- serial:    逐个发送，上一个响应返回后再发下一个（基线）
+- pipelined: 一次性写出全部请求（显式 id），不等待响应
+- batch:     作为一个 JSON-RPC 批量请求（数组）发送
+
+校验每个请求 id 恰好收到一个 id 相同的响应；输出各方式耗时、吞吐量、
+相对 serial 的加速比，以及 pipelined 模式下乱序返回的响应数。
+
+用法：
+    python3 test-pipeline.py --requests 30 --rounds 5
+    python3 test-pipeline.py --fake-cdp --fake-latency 5 --json pipeline.json   # 不需要真实 Chrome
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from fake_cdp import add_fake_cdp_arguments, fake_chrome_from_args
+from mcp_bench import summarize, write_json
+from mcp_client import StdioClient, run
+
+CHROME_URL = "http://127.0.0.1:9222"
+
+# 服务器标记为 concurrencySafe 的只读工具
+DEFAULT_TOOLS = ["list_pages", "list_extensions", "list_console_messages"]
+
+TOOL_ARGS: Dict[str, Dict[str, Any]] = {
+    "list_console_messages": {"pageSize": 20},
+    "list_network_requests": {"pageSize": 20},
+}
+
+MODES = ["serial", "pipelined", "batch"]
+
+
+def print_section(title: str):
+    """打印章节标题"""
+    print(f"\n{'='*70}")
+    print(f"  {title}")
+    print(f"{'='*70}\n")
+
+
+class ResponseLog:
+    """记录每一帧原始消息：按 id 统计响应次数和到达顺序"""
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self.arrivals: List[Any] = []
+        self.frames = 0
+        self.batch_frames = 0
+
+    def __call__(self, message: Any):
+        self.frames += 1
+        items = message if isinstance(message, list) else [message]
+        if isinstance(message, list):
+            self.batch_frames += 1
+        for item in items:
+            if isinstance(item, dict) and "id" in item and "method" not in item:
+                self.counts[item["id"]] += 1
+                self.arrivals.append(item["id"])
+
+    def reset(self):
+        self.__init__()
+
+
+def out_of_order(sent: List[Any], arrived: List[Any]) -> int:
+    """在更早发送的请求之前到达的响应数"""
+    position = {request_id: i for i, request_id in enumerate(sent)}
+    count, latest = 0, -1
+    for request_id in arrived:
+        index = position.get(request_id, -1)
+        if index < latest:
+            count += 1
+        latest = max(latest, index)
+    return count
+
+
+def check_responses(ids: List[Any], responses: List[Dict[str, Any]], log: ResponseLog) -> List[str]:
+    """每个请求 id 恰好一个响应，且响应 id 与请求一致"""
+    problems = []
+    for request_id, response in zip(ids, responses):
+        if response.get("id") != request_id:
+            problems.append(f"id {request_id} 收到了 id {response.get('id')} 的响应")
+        elif "error" in response:
+            problems.append(f"id {request_id} 返回错误: {response['error'].get('message')}")
+        elif response.get("result", {}).get("isError"):
+            problems.append(f"id {request_id} 工具返回 isError")
+    for request_id in ids:
+        if log.counts[request_id] != 1:
+            problems.append(f"id {request_id} 收到 {log.counts[request_id]} 个响应")
+    return problems
+
+
+async def run_round(client: StdioClient, mode: str, tools: List[str], count: int,
+                    log: ResponseLog, timeout: float) -> Dict[str, Any]:
+    cycle = itertools.cycle(tools)
+    messages = [
+        client.build_request("tools/call", {"name": name, "arguments": TOOL_ARGS.get(name, {})})
+        for name in itertools.islice(cycle, count)
+    ]
+    ids = [message["id"] for message in messages]
+    log.reset()
+
+    start = time.perf_counter()
+    if mode == "serial":
+        responses = [await client.send_message(message, timeout) for message in messages]
+    elif mode == "pipelined":
+        responses = await asyncio.gather(*[client.send_message(m, timeout) for m in messages])
+    else:
+        responses = await client.send_batch(messages, timeout)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "elapsed": round(elapsed * 1000, 3),
+        "outOfOrder": out_of_order(ids, log.arrivals),
+        "frames": log.frames,
+        "batchFrames": log.batch_frames,
+        "problems": check_responses(ids, list(responses), log),
+    }
+
+
+def format_results(results: Dict[str, Dict[str, Any]], count: int) -> str:
+    header = f"{'mode':<12}{'p50':>10}{'p95':>10}{'req/s':>10}{'speedup':>10}{'乱序':>8}{'帧数':>8}"
+    lines = [header, "-" * len(header)]
+    for mode, row in results.items():
+        lines.append(
+            f"{mode:<12}{row['elapsed']['p50']:>8.1f}ms{row['elapsed']['p95']:>8.1f}ms"
+            f"{row['throughput']:>10.1f}{row['speedup']:>9.2f}x"
+            f"{row['outOfOrder']:>8}{row['frames'] / max(row['rounds'], 1):>8.1f}"
+        )
+    lines.append(f"（每轮 {count} 个请求；乱序 = 所有轮次中先于更早请求到达的响应数，帧数为每轮平均）")
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="stdio 流水线 / 批量 JSON-RPC 测试")
+    parser.add_argument("--requests", "-n", type=int, default=30, help="每轮请求数")
+    parser.add_argument("--rounds", type=int, default=5, help="每种方式的计时轮数")
+    parser.add_argument("--tools", default=",".join(DEFAULT_TOOLS), help="逗号分隔的工具名")
+    parser.add_argument("--modes", default=",".join(MODES), help="逗号分隔: serial,pipelined,batch")
+    parser.add_argument("--timeout", type=float, default=60.0, help="单轮超时（秒）")
+    parser.add_argument("--browser-url", default=os.environ.get("CHROME_URL", CHROME_URL))
+    parser.add_argument("--json", help="把结果写入 JSON 文件（- 表示 stdout）")
+    parser.add_argument("--fake-cdp", action="store_true", help="使用本地 CDP 替身代替真实 Chrome")
+    add_fake_cdp_arguments(parser.add_argument_group("CDP 替身（--fake-cdp）"), prefix="fake-")
+    args = parser.parse_args(argv)
+    args.tools = [t.strip() for t in args.tools.split(",") if t.strip()]
+    args.modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = set(args.modes) - set(MODES)
+    if unknown:
+        parser.error(f"未知的方式: {', '.join(sorted(unknown))}")
+    return args
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    fake_chrome = None
+    if args.fake_cdp:
+        fake_chrome = fake_chrome_from_args(args, prefix="fake-")
+        await fake_chrome.start()
+        args.browser_url = fake_chrome.browser_url
+
+    print_section("stdio 流水线 / 批量请求")
+    print(f"浏览器: {args.browser_url}{'（CDP 替身）' if fake_chrome else ''}")
+    print(f"工具: {', '.join(args.tools)}；每轮 {args.requests} 个请求 × {args.rounds} 轮\n")
+
+    log = ResponseLog()
+    client = StdioClient(browser_url=args.browser_url, timeout=args.timeout)
+    client.on_message = log
+    results: Dict[str, Dict[str, Any]] = {}
+    problems: List[str] = []
+    try:
+        await client.start()
+        await client.initialize({"name": "pipeline-test", "version": "1.0.0"})
+        # 预热：建立浏览器连接和 McpContext
+        for tool in args.tools:
+            await client.call_tool(tool, TOOL_ARGS.get(tool, {}))
+
+        for mode in args.modes:
+            rounds = [
+                await run_round(client, mode, args.tools, args.requests, log, args.timeout)
+                for _ in range(args.rounds)
+            ]
+            elapsed = [r["elapsed"] for r in rounds]
+            mode_problems = sorted({p for r in rounds for p in r["problems"]})
+            problems.extend(f"{mode}: {p}" for p in mode_problems)
+            results[mode] = {
+                "rounds": len(rounds),
+                "elapsed": summarize(elapsed),
+                "throughput": args.requests * len(rounds) * 1000 / sum(elapsed),
+                "outOfOrder": sum(r["outOfOrder"] for r in rounds),
+                "frames": sum(r["frames"] for r in rounds),
+                "batchFrames": sum(r["batchFrames"] for r in rounds),
+                "problems": mode_problems,
+            }
+            icon = "❌" if mode_problems else "✅"
+            print(f"{icon} {mode:<10} p50 {results[mode]['elapsed']['p50']:.1f}ms  "
+                  f"{results[mode]['throughput']:.1f} req/s")
+    finally:
+        await client.close()
+        if fake_chrome:
+            await fake_chrome.stop()
+
+    baseline = results.get("serial", {}).get("throughput")
+    for row in results.values():
+        row["speedup"] = row["throughput"] / baseline if baseline else 1.0
+
+    print()
+    print(format_results(results, args.requests))
+    if "batch" in results and results["batch"]["batchFrames"] != results["batch"]["rounds"]:
+        problems.append("batch: 每轮应只收到一个批量响应数组")
+    for problem in problems:
+        print(f"❌ {problem}")
+
+    if args.json:
+        write_json(args.json, {
+            "config": {
+                "requests": args.requests, "rounds": args.rounds, "tools": args.tools,
+                "modes": args.modes, "browserUrl": args.browser_url, "fakeCdp": args.fake_cdp,
+            },
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "results": results,
+            "problems": problems,
+        })
+
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(main()))
@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""录制真实会话的 JSON-RPC 请求并回放，对比两个服务器构建的延迟分布
+
+固定的工具列表（test-core-tools.py 的 CORE_TOOLS）与真实负载差别很大。
+这里把 agent 的真实会话录下来，在部署前对新旧两个构建回放同样的流量：
+
+record   作为 stdio 代理运行在 agent 和服务器之间，原样转发双向消息，同时把每个
+         请求的发送时刻、method、params 和当时的延迟写入 trace 文件
+         （JSON Lines，文件名以 .gz 结尾时 gzip 压缩；第一行为文件头）。
+         在 agent 的 MCP 配置中把服务器命令替换为：
+             python3 test-replay.py record -o session.jsonl.gz -- node build/src/index.js ...
+replay   对每个 --build 目录启动一次服务器并回放 trace：
+         - 默认按原始节奏（--speed 倍速），请求之间的并发关系与录制时一致
+         - --fast 尽快发送，按录制顺序保持最多 --concurrency 个请求在途
+         initialize / notifications/initialized 由回放客户端自己完成，不重放。
+         给出多个 --build 时以第一个为基线，p50 / p95 变慢超过 --threshold% 即判为回归。
+compare  对比两次 replay --json 的结果（例如在不同机器或不同时间回放）
+
+用法：
+    python3 test-replay.py record -o session.jsonl.gz -- node build/src/index.js --browserUrl http://127.0.0.1:9222
+    python3 test-replay.py replay session.jsonl.gz --build ../baseline --build . --fast
+    python3 test-replay.py replay session.jsonl.gz --transport streamable --speed 2 --json new.json
+    python3 test-replay.py compare old.json new.json --threshold 15
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import signal
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, IO, List, Optional, Tuple
+
+from fake_cdp import add_fake_cdp_arguments, fake_chrome_from_args
+from mcp_bench import LatencyRecorder, format_table, write_json
+from mcp_client import (
+    STREAM_LIMIT, McpClient, McpError, ServerProcess, StdioClient, TRANSPORTS, TransportClosed,
+    create_client, register_tenant, run, server_command,
+)
+
+CHROME_URL = "http://127.0.0.1:9222"
+TRACE_FORMAT = "mcp-request-trace"
+TRACE_VERSION = 1
+
+# 回放客户端自己完成握手，这些消息不重放
+HANDSHAKE_METHODS = {"initialize", "notifications/initialized"}
+
+
+def print_section(title: str):
+    print(f"\n{'=' * 70}\n  {title}\n{'=' * 70}")
+
+
+def request_key(method: str, params: Optional[Dict[str, Any]]) -> str:
+    """统计用的 key：tools/call 用工具名，其他请求用 method"""
+    if method == "tools/call" and params:
+        return params.get("name", method)
+    return method
+
+
+# ============================================================================
+# trace 文件
+# ============================================================================
+
+def open_trace(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class TraceWriter:
+    """逐条写入 trace；close() 之前 gzip 文件不完整"""
+
+    def __init__(self, path: str, header: Dict[str, Any]):
+        self.path = path
+        self.count = 0
+        self._file = open_trace(path, "w")
+        self._write({"format": TRACE_FORMAT, "version": TRACE_VERSION, **header})
+
+    def _write(self, entry: Dict[str, Any]):
+        self._file.write(json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n")
+
+    def write(self, entry: Dict[str, Any]):
+        self._write(entry)
+        self.count += 1
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def read_trace(path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """返回 (文件头, 按发送时刻排序的条目)"""
+    with open_trace(path, "r") as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines or lines[0].get("format") != TRACE_FORMAT:
+        raise ValueError(f"{path} 不是 {TRACE_FORMAT} 文件")
+    header, entries = lines[0], lines[1:]
+    if header.get("version", 0) > TRACE_VERSION:
+        raise ValueError(f"不支持的 trace 版本 {header['version']}（最高 {TRACE_VERSION}）")
+    entries.sort(key=lambda entry: entry["t"])
+    return header, entries
+
+
+def iter_messages(line: bytes) -> List[Dict[str, Any]]:
+    """解析一行 JSON-RPC（可能是批量数组）；无法解析时返回空列表"""
+    try:
+        message = json.loads(line)
+    except ValueError:
+        return []
+    items = message if isinstance(message, list) else [message]
+    return [item for item in items if isinstance(item, dict)]
+
+
+# ============================================================================
+# record：stdio 代理
+# ============================================================================
+
+async def record(args) -> int:
+    command = args.command or server_command("stdio", browser_url=args.browser_url)
+    writer = TraceWriter(args.output, {
+        "recordedAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "command": command,
+    })
+    process = await asyncio.create_subprocess_exec(
+        *command, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+        limit=STREAM_LIMIT,
+    )
+    assert process.stdin and process.stdout
+    loop = asyncio.get_running_loop()
+    stdin = asyncio.StreamReader(limit=STREAM_LIMIT)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(stdin), sys.stdin)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, process.terminate)
+
+    origin: Optional[float] = None
+    # JSON-RPC id -> (条目, 发送时刻)
+    pending: Dict[Any, Tuple[Dict[str, Any], float]] = {}
+
+    async def agent_to_server():
+        nonlocal origin
+        while True:
+            line = await stdin.readline()
+            if not line:
+                break
+            now = time.perf_counter()
+            origin = origin if origin is not None else now
+            process.stdin.write(line)
+            for message in iter_messages(line):
+                # 没有 method 的是 agent 对服务器请求的响应，不录制
+                if "method" not in message:
+                    continue
+                entry: Dict[str, Any] = {"t": round((now - origin) * 1000, 1),
+                                         "method": message["method"]}
+                if "params" in message:
+                    entry["params"] = message["params"]
+                if "id" in message:
+                    entry["id"] = message["id"]
+                    pending[message["id"]] = (entry, now)
+                else:
+                    writer.write(entry)
+            try:
+                await process.stdin.drain()
+            except ConnectionError:
+                break
+        process.stdin.close()
+
+    async def server_to_agent():
+        out = sys.stdout.buffer
+        while True:
+            line = await process.stdout.readline()
+            if not line:
+                break
+            out.write(line)
+            out.flush()
+            now = time.perf_counter()
+            for message in iter_messages(line):
+                if "id" not in message or ("result" not in message and "error" not in message):
+                    continue
+                item = pending.pop(message["id"], None)
+                if item is None:
+                    continue
+                entry, sent = item
+                entry["ms"] = round((now - sent) * 1000, 1)
+                entry["bytes"] = len(line)
+                if "error" in message:
+                    entry["error"] = message["error"].get("code", "error")
+                elif isinstance(message.get("result"), dict) and message["result"].get("isError"):
+                    entry["error"] = "tool_error"
+                writer.write(entry)
+
+    upstream = asyncio.ensure_future(agent_to_server())
+    try:
+        await server_to_agent()
+        await process.wait()
+    finally:
+        upstream.cancel()
+        await asyncio.gather(upstream, return_exceptions=True)
+        # 服务器退出时仍未响应的请求也保留（回放时照常发送）
+        for entry, _ in pending.values():
+            writer.write(entry)
+        writer.close()
+        print(f"已录制 {writer.count} 条请求 → {writer.path}", file=sys.stderr)
+    return process.returncode or 0
+
+
+# ============================================================================
+# replay
+# ============================================================================
+
+async def send_entry(client: McpClient, entry: Dict[str, Any], args, recorder: LatencyRecorder):
+    method = entry["method"]
+    params = dict(entry.get("params") or {})
+    # 录制时的 progressToken 等不重放
+    params.pop("_meta", None)
+    key = request_key(method, params)
+    if "id" not in entry:
+        await client.notify(method, params or None)
+        return
+    start = time.perf_counter()
+    error: Optional[str] = None
+    try:
+        result = await client.request(method, params, timeout=args.timeout)
+        if isinstance(result, dict) and result.get("isError"):
+            error = "tool_error"
+    except McpError as e:
+        error = f"rpc_{e.code}"
+    except (TransportClosed, asyncio.TimeoutError) as e:
+        error = type(e).__name__
+    recorder.record(key, time.perf_counter() - start, error)
+
+
+async def replay_entries(client: McpClient, entries: List[Dict[str, Any]], args,
+                         recorder: LatencyRecorder):
+    if args.fast:
+        # 按录制顺序发送，最多 --concurrency 个在途
+        slots = asyncio.Semaphore(args.concurrency)
+
+        async def limited(entry: Dict[str, Any]):
+            try:
+                await send_entry(client, entry, args, recorder)
+            finally:
+                slots.release()
+
+        tasks = []
+        for entry in entries:
+            await slots.acquire()
+            tasks.append(asyncio.ensure_future(limited(entry)))
+        await asyncio.gather(*tasks)
+        return
+
+    # 按原始节奏：在 t / speed 时刻发出，不等待之前的请求完成
+    start = time.perf_counter()
+    tasks = []
+    for entry in entries:
+        delay = start + entry["t"] / 1000 / args.speed - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(send_entry(client, entry, args, recorder)))
+    await asyncio.gather(*tasks)
+
+
+async def replay_build(build: str, entries: List[Dict[str, Any]], args) -> Dict[str, Any]:
+    """在 build 目录下启动服务器并回放 --repeat 次"""
+    mode = args.transport
+    cwd = os.path.abspath(build)
+    server: Optional[ServerProcess] = None
+    data_dir: Optional[tempfile.TemporaryDirectory] = None
+    client: Optional[McpClient] = None
+    try:
+        if mode == "stdio":
+            client = StdioClient(browser_url=args.browser_url, cwd=cwd, timeout=args.timeout)
+        else:
+            env: Dict[str, str] = {}
+            if mode == "multi-tenant":
+                data_dir = tempfile.TemporaryDirectory(prefix="mcp-replay-")
+                env["DATA_DIR"] = data_dir.name
+            server = ServerProcess(mode, port=args.port, browser_url=args.browser_url, env=env,
+                                   cwd=cwd)
+            await server.start()
+            token = None
+            if mode == "multi-tenant":
+                tenant = await register_tenant(server.base_url, args.browser_url,
+                                               f"replay-{int(time.time() * 1000)}@example.com")
+                token = tenant["token"]
+            client = create_client(mode, base_url=server.base_url, token=token,
+                                   timeout=args.timeout)
+        await client.start()
+        await client.initialize({"name": "replay", "version": "1.0.0"})
+        recorder = LatencyRecorder()
+        for _ in range(args.repeat):
+            await replay_entries(client, entries, args, recorder)
+        recorder.finish()
+    finally:
+        if client:
+            await client.close()
+        if server:
+            await server.stop()
+        if data_dir:
+            data_dir.cleanup()
+    return {"build": build, "elapsed": recorder.elapsed, "requests": recorder.summary()}
+
+
+def compare_results(baseline: Dict[str, Any], candidate: Dict[str, Any], threshold: float,
+                    min_count: int) -> Tuple[str, List[str]]:
+    """逐个 key 对比 p50 / p95，返回 (表格, 回归的 key)"""
+    base_rows, cand_rows = baseline["requests"], candidate["requests"]
+    lines = [f"{'request':<32}{'count':>7}{'p50 base':>11}{'p50 new':>11}{'Δp50':>8}"
+             f"{'p95 base':>11}{'p95 new':>11}{'Δp95':>8}{'errors':>10}"]
+    regressions: List[str] = []
+    keys = [k for k in base_rows if k != "ALL" and k in cand_rows] + ["ALL"]
+    for key in keys:
+        base, cand = base_rows[key], cand_rows[key]
+        deltas = []
+        for stat in ("p50", "p95"):
+            deltas.append((cand[stat] - base[stat]) / base[stat] * 100 if base[stat] else 0.0)
+        regressed = (key != "ALL" and min(base["count"], cand["count"]) >= min_count
+                     and max(deltas) > threshold)
+        if regressed:
+            regressions.append(key)
+        lines.append(f"{key[:31]:<32}{cand['count']:>7}{base['p50']:>9.1f}ms{cand['p50']:>9.1f}ms"
+                     f"{deltas[0]:>+7.0f}%{base['p95']:>9.1f}ms{cand['p95']:>9.1f}ms"
+                     f"{deltas[1]:>+7.0f}%{base['errors']:>5}/{cand['errors']:<4}"
+                     + ("  ⚠️" if regressed else ""))
+    missing = sorted(set(base_rows) ^ set(cand_rows))
+    if missing:
+        lines.append(f"\n只在一侧出现: {', '.join(missing)}")
+    return "\n".join(lines), regressions
+
+
+def report_comparison(baseline: Dict[str, Any], candidate: Dict[str, Any], args) -> bool:
+    print_section(f"{candidate['build']} 对比基线 {baseline['build']}")
+    table, regressions = compare_results(baseline, candidate, args.threshold, args.min_count)
+    print(table)
+    if regressions:
+        print(f"\n❌ {len(regressions)} 个请求 p50/p95 变慢超过 {args.threshold:g}%: "
+              f"{', '.join(regressions)}")
+        return False
+    print(f"\n✅ 没有请求变慢超过 {args.threshold:g}%")
+    return True
+
+
+async def replay(args) -> int:
+    header, entries = read_trace(args.trace)
+    entries = [e for e in entries if e["method"] not in HANDSHAKE_METHODS]
+    if not entries:
+        print(f"❌ {args.trace} 中没有可回放的请求")
+        return 1
+    duration = entries[-1]["t"] / 1000
+    pacing = f"尽快发送（并发 {args.concurrency}）" if args.fast else f"{args.speed:g} 倍速"
+    print(f"trace: {args.trace}（{len(entries)} 条请求，录制时长 {duration:.1f}s，"
+          f"录制于 {header.get('recordedAt', '?')}）")
+    print(f"回放: {args.transport}，{pacing}，{args.repeat} 遍")
+
+    fake_chrome = None
+    if args.fake_cdp:
+        fake_chrome = fake_chrome_from_args(args, prefix="fake-")
+        await fake_chrome.start()
+        args.browser_url = fake_chrome.browser_url
+        print(f"✅ CDP 替身已启动: {fake_chrome.browser_url}")
+
+    results: List[Dict[str, Any]] = []
+    try:
+        for build in args.build:
+            print_section(f"回放 {build}")
+            result = await replay_build(build, entries, args)
+            results.append(result)
+            print(format_table(result["requests"], f"{build}: {result['elapsed']:.1f}s"))
+    except (McpError, TransportClosed, asyncio.TimeoutError) as e:
+        print(f"❌ 回放失败: {e}")
+        return 1
+    finally:
+        if fake_chrome:
+            await fake_chrome.stop()
+
+    ok = True
+    for candidate in results[1:]:
+        ok = report_comparison(results[0], candidate, args) and ok
+
+    if args.json:
+        write_json(args.json, {
+            "config": {
+                "trace": args.trace, "transport": args.transport, "fast": args.fast,
+                "speed": args.speed, "concurrency": args.concurrency, "repeat": args.repeat,
+                "browserUrl": args.browser_url, "fakeCdp": args.fake_cdp,
+            },
+            "results": results,
+        })
+    return 0 if ok else 1
+
+
+def compare(args) -> int:
+    loaded = []
+    for path in (args.baseline, args.candidate):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        result = dict(data["results"][args.index])
+        result["build"] = f"{path}:{result['build']}"
+        loaded.append(result)
+    return 0 if report_comparison(loaded[0], loaded[1], args) else 1
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def add_comparison_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="p50 / p95 变慢超过该百分比判为回归")
+    parser.add_argument("--min-count", type=int, default=5, help="样本数少于该值的请求不参与判定")
+
+
+def parse_args(argv: Optional[List[str]]):
+    parser = argparse.ArgumentParser(description="录制 / 回放 MCP 请求 trace")
+    sub = parser.add_subparsers(dest="command_name", required=True)
+
+    rec = sub.add_parser("record", help="作为 stdio 代理录制会话")
+    rec.add_argument("-o", "--output", required=True, help="trace 文件（.jsonl 或 .jsonl.gz）")
+    rec.add_argument("--browser-url", default=os.environ.get("CHROME_URL", CHROME_URL),
+                     help="未给出服务器命令时用于默认命令")
+    rec.add_argument("command", nargs=argparse.REMAINDER,
+                     help="服务器命令（放在 -- 之后，默认 node build/src/index.js）")
+
+    rep = sub.add_parser("replay", help="对一个或多个构建回放 trace")
+    rep.add_argument("trace", help="record 生成的 trace 文件")
+    rep.add_argument("--build", action="append", default=[],
+                     help="包含 build/src/index.js 的目录（可重复，第一个为基线，默认当前目录）")
+    rep.add_argument("--transport", "-t", default="stdio", choices=list(TRANSPORTS))
+    rep.add_argument("--speed", type=float, default=1.0, help="回放倍速（按原始节奏时）")
+    rep.add_argument("--fast", action="store_true", help="忽略原始节奏，尽快发送")
+    rep.add_argument("--concurrency", "-c", type=int, default=1, help="--fast 时的最大在途请求数")
+    rep.add_argument("--repeat", type=int, default=1, help="每个构建回放的遍数")
+    rep.add_argument("--timeout", type=float, default=60.0, help="单个请求超时（秒）")
+    rep.add_argument("--browser-url", default=os.environ.get("CHROME_URL", CHROME_URL))
+    rep.add_argument("--port", type=int, help="HTTP 传输的服务器端口")
+    rep.add_argument("--json", help="把结果写入 JSON 文件（- 表示 stdout）")
+    rep.add_argument("--fake-cdp", action="store_true", help="使用本地 CDP 替身代替真实 Chrome")
+    add_fake_cdp_arguments(rep.add_argument_group("CDP 替身（--fake-cdp）"), prefix="fake-")
+    add_comparison_arguments(rep)
+
+    cmp_parser = sub.add_parser("compare", help="对比两次 replay --json 的结果")
+    cmp_parser.add_argument("baseline")
+    cmp_parser.add_argument("candidate")
+    cmp_parser.add_argument("--index", type=int, default=0, help="使用 results 中的第几个构建")
+    add_comparison_arguments(cmp_parser)
+
+    args = parser.parse_args(argv)
+    if args.command_name == "record" and args.command[:1] == ["--"]:
+        args.command = args.command[1:]
+    if args.command_name == "replay":
+        args.build = args.build or ["."]
+        if args.speed <= 0:
+            parser.error("--speed 必须大于 0（尽快发送请使用 --fast）")
+    return args
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.command_name == "record":
+        return await record(args)
+    if args.command_name == "replay":
+        return await replay(args)
+    return compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(run(main()))
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""内存泄漏浸泡测试：长时间发起大量 tools/call，同时跟踪服务器 RSS 和 V8 堆
+
+服务器以 MCP_DEBUG_MEMORY=1 和 --expose-gc 启动（src/utils/memoryStats.ts）：
+- stdio:  服务器每隔 --sample-interval 向 stderr 输出一行 [memory] 采样
+- 其它模式: 定期请求 GET /debug/memory?gc=1
+每次采样前都会执行完整 GC，因此 heapUsed 反映的是存活对象。
+
+判定方式：
+- baseline: 预热调用完成后的前 3 个采样的中位数
+- final:    最后 3 个采样的中位数
+- growth = final - baseline，超过 --max-heap-growth / --max-rss-growth（MB）即失败
+另外输出 heapUsed 对调用次数的线性回归斜率（KB / 1000 次调用），
+斜率持续为正说明存在按调用累积的数据（如 PageCollector 的每页历史）。
+
+用法：
+    python3 test-soak.py --calls 5000
+    python3 test-soak.py --transport streamable --calls 20000 --concurrency 8
+    python3 test-soak.py --fake-cdp --fake-console-rate 50 --fake-network-rate 20 --calls 10000
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from fake_cdp import add_fake_cdp_arguments, fake_chrome_from_args
+from mcp_bench import (
+    MB, MEMORY_WINDOW, LatencyRecorder, MemoryTrace,
+    format_growth, format_table, memory_debug_env, write_json,
+)
+from mcp_client import (
+    McpClient, ServerProcess, StdioClient, TRANSPORTS,
+    create_client, http_request, register_tenant, run,
+)
+
+CHROME_URL = "http://127.0.0.1:9222"
+
+# 会在服务器端累积数据的工具组合
+DEFAULT_TOOLS = ["take_snapshot", "list_console_messages", "list_network_requests", "list_pages"]
+
+TOOL_ARGS: Dict[str, Dict[str, Any]] = {
+    "list_console_messages": {"pageSize": 50},
+    "list_network_requests": {"pageSize": 50},
+}
+
+
+def print_section(title: str):
+    """打印章节标题"""
+    print(f"\n{'='*70}")
+    print(f"  {title}")
+    print(f"{'='*70}\n")
+
+
+async def poll_memory(base_url: str, trace: MemoryTrace, interval: float, stop: asyncio.Event):
+    """HTTP 模式：定期请求 /debug/memory"""
+    while not stop.is_set():
+        try:
+            response = await http_request(f"{base_url}/debug/memory?gc=1", timeout=10)
+            if response.status == 200:
+                trace.add(response.json())
+        except (OSError, asyncio.TimeoutError, ValueError):
+            pass
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def soak_worker(client: McpClient, tools: List[str], counter: itertools.count,
+                      args, recorder: LatencyRecorder, trace: MemoryTrace):
+    total = args.warmup_calls + args.calls
+    while True:
+        index = next(counter)
+        if index >= total:
+            return
+        tool = tools[index % len(tools)]
+        start = time.perf_counter()
+        error: Optional[str] = None
+        try:
+            result = await client.call_tool(tool, TOOL_ARGS.get(tool, {}), timeout=args.timeout)
+            if result.get("isError"):
+                error = "tool_error"
+        except Exception as e:  # noqa: BLE001 - 所有失败都计入统计
+            error = type(e).__name__
+        if index >= args.warmup_calls:
+            recorder.record(tool, time.perf_counter() - start, error)
+        trace.calls += 1
+
+
+async def report_progress(trace: MemoryTrace, total: int, interval: float, stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+        if trace.samples:
+            last = trace.samples[-1]
+            print(f"   {trace.calls:>7}/{total} calls  rss {last['rss'] / MB:7.1f}MB  "
+                  f"heap {last['heapUsed'] / MB:7.1f}MB")
+
+
+async def run_soak(args) -> Dict[str, Any]:
+    mode = args.transport
+    print_section(f"{mode} 模式内存浸泡测试")
+
+    trace = MemoryTrace(args.warmup_calls)
+    env = memory_debug_env(args.sample_interval)
+    server: Optional[ServerProcess] = None
+    data_dir: Optional[tempfile.TemporaryDirectory] = None
+    client: Optional[McpClient] = None
+    stop = asyncio.Event()
+    background: List[asyncio.Task] = []
+
+    try:
+        if mode == "stdio":
+            client = StdioClient(browser_url=args.browser_url, env={**os.environ, **env},
+                                 on_stderr=trace.add_line, timeout=args.timeout)
+            await client.start()
+        else:
+            if mode == "multi-tenant":
+                data_dir = tempfile.TemporaryDirectory(prefix="mcp-soak-")
+                env["DATA_DIR"] = data_dir.name
+            server = ServerProcess(mode, port=args.port, browser_url=args.browser_url, env=env)
+            await server.start()
+            print(f"✅ 服务器已启动 (PID: {server.pid}, Port: {server.port})")
+            token = None
+            if mode == "multi-tenant":
+                tenant = await register_tenant(server.base_url, args.browser_url,
+                                               f"soak-{int(time.time() * 1000)}@example.com")
+                token = tenant["token"]
+            client = create_client(mode, base_url=server.base_url, token=token, timeout=args.timeout)
+            await client.start()
+            background.append(asyncio.create_task(
+                poll_memory(server.base_url, trace, args.sample_interval, stop)))
+        await client.initialize({"name": "soak-test", "version": "1.0.0"})
+
+        total = args.warmup_calls + args.calls
+        print(f"⏳ {args.warmup_calls} 次预热 + {args.calls} 次调用，并发 {args.concurrency}"
+              f"（工具: {', '.join(args.tools)}）")
+        background.append(asyncio.create_task(
+            report_progress(trace, total, args.progress_interval, stop)))
+
+        recorder = LatencyRecorder()
+        counter = itertools.count()
+        await asyncio.gather(*[
+            soak_worker(client, args.tools, counter, args, recorder, trace)
+            for _ in range(args.concurrency)
+        ])
+        recorder.finish()
+        # 结束后再采样几次，让最后的窗口不受在途请求影响
+        await asyncio.sleep(args.sample_interval * (MEMORY_WINDOW + 0.5))
+    finally:
+        stop.set()
+        for task in background:
+            await task
+        if client:
+            await client.close()
+        if server:
+            await server.stop()
+        if data_dir:
+            data_dir.cleanup()
+
+    rows = recorder.summary()
+    print()
+    print(format_table(rows, f"{mode}: {args.calls} calls, {recorder.elapsed:.1f}s"))
+    return {
+        "mode": mode,
+        "elapsed": recorder.elapsed,
+        "tools": rows,
+        "heap": trace.growth("heapUsed"),
+        "rss": trace.growth("rss"),
+        "samples": trace.samples,
+    }
+
+
+def judge(name: str, growth: Optional[Dict[str, float]], limit_mb: float) -> bool:
+    print(format_growth(name, growth, limit_mb))
+    return growth is None or growth["growth_mb"] <= limit_mb
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="MCP 服务器内存泄漏浸泡测试")
+    parser.add_argument("--transport", "-t", default="stdio", choices=list(TRANSPORTS))
+    parser.add_argument("--calls", "-n", type=int, default=5000, help="计入统计的调用次数")
+    parser.add_argument("--warmup-calls", type=int, default=200, help="不计入基线的预热调用次数")
+    parser.add_argument("--concurrency", "-c", type=int, default=4, help="并发在途请求数")
+    parser.add_argument("--tools", default=",".join(DEFAULT_TOOLS), help="逗号分隔的工具名")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="内存采样间隔（秒）")
+    parser.add_argument("--progress-interval", type=float, default=10.0, help="进度输出间隔（秒）")
+    parser.add_argument("--max-heap-growth", type=float, default=64.0, help="heapUsed 增长上限（MB）")
+    parser.add_argument("--max-rss-growth", type=float, default=256.0, help="RSS 增长上限（MB）")
+    parser.add_argument("--timeout", type=float, default=60.0, help="单个请求超时（秒）")
+    parser.add_argument("--browser-url", default=os.environ.get("CHROME_URL", CHROME_URL))
+    parser.add_argument("--port", type=int, help="启动服务器使用的端口")
+    parser.add_argument("--json", help="把结果（含全部采样）写入 JSON 文件（- 表示 stdout）")
+    parser.add_argument("--fake-cdp", action="store_true", help="使用本地 CDP 替身代替真实 Chrome")
+    add_fake_cdp_arguments(parser.add_argument_group("CDP 替身（--fake-cdp）"), prefix="fake-")
+    args = parser.parse_args(argv)
+    args.tools = [t.strip() for t in args.tools.split(",") if t.strip()]
+    return args
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    fake_chrome = None
+    if args.fake_cdp:
+        fake_chrome = fake_chrome_from_args(args, prefix="fake-")
+        await fake_chrome.start()
+        args.browser_url = fake_chrome.browser_url
+        print(f"✅ CDP 替身已启动: {fake_chrome.browser_url}")
+
+    try:
+        result = await run_soak(args)
+    finally:
+        if fake_chrome:
+            await fake_chrome.stop()
+
+    print_section("内存判定")
+    heap_ok = judge("heap", result["heap"], args.max_heap_growth)
+    rss_ok = judge("rss", result["rss"], args.max_rss_growth)
+    errors = result["tools"]["ALL"]["errors"] if "ALL" in result["tools"] else 0
+    if errors:
+        print(f"⚠️  {errors} 次调用失败")
+
+    if args.json:
+        write_json(args.json, {
+            "config": {
+                "transport": args.transport, "calls": args.calls, "warmupCalls": args.warmup_calls,
+                "concurrency": args.concurrency, "tools": args.tools,
+                "maxHeapGrowthMb": args.max_heap_growth, "maxRssGrowthMb": args.max_rss_growth,
+                "browserUrl": args.browser_url, "fakeCdp": args.fake_cdp,
+            },
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "result": result,
+        })
+
+    return 0 if heap_ok and rss_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(run(main()))
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""stdio 服务器启动耗时剖析：反复冷启动 build/src/index.js
+
+IDE 客户端每个会话都会启动一个新的 stdio 服务器，启动耗时直接影响体验。
+每次运行测量（从 spawn 开始计时，毫秒）：
+- initialize:  收到 initialize 响应
+- tools/list:  收到第一个 tools/list 响应
+- first_call:  第一个 tools/call 返回（默认 list_pages，包含首次连接浏览器）
+
+并以 MCP_STARTUP_PROFILE=1 启动服务器，解析 stderr 中的分阶段耗时
+（src/utils/startupProfile.ts）：
+- entry:            时间点，进程启动到 index.ts 开始执行（Node 启动 + CLI 依赖加载）
+- moduleImport:     main.ts 全部静态依赖的加载与求值
+- toolRegistry:     getAllTools() 与逐个 registerTool
+- browserValidate:  启动时校验 --browserUrl（/json/version）
+- transportConnect: 建立 stdio 传输
+- ready:            时间点，服务器开始接受请求
+- browserConnect:   首次工具调用时连接浏览器
+- contextInit:      McpContext 初始化
+
+用法：
+    python3 test-startup.py --runs 20 --json startup.json
+    python3 test-startup.py --fake-cdp --runs 50 --budget 1500   # 不需要真实 Chrome
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from fake_cdp import add_fake_cdp_arguments, fake_chrome_from_args
+from mcp_bench import check_budget, format_budget, summarize, write_json
+from mcp_client import StdioClient, run, tool_text
+
+CHROME_URL = "http://127.0.0.1:9222"
+PROFILE_PREFIX = "[startup] "
+
+CLIENT_METRICS = ["initialize", "tools/list", "first_call"]
+SERVER_PHASES = [
+    "entry", "moduleImport", "toolRegistry", "browserValidate",
+    "transportConnect", "ready", "browserConnect", "contextInit",
+]
+
+
+def print_section(title: str):
+    """打印章节标题"""
+    print(f"\n{'='*70}")
+    print(f"  {title}")
+    print(f"{'='*70}\n")
+
+
+def ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def parse_profile(lines: List[str]) -> Dict[str, float]:
+    """[startup] 行 -> {阶段: 耗时 ms, 时间点: 距进程启动 ms}"""
+    phases: Dict[str, float] = {}
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if "phase" in record:
+            phases[record["phase"]] = record["duration"]
+        elif "event" in record:
+            phases[record["event"]] = record["at"]
+    return phases
+
+
+async def cold_start(index: int, args) -> Dict[str, Any]:
+    """启动一个全新的 stdio 服务器，测量到各个首响应的时间"""
+    profile_lines: List[str] = []
+
+    def on_stderr(line: str):
+        if line.startswith(PROFILE_PREFIX):
+            profile_lines.append(line[len(PROFILE_PREFIX):])
+
+    client = StdioClient(
+        browser_url=args.browser_url,
+        env={**os.environ, "MCP_STARTUP_PROFILE": "1"},
+        on_stderr=on_stderr,
+        timeout=args.timeout,
+    )
+    result: Dict[str, Any] = {"run": index}
+    try:
+        await client.start()
+        assert client.spawned_at is not None
+        await client.initialize({"name": "startup-profile", "version": "1.0.0"})
+        result["initialize"] = ms(client.startup_time or 0.0)
+
+        tools = await client.list_tools()
+        result["tools/list"] = ms(time.perf_counter() - client.spawned_at)
+        result["tool_count"] = len(tools)
+
+        if args.first_call:
+            response = await client.call_tool(args.first_call)
+            result["first_call"] = ms(time.perf_counter() - client.spawned_at)
+            if response.get("isError"):
+                result["error"] = f"{args.first_call}: {tool_text(response)[:200]}"
+    except Exception as e:  # noqa: BLE001 - 单次失败记录下来，继续下一次
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        await client.close()
+    result["phases"] = parse_profile(profile_lines)
+    return result
+
+
+def summarize_runs(runs: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    summary: Dict[str, Dict[str, float]] = {}
+    for metric in CLIENT_METRICS:
+        values = [r[metric] for r in runs if metric in r]
+        if values:
+            summary[metric] = summarize(values)
+    for phase in SERVER_PHASES:
+        values = [r["phases"][phase] for r in runs if phase in r["phases"]]
+        if values:
+            summary[phase] = summarize(values)
+    return summary
+
+
+def format_summary(summary: Dict[str, Dict[str, float]]) -> str:
+    header = f"{'metric':<20}{'n':>5}{'min':>10}{'p50':>10}{'p95':>10}{'max':>10}{'mean':>10}"
+    lines = [header, "-" * len(header)]
+    for metric, row in summary.items():
+        if metric == SERVER_PHASES[0]:
+            lines.append("-" * len(header) + "  服务器阶段（entry/ready 为距进程启动的时间点）")
+        lines.append(
+            f"{metric:<20}{row['count']:>5}{row['min']:>8.1f}ms{row['p50']:>8.1f}ms"
+            f"{row['p95']:>8.1f}ms{row['max']:>8.1f}ms{row['mean']:>8.1f}ms"
+        )
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="stdio 服务器冷启动耗时剖析")
+    parser.add_argument("--runs", "-n", type=int, default=10, help="冷启动次数")
+    parser.add_argument("--warmup", type=int, default=1, help="不计入统计的预热次数（预热文件缓存）")
+    parser.add_argument("--first-call", default="list_pages",
+                        help="测量首个 tools/call 的工具名；空字符串表示跳过")
+    parser.add_argument("--budget", type=float, help="initialize p95 预算（毫秒），超出则退出码为 1")
+    parser.add_argument("--timeout", type=float, default=60.0, help="单个请求超时（秒）")
+    parser.add_argument("--browser-url", default=os.environ.get("CHROME_URL", CHROME_URL))
+    parser.add_argument("--json", help="把结果写入 JSON 文件（- 表示 stdout）")
+    parser.add_argument("--fake-cdp", action="store_true", help="使用本地 CDP 替身代替真实 Chrome")
+    add_fake_cdp_arguments(parser.add_argument_group("CDP 替身（--fake-cdp）"), prefix="fake-")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    fake_chrome = None
+    if args.fake_cdp:
+        fake_chrome = fake_chrome_from_args(args, prefix="fake-")
+        await fake_chrome.start()
+        args.browser_url = fake_chrome.browser_url
+
+    print_section("stdio 冷启动剖析")
+    print(f"浏览器: {args.browser_url}{'（CDP 替身）' if fake_chrome else ''}")
+    print(f"运行: {args.warmup} 次预热 + {args.runs} 次计时\n")
+
+    runs: List[Dict[str, Any]] = []
+    try:
+        for i in range(args.warmup + args.runs):
+            result = await cold_start(i, args)
+            warmup = i < args.warmup
+            label = "预热" if warmup else f"#{i - args.warmup + 1}"
+            if "error" in result:
+                print(f"❌ {label:<5} {result['error']}")
+            else:
+                first_call = f"  first_call {result['first_call']:.0f}ms" if "first_call" in result else ""
+                print(f"✅ {label:<5} initialize {result['initialize']:.0f}ms  "
+                      f"tools/list {result['tools/list']:.0f}ms{first_call}")
+            if not warmup:
+                runs.append(result)
+    finally:
+        if fake_chrome:
+            await fake_chrome.stop()
+
+    summary = summarize_runs(runs)
+    print()
+    print(format_summary(summary))
+
+    p95 = summary.get("initialize", {}).get("p95")
+    budget = check_budget(p95, args.budget)
+    print()
+    print(format_budget("initialize p95", budget))
+
+    failures = [r for r in runs if "error" in r]
+    if failures:
+        print(f"❌ {len(failures)}/{len(runs)} 次运行失败")
+
+    if args.json:
+        write_json(args.json, {
+            "config": {
+                "runs": args.runs, "warmup": args.warmup, "firstCall": args.first_call,
+                "browserUrl": args.browser_url, "fakeCdp": args.fake_cdp,
+            },
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "summary": summary,
+            "budget": budget,
+            "runs": runs,
+        })
+
+    return 1 if failures or budget["status"] == "fail" else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(main()))
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""多租户存储重启耗时测试：合成百万行 JSONL 日志，对比压缩前后的冷启动
+
+PersistentStoreV2 启动时重放整个日志（src/multi-tenant/storage/PersistentStoreV2.ts）。
+日志达到阈值后在后台压缩为"快照 + 尾部"，重启只需解析快照和快照之后的几行。
+
+流程：
+1. 在临时 DATA_DIR 中生成 store-v2.jsonl：register_user / bind_browser 之后是
+   --lines 行 increment_tool_call / update_last_connected（可复现，--seed）
+2. 启动 multi-tenant 服务器，记录到 /health 就绪的耗时（重放完整日志），
+   抽查用户数和若干浏览器的 lastConnectedAt
+3. 等待后台压缩完成（日志第一行变为 snapshot），停止服务器
+4. 再次启动并测量耗时、重复抽查，结果应与第 2 步一致
+
+用法：
+    python3 test-store-restart.py
+    python3 test-store-restart.py --lines 2000000 --users 500 --json restart.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from mcp_bench import write_json
+from mcp_client import ServerProcess, http_request, run
+
+LOG_FILE = "store-v2.jsonl"
+BASE_TIMESTAMP = 1_700_000_000_000
+
+
+def print_section(title: str):
+    """打印章节标题"""
+    print(f"\n{'='*70}")
+    print(f"  {title}")
+    print(f"{'='*70}\n")
+
+
+def generate_log(path: str, lines: int, users: int, browsers_per_user: int,
+                 seed: int) -> Dict[str, Any]:
+    """写入合成日志，返回 {browsers: {browserId: (userId, 最后连接时间)}, lines, bytes}"""
+    rng = random.Random(seed)
+    browsers: Dict[str, Any] = {}
+    timestamp = BASE_TIMESTAMP
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for u in range(users):
+            user_id = f"user-{u:05d}"
+            f.write(json.dumps({
+                "op": "register_user", "timestamp": timestamp,
+                "data": {"userId": user_id, "email": f"{user_id}@example.com",
+                         "username": user_id, "registeredAt": timestamp},
+            }) + "\n")
+            written += 1
+            for b in range(browsers_per_user):
+                browser_id = f"browser-{u:05d}-{b:02d}"
+                f.write(json.dumps({
+                    "op": "bind_browser", "timestamp": timestamp,
+                    "data": {"browserId": browser_id, "userId": user_id,
+                             "browserURL": "http://127.0.0.1:9222",
+                             "tokenName": f"bench-{b}", "token": f"mcp_{u:05d}{b:02d}{seed:08x}",
+                             "createdAt": timestamp},
+                }) + "\n")
+                written += 1
+                browsers[browser_id] = [user_id, None]
+        ids = list(browsers)
+        while written < lines:
+            timestamp += 1
+            browser_id = rng.choice(ids)
+            if rng.random() < 0.2:
+                f.write(json.dumps({"op": "update_last_connected", "timestamp": timestamp,
+                                    "browserId": browser_id}) + "\n")
+                browsers[browser_id][1] = timestamp
+            else:
+                f.write(json.dumps({"op": "increment_tool_call", "timestamp": timestamp,
+                                    "browserId": browser_id}) + "\n")
+            written += 1
+    return {"browsers": browsers, "lines": written, "bytes": os.path.getsize(path)}
+
+
+def iso(timestamp: Optional[int]) -> Optional[str]:
+    if timestamp is None:
+        return None
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(timestamp / 1000)) + \
+        f".{timestamp % 1000:03d}Z"
+
+
+def log_state(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        first = f.readline()
+        lines = 1 + sum(1 for _ in f) if first else 0
+    head = json.loads(first).get("op") if first.strip() else None
+    return {"lines": lines, "bytes": os.path.getsize(path), "firstOp": head}
+
+
+async def verify(base_url: str, expected_users: int, browsers: Dict[str, Any],
+                 samples: List[str]) -> List[str]:
+    """抽查服务器加载出的状态，返回问题列表"""
+    problems = []
+    response = await http_request(f"{base_url}/api/v2/users")
+    total = response.json().get("total") if response.status == 200 else None
+    if total != expected_users:
+        problems.append(f"用户数为 {total}，应为 {expected_users}")
+    for browser_id in samples:
+        user_id, last = browsers[browser_id]
+        response = await http_request(f"{base_url}/api/v2/users/{user_id}/browsers")
+        if response.status != 200:
+            problems.append(f"{user_id}: 列出浏览器返回 {response.status}")
+            continue
+        found = {b["browserId"]: b for b in response.json()["browsers"]}
+        if browser_id not in found:
+            problems.append(f"{browser_id}: 浏览器丢失")
+        elif found[browser_id]["lastConnectedAt"] != iso(last):
+            problems.append(f"{browser_id}: lastConnectedAt 为 {found[browser_id]['lastConnectedAt']}，"
+                            f"应为 {iso(last)}")
+    return problems
+
+
+async def wait_for_compaction(path: str, timeout: float) -> Optional[float]:
+    """轮询直到日志第一行是 snapshot，返回等待秒数；超时返回 None"""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            if log_state(path)["firstOp"] == "snapshot":
+                return time.perf_counter() - start
+        except (OSError, ValueError):
+            pass  # 替换日志的瞬间
+        await asyncio.sleep(0.1)
+    return None
+
+
+async def start_server(args, data_dir: str) -> ServerProcess:
+    server = ServerProcess("multi-tenant", port=args.port, env={"DATA_DIR": data_dir},
+                           startup_timeout=args.startup_timeout)
+    await server.start()
+    return server
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="多租户存储重启耗时测试")
+    parser.add_argument("--lines", type=int, default=1_000_000, help="合成日志的总行数")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--browsers-per-user", type=int, default=3)
+    parser.add_argument("--samples", type=int, default=10, help="抽查的浏览器数")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, help="multi-tenant 服务器端口")
+    parser.add_argument("--startup-timeout", type=float, default=300.0, help="等待 /health 就绪的秒数")
+    parser.add_argument("--compaction-timeout", type=float, default=300.0, help="等待后台压缩的秒数")
+    parser.add_argument("--keep", action="store_true", help="保留临时数据目录")
+    parser.add_argument("--json", help="把结果写入 JSON 文件（- 表示 stdout）")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    data_dir = tempfile.mkdtemp(prefix="store-restart-")
+    log_path = os.path.join(data_dir, LOG_FILE)
+    problems: List[str] = []
+    results: Dict[str, Any] = {}
+    server: Optional[ServerProcess] = None
+
+    try:
+        print_section("生成合成日志")
+        start = time.perf_counter()
+        generated = generate_log(log_path, args.lines, args.users, args.browsers_per_user, args.seed)
+        browsers = generated["browsers"]
+        samples = random.Random(args.seed).sample(sorted(browsers), min(args.samples, len(browsers)))
+        print(f"✅ {generated['lines']} 行，{generated['bytes'] / 1024 / 1024:.1f} MB，"
+              f"耗时 {time.perf_counter() - start:.1f}s ({data_dir})")
+        results["before"] = log_state(log_path)
+
+        print_section("冷启动：重放完整日志")
+        server = await start_server(args, data_dir)
+        results["fullReplayMs"] = server.startup_time * 1000
+        print(f"✅ 就绪耗时 {results['fullReplayMs']:.0f}ms")
+        problems += [f"完整重放: {p}" for p in await verify(server.base_url, args.users, browsers, samples)]
+
+        print("⏳ 等待后台压缩...")
+        waited = await wait_for_compaction(log_path, args.compaction_timeout)
+        if waited is None:
+            problems.append(f"{args.compaction_timeout:g}s 内没有完成压缩")
+        else:
+            print(f"✅ 压缩完成（就绪后 {waited:.1f}s）")
+        await server.stop()
+        server = None
+        results["after"] = log_state(log_path)
+
+        print_section("重启：快照 + 尾部")
+        server = await start_server(args, data_dir)
+        results["snapshotReplayMs"] = server.startup_time * 1000
+        print(f"✅ 就绪耗时 {results['snapshotReplayMs']:.0f}ms")
+        problems += [f"快照重放: {p}" for p in await verify(server.base_url, args.users, browsers, samples)]
+    finally:
+        if server:
+            await server.stop()
+        if not args.keep:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    print_section("结果")
+    before, after = results["before"], results.get("after")
+    print(f"ℹ️  压缩前日志: {before['lines']} 行，{before['bytes'] / 1024 / 1024:.1f} MB")
+    if after:
+        print(f"ℹ️  压缩后日志: {after['lines']} 行，{after['bytes'] / 1024 / 1024:.1f} MB"
+              f"（第一行: {after['firstOp']}）")
+    if "snapshotReplayMs" in results:
+        speedup = results["fullReplayMs"] / max(results["snapshotReplayMs"], 1e-6)
+        print(f"ℹ️  重启耗时: 完整重放 {results['fullReplayMs']:.0f}ms → "
+              f"快照 {results['snapshotReplayMs']:.0f}ms（{speedup:.1f}x）")
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print("✅ 两次启动加载出相同的状态")
+
+    if args.json:
+        write_json(args.json, {
+            "config": {
+                "lines": args.lines, "users": args.users,
+                "browsersPerUser": args.browsers_per_user, "seed": args.seed,
+            },
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            **results,
+            "problems": problems,
+        })
+
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(main()))
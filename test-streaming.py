@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""大响应流式发送测试：对比首个消息到达时间（TTFB）与完整响应到达时间（TTLB）
+
+客户端在 tools/call 的 _meta 中带上 progressToken 和 "chrome-devtools-mcp/stream": true 时，
+服务器把超过 MCP_STREAM_THRESHOLD 字符的响应文本边格式化边以 notifications/progress
+分块发送（src/config/ResponseStreaming.ts），最终响应只包含摘要。
+
+对每个工具分别测：
+- buffered: 普通调用，第一个消息就是完整响应，TTFB = TTLB
+- streamed: 流式调用，TTFB 为第一个分块到达的时间，TTLB 为最终响应到达的时间
+并检查分块拼接后的文本与普通调用的文本一致（忽略快照 uid 前缀）。
+
+用法：
+    python3 test-streaming.py --fake-cdp --fake-ax-nodes 20000
+    python3 test-streaming.py --transport sse --rounds 20
+    python3 test-streaming.py --tool take_snapshot --tool 'list_network_requests={"pageSize": 500}'
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import re
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from fake_cdp import add_fake_cdp_arguments, fake_chrome_from_args
+from mcp_bench import summarize, write_json
+from mcp_client import McpClient, ServerProcess, StdioClient, create_client, run, tool_text
+
+CHROME_URL = "http://127.0.0.1:9222"
+STREAM_META_KEY = "chrome-devtools-mcp/stream"
+DEFAULT_TOOLS = ["take_snapshot", "list_network_requests"]
+# 完整快照每次都会分配新的 uid 前缀（snapshotId），比较文本时去掉
+UID_PREFIX = re.compile(r"uid=\d+_")
+
+
+def print_section(title: str):
+    """打印章节标题"""
+    print(f"\n{'='*70}")
+    print(f"  {title}")
+    print(f"{'='*70}\n")
+
+
+def parse_tool(spec: str) -> Tuple[str, Dict[str, Any]]:
+    """NAME 或 NAME=JSON 参数"""
+    name, _, raw = spec.partition("=")
+    return name.strip(), json.loads(raw) if raw else {}
+
+
+class ProgressChunks:
+    """按 progressToken 收集 notifications/progress 中的分块及第一个分块的到达时间"""
+
+    def __init__(self):
+        self.first_at: Dict[str, float] = {}
+        self.chunks: Dict[str, List[str]] = {}
+
+    def watch(self, token: str):
+        self.chunks[token] = []
+
+    def pop(self, token: str) -> Tuple[Optional[float], List[str]]:
+        return self.first_at.pop(token, None), self.chunks.pop(token, [])
+
+    def on_notification(self, message: Dict[str, Any]):
+        if message.get("method") != "notifications/progress":
+            return
+        params = message.get("params") or {}
+        token = params.get("progressToken")
+        if token not in self.chunks:
+            return
+        self.first_at.setdefault(token, time.perf_counter())
+        self.chunks[token].append(params.get("message", ""))
+
+
+async def measure(client: McpClient, progress: ProgressChunks, tokens: itertools.count,
+                  tool: str, arguments: Dict[str, Any], streamed: bool,
+                  timeout: float) -> Dict[str, Any]:
+    meta = None
+    token = None
+    if streamed:
+        token = f"stream-{next(tokens)}"
+        progress.watch(token)
+        meta = {"progressToken": token, STREAM_META_KEY: True}
+    start = time.perf_counter()
+    result = await client.call_tool(tool, arguments, timeout=timeout, meta=meta)
+    end = time.perf_counter()
+    first_at, chunks = progress.pop(token) if token else (None, [])
+    text = "".join(chunks) if chunks else tool_text(result)
+    return {
+        "ttfb_ms": ((first_at or end) - start) * 1000,
+        "ttlb_ms": (end - start) * 1000,
+        "chars": len(text),
+        "chunks": len(chunks),
+        "error": bool(result.get("isError")),
+        "text": text,
+    }
+
+
+def summarize_rounds(rounds: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "ttfb_ms": summarize(r["ttfb_ms"] for r in rounds),
+        "ttlb_ms": summarize(r["ttlb_ms"] for r in rounds),
+        "chars": summarize(r["chars"] for r in rounds),
+        "chunks": summarize(r["chunks"] for r in rounds),
+        "errors": sum(1 for r in rounds if r["error"]),
+    }
+
+
+async def bench_tool(client: McpClient, progress: ProgressChunks, tokens: itertools.count,
+                     tool: str, arguments: Dict[str, Any], args) -> Dict[str, Any]:
+    rows: Dict[str, Any] = {}
+    texts: Dict[str, str] = {}
+    for mode in ("buffered", "streamed"):
+        rounds = []
+        for _ in range(args.rounds):
+            rounds.append(await measure(client, progress, tokens, tool, arguments,
+                                        mode == "streamed", args.timeout))
+        texts[mode] = UID_PREFIX.sub("uid=", rounds[-1]["text"])
+        rows[mode] = summarize_rounds(rounds)
+    rows["same_text"] = texts["buffered"] == texts["streamed"]
+    return rows
+
+
+def format_rows(results: Dict[str, Dict[str, Any]]) -> str:
+    header = (f"{'tool':<26}{'mode':<10}{'chars':>10}{'chunks':>8}"
+              f"{'TTFB p50':>11}{'TTLB p50':>11}{'TTFB p95':>11}{'TTLB p95':>11}")
+    lines = [header, "-" * len(header)]
+    for tool, rows in results.items():
+        for mode in ("buffered", "streamed"):
+            row = rows[mode]
+            lines.append(
+                f"{tool:<26}{mode:<10}{row['chars']['mean']:>10.0f}{row['chunks']['mean']:>8.1f}"
+                f"{row['ttfb_ms']['p50']:>9.1f}ms{row['ttlb_ms']['p50']:>9.1f}ms"
+                f"{row['ttfb_ms']['p95']:>9.1f}ms{row['ttlb_ms']['p95']:>9.1f}ms"
+            )
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="大响应流式发送 TTFB/TTLB 测试")
+    parser.add_argument("--transport", "-t", default="streamable", choices=["stdio", "sse", "streamable"])
+    parser.add_argument("--tool", action="append", default=[], metavar="NAME[=JSON]",
+                        help=f"要测试的工具及参数（可重复，默认 {', '.join(DEFAULT_TOOLS)}）")
+    parser.add_argument("--rounds", "-n", type=int, default=10, help="每个工具每种模式的调用次数")
+    parser.add_argument("--threshold", type=int, default=16 * 1024, help="MCP_STREAM_THRESHOLD（字符）")
+    parser.add_argument("--chunk-size", type=int, default=16 * 1024, help="MCP_STREAM_CHUNK_SIZE（字符）")
+    parser.add_argument("--timeout", type=float, default=60.0, help="单个请求超时（秒）")
+    parser.add_argument("--browser-url", default=os.environ.get("CHROME_URL", CHROME_URL))
+    parser.add_argument("--port", type=int, help="启动服务器使用的端口")
+    parser.add_argument("--json", help="把结果写入 JSON 文件（- 表示 stdout）")
+    parser.add_argument("--fake-cdp", action="store_true", help="使用本地 CDP 替身代替真实 Chrome")
+    add_fake_cdp_arguments(parser.add_argument_group("CDP 替身（--fake-cdp）"), prefix="fake-")
+    args = parser.parse_args(argv)
+    args.tools = [parse_tool(spec) for spec in (args.tool or DEFAULT_TOOLS)]
+    return args
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    fake_chrome = None
+    if args.fake_cdp:
+        fake_chrome = fake_chrome_from_args(args, prefix="fake-")
+        await fake_chrome.start()
+        args.browser_url = fake_chrome.browser_url
+        print(f"✅ CDP 替身已启动: {fake_chrome.browser_url}")
+
+    env = {
+        "MCP_STREAM_THRESHOLD": str(args.threshold),
+        "MCP_STREAM_CHUNK_SIZE": str(args.chunk_size),
+    }
+    server: Optional[ServerProcess] = None
+    client: Optional[McpClient] = None
+    progress = ProgressChunks()
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        print_section(f"{args.transport} 模式流式响应测试")
+        if args.transport == "stdio":
+            client = StdioClient(browser_url=args.browser_url, env={**os.environ, **env},
+                                 timeout=args.timeout)
+        else:
+            server = ServerProcess(args.transport, port=args.port, browser_url=args.browser_url, env=env)
+            await server.start()
+            print(f"✅ 服务器已启动 (PID: {server.pid}, Port: {server.port})")
+            client = create_client(args.transport, base_url=server.base_url, timeout=args.timeout)
+        client.on_notification = progress.on_notification
+        await client.start()
+        await client.initialize({"name": "streaming-test", "version": "1.0.0"})
+        print(f"阈值 {args.threshold} 字符，分块 {args.chunk_size} 字符，每种模式 {args.rounds} 次\n")
+
+        tokens = itertools.count(1)
+        for tool, arguments in args.tools:
+            print(f"⏳ {tool} {json.dumps(arguments, ensure_ascii=False) if arguments else ''}")
+            results[tool] = await bench_tool(client, progress, tokens, tool, arguments, args)
+    finally:
+        if client:
+            await client.close()
+        if server:
+            await server.stop()
+        if fake_chrome:
+            await fake_chrome.stop()
+
+    print()
+    print(format_rows(results))
+
+    print_section("判定")
+    problems: List[str] = []
+    for tool, rows in results.items():
+        buffered, streamed = rows["buffered"], rows["streamed"]
+        if buffered["errors"] or streamed["errors"]:
+            problems.append(f"{tool}: {buffered['errors'] + streamed['errors']} 次调用返回错误")
+        if buffered["chars"]["max"] > args.threshold and not streamed["chunks"]["max"]:
+            problems.append(f"{tool}: 响应超过阈值但没有收到分块（服务器不支持流式发送？）")
+            continue
+        if not rows["same_text"]:
+            print(f"⚠️  {tool}: 分块拼接的文本与普通调用不同（页面内容是否在变化？）")
+        if streamed["chunks"]["max"]:
+            speedup = buffered["ttlb_ms"]["p50"] / max(streamed["ttfb_ms"]["p50"], 1e-6)
+            print(f"ℹ️  {tool}: 首个分块比完整响应早 {speedup:.1f}x 到达 "
+                  f"(TTFB {streamed['ttfb_ms']['p50']:.1f}ms vs {buffered['ttlb_ms']['p50']:.1f}ms)")
+        else:
+            print(f"ℹ️  {tool}: 响应未超过阈值，未分块")
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print("✅ 流式响应正常")
+
+    if args.json:
+        write_json(args.json, {
+            "config": {
+                "transport": args.transport, "rounds": args.rounds,
+                "threshold": args.threshold, "chunkSize": args.chunk_size,
+                "tools": [{"name": name, "arguments": arguments} for name, arguments in args.tools],
+                "browserUrl": args.browser_url, "fakeCdp": args.fake_cdp,
+            },
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "results": results,
+            "problems": problems,
+        })
+
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(main()))
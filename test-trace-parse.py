@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""trace 解析耗时与主线程卡顿：performance_stop_trace / performance_analyze_insight
+
+每条 trace 录制 --iterations 次：
+1. performance_start_trace（不刷新、不自动停止）
+2. performance_stop_trace，同时每隔 --probe-interval 毫秒发送一个 MCP ping；
+   ping 由服务器主线程直接应答，其延迟就是解析期间事件循环的卡顿
+3. 对 --insights 中的每个 insight 调用 performance_analyze_insight --insight-rounds 次，
+   第 1 次需要格式化，之后命中 RecordedTrace 的缓存
+
+--workers 给出要对比的 MCP_TRACE_WORKERS 取值（0 表示在主线程解析，即改动前的行为），
+每个取值启动一次服务器（src/trace-processing/TraceWorkerPool.ts）。
+使用 CDP 替身时 Tracing.end 返回 --trace 指定的录制文件，可以用真实录制的大 trace；
+连接真实 Chrome 时录制当前选中页面。
+
+用法：
+    python3 test-trace-parse.py --fake-cdp
+    python3 test-trace-parse.py --fake-cdp --trace big-trace.json.gz --iterations 5 --workers 0,1
+    python3 test-trace-parse.py --browser-url http://127.0.0.1:9222 --workers 1
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from fake_cdp import add_fake_cdp_arguments, fake_chrome_from_args, load_trace_file
+from mcp_bench import LatencyRecorder, format_table, summarize, write_json
+from mcp_client import McpError, StdioClient, TransportClosed, run
+
+CHROME_URL = "http://127.0.0.1:9222"
+DEFAULT_TRACE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "tests", "trace-processing", "fixtures", "web-dev-with-commit.json.gz")
+DEFAULT_INSIGHTS = "LCPBreakdown,DocumentLatency,RenderBlocking"
+
+# ping 超过该值视为一次卡顿
+STALL_MS = 50
+
+
+def print_section(title: str):
+    print(f"\n{'=' * 70}\n  {title}\n{'=' * 70}")
+
+
+async def probe_loop(client: StdioClient, interval: float, samples: List[float],
+                     stop: asyncio.Event):
+    """在 stop 之前持续发送 ping，记录每次往返时间（秒）"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            await client.request("ping", timeout=60)
+        except (McpError, asyncio.TimeoutError):
+            pass
+        samples.append(time.perf_counter() - start)
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+def stall_stats(samples: List[float]) -> Dict[str, Any]:
+    stats = summarize(v * 1000 for v in samples)
+    stats["stalls"] = sum(1 for v in samples if v * 1000 >= STALL_MS)
+    return stats
+
+
+async def record_once(client: StdioClient, args, recorder: LatencyRecorder) -> Dict[str, Any]:
+    """录制并停止一次 trace，返回 stop 耗时和期间的 ping 统计"""
+    await client.call_tool("performance_start_trace", {"reload": False, "autoStop": False},
+                           timeout=args.timeout)
+    samples: List[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.ensure_future(probe_loop(client, args.probe_interval / 1000, samples, stop))
+    start = time.perf_counter()
+    try:
+        result = await client.call_tool("performance_stop_trace", timeout=args.timeout)
+    finally:
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await probe
+    text = "\n".join(item.get("text", "") for item in result.get("content", []))
+    failed = result.get("isError") or "unexpected error parsing" in text or "An error occurred" in text
+    error = "parse_error" if failed else None
+    recorder.record("performance_stop_trace", elapsed, error=error)
+    return {"stopMs": elapsed * 1000, "ping": stall_stats(samples)}
+
+
+async def analyze_insights(client: StdioClient, args, cold: LatencyRecorder,
+                           warm: LatencyRecorder):
+    for name in args.insights:
+        for round_index in range(args.insight_rounds):
+            recorder = cold if round_index == 0 else warm
+            start = time.perf_counter()
+            try:
+                await client.call_tool("performance_analyze_insight", {"insightName": name},
+                                       timeout=args.timeout)
+            except (McpError, TransportClosed, asyncio.TimeoutError) as e:
+                recorder.record(name, time.perf_counter() - start, error=type(e).__name__)
+            else:
+                recorder.record(name, time.perf_counter() - start)
+
+
+async def run_mode(workers: int, trace_path: Optional[str], args) -> Dict[str, Any]:
+    """以 MCP_TRACE_WORKERS=workers 启动服务器，对一条 trace 执行 --iterations 次"""
+    env = {**os.environ, "MCP_TRACE_WORKERS": str(workers)}
+    client = StdioClient(browser_url=args.browser_url, env=env, timeout=args.timeout)
+    stop_recorder = LatencyRecorder()
+    insight_cold = LatencyRecorder()
+    insight_warm = LatencyRecorder()
+    iterations: List[Dict[str, Any]] = []
+    try:
+        await client.start()
+        await client.initialize()
+        await client.call_tool("list_pages", timeout=args.timeout)
+        for _ in range(args.iterations):
+            iterations.append(await record_once(client, args, stop_recorder))
+            await analyze_insights(client, args, insight_cold, insight_warm)
+    finally:
+        await client.close()
+    for recorder in (stop_recorder, insight_cold, insight_warm):
+        recorder.finish()
+
+    pings = [i["ping"] for i in iterations]
+    return {
+        "workers": workers,
+        "trace": trace_path,
+        "stop": stop_recorder.summary()["performance_stop_trace"],
+        "maxPingMs": max(p["max"] for p in pings),
+        "p99PingMs": summarize(p["p99"] for p in pings)["max"],
+        "stalls": sum(p["stalls"] for p in pings),
+        "pings": sum(p["count"] for p in pings),
+        "insightsCold": insight_cold.summary(),
+        "insightsWarm": insight_warm.summary(),
+        "iterations": iterations,
+    }
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    lines = [f"{'trace':<28}{'workers':>8}{'stop p50':>11}{'max ping':>11}{'p99 ping':>11}"
+             f"{'stalls':>9}{'insight 1st':>13}{'insight hit':>13}"]
+    for r in results:
+        name = os.path.basename(r["trace"]) if r["trace"] else "(chrome)"
+        cold = r["insightsCold"]["ALL"]["p50"]
+        warm = r["insightsWarm"]["ALL"]["p50"]
+        lines.append(f"{name[:27]:<28}{r['workers']:>8}{r['stop']['p50']:>9.1f}ms"
+                     f"{r['maxPingMs']:>9.1f}ms{r['p99PingMs']:>9.1f}ms"
+                     f"{r['stalls']:>5}/{r['pings']:<3}{cold:>11.1f}ms{warm:>11.1f}ms")
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[List[str]]):
+    parser = argparse.ArgumentParser(description="trace 解析耗时与主线程卡顿")
+    parser.add_argument("--trace", action="append", default=[],
+                        help="CDP 替身返回的 trace 文件（.json / .json.gz，可重复）")
+    parser.add_argument("--workers", default="0,1", help="要对比的 MCP_TRACE_WORKERS，逗号分隔")
+    parser.add_argument("--iterations", type=int, default=3, help="每条 trace 录制次数")
+    parser.add_argument("--insights", default=DEFAULT_INSIGHTS, help="逗号分隔的 insight 名称")
+    parser.add_argument("--insight-rounds", type=int, default=5,
+                        help="每个 insight 的调用次数（第 1 次为冷调用）")
+    parser.add_argument("--probe-interval", type=float, default=10.0, help="ping 间隔（毫秒）")
+    parser.add_argument("--timeout", type=float, default=120.0, help="单次调用超时（秒）")
+    parser.add_argument("--browser-url", default=os.environ.get("CHROME_URL", CHROME_URL))
+    parser.add_argument("--json", help="把结果写入 JSON 文件（- 表示 stdout）")
+    parser.add_argument("--fake-cdp", action="store_true", help="使用本地 CDP 替身代替真实 Chrome")
+    add_fake_cdp_arguments(parser.add_argument_group("CDP 替身（--fake-cdp）"), prefix="fake-")
+    args = parser.parse_args(argv)
+    args.workers = [int(w) for w in args.workers.split(",") if w.strip()]
+    args.insights = [name.strip() for name in args.insights.split(",") if name.strip()]
+    if args.fake_cdp and not args.trace:
+        args.trace = [args.fake_trace_file or DEFAULT_TRACE]
+    return args
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    fake_chrome = None
+    if args.fake_cdp:
+        fake_chrome = fake_chrome_from_args(args, prefix="fake-")
+        await fake_chrome.start()
+        args.browser_url = fake_chrome.browser_url
+        print(f"✅ CDP 替身已启动: {fake_chrome.browser_url}")
+
+    traces = args.trace if args.fake_cdp else [None]
+    results: List[Dict[str, Any]] = []
+    try:
+        for trace_path in traces:
+            if fake_chrome and trace_path:
+                fake_chrome.trace_data = load_trace_file(trace_path)
+                size = len(fake_chrome.trace_data) / 1024 / 1024
+                print_section(f"{os.path.basename(trace_path)}（{size:.1f} MB）")
+            else:
+                print_section("真实 Chrome 录制")
+            for workers in args.workers:
+                print(f"MCP_TRACE_WORKERS={workers}: {args.iterations} 次录制 ...")
+                result = await run_mode(workers, trace_path, args)
+                results.append(result)
+                print(format_table(result["insightsCold"], "analyze_insight 第 1 次"))
+                print(format_table(result["insightsWarm"], "analyze_insight 重复调用"))
+    except (McpError, TransportClosed, asyncio.TimeoutError) as e:
+        print(f"❌ 测试失败: {e}")
+        return 1
+    finally:
+        if fake_chrome:
+            await fake_chrome.stop()
+
+    print_section("汇总（ping 延迟即主线程卡顿）")
+    print(format_results(results))
+    print(f"\nstalls = ping ≥ {STALL_MS}ms 的次数 / ping 总数")
+
+    if args.json:
+        write_json(args.json, {
+            "config": {
+                "traces": traces, "workers": args.workers, "iterations": args.iterations,
+                "insights": args.insights, "insightRounds": args.insight_rounds,
+                "probeIntervalMs": args.probe_interval, "browserUrl": args.browser_url,
+                "fakeCdp": args.fake_cdp,
+            },
+            "results": results,
+        })
+
+    errors = sum(r["stop"]["errors"] for r in results)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(main()))
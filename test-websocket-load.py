@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""WebSocket 帧负载测试：monitor_websocket_traffic 在高帧率下的统计准确性与开销
+
+用 fake_cdp.FakeChrome 代替真实页面。对每个 --build：
+1. 后台调用 monitor_websocket_traffic（duration = --duration + --settle，includeControlFrames），
+   等到 CDP 替身收到工具会话的 Network.enable 后建立 --connections 个连接
+2. 在 --duration 秒内按 --rate 帧/秒分批推送文本帧（每 --control-every 帧插入一个 ping），
+   各连接轮流发送
+3. 对比工具报告的 Total / Sent / Received 与实际推送的帧数，记录工具返回时间超出
+   duration 的部分（汇总与格式化的开销）；给出 --output-file 时再核对文件的行数
+
+给出多个 --build 时可对比改动前后（例如 --build ../baseline --build .）。
+
+用法：
+    python3 test-websocket-load.py
+    python3 test-websocket-load.py --rate 50000 --duration 10 --output-file /tmp/frames.jsonl
+    python3 test-websocket-load.py --build ../baseline --build .
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from fake_cdp import add_fake_cdp_arguments, fake_chrome_from_args
+from mcp_bench import write_json
+from mcp_client import McpError, StdioClient, TransportClosed, run, tool_text
+
+MONITOR = "monitor_websocket_traffic"
+TICK = 0.01
+
+TOTAL = re.compile(r"\*\*Total Frames\*\*: (\d+)")
+SENT = re.compile(r"\*\*Sent\*\*: (\d+)")
+RECEIVED = re.compile(r"\*\*Received\*\*: (\d+)")
+
+
+def print_section(title: str):
+    print(f"\n{'=' * 70}\n  {title}\n{'=' * 70}")
+
+
+def match_int(pattern: re.Pattern, text: str) -> int:
+    match = pattern.search(text)
+    return int(match.group(1)) if match else 0
+
+
+async def wait_for_count(counts: Counter, method: str, target: int, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if counts[method] >= target:
+            return True
+        await asyncio.sleep(TICK)
+    return False
+
+
+async def push_frames(chrome, page, args) -> Counter:
+    """按 --rate 分批推送 --duration 秒，返回推送的帧数统计"""
+    request_ids = [f"ws.{i}" for i in range(args.connections)]
+    for i, request_id in enumerate(request_ids):
+        chrome.emit_websocket_created(page, request_id, f"wss://fake.example/socket/{i}")
+
+    emitted: Counter = Counter()
+    budget = 0.0
+    turn = 0
+    start = last = time.perf_counter()
+    while (now := time.perf_counter()) - start < args.duration:
+        budget += args.rate * (now - last)
+        last = now
+        batch = int(budget)
+        budget -= batch
+        if batch:
+            emitted += chrome.emit_websocket_frames(
+                page, request_ids[turn % len(request_ids)], batch,
+                payload_size=args.payload_size, control_every=args.control_every)
+            turn += 1
+        await asyncio.sleep(TICK)
+    emitted["seconds"] = time.perf_counter() - start
+    return emitted
+
+
+async def run_build(build: str, chrome, args) -> Dict[str, Any]:
+    client = StdioClient(browser_url=chrome.browser_url, cwd=os.path.abspath(build),
+                         timeout=args.timeout)
+    page = next(t for t in chrome.targets.values() if t.type == "page")
+    counts = chrome.command_counts
+    duration = args.duration + args.settle
+    params: Dict[str, Any] = {
+        "duration": int(duration * 1000),
+        "maxFrames": args.max_frames,
+        "includeControlFrames": True,
+    }
+    if args.output_file:
+        params["filePath"] = os.path.abspath(args.output_file)
+
+    try:
+        await client.start()
+        await client.initialize()
+        await client.call_tool("list_pages", timeout=args.timeout)
+
+        enabled = counts["Network.enable"]
+        started = time.perf_counter()
+        call = asyncio.create_task(
+            client.call_tool(MONITOR, params, timeout=duration + args.timeout))
+        if not await wait_for_count(counts, "Network.enable", enabled + 1, args.timeout):
+            call.cancel()
+            raise McpError(-1, f"{MONITOR} 没有启用 Network 域")
+        # Network.enable 的响应返回后工具才注册事件监听
+        await asyncio.sleep(args.settle / 4)
+        emitted = await push_frames(chrome, page, args)
+        text = tool_text(await call)
+        elapsed = time.perf_counter() - started
+    finally:
+        await client.close()
+
+    sent, received = emitted["sent"], emitted["received"]
+    reported = {
+        "total": match_int(TOTAL, text),
+        "sent": match_int(SENT, text),
+        "received": match_int(RECEIVED, text),
+    }
+    result: Dict[str, Any] = {
+        "build": build,
+        "emitted": {"frames": sent + received, "sent": sent, "received": received,
+                    "control": emitted["control"], "payloadBytes": emitted["bytes"]},
+        "framesPerSec": (sent + received) / emitted["seconds"],
+        "reported": reported,
+        "missing": sent + received - reported["total"],
+        "overheadMs": (elapsed - duration) * 1000,
+        "responseChars": len(text),
+    }
+    if args.output_file:
+        with open(args.output_file, "rb") as f:
+            result["fileLines"] = sum(1 for _ in f)
+    return result
+
+
+def format_results(results: List[Dict[str, Any]], args) -> str:
+    lines = [f"{'build':<24}{'frames/s':>11}{'emitted':>10}{'reported':>10}{'missing':>9}"
+             f"{'overhead':>11}{'chars':>9}" + (f"{'file lines':>12}" if args.output_file else "")]
+    for r in results:
+        line = (f"{r['build'][-23:]:<24}{r['framesPerSec']:>11,.0f}{r['emitted']['frames']:>10}"
+                f"{r['reported']['total']:>10}{r['missing']:>9}{r['overheadMs']:>9.0f}ms"
+                f"{r['responseChars']:>9}")
+        if args.output_file:
+            line += f"{r.get('fileLines', 0):>12}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[List[str]]):
+    parser = argparse.ArgumentParser(description="WebSocket 帧负载测试（使用 CDP 替身）")
+    parser.add_argument("--build", action="append", default=[],
+                        help="包含 build/src/index.js 的目录（可重复，默认当前目录）")
+    parser.add_argument("--rate", type=float, default=20000.0, help="每秒推送的帧数")
+    parser.add_argument("--duration", type=float, default=5.0, help="推送时长（秒）")
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="监控时长比推送时长多出的余量（秒）")
+    parser.add_argument("--connections", type=int, default=4, help="WebSocket 连接数")
+    parser.add_argument("--payload-size", type=int, default=128, help="文本帧 payload 字节数")
+    parser.add_argument("--control-every", type=int, default=100,
+                        help="每多少帧插入一个 ping（0 表示不插入）")
+    parser.add_argument("--max-frames", type=int, default=100, help="工具的 maxFrames 参数")
+    parser.add_argument("--output-file", help="工具的 filePath 参数（JSONL，会被覆盖）")
+    parser.add_argument("--timeout", type=float, default=60.0, help="单次调用超时（秒）")
+    parser.add_argument("--json", help="把结果写入 JSON 文件（- 表示 stdout）")
+    add_fake_cdp_arguments(parser.add_argument_group("CDP 替身"), prefix="fake-")
+    args = parser.parse_args(argv)
+    args.build = args.build or ["."]
+    return args
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    chrome = fake_chrome_from_args(args, prefix="fake-")
+    await chrome.start()
+    print(f"✅ CDP 替身已启动: {chrome.browser_url}")
+    print(f"{args.rate:,.0f} 帧/秒 × {args.duration:g}s，{args.connections} 个连接，"
+          f"payload {args.payload_size}B，maxFrames={args.max_frames}")
+
+    results: List[Dict[str, Any]] = []
+    try:
+        for build in args.build:
+            print_section(build)
+            result = await run_build(build, chrome, args)
+            results.append(result)
+            emitted, reported = result["emitted"], result["reported"]
+            print(f"  推送 {emitted['frames']} 帧（sent {emitted['sent']}, received "
+                  f"{emitted['received']}, ping {emitted['control']}），"
+                  f"{result['framesPerSec']:,.0f} 帧/秒")
+            print(f"  报告 {reported['total']} 帧（sent {reported['sent']}, received "
+                  f"{reported['received']}），开销 {result['overheadMs']:.0f}ms")
+    except (McpError, TransportClosed, asyncio.TimeoutError) as e:
+        print(f"❌ 测试失败: {e}")
+        return 1
+    finally:
+        await chrome.stop()
+
+    print_section("汇总")
+    print(format_results(results, args))
+
+    if args.json:
+        write_json(args.json, {
+            "config": {
+                "builds": args.build, "rate": args.rate, "duration": args.duration,
+                "connections": args.connections, "payloadSize": args.payload_size,
+                "controlEvery": args.control_every, "maxFrames": args.max_frames,
+                "filePath": args.output_file,
+            },
+            "results": results,
+        })
+
+    return 1 if any(r["missing"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(main()))
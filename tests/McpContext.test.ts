@@ -8,7 +8,7 @@ import {describe, it} from 'node:test';
 
 import sinon from 'sinon';
 
-import type {TraceResult} from '../src/trace-processing/parse.js';
+import type {RecordedTrace} from '../src/trace-processing/TraceWorkerPool.js';
 
 import {withBrowser} from './utils.js';
 
@@ -33,10 +33,62 @@ describe('McpContext', () => {
     });
   });
 
+  it('keeps uids of unchanged elements in incremental snapshots', async () => {
+    await withBrowser(async (_response, context) => {
+      const page = context.getSelectedPage();
+      await page.setContent(`<!DOCTYPE html>
+<button>Click me</button><input type="text" value="Input">`);
+      await context.createTextSnapshot({incremental: true});
+      await context.createTextSnapshot({incremental: true});
+      assert.strictEqual(context.getTextSnapshotDiff()?.size, 0);
+      assert.ok(await context.getElementByUid('1_1'));
+
+      await page.evaluate(() => {
+        document.body.append(document.createElement('button'));
+      });
+      await context.createTextSnapshot({incremental: true});
+      const diff = context.getTextSnapshotDiff();
+      assert.strictEqual(diff?.added.length, 1);
+      assert.strictEqual(diff?.added[0].node.id, '3_3');
+      assert.ok(await context.getElementByUid('1_1'));
+      assert.ok(await context.getElementByUid('3_3'));
+    });
+  });
+
+  it('sees script-set state and shadow DOM changes in incremental snapshots', async () => {
+    await withBrowser(async (_response, context) => {
+      const page = context.getSelectedPage();
+      await page.setContent(`<!DOCTYPE html>
+<input type="checkbox" aria-label="Agree"><div id="host"></div>`);
+      await page.evaluate(() => {
+        document
+          .getElementById('host')!
+          .attachShadow({mode: 'open'}).innerHTML = '<button>Light</button>';
+      });
+      await context.createTextSnapshot({incremental: true});
+
+      await page.evaluate(() => {
+        document.querySelector('input')!.checked = true;
+        const shadow = document.getElementById('host')!.shadowRoot!;
+        shadow.querySelector('button')!.textContent = 'Shadow';
+      });
+      await context.createTextSnapshot({incremental: true});
+      const diff = context.getTextSnapshotDiff();
+      assert.deepStrictEqual(
+        diff?.changed.map(node => [node.role, node.name, node.checked]),
+        [
+          ['checkbox', 'Agree', true],
+          ['button', 'Shadow', undefined],
+        ],
+      );
+      assert.strictEqual(diff?.added.length, 0);
+    });
+  });
+
   it('can store and retrieve performance traces', async () => {
     await withBrowser(async (_response, context) => {
-      const fakeTrace1 = {} as unknown as TraceResult;
-      const fakeTrace2 = {} as unknown as TraceResult;
+      const fakeTrace1 = {} as unknown as RecordedTrace;
+      const fakeTrace2 = {} as unknown as RecordedTrace;
       context.storeTraceRecording(fakeTrace1);
       context.storeTraceRecording(fakeTrace2);
       assert.deepEqual(context.recordedTraces(), [fakeTrace1, fakeTrace2]);
@@ -78,4 +130,19 @@ describe('McpContext', () => {
       sinon.assert.calledWithExactly(stub, page, 2, 10);
     });
   });
+
+  it('keeps the selected page when the page list shifts', async () => {
+    await withBrowser(async (_response, context) => {
+      const first = context.getSelectedPage();
+      const second = await context.newPage();
+      assert.strictEqual(context.getSelectedPageIdx(), 1);
+
+      // 另一个调用关闭了前面的页面后刷新页面列表
+      await first.close();
+      await context.createPagesSnapshot();
+
+      assert.strictEqual(context.getSelectedPage(), second);
+      assert.strictEqual(context.getSelectedPageIdx(), 0);
+    });
+  });
 });
@@ -6,7 +6,15 @@
 import assert from 'node:assert';
 import {describe, it} from 'node:test';
 
-import {getMockRequest, getMockResponse, html, withBrowser} from './utils.js';
+import {McpResponse} from '../src/McpResponse.js';
+
+import {
+  getMockRequest,
+  getMockResponse,
+  html,
+  mockNetworkRequests,
+  withBrowser,
+} from './utils.js';
 
 describe('McpResponse', () => {
   it('list pages', async () => {
@@ -95,6 +103,67 @@ uid=1_0 RootWebArea "My test page"
     });
   });
 
+  it('streams large responses in chunks', async () => {
+    await withBrowser(async (response, context) => {
+      response.appendResponseLine('x'.repeat(100));
+      const chunks: string[] = [];
+      const result = await response.handleStreaming('test', context, {
+        threshold: 50,
+        chunkSize: 40,
+        write: async (chunk, sent) => {
+          chunks.push(chunk);
+          assert.strictEqual(sent, chunks.join('').length);
+        },
+      });
+      assert.strictEqual(
+        chunks.join(''),
+        `# test response\n${'x'.repeat(100)}`,
+      );
+      assert.deepStrictEqual(chunks.map(chunk => chunk.length), [40, 40, 36]);
+      assert.equal(result[0].type, 'text');
+      assert.strictEqual(
+        result[0].text,
+        `# test response
+Streamed 116 characters in 3 progress notifications.`,
+      );
+    });
+  });
+
+  it('keeps surrogate pairs together with a chunk size of 1', async () => {
+    await withBrowser(async (response, context) => {
+      response.appendResponseLine('😀a😀');
+      const chunks: string[] = [];
+      await response.handleStreaming('test', context, {
+        threshold: 1,
+        chunkSize: 1,
+        write: async chunk => {
+          chunks.push(chunk);
+        },
+      });
+      assert.strictEqual(chunks.join(''), '# test response\n😀a😀');
+      assert.deepStrictEqual(chunks.slice(-3), ['😀', 'a', '😀']);
+      for (const chunk of chunks) {
+        assert.ok(chunk.length > 0);
+        assert.strictEqual([...chunk].length, 1);
+      }
+    });
+  });
+
+  it('does not stream responses below the threshold', async () => {
+    await withBrowser(async (response, context) => {
+      response.appendResponseLine('Testing 1');
+      const result = await response.handleStreaming('test', context, {
+        threshold: 1000,
+        chunkSize: 10,
+        write: async () => {
+          assert.fail('not reached');
+        },
+      });
+      assert.equal(result[0].type, 'text');
+      assert.strictEqual(result[0].text, `# test response\nTesting 1`);
+    });
+  });
+
   it('adds throttling setting when it is not null', async () => {
     await withBrowser(async (response, context) => {
       context.setNetworkConditions('Slow 3G');
@@ -177,9 +246,7 @@ Call handle_dialog to handle it before continuing.`,
   it('add network requests when setting is true', async () => {
     await withBrowser(async (response, context) => {
       response.setIncludeNetworkRequests(true);
-      context.getNetworkRequests = () => {
-        return [getMockRequest()];
-      };
+      mockNetworkRequests(context, [getMockRequest()]);
       const result = await response.handle('test', context);
       assert.strictEqual(
         result[0].text,
@@ -194,9 +261,7 @@ http://example.com GET [pending]`,
   it('does not include network requests when setting is false', async () => {
     await withBrowser(async (response, context) => {
       response.setIncludeNetworkRequests(false);
-      context.getNetworkRequests = () => {
-        return [getMockRequest()];
-      };
+      mockNetworkRequests(context, [getMockRequest()]);
       const result = await response.handle('test', context);
       assert.strictEqual(result[0].text, `# test response`);
     });
@@ -220,9 +285,7 @@ http://example.com GET [pending]`,
         postData: JSON.stringify({request: 'body'}),
         response: httpResponse,
       });
-      context.getNetworkRequests = () => {
-        return [request];
-      };
+      mockNetworkRequests(context, [request]);
       response.attachNetworkRequest(request.url());
 
       const result = await response.handle('test', context);
@@ -251,9 +314,7 @@ http://example.com POST [success - 200]`,
     await withBrowser(async (response, context) => {
       response.setIncludeNetworkRequests(true);
       const request = getMockRequest();
-      context.getNetworkRequests = () => {
-        return [request];
-      };
+      mockNetworkRequests(context, [request]);
       response.attachNetworkRequest(request.url());
       const result = await response.handle('test', context);
       assert.strictEqual(
@@ -316,14 +377,12 @@ describe('McpResponse network request filtering', () => {
       response.setIncludeNetworkRequests(true, {
         resourceTypes: ['script', 'stylesheet'],
       });
-      context.getNetworkRequests = () => {
-        return [
-          getMockRequest({resourceType: 'script'}),
-          getMockRequest({resourceType: 'image'}),
-          getMockRequest({resourceType: 'stylesheet'}),
-          getMockRequest({resourceType: 'document'}),
-        ];
-      };
+      mockNetworkRequests(context, [
+        getMockRequest({resourceType: 'script'}),
+        getMockRequest({resourceType: 'image'}),
+        getMockRequest({resourceType: 'stylesheet'}),
+        getMockRequest({resourceType: 'document'}),
+      ]);
       const result = await response.handle('test', context);
       assert.strictEqual(
         result[0].text,
@@ -341,13 +400,11 @@ http://example.com GET [pending]`,
       response.setIncludeNetworkRequests(true, {
         resourceTypes: ['image'],
       });
-      context.getNetworkRequests = () => {
-        return [
-          getMockRequest({resourceType: 'script'}),
-          getMockRequest({resourceType: 'image'}),
-          getMockRequest({resourceType: 'stylesheet'}),
-        ];
-      };
+      mockNetworkRequests(context, [
+        getMockRequest({resourceType: 'script'}),
+        getMockRequest({resourceType: 'image'}),
+        getMockRequest({resourceType: 'stylesheet'}),
+      ]);
       const result = await response.handle('test', context);
       assert.strictEqual(
         result[0].text,
@@ -364,13 +421,11 @@ http://example.com GET [pending]`,
       response.setIncludeNetworkRequests(true, {
         resourceTypes: ['font'],
       });
-      context.getNetworkRequests = () => {
-        return [
-          getMockRequest({resourceType: 'script'}),
-          getMockRequest({resourceType: 'image'}),
-          getMockRequest({resourceType: 'stylesheet'}),
-        ];
-      };
+      mockNetworkRequests(context, [
+        getMockRequest({resourceType: 'script'}),
+        getMockRequest({resourceType: 'image'}),
+        getMockRequest({resourceType: 'stylesheet'}),
+      ]);
       const result = await response.handle('test', context);
       assert.strictEqual(
         result[0].text,
@@ -384,15 +439,13 @@ No requests found.`,
   it('shows all requests when no filters are provided', async () => {
     await withBrowser(async (response, context) => {
       response.setIncludeNetworkRequests(true);
-      context.getNetworkRequests = () => {
-        return [
-          getMockRequest({resourceType: 'script'}),
-          getMockRequest({resourceType: 'image'}),
-          getMockRequest({resourceType: 'stylesheet'}),
-          getMockRequest({resourceType: 'document'}),
-          getMockRequest({resourceType: 'font'}),
-        ];
-      };
+      mockNetworkRequests(context, [
+        getMockRequest({resourceType: 'script'}),
+        getMockRequest({resourceType: 'image'}),
+        getMockRequest({resourceType: 'stylesheet'}),
+        getMockRequest({resourceType: 'document'}),
+        getMockRequest({resourceType: 'font'}),
+      ]);
       const result = await response.handle('test', context);
       assert.strictEqual(
         result[0].text,
@@ -413,15 +466,13 @@ http://example.com GET [pending]`,
       response.setIncludeNetworkRequests(true, {
         resourceTypes: [],
       });
-      context.getNetworkRequests = () => {
-        return [
-          getMockRequest({resourceType: 'script'}),
-          getMockRequest({resourceType: 'image'}),
-          getMockRequest({resourceType: 'stylesheet'}),
-          getMockRequest({resourceType: 'document'}),
-          getMockRequest({resourceType: 'font'}),
-        ];
-      };
+      mockNetworkRequests(context, [
+        getMockRequest({resourceType: 'script'}),
+        getMockRequest({resourceType: 'image'}),
+        getMockRequest({resourceType: 'stylesheet'}),
+        getMockRequest({resourceType: 'document'}),
+        getMockRequest({resourceType: 'font'}),
+      ]);
       const result = await response.handle('test', context);
       assert.strictEqual(
         result[0].text,
@@ -442,7 +493,7 @@ describe('McpResponse network pagination', () => {
   it('returns all requests when pagination is not provided', async () => {
     await withBrowser(async (response, context) => {
       const requests = Array.from({length: 5}, () => getMockRequest());
-      context.getNetworkRequests = () => requests;
+      mockNetworkRequests(context, requests);
       response.setIncludeNetworkRequests(true);
       const result = await response.handle('test', context);
       const text = (result[0].text as string).toString();
@@ -457,9 +508,7 @@ describe('McpResponse network pagination', () => {
       const requests = Array.from({length: 30}, (_, idx) =>
         getMockRequest({method: `GET-${idx}`}),
       );
-      context.getNetworkRequests = () => {
-        return requests;
-      };
+      mockNetworkRequests(context, requests);
       response.setIncludeNetworkRequests(true, {pageSize: 10});
       const result = await response.handle('test', context);
       const text = (result[0].text as string).toString();
@@ -474,7 +523,7 @@ describe('McpResponse network pagination', () => {
       const requests = Array.from({length: 25}, (_, idx) =>
         getMockRequest({method: `GET-${idx}`}),
       );
-      context.getNetworkRequests = () => requests;
+      mockNetworkRequests(context, requests);
       response.setIncludeNetworkRequests(true, {
         pageSize: 10,
         pageIdx: 1,
@@ -490,7 +539,7 @@ describe('McpResponse network pagination', () => {
   it('handles invalid page number by showing first page', async () => {
     await withBrowser(async (response, context) => {
       const requests = Array.from({length: 5}, () => getMockRequest());
-      context.getNetworkRequests = () => requests;
+      mockNetworkRequests(context, requests);
       response.setIncludeNetworkRequests(true, {
         pageSize: 2,
         pageIdx: 10, // Invalid page number
@@ -505,6 +554,77 @@ describe('McpResponse network pagination', () => {
   });
 });
 
+describe('McpResponse network request queries', () => {
+  it('filters network requests by status class and host', async () => {
+    await withBrowser(async (response, context) => {
+      response.setIncludeNetworkRequests(true, {
+        statusClasses: ['4xx', 'failed'],
+        hosts: ['API.example.com'],
+      });
+      mockNetworkRequests(context, [
+        getMockRequest({
+          url: 'https://api.example.com/missing',
+          response: getMockResponse({status: 404}),
+        }),
+        getMockRequest({
+          url: 'https://cdn.example.com/missing',
+          response: getMockResponse({status: 404}),
+        }),
+        getMockRequest({
+          url: 'https://api.example.com/ok',
+          response: getMockResponse({status: 200}),
+        }),
+        getMockRequest({url: 'https://api.example.com/pending'}),
+        getMockRequest({
+          url: 'https://api.example.com/offline',
+          failure: () => ({errorText: 'net::ERR_FAILED'}),
+        }),
+      ]);
+      const result = await response.handle('test', context);
+      assert.strictEqual(
+        result[0].text,
+        `# test response
+## Network requests
+Showing 1-2 of 2 (Page 1 of 1).
+[reqid-0-https://api.example.com/missing] https://api.example.com/missing GET [failed - 404]
+[reqid-0-https://api.example.com/offline] https://api.example.com/offline GET [failed - net::ERR_FAILED]`,
+      );
+    });
+  });
+
+  it('continues from a cursor while new requests arrive', async () => {
+    await withBrowser(async (response, context) => {
+      const requests = Array.from({length: 5}, (_, idx) =>
+        getMockRequest({url: `http://example.com/${idx}`}),
+      );
+      mockNetworkRequests(context, requests);
+      response.setIncludeNetworkRequests(true, {pageSize: 2});
+      let text = (await response.handle('test', context))[0].text as string;
+      assert.ok(text.includes('Next cursor: c1'));
+
+      // 新请求到达后，游标之后的内容不变
+      mockNetworkRequests(context, [
+        ...requests,
+        getMockRequest({url: 'http://example.com/5'}),
+      ]);
+      const next = new McpResponse();
+      next.setIncludeNetworkRequests(true, {pageSize: 3, cursor: 'c1'});
+      text = (await next.handle('test', context))[0].text as string;
+      assert.ok(text.includes('Showing 3 requests after the cursor.'));
+      assert.ok(text.includes('http://example.com/2 GET'));
+      assert.ok(text.includes('http://example.com/4 GET'));
+      assert.ok(text.includes('Next cursor: c4'));
+      assert.ok(!text.includes('no more requests yet'));
+
+      const last = new McpResponse();
+      last.setIncludeNetworkRequests(true, {cursor: 'c4'});
+      text = (await last.handle('test', context))[0].text as string;
+      assert.ok(text.includes('http://example.com/5 GET'));
+      assert.ok(text.includes('Next cursor: c5 (no more requests yet)'));
+    });
+  });
+});
+
 describe('McpResponse body availability indication', () => {
   it('shows "No request body" for GET request', async () => {
     await withBrowser(async (response, context) => {
@@ -512,7 +632,7 @@ describe('McpResponse body availability indication', () => {
         method: 'GET',
         hasPostData: false,
       });
-      context.getNetworkRequests = () => [request];
+      mockNetworkRequests(context, [request]);
       response.attachNetworkRequest(request.url());
 
       const result = await response.handle('test', context);
@@ -532,7 +652,7 @@ describe('McpResponse body availability indication', () => {
         hasPostData: true,
         postData: '{"test": "data"}',
       });
-      context.getNetworkRequests = () => [request];
+      mockNetworkRequests(context, [request]);
       response.attachNetworkRequest(request.url());
 
       const result = await response.handle('test', context);
@@ -552,7 +672,7 @@ describe('McpResponse body availability indication', () => {
         postData: undefined,
         fetchPostData: Promise.reject(new Error('No data')),
       });
-      context.getNetworkRequests = () => [request];
+      mockNetworkRequests(context, [request]);
       response.attachNetworkRequest(request.url());
 
       const result = await response.handle('test', context);
@@ -571,7 +691,7 @@ describe('McpResponse body availability indication', () => {
       const request = getMockRequest({
         response: httpResponse,
       });
-      context.getNetworkRequests = () => [request];
+      mockNetworkRequests(context, [request]);
       response.attachNetworkRequest(request.url());
 
       const result = await response.handle('test', context);
@@ -591,7 +711,7 @@ describe('McpResponse body availability indication', () => {
       const request = getMockRequest({
         response: httpResponse,
       });
-      context.getNetworkRequests = () => [request];
+      mockNetworkRequests(context, [request]);
       response.attachNetworkRequest(request.url());
 
       const result = await response.handle('test', context);
@@ -610,7 +730,7 @@ describe('McpResponse body availability indication', () => {
           return {errorText: 'Network error'};
         },
       });
-      context.getNetworkRequests = () => [request];
+      mockNetworkRequests(context, [request]);
       response.attachNetworkRequest(request.url());
 
       const result = await response.handle('test', context);
@@ -0,0 +1,71 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+import assert from 'node:assert';
+import {describe, it} from 'node:test';
+
+import {ReadWriteMutex} from '../src/Mutex.js';
+
+function tick() {
+  return new Promise(resolve => setImmediate(resolve));
+}
+
+describe('ReadWriteMutex', () => {
+  it('allows shared holders to run concurrently', async () => {
+    const mutex = new ReadWriteMutex();
+    const first = await mutex.acquireShared();
+    const second = await mutex.acquireShared();
+    assert.strictEqual(mutex.readers, 2);
+    first.dispose();
+    second.dispose();
+    assert.strictEqual(mutex.locked, false);
+  });
+
+  it('blocks exclusive acquire until shared holders release', async () => {
+    const mutex = new ReadWriteMutex();
+    const shared = await mutex.acquireShared();
+    let acquired = false;
+    const exclusive = mutex.acquire().then(guard => {
+      acquired = true;
+      return guard;
+    });
+    await tick();
+    assert.strictEqual(acquired, false);
+    shared.dispose();
+    (await exclusive).dispose();
+    assert.strictEqual(acquired, true);
+    assert.strictEqual(mutex.locked, false);
+  });
+
+  it('does not let shared requests overtake a queued exclusive one', async () => {
+    const mutex = new ReadWriteMutex();
+    const order: string[] = [];
+    const shared = await mutex.acquireShared();
+    const exclusive = mutex.acquire().then(guard => {
+      order.push('exclusive');
+      return guard;
+    });
+    const lateShared = mutex.acquireShared().then(guard => {
+      order.push('shared');
+      return guard;
+    });
+    await tick();
+    assert.deepStrictEqual(order, []);
+    shared.dispose();
+    (await exclusive).dispose();
+    (await lateShared).dispose();
+    assert.deepStrictEqual(order, ['exclusive', 'shared']);
+  });
+
+  it('ignores repeated dispose calls', async () => {
+    const mutex = new ReadWriteMutex();
+    const first = await mutex.acquireShared();
+    const second = await mutex.acquireShared();
+    first.dispose();
+    first.dispose();
+    assert.strictEqual(mutex.readers, 1);
+    second.dispose();
+  });
+});
@@ -153,4 +153,31 @@ describe('PageCollector', () => {
 
     assert.equal(collector.getData(page).length, 2);
   });
+
+  it('evicts the oldest entries beyond the per-page limit', async () => {
+    const browser = getMockBrowser();
+    const page = (await browser.pages())[0];
+    const requests = [getMockRequest(), getMockRequest(), getMockRequest()];
+    const collector = new PageCollector(
+      browser,
+      (page, collect) => {
+        page.on('request', req => {
+          collect(req);
+        });
+      },
+      {maxPerPage: 2},
+    );
+    await collector.init();
+    for (const request of requests) {
+      page.emit('request', request);
+    }
+
+    assert.deepStrictEqual(collector.getData(page), requests.slice(1));
+    assert.equal(collector.getDroppedCount(page), 1);
+
+    page.emit('framenavigated', page.mainFrame());
+
+    assert.equal(collector.getData(page).length, 0);
+    assert.equal(collector.getDroppedCount(page), 0);
+  });
 });
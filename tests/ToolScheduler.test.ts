@@ -0,0 +1,201 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+import assert from 'node:assert';
+import {describe, it} from 'node:test';
+
+import type {Page} from 'puppeteer-core';
+
+import {getToolScope, ToolScheduler} from '../src/ToolScheduler.js';
+import {ToolCategories} from '../src/tools/categories.js';
+import {
+  clearExtensionErrors,
+  reloadExtension,
+} from '../src/tools/extension/execution.js';
+import {
+  closePopup,
+  openExtensionPopup,
+} from '../src/tools/extension/popup-lifecycle.js';
+import {getExtensionRuntimeErrors} from '../src/tools/extension/runtime-errors.js';
+import type {ToolDefinition, ToolScope} from '../src/tools/ToolDefinition.js';
+
+function tick() {
+  return new Promise(resolve => setImmediate(resolve));
+}
+
+function fakeTool(
+  category: ToolCategories,
+  options: {concurrencySafe?: boolean; scope?: ToolScope} = {},
+): ToolDefinition {
+  return {
+    name: `fake_${category}`,
+    description: '',
+    annotations: {category, readOnlyHint: true, ...options},
+    schema: {},
+    handler: async () => {},
+  };
+}
+
+function fakeContext(pages: Page[]) {
+  let selected = pages[0];
+  return {
+    getSelectedPage: () => selected,
+    getPageByIdx: (idx: number) => {
+      const page = pages[idx];
+      if (!page) {
+        throw new Error('No page found');
+      }
+      return page;
+    },
+    select(page: Page) {
+      selected = page;
+    },
+  };
+}
+
+function fakePage(): Page {
+  return {} as Page;
+}
+
+function track<T>(promise: Promise<T>) {
+  const state = {settled: false, promise};
+  void promise.then(() => {
+    state.settled = true;
+  });
+  return state;
+}
+
+const pageTool = fakeTool(ToolCategories.INPUT_AUTOMATION);
+const readOnlyPageTool = fakeTool(ToolCategories.DEBUGGING, {
+  concurrencySafe: true,
+});
+const browserTool = fakeTool(ToolCategories.BROWSER_INFO);
+const extensionTool = fakeTool(ToolCategories.EXTENSION_DEBUGGING);
+const contextTool = fakeTool(ToolCategories.NAVIGATION_AUTOMATION, {
+  scope: 'context',
+});
+
+describe('ToolScheduler', () => {
+  it('derives the scope from the annotations and category', () => {
+    assert.strictEqual(getToolScope(pageTool), 'page');
+    assert.strictEqual(getToolScope(browserTool), 'browser');
+    assert.strictEqual(getToolScope(extensionTool), 'browser');
+    assert.strictEqual(getToolScope(contextTool), 'context');
+  });
+
+  it('runs extension tools that open or close pages in the context scope', () => {
+    const tools = [
+      openExtensionPopup,
+      closePopup,
+      reloadExtension,
+      clearExtensionErrors,
+      getExtensionRuntimeErrors,
+    ] as unknown as ToolDefinition[];
+    for (const tool of tools) {
+      assert.strictEqual(getToolScope(tool), 'context', tool.name);
+    }
+  });
+
+  it('lets browser-scoped calls run during a page call', async () => {
+    const scheduler = new ToolScheduler();
+    const context = fakeContext([fakePage()]);
+    const page = await scheduler.acquire(pageTool, {}, context);
+    const browser = track(scheduler.acquire(browserTool, {}, context));
+    await tick();
+    assert.strictEqual(browser.settled, true);
+    (await browser.promise).dispose();
+    page.dispose();
+  });
+
+  it('serializes mutating calls on the same page', async () => {
+    const scheduler = new ToolScheduler();
+    const context = fakeContext([fakePage()]);
+    const first = await scheduler.acquire(pageTool, {}, context);
+    const second = track(scheduler.acquire(pageTool, {}, context));
+    await tick();
+    assert.strictEqual(second.settled, false);
+    first.dispose();
+    (await second.promise).dispose();
+  });
+
+  it('runs calls on different pages concurrently', async () => {
+    const scheduler = new ToolScheduler();
+    const pages = [fakePage(), fakePage()];
+    const context = fakeContext(pages);
+    const first = await scheduler.acquire(pageTool, {}, context);
+    context.select(pages[1]);
+    const second = track(scheduler.acquire(pageTool, {}, context));
+    await tick();
+    assert.strictEqual(second.settled, true);
+    (await second.promise).dispose();
+    first.dispose();
+  });
+
+  it('shares the page between concurrency-safe calls only', async () => {
+    const scheduler = new ToolScheduler();
+    const context = fakeContext([fakePage()]);
+    const first = await scheduler.acquire(readOnlyPageTool, {}, context);
+    const second = track(scheduler.acquire(readOnlyPageTool, {}, context));
+    const mutating = track(scheduler.acquire(pageTool, {}, context));
+    await tick();
+    assert.strictEqual(second.settled, true);
+    assert.strictEqual(mutating.settled, false);
+    first.dispose();
+    (await second.promise).dispose();
+    (await mutating.promise).dispose();
+  });
+
+  it('drains the context before a context-scoped call', async () => {
+    const scheduler = new ToolScheduler();
+    const context = fakeContext([fakePage()]);
+    const browser = await scheduler.acquire(browserTool, {}, context);
+    const select = track(
+      scheduler.acquire(contextTool, {pageIdx: 0}, context),
+    );
+    await tick();
+    assert.strictEqual(select.settled, false);
+    browser.dispose();
+    const guard = await select.promise;
+    const page = track(scheduler.acquire(pageTool, {}, context));
+    await tick();
+    assert.strictEqual(page.settled, false);
+    guard.dispose();
+    (await page.promise).dispose();
+  });
+
+  it('locks extensions by id', async () => {
+    const scheduler = new ToolScheduler();
+    const context = fakeContext([fakePage()]);
+    const first = await scheduler.acquire(
+      extensionTool,
+      {extensionId: 'a'},
+      context,
+    );
+    const other = track(
+      scheduler.acquire(extensionTool, {extensionId: 'b'}, context),
+    );
+    const same = track(
+      scheduler.acquire(extensionTool, {extensionId: 'a'}, context),
+    );
+    await tick();
+    assert.strictEqual(other.settled, true);
+    assert.strictEqual(same.settled, false);
+    first.dispose();
+    (await other.promise).dispose();
+    (await same.promise).dispose();
+  });
+
+  it('keeps contexts independent', async () => {
+    const scheduler = new ToolScheduler();
+    const first = fakeContext([fakePage()]);
+    const second = fakeContext([fakePage()]);
+    const guard = await scheduler.acquire(contextTool, {}, first);
+    const other = track(scheduler.acquire(contextTool, {}, second));
+    await tick();
+    assert.strictEqual(other.settled, true);
+    (await other.promise).dispose();
+    guard.dispose();
+  });
+});
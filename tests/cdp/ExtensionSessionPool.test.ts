@@ -0,0 +1,140 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+import assert from 'node:assert';
+import {EventEmitter} from 'node:events';
+import {describe, it} from 'node:test';
+
+import type {Browser, Target} from 'puppeteer-core';
+import sinon from 'sinon';
+
+import {
+  ExtensionSessionPool,
+  type ExtensionTargetInfo,
+} from '../../src/cdp/ExtensionSessionPool.js';
+
+function fakeSession() {
+  return {
+    send: sinon.stub().resolves({}),
+    detach: sinon.stub().resolves(),
+    once: () => undefined,
+  };
+}
+
+function fakeTarget(targetId: string) {
+  const session = fakeSession();
+  return {
+    _targetId: targetId,
+    session,
+    createCDPSession: sinon.stub().resolves(session),
+  };
+}
+
+function setup(targetIds: string[], idleTimeout?: number) {
+  const browser = new EventEmitter() as EventEmitter & {targets(): unknown[]};
+  const targets = targetIds.map(fakeTarget);
+  browser.targets = () => targets;
+  const infos = targetIds.map(
+    targetId => ({targetId, type: 'service_worker'}) as ExtensionTargetInfo,
+  );
+  const listTargets = sinon.stub().resolves(infos);
+  const pool = new ExtensionSessionPool(
+    browser as unknown as Browser,
+    listTargets,
+    {idleTimeout},
+  );
+  return {browser, targets, listTargets, pool};
+}
+
+describe('ExtensionSessionPool', () => {
+  it('attaches once per target and enables Runtime', async () => {
+    const {targets, pool} = setup(['sw']);
+    const [first, second] = await Promise.all([
+      pool.acquire('sw'),
+      pool.acquire('sw'),
+    ]);
+    await pool.acquire('sw');
+
+    assert.strictEqual(first, second);
+    assert.strictEqual(targets[0].createCDPSession.callCount, 1);
+    assert.ok(targets[0].session.send.calledOnceWith('Runtime.enable'));
+    assert.deepStrictEqual(pool.getStats(), {
+      sessions: 1,
+      sessionHits: 2,
+      attaches: 1,
+      invalidations: 0,
+      idleDetaches: 0,
+      discoveryHits: 0,
+      discoveries: 0,
+    });
+  });
+
+  it('drops the session when its target is destroyed', async () => {
+    const {browser, targets, pool} = setup(['sw']);
+    await pool.acquire('sw');
+    browser.emit('targetdestroyed', targets[0]);
+    await new Promise(resolve => setImmediate(resolve));
+
+    assert.ok(targets[0].session.detach.calledOnce);
+    await pool.acquire('sw');
+    assert.strictEqual(targets[0].createCDPSession.callCount, 2);
+    assert.strictEqual(pool.getStats().invalidations, 1);
+  });
+
+  it('disables Runtime and detaches once idle after the last release', async () => {
+    const {targets, pool} = setup(['sw'], 10);
+    const {session} = targets[0];
+    await pool.acquire('sw');
+    await pool.acquire('sw');
+    pool.release('sw');
+    await new Promise(resolve => setTimeout(resolve, 30));
+    assert.ok(session.detach.notCalled);
+
+    pool.release('sw');
+    await new Promise(resolve => setTimeout(resolve, 30));
+    assert.deepStrictEqual(
+      session.send.args.map(([method]) => method),
+      ['Runtime.enable', 'Runtime.disable'],
+    );
+    assert.ok(session.detach.calledOnce);
+    assert.strictEqual(pool.getStats().sessions, 0);
+    assert.strictEqual(pool.getStats().idleDetaches, 1);
+  });
+
+  it('keeps the session when it is acquired again before the timeout', async () => {
+    const {targets, pool} = setup(['sw'], 20);
+    await pool.acquire('sw');
+    pool.release('sw');
+    await pool.acquire('sw');
+    await new Promise(resolve => setTimeout(resolve, 40));
+
+    assert.ok(targets[0].session.detach.notCalled);
+    assert.strictEqual(targets[0].createCDPSession.callCount, 1);
+    pool.release('sw');
+    pool.dispose();
+  });
+
+  it('reuses the target list until targets change', async () => {
+    const {browser, listTargets, pool} = setup(['sw']);
+    await pool.getTargets();
+    await pool.getTargets();
+    assert.strictEqual(listTargets.callCount, 1);
+
+    browser.emit('targetchanged');
+    await pool.getTargets();
+    assert.strictEqual(listTargets.callCount, 2);
+    assert.strictEqual(pool.getStats().discoveryHits, 1);
+  });
+
+  it('removes browser listeners on dispose', async () => {
+    const {browser, pool} = setup(['sw']);
+    await pool.acquire('sw');
+    assert.strictEqual(browser.listenerCount('targetdestroyed'), 1);
+    pool.dispose();
+    assert.strictEqual(browser.listenerCount('targetdestroyed'), 0);
+    assert.strictEqual(pool.getStats().sessions, 0);
+  });
+});
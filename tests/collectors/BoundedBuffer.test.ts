@@ -0,0 +1,117 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+import assert from 'node:assert';
+import {describe, it} from 'node:test';
+
+import {
+  BoundedBuffer,
+  CollectorBudget,
+} from '../../src/collectors/BoundedBuffer.js';
+
+describe('BoundedBuffer', () => {
+  it('keeps insertion order below capacity', () => {
+    const buffer = new BoundedBuffer<number>(5);
+    buffer.push(1);
+    buffer.push(2);
+    buffer.push(3);
+    assert.deepStrictEqual(buffer.toArray(), [1, 2, 3]);
+    assert.strictEqual(buffer.dropped, 0);
+  });
+
+  it('evicts the oldest entries when full', () => {
+    const buffer = new BoundedBuffer<number>(3);
+    for (let i = 0; i < 10; i++) {
+      buffer.push(i);
+    }
+    assert.deepStrictEqual(buffer.toArray(), [7, 8, 9]);
+    assert.strictEqual(buffer.length, 3);
+    assert.strictEqual(buffer.dropped, 7);
+  });
+
+  it('trimStart removes entries without counting them as dropped', () => {
+    const buffer = new BoundedBuffer<number>(3);
+    for (let i = 0; i < 5; i++) {
+      buffer.push(i);
+    }
+    buffer.trimStart(2);
+    buffer.push(5);
+    assert.deepStrictEqual(buffer.toArray(), [4, 5]);
+    assert.strictEqual(buffer.dropped, 2);
+  });
+
+  it('clear resets entries and the dropped counter', () => {
+    const buffer = new BoundedBuffer<number>(2);
+    for (let i = 0; i < 4; i++) {
+      buffer.push(i);
+    }
+    buffer.clear();
+    assert.deepStrictEqual(buffer.toArray(), []);
+    assert.strictEqual(buffer.dropped, 0);
+    buffer.push(9);
+    assert.deepStrictEqual(buffer.toArray(), [9]);
+  });
+
+  it('does not change a snapshot returned earlier', () => {
+    const buffer = new BoundedBuffer<number>(2);
+    buffer.push(1);
+    buffer.push(2);
+    const snapshot = buffer.toArray();
+    buffer.push(3);
+    assert.deepStrictEqual(snapshot, [1, 2]);
+    assert.deepStrictEqual(buffer.toArray(), [2, 3]);
+  });
+
+  it('keeps sequence numbers stable across eviction and clear', () => {
+    const buffer = new BoundedBuffer<number>(3);
+    for (let i = 0; i < 5; i++) {
+      buffer.push(i * 10);
+    }
+    assert.strictEqual(buffer.firstSeq, 2);
+    assert.strictEqual(buffer.nextSeq, 5);
+    assert.strictEqual(buffer.at(1), undefined);
+    assert.strictEqual(buffer.at(2), 20);
+    assert.strictEqual(buffer.at(4), 40);
+
+    buffer.clear();
+    buffer.push(50);
+    assert.strictEqual(buffer.firstSeq, 5);
+    assert.strictEqual(buffer.at(5), 50);
+  });
+});
+
+describe('CollectorBudget', () => {
+  it('evicts from the largest buffer when the total is exceeded', () => {
+    const budget = new CollectorBudget(10);
+    const quiet = new BoundedBuffer<string>(100, budget);
+    const noisy = new BoundedBuffer<number>(100, budget);
+    quiet.push('a');
+    quiet.push('b');
+    quiet.push('c');
+    for (let i = 0; i < 50; i++) {
+      noisy.push(i);
+    }
+    assert.strictEqual(budget.total, 10);
+    assert.deepStrictEqual(quiet.toArray(), ['a', 'b', 'c']);
+    assert.strictEqual(noisy.length, 7);
+    assert.strictEqual(noisy.toArray()[0], 43);
+    assert.strictEqual(noisy.dropped, 43);
+    assert.strictEqual(budget.dropped, 43);
+  });
+
+  it('releases the share of detached buffers', () => {
+    const budget = new CollectorBudget(10);
+    const first = new BoundedBuffer<number>(100, budget);
+    const second = new BoundedBuffer<number>(100, budget);
+    for (let i = 0; i < 6; i++) {
+      first.push(i);
+      second.push(i);
+    }
+    first.detach();
+    assert.strictEqual(budget.total, second.length);
+    assert.strictEqual(budget.bufferCount, 1);
+  });
+});
@@ -7,8 +7,45 @@
 import assert from 'node:assert';
 import {beforeEach, describe, it} from 'node:test';
 
+import type {CDPSession, Page, Protocol} from 'puppeteer-core';
+import sinon from 'sinon';
+
 import {EnhancedConsoleCollector} from '../../src/collectors/EnhancedConsoleCollector.js';
 
+/**
+ * 只实现 init() 用到的部分；getProperties 按 objectId 返回 properties 中的属性
+ */
+function fakeSession(
+  properties: Record<string, Protocol.Runtime.PropertyDescriptor[]> = {},
+) {
+  const handlers = new Map<string, (params: unknown) => void>();
+  let getProperties = 0;
+  const session = {
+    send: sinon.stub().callsFake(async (method: string, params) => {
+      if (method === 'Runtime.getProperties') {
+        getProperties++;
+        return {result: properties[params.objectId] ?? []};
+      }
+      return {};
+    }),
+    on(event: string, handler: (params: unknown) => void) {
+      handlers.set(event, handler);
+    },
+  } as unknown as CDPSession;
+  const emit = (event: string, params: unknown) =>
+    handlers.get(event)?.(params);
+  const getPropertiesCalls = () => getProperties;
+  return {session, emit, getPropertiesCalls};
+}
+
+const fakePage = {on() {}} as unknown as Page;
+
+function consoleEvent(
+  args: Protocol.Runtime.RemoteObject[],
+): Protocol.Runtime.ConsoleAPICalledEvent {
+  return {type: 'log', args, executionContextId: 1, timestamp: 1000};
+}
+
 describe('EnhancedConsoleCollector', () => {
   let collector: EnhancedConsoleCollector;
 
@@ -302,4 +339,149 @@ describe('EnhancedConsoleCollector', () => {
       assert.strictEqual(result.length, 0);
     });
   });
+
+  describe('lazy serialization', () => {
+    it('ingests primitives and complete previews without CDP calls', async () => {
+      const {session, emit, getPropertiesCalls} = fakeSession();
+      await collector.init(fakePage, session);
+
+      emit(
+        'Runtime.consoleAPICalled',
+        consoleEvent([
+          {type: 'string', value: 'count'},
+          {type: 'number', value: 3, description: '3'},
+          {
+            type: 'object',
+            className: 'Object',
+            description: 'Object',
+            objectId: '1.1',
+            preview: {
+              type: 'object',
+              description: 'Object',
+              overflow: false,
+              properties: [
+                {name: 'a', type: 'number', value: '1'},
+                {name: 'b', type: 'string', value: 'x'},
+              ],
+            },
+          },
+        ]),
+      );
+
+      const [log] = collector.getLogs();
+      assert.deepStrictEqual(log.args, ['count', 3, {a: 1, b: 'x'}]);
+      assert.strictEqual(log.text, 'count 3 {"a":1,"b":"x"}');
+      assert.strictEqual(log.serialized, undefined);
+      await collector.resolveLogs([log]);
+      assert.strictEqual(getPropertiesCalls(), 0);
+    });
+
+    it('serializes nested objects on first read and caches them', async () => {
+      const {session, emit, getPropertiesCalls} = fakeSession({
+        '1.1': [{name: 'inner', value: {type: 'object', objectId: '2.1'}}],
+        '2.1': [{name: 'deep', value: {type: 'number', value: 42}}],
+      } as unknown as Record<string, Protocol.Runtime.PropertyDescriptor[]>);
+      await collector.init(fakePage, session);
+
+      emit(
+        'Runtime.consoleAPICalled',
+        consoleEvent([
+          {
+            type: 'object',
+            className: 'Object',
+            description: 'Object',
+            objectId: '1.1',
+            preview: {
+              type: 'object',
+              description: 'Object',
+              overflow: false,
+              properties: [{name: 'inner', type: 'object', value: 'Object'}],
+            },
+          },
+        ]),
+      );
+
+      const [log] = collector.getLogs();
+      assert.strictEqual(log.serialized, false);
+      assert.deepStrictEqual(log.args, [{inner: 'Object'}]);
+      assert.strictEqual(getPropertiesCalls(), 0);
+
+      await collector.resolveLogs([log]);
+      assert.strictEqual(log.serialized, true);
+      assert.deepStrictEqual(log.args, [{inner: {deep: 42}}]);
+      assert.strictEqual(log.text, '{"inner":{"deep":42}}');
+      assert.strictEqual(getPropertiesCalls(), 2);
+
+      await collector.resolveLogs(collector.getLogs());
+      assert.strictEqual(getPropertiesCalls(), 2);
+    });
+
+    it('limits how many logs are serialized at once', async () => {
+      const {session, emit} = fakeSession();
+      let inFlight = 0;
+      let maxInFlight = 0;
+      (session.send as sinon.SinonStub).callsFake(async (method: string) => {
+        if (method !== 'Runtime.getProperties') {
+          return {};
+        }
+        maxInFlight = Math.max(maxInFlight, ++inFlight);
+        await new Promise(resolve => setTimeout(resolve, 1));
+        inFlight--;
+        return {result: [{name: 'deep', value: {type: 'number', value: 1}}]};
+      });
+      await collector.init(fakePage, session);
+
+      for (let i = 0; i < 50; i++) {
+        emit(
+          'Runtime.consoleAPICalled',
+          consoleEvent([
+            {
+              type: 'object',
+              className: 'Object',
+              description: 'Object',
+              objectId: `${i}.1`,
+              preview: {
+                type: 'object',
+                description: 'Object',
+                overflow: true,
+                properties: [],
+              },
+            },
+          ]),
+        );
+      }
+
+      const logs = await collector.resolveLogs(collector.getLogs());
+      assert.strictEqual(logs.length, 50);
+      assert.ok(logs.every(log => log.serialized));
+      assert.deepStrictEqual(logs[49].args, [{deep: 1}]);
+      assert.ok(maxInFlight > 1 && maxInFlight <= 8, `${maxInFlight}`);
+    });
+
+    it('formats exceptions from the error description', async () => {
+      const {session, emit, getPropertiesCalls} = fakeSession();
+      await collector.init(fakePage, session);
+
+      emit('Runtime.exceptionThrown', {
+        timestamp: 1000,
+        exceptionDetails: {
+          exceptionId: 1,
+          text: 'Uncaught',
+          lineNumber: 0,
+          columnNumber: 0,
+          exception: {
+            type: 'object',
+            subtype: 'error',
+            className: 'TypeError',
+            description: 'TypeError: boom\n    at foo (app.js:1:1)',
+            objectId: '3.1',
+          },
+        },
+      });
+
+      const [log] = collector.getLogs();
+      assert.strictEqual(log.text, 'Uncaught TypeError: boom');
+      assert.strictEqual(getPropertiesCalls(), 0);
+    });
+  });
 });
@@ -0,0 +1,137 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+import assert from 'node:assert';
+import {describe, it} from 'node:test';
+
+import {
+  IndexedBuffer,
+  type BufferIndexSpec,
+} from '../../src/collectors/IndexedBuffer.js';
+
+interface Entry {
+  id: number;
+  kind: string;
+  host: string;
+  time: number;
+  status?: string;
+}
+
+const spec: BufferIndexSpec<Entry> = {
+  keys: {
+    kind: entry => entry.kind,
+    host: entry => entry.host,
+    status: entry => entry.status,
+  },
+  lateKeys: ['status'],
+  timestamp: entry => entry.time,
+};
+
+function fill(buffer: IndexedBuffer<Entry>, count: number): Entry[] {
+  const entries: Entry[] = [];
+  for (let id = 0; id < count; id++) {
+    const entry = {
+      id,
+      kind: id % 3 === 0 ? 'script' : 'image',
+      host: id % 2 === 0 ? 'a.test' : 'b.test',
+      time: 1000 + id * 10,
+    };
+    entries.push(entry);
+    buffer.push(entry);
+  }
+  return entries;
+}
+
+const ids = (entries: Entry[]) => entries.map(entry => entry.id);
+
+describe('IndexedBuffer', () => {
+  it('matches a linear scan for combined filters', () => {
+    const buffer = new IndexedBuffer(100, spec);
+    const entries = fill(buffer, 60);
+    const result = buffer.query({
+      where: {kind: ['script'], host: ['a.test', 'c.test']},
+      since: 1200,
+    });
+    const expected = entries.filter(
+      entry =>
+        entry.kind === 'script' &&
+        entry.host === 'a.test' &&
+        entry.time >= 1200,
+    );
+    assert.deepStrictEqual(ids(result.items), ids(expected));
+    assert.deepStrictEqual(result.seqs, ids(expected));
+    assert.strictEqual(result.hasMore, false);
+  });
+
+  it('pages with a cursor that survives new entries and eviction', () => {
+    const buffer = new IndexedBuffer(10, spec);
+    fill(buffer, 8);
+    const first = buffer.query({where: {kind: ['image']}, limit: 2});
+    assert.deepStrictEqual(ids(first.items), [1, 2]);
+    assert.strictEqual(first.hasMore, true);
+
+    // 新条目到达并挤掉最旧的条目，游标之后的结果不受影响
+    buffer.push({id: 8, kind: 'image', host: 'a.test', time: 2000});
+    buffer.push({id: 9, kind: 'image', host: 'a.test', time: 2000});
+    buffer.push({id: 10, kind: 'image', host: 'a.test', time: 2000});
+    const next = buffer.query({
+      where: {kind: ['image']},
+      after: first.seqs.at(-1),
+      limit: 3,
+    });
+    assert.deepStrictEqual(ids(next.items), [4, 5, 7]);
+
+    const rest = buffer.query({where: {kind: ['image']}, after: next.seqs[2]});
+    assert.deepStrictEqual(ids(rest.items), [8, 9, 10]);
+    assert.strictEqual(rest.hasMore, false);
+  });
+
+  it('returns the newest matches in tail mode', () => {
+    const buffer = new IndexedBuffer(100, spec);
+    fill(buffer, 20);
+    const result = buffer.query({
+      where: {kind: ['script']},
+      limit: 2,
+      tail: true,
+    });
+    assert.deepStrictEqual(ids(result.items), [15, 18]);
+    assert.strictEqual(result.hasMore, true);
+  });
+
+  it('indexes late keys once their value is known', () => {
+    const buffer = new IndexedBuffer(100, spec);
+    const entries = fill(buffer, 5);
+    assert.deepStrictEqual(buffer.query({where: {status: ['2xx']}}).items, []);
+
+    entries[3].status = '2xx';
+    entries[1].status = '2xx';
+    entries[2].status = '4xx';
+    assert.deepStrictEqual(
+      ids(buffer.query({where: {status: ['2xx']}}).items),
+      [1, 3],
+    );
+    assert.deepStrictEqual(buffer.countBy('status'), {'2xx': 2, '4xx': 1});
+  });
+
+  it('drops evicted entries from the index', () => {
+    const buffer = new IndexedBuffer(50, spec);
+    fill(buffer, 5000);
+    assert.deepStrictEqual(buffer.countBy('host'), {
+      'a.test': 25,
+      'b.test': 25,
+    });
+    assert.strictEqual(buffer.query({since: 0}).items[0].id, 4950);
+
+    buffer.clear();
+    assert.deepStrictEqual(buffer.countBy('kind'), {});
+    assert.deepStrictEqual(buffer.query().items, []);
+  });
+
+  it('rejects unknown keys', () => {
+    const buffer = new IndexedBuffer(10, spec);
+    assert.throws(() => buffer.query({where: {method: ['GET']}}), /method/);
+  });
+});
@@ -0,0 +1,153 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+import assert from 'node:assert';
+import {mkdtemp, readFile} from 'node:fs/promises';
+import os from 'node:os';
+import path from 'node:path';
+import {describe, it} from 'node:test';
+
+import {
+  fnv1a,
+  payloadSize,
+  WebSocketCaptureFile,
+  type WebSocketFrameInput,
+  WebSocketFrameStore,
+} from '../../src/collectors/WebSocketFrameStore.js';
+
+function frame(
+  seq: number,
+  overrides: Partial<WebSocketFrameInput> = {},
+): WebSocketFrameInput {
+  return {
+    connectionId: 'ws-1',
+    direction: seq % 2 ? 'received' : 'sent',
+    timestamp: 100 + seq,
+    opcode: 1,
+    mask: seq % 2 === 0,
+    payloadData: `message ${seq}`,
+    ...overrides,
+  };
+}
+
+describe('WebSocketFrameStore', () => {
+  it('keeps the most recent frames in order', () => {
+    const store = new WebSocketFrameStore(3);
+    for (let i = 0; i < 5; i++) {
+      store.add(frame(i));
+    }
+    assert.deepStrictEqual(
+      store.toArray().map(f => f.preview),
+      ['message 2', 'message 3', 'message 4'],
+    );
+    assert.deepStrictEqual(
+      store.toArray(2).map(f => f.preview),
+      ['message 3', 'message 4'],
+    );
+    assert.strictEqual(store.length, 3);
+    assert.strictEqual(store.totalFrames, 5);
+    assert.strictEqual(store.droppedFrames, 2);
+
+    const [first] = store.toArray();
+    assert.strictEqual(first.direction, 'sent');
+    assert.strictEqual(first.mask, true);
+    assert.strictEqual(first.timestamp, 102);
+    assert.strictEqual(first.size, 9);
+    assert.strictEqual(
+      first.hash,
+      fnv1a('message 2').toString(16).padStart(8, '0'),
+    );
+  });
+
+  it('truncates payloads and hashes the full payload', () => {
+    const store = new WebSocketFrameStore(2, {previewLength: 4});
+    const payloadData = 'x'.repeat(1000);
+    store.add(frame(0, {payloadData}));
+
+    const [stored] = store.toArray();
+    assert.strictEqual(stored.preview, 'xxxx');
+    assert.strictEqual(stored.truncated, true);
+    assert.strictEqual(stored.size, 1000);
+    assert.strictEqual(
+      stored.hash,
+      fnv1a(payloadData).toString(16).padStart(8, '0'),
+    );
+  });
+
+  it('does not split surrogate pairs in previews', () => {
+    const store = new WebSocketFrameStore(1, {previewLength: 2});
+    store.add(frame(0, {payloadData: 'a😀bc'}));
+    assert.strictEqual(store.toArray()[0].preview, 'a');
+  });
+
+  it('aggregates every frame per connection, including overwritten ones', () => {
+    const store = new WebSocketFrameStore(1);
+    store.setUrl('ws-1', 'wss://example.com/chat');
+    store.add(frame(0, {payloadData: 'héllo'}));
+    store.add(frame(1, {opcode: 2, payloadData: 'AAECAw=='}));
+    store.add(frame(2, {opcode: 9, payloadData: ''}));
+    store.add(frame(3, {connectionId: 'ws-2'}));
+
+    assert.strictEqual(store.totalFrames, 4);
+    assert.strictEqual(store.toArray()[0].connectionId, 'ws-2');
+    const [chat, other] = store.connections();
+    assert.deepStrictEqual(chat, {
+      connectionId: 'ws-1',
+      url: 'wss://example.com/chat',
+      sentFrames: 2,
+      receivedFrames: 1,
+      sentBytes: 6,
+      receivedBytes: 4,
+      opcodes: {1: 1, 2: 1, 9: 1},
+      firstTimestamp: 100,
+      lastTimestamp: 102,
+    });
+    assert.strictEqual(other.url, undefined);
+
+    const totals = store.totals();
+    assert.strictEqual(totals.sentFrames, 2);
+    assert.strictEqual(totals.receivedFrames, 2);
+    assert.deepStrictEqual(totals.opcodes, {1: 2, 2: 1, 9: 1});
+    assert.strictEqual(totals.firstTimestamp, 100);
+    assert.strictEqual(totals.lastTimestamp, 103);
+  });
+
+  it('computes decoded sizes of base64 payloads', () => {
+    assert.strictEqual(payloadSize(2, ''), 0);
+    assert.strictEqual(payloadSize(2, 'AA=='), 1);
+    assert.strictEqual(payloadSize(2, 'AAA='), 2);
+    assert.strictEqual(payloadSize(2, 'AAAA'), 3);
+    assert.strictEqual(payloadSize(1, '😀'), 4);
+  });
+});
+
+describe('WebSocketCaptureFile', () => {
+  it('streams full frames as JSON lines', async () => {
+    const dir = await mkdtemp(path.join(os.tmpdir(), 'ws-capture-'));
+    const file = new WebSocketCaptureFile(path.join(dir, 'frames.jsonl'));
+    const payloadData = 'y'.repeat(500);
+    file.write(frame(0, {payloadData}), 'wss://example.com');
+    file.write(frame(1));
+    await file.close();
+
+    const lines = (await readFile(file.filename, 'utf8')).trim().split('\n');
+    assert.strictEqual(file.written, 2);
+    assert.strictEqual(file.dropped, 0);
+    assert.deepStrictEqual(JSON.parse(lines[0]), {
+      ...frame(0, {payloadData}),
+      url: 'wss://example.com',
+    });
+    assert.strictEqual(JSON.parse(lines[1]).payloadData, 'message 1');
+  });
+
+  it('reports write errors on close', async () => {
+    const file = new WebSocketCaptureFile(
+      path.join(os.tmpdir(), 'missing-dir-for-ws-capture', 'frames.jsonl'),
+    );
+    file.write(frame(0));
+    await assert.rejects(file.close(), /Could not write WebSocket capture/);
+  });
+});
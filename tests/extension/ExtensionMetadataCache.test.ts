@@ -0,0 +1,126 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+import assert from 'node:assert';
+import {EventEmitter} from 'node:events';
+import {describe, it} from 'node:test';
+
+import type {Browser} from 'puppeteer';
+import sinon from 'sinon';
+
+import {
+  ExtensionMetadataCache,
+  compileMatchPattern,
+} from '../../src/extension/ExtensionMetadataCache.js';
+import type {ExtensionInfo, ManifestV3} from '../../src/extension/types.js';
+
+const EXT_ID = 'abcdefghijklmnopabcdefghijklmnop';
+
+function manifest(version: string): ManifestV3 {
+  return {manifest_version: 3, name: 'Test', version} as ManifestV3;
+}
+
+function extension(version: string): ExtensionInfo {
+  return {
+    id: EXT_ID,
+    name: 'Test',
+    version,
+    manifestVersion: 3,
+    enabled: true,
+  };
+}
+
+function setup() {
+  const browser = new EventEmitter();
+  const cache = new ExtensionMetadataCache(browser as unknown as Browser);
+  const target = (url: string) => ({url: () => url});
+  return {browser, cache, target};
+}
+
+describe('ExtensionMetadataCache', () => {
+  it('reloads the manifest only when the version changes', async () => {
+    const {cache} = setup();
+    const load = sinon.stub();
+    load.onFirstCall().resolves(manifest('1.0'));
+    load.onSecondCall().resolves(manifest('1.1'));
+
+    await cache.getManifest(EXT_ID, '1.0', load);
+    await cache.getManifest(EXT_ID, '1.0', load);
+    await cache.getManifest(EXT_ID, undefined, load);
+    const updated = await cache.getManifest(EXT_ID, '1.1', load);
+
+    assert.strictEqual(updated?.version, '1.1');
+    assert.strictEqual(load.callCount, 2);
+    assert.deepStrictEqual(cache.getStats().manifests, {hits: 2, misses: 2});
+  });
+
+  it('drops the extension list when an extension target changes', async () => {
+    const {browser, cache, target} = setup();
+    const load = sinon.stub().resolves([extension('1.0')]);
+
+    await cache.getExtensions(false, load);
+    await cache.getExtensions(false, load);
+    browser.emit('targetchanged', target('https://example.com/'));
+    await cache.getExtensions(false, load);
+    assert.strictEqual(load.callCount, 1);
+
+    const worker = target(`chrome-extension://${EXT_ID}/sw.js`);
+    browser.emit('targetdestroyed', worker);
+    await cache.getExtensions(false, load);
+    assert.strictEqual(load.callCount, 2);
+    assert.deepStrictEqual(cache.getStats().discovery, {hits: 2, misses: 2});
+  });
+
+  it('does not keep an empty extension list', async () => {
+    const {cache} = setup();
+    const load = sinon.stub().resolves([]);
+    await cache.getExtensions(true, load);
+    await cache.getExtensions(true, load);
+    assert.strictEqual(load.callCount, 2);
+  });
+
+  it('compiles each match pattern once per extension version', () => {
+    const {cache} = setup();
+    const first = cache.getMatcher(extension('1.0'), '*://*.example.com/*');
+    assert.strictEqual(
+      cache.getMatcher(extension('1.0'), '*://*.example.com/*'),
+      first,
+    );
+    assert.notStrictEqual(
+      cache.getMatcher(extension('2.0'), '*://*.example.com/*'),
+      first,
+    );
+    assert.deepStrictEqual(cache.getStats().matchPatterns, {
+      hits: 1,
+      misses: 2,
+    });
+  });
+
+  it('invalidates everything for a reloaded extension', async () => {
+    const {cache} = setup();
+    const load = sinon.stub().resolves(manifest('1.0'));
+    await cache.getManifest(EXT_ID, '1.0', load);
+    cache.invalidate(EXT_ID);
+    await cache.getManifest(EXT_ID, '1.0', load);
+    assert.strictEqual(load.callCount, 2);
+  });
+});
+
+describe('compileMatchPattern', () => {
+  it('matches scheme, host and path', () => {
+    const matches = (pattern: string, url: string) =>
+      compileMatchPattern(pattern)(new URL(url));
+
+    assert.ok(matches('*://*.example.com/*', 'https://a.example.com/x'));
+    assert.ok(matches('*://*.example.com/*', 'http://example.com/'));
+    assert.ok(!matches('https://example.com/*', 'http://example.com/'));
+    assert.ok(matches('https://example.com/a/*', 'https://example.com/a/b'));
+    assert.ok(!matches('https://example.com/a/*', 'https://example.com/b'));
+    assert.ok(matches('<all_urls>', 'file:///tmp/x.html'));
+    assert.ok(!matches('<all_urls>', 'chrome://extensions/'));
+    assert.ok(!matches('not a pattern', 'https://example.com/'));
+  });
+});
@@ -0,0 +1,232 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+import assert from 'node:assert';
+import {describe, it} from 'node:test';
+
+import type {CDPSession, Protocol} from 'puppeteer-core';
+
+import {EnhancedObjectSerializer} from '../../src/formatters/EnhancedObjectSerializer.js';
+
+/**
+ * 用当前进程中的真实对象模拟页面：
+ * getProperties 读取自有属性，callFunctionOn 在本地执行函数声明并按值返回
+ */
+function localPage() {
+  const objects = new Map<string, unknown>();
+  const sent: string[] = [];
+  let failCallFunctionOn = false;
+
+  const remote = (value: unknown): Protocol.Runtime.RemoteObject => {
+    if (value === null) {
+      return {type: 'object', subtype: 'null', value: null};
+    }
+    if (typeof value !== 'object' && typeof value !== 'function') {
+      return {type: typeof value, value} as Protocol.Runtime.RemoteObject;
+    }
+    const objectId = String(objects.size + 1);
+    objects.set(objectId, value);
+    if (typeof value === 'function') {
+      return {type: 'function', description: value.toString(), objectId};
+    }
+    if (Array.isArray(value)) {
+      const description = `Array(${value.length})`;
+      return {type: 'object', subtype: 'array', description, objectId};
+    }
+    if (value instanceof Error) {
+      return {type: 'object', subtype: 'error', description: value.stack};
+    }
+    if (value instanceof Map) {
+      const description = `Map(${value.size})`;
+      return {type: 'object', subtype: 'map', description, objectId};
+    }
+    if (value instanceof Date) {
+      const description = String(value);
+      return {type: 'object', subtype: 'date', description, objectId};
+    }
+    return {type: 'object', description: 'Object', objectId};
+  };
+
+  const send = async (
+    method: string,
+    params: {
+      objectId: string;
+      functionDeclaration?: string;
+      arguments?: Array<{value: unknown}>;
+    },
+  ) => {
+    sent.push(method);
+    const target = objects.get(params.objectId) as object;
+    if (method === 'Runtime.callFunctionOn') {
+      if (failCallFunctionOn) {
+        throw new Error('Protocol error: Execution context was destroyed');
+      }
+      const fn = new Function(`return (${params.functionDeclaration})`)();
+      const value = fn.apply(
+        target,
+        params.arguments?.map(arg => arg.value),
+      );
+      return {result: {type: 'object', value: structuredClone(value)}};
+    }
+    if (method === 'Runtime.getProperties') {
+      return {
+        result: Object.getOwnPropertyNames(target).map(name => {
+          const descriptor = Object.getOwnPropertyDescriptor(target, name)!;
+          return {
+            name,
+            value: 'value' in descriptor ? remote(descriptor.value) : undefined,
+          };
+        }),
+      };
+    }
+    return {};
+  };
+
+  return {
+    session: {send} as unknown as CDPSession,
+    remote,
+    sent,
+    failInPage() {
+      failCallFunctionOn = true;
+    },
+  };
+}
+
+const graph = {
+  name: 'root',
+  count: 3,
+  enabled: true,
+  nothing: null,
+  tags: ['a', 'b', {nested: 1}],
+  lookup: new Map([['k', 1]]),
+  when: new Date(0),
+  handler: function onClick(event: unknown) {
+    return event;
+  },
+  child: {level: 1, child: {level: 2, child: {level: 3, child: {level: 4}}}},
+};
+
+describe('EnhancedObjectSerializer', () => {
+  it('serializes in one round trip with the same output as properties mode', async () => {
+    const inPage = localPage();
+    const inPageValue = await new EnhancedObjectSerializer({
+      mode: 'in-page',
+    }).serialize(inPage.remote(graph), inPage.session);
+
+    const properties = localPage();
+    const propertiesValue = await new EnhancedObjectSerializer({
+      mode: 'properties',
+    }).serialize(properties.remote(graph), properties.session);
+
+    assert.deepStrictEqual(inPageValue, propertiesValue);
+    assert.deepStrictEqual(inPage.sent, ['Runtime.callFunctionOn']);
+    assert.ok(properties.sent.length > 5);
+  });
+
+  it('marks circular references', async () => {
+    const page = localPage();
+    const node: Record<string, unknown> = {id: 1};
+    node.self = node;
+    node.list = [node];
+
+    const value = await new EnhancedObjectSerializer({
+      mode: 'in-page',
+    }).serialize(page.remote(node), page.session);
+
+    assert.deepStrictEqual(value, {
+      id: 1,
+      self: '[Circular]',
+      list: ['[Circular]'],
+    });
+  });
+
+  it('truncates wide objects and long strings', async () => {
+    const page = localPage();
+    const value = await new EnhancedObjectSerializer({
+      mode: 'in-page',
+      maxEntries: 2,
+      maxStringLength: 3,
+    }).serialize(
+      page.remote({items: [1, 2, 3, 4], text: 'abcdef'}),
+      page.session,
+    );
+
+    assert.deepStrictEqual(value, {
+      items: [1, 2, '[… 2 more]'],
+      text: 'abc…',
+    });
+  });
+
+  it('reports error names from the prototype', async () => {
+    const page = localPage();
+    const error = new TypeError('boom');
+    const value = await new EnhancedObjectSerializer({
+      mode: 'in-page',
+    }).serialize(page.remote({error}), page.session);
+
+    assert.deepStrictEqual(value, {
+      error: {
+        __type: 'Error',
+        name: 'TypeError',
+        message: 'boom',
+        stack: error.stack,
+      },
+    });
+  });
+
+  it('falls back to Runtime.getProperties when the page call fails', async () => {
+    const page = localPage();
+    page.failInPage();
+    const value = await new EnhancedObjectSerializer({
+      mode: 'in-page',
+    }).serialize(page.remote({a: 1, b: ['x']}), page.session);
+
+    assert.deepStrictEqual(value, {a: 1, b: ['x']});
+    assert.strictEqual(page.sent[0], 'Runtime.callFunctionOn');
+    assert.ok(page.sent.includes('Runtime.getProperties'));
+  });
+
+  it('falls back to Runtime.getProperties when a nested proxy trap throws', async () => {
+    const page = localPage();
+    const inner = new Proxy(
+      {},
+      {
+        ownKeys() {
+          throw new Error('trap');
+        },
+      },
+    );
+    const value = await new EnhancedObjectSerializer({
+      mode: 'in-page',
+    }).serialize(page.remote({a: 1, inner}), page.session);
+
+    assert.deepStrictEqual(value, {a: 1, inner: {}});
+    assert.strictEqual(page.sent[0], 'Runtime.callFunctionOn');
+    assert.ok(page.sent.includes('Runtime.getProperties'));
+  });
+
+  // 已知限制：页面内无法识别嵌套的 Proxy，遍历时会执行它的 trap
+  it('runs traps of nested proxies in in-page mode', async () => {
+    const page = localPage();
+    const traps: string[] = [];
+    const inner = new Proxy(
+      {b: 2},
+      {
+        ownKeys(target) {
+          traps.push('ownKeys');
+          return Reflect.ownKeys(target);
+        },
+      },
+    );
+    const value = await new EnhancedObjectSerializer({
+      mode: 'in-page',
+    }).serialize(page.remote({a: 1, inner}), page.session);
+
+    assert.deepStrictEqual(value, {a: 1, inner: {b: 2}});
+    assert.deepStrictEqual(page.sent, ['Runtime.callFunctionOn']);
+    assert.deepStrictEqual(traps, ['ownKeys']);
+  });
+});
@@ -0,0 +1,113 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+import assert from 'node:assert';
+import {performance} from 'node:perf_hooks';
+import {describe, it, afterEach} from 'node:test';
+
+import puppeteer from 'puppeteer-core';
+import type {Browser} from 'puppeteer-core';
+import sinon from 'sinon';
+
+import {BrowserConnectionPool} from '../../src/multi-tenant/core/BrowserConnectionPool.js';
+
+function fakeBrowser(version: () => Promise<string>) {
+  return {
+    isConnected: () => true,
+    version: sinon.spy(version),
+    once: () => undefined,
+    removeAllListeners: () => undefined,
+    disconnect: async () => undefined,
+  };
+}
+
+async function connectAll(
+  pool: BrowserConnectionPool,
+  users: string[],
+  version: () => Promise<string> = async () => 'Chrome/1',
+) {
+  const browsers = users.map(() => fakeBrowser(version));
+  const connect = sinon.stub(puppeteer, 'connect');
+  browsers.forEach((browser, i) =>
+    connect.onCall(i).resolves(browser as unknown as Browser),
+  );
+  for (const user of users) {
+    await pool.connect(user, 'http://127.0.0.1:9222');
+  }
+  return browsers;
+}
+
+describe('BrowserConnectionPool health checks', () => {
+  afterEach(() => {
+    sinon.restore();
+  });
+
+  it('skips connections with recent CDP activity', async () => {
+    const pool = new BrowserConnectionPool();
+    const [a, b] = await connectAll(pool, ['a', 'b']);
+    pool.recordActivity('a');
+    await pool.healthCheckAll();
+
+    assert.strictEqual(a.version.callCount, 0);
+    assert.strictEqual(b.version.callCount, 1);
+    const stats = pool.getStats().healthChecks;
+    assert.strictEqual(stats.cycles, 1);
+    assert.strictEqual(stats.checked, 1);
+    assert.strictEqual(stats.skipped, 1);
+    assert.deepStrictEqual(
+      {checked: stats.lastCycle?.checked, skipped: stats.lastCycle?.skipped},
+      {checked: 1, skipped: 1},
+    );
+  });
+
+  it('caps the number of concurrent checks', async () => {
+    const pool = new BrowserConnectionPool({healthCheckConcurrency: 2});
+    const pending: Array<() => void> = [];
+    const browsers = await connectAll(
+      pool,
+      ['a', 'b', 'c', 'd', 'e'],
+      () =>
+        new Promise(resolve => {
+          pending.push(() => resolve('Chrome/1'));
+        }),
+    );
+    const cycle = pool.healthCheckAll();
+    let maxInFlight = 0;
+    while (browsers.some(browser => browser.version.callCount === 0)) {
+      await new Promise(resolve => setImmediate(resolve));
+      const {inFlight} = pool.getStats().healthChecks;
+      maxInFlight = Math.max(maxInFlight, inFlight);
+      pending.shift()?.();
+    }
+    pending.forEach(resolve => resolve());
+    await cycle;
+    assert.strictEqual(maxInFlight, 2);
+  });
+
+  it('spreads one cycle over the requested time', async () => {
+    const pool = new BrowserConnectionPool();
+    const calls: number[] = [];
+    await connectAll(pool, ['a', 'b', 'c', 'd'], async () => {
+      calls.push(performance.now());
+      return 'Chrome/1';
+    });
+    await pool.healthCheckAll(200);
+
+    assert.strictEqual(calls.length, 4);
+    // 第 i 个检查在 i * 50ms 之后开始
+    assert.ok(calls[3] - calls[0] >= 140, `${calls[3] - calls[0]}ms`);
+  });
+
+  it('marks a connection whose probe fails as disconnected', async () => {
+    const pool = new BrowserConnectionPool();
+    await connectAll(pool, ['a'], async () => {
+      throw new Error('socket hang up');
+    });
+    assert.strictEqual(await pool.healthCheck('a'), false);
+    assert.strictEqual(pool.getConnection('a')?.status, 'disconnected');
+    assert.strictEqual(pool.getStats().healthChecks.failed, 1);
+  });
+});
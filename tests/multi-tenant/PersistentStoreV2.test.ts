@@ -0,0 +1,146 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+import assert from 'node:assert';
+import fs from 'node:fs';
+import os from 'node:os';
+import path from 'node:path';
+import {describe, it, beforeEach, afterEach} from 'node:test';
+
+import {PersistentStoreV2} from '../../src/multi-tenant/storage/PersistentStoreV2.js';
+
+function readLines(file: string): string[] {
+  return fs
+    .readFileSync(file, 'utf8')
+    .split('\n')
+    .filter(line => line.trim());
+}
+
+describe('PersistentStoreV2', () => {
+  let dataDir: string;
+  let logFile: string;
+
+  beforeEach(() => {
+    dataDir = fs.mkdtempSync(path.join(os.tmpdir(), 'store-v2-'));
+    logFile = path.join(dataDir, 'store-v2.jsonl');
+  });
+
+  afterEach(() => {
+    fs.rmSync(dataDir, {recursive: true, force: true});
+  });
+
+  /** 按时间戳排序的备份文件名 */
+  function backups(): string[] {
+    return fs
+      .readdirSync(dataDir)
+      .filter(name => /^store-v2\.jsonl\.\d+\.bak$/.test(name))
+      .sort(
+        (a, b) => Number(a.split('.').at(-2)) - Number(b.split('.').at(-2)),
+      );
+  }
+
+  it('replays a compacted log as snapshot plus tail', async () => {
+    const store = new PersistentStoreV2({dataDir, autoCompaction: false});
+    await store.initialize();
+    const user = await store.registerUserByEmail('a@example.com');
+    const browser = await store.bindBrowser(user.userId, 'http://b:9222');
+    await store.incrementToolCallCount(browser.browserId);
+    await store.compact();
+    await store.incrementToolCallCount(browser.browserId);
+    await store.close();
+
+    const lines = readLines(logFile);
+    assert.strictEqual(lines.length, 2);
+    assert.strictEqual(JSON.parse(lines[0]).op, 'snapshot');
+    assert.strictEqual(backups().length, 1);
+
+    const reloaded = new PersistentStoreV2({dataDir, autoCompaction: false});
+    await reloaded.initialize();
+    assert.strictEqual(reloaded.getStats().logLines, 2);
+    assert.strictEqual(
+      reloaded.getBrowserById(browser.browserId)?.toolCallCount,
+      2,
+    );
+    await reloaded.close();
+  });
+
+  it('keeps only the newest timestamped backups', async () => {
+    const store = new PersistentStoreV2({
+      dataDir,
+      autoCompaction: false,
+      maxBackups: 2,
+    });
+    await store.initialize();
+    const user = await store.registerUserByEmail('a@example.com');
+    const browser = await store.bindBrowser(user.userId, 'http://b:9222');
+    const created: string[] = [];
+    for (let i = 0; i < 4; i++) {
+      await store.incrementToolCallCount(browser.browserId);
+      await store.compact();
+      created.push(...backups().filter(name => !created.includes(name)));
+    }
+    await store.close();
+
+    assert.strictEqual(created.length, 4);
+    assert.deepStrictEqual(backups(), created.slice(-2));
+  });
+
+  it('keeps writes issued during background compaction', async () => {
+    const store = new PersistentStoreV2({dataDir, snapshotThreshold: 5});
+    await store.initialize();
+    const user = await store.registerUserByEmail('a@example.com');
+    const browser = await store.bindBrowser(user.userId, 'http://b:9222');
+    await Promise.all(
+      Array.from({length: 20}, () =>
+        store.incrementToolCallCount(browser.browserId),
+      ),
+    );
+    await store.close();
+
+    const reloaded = new PersistentStoreV2({dataDir, autoCompaction: false});
+    await reloaded.initialize();
+    assert.strictEqual(
+      reloaded.getBrowserById(browser.browserId)?.toolCallCount,
+      20,
+    );
+    assert.ok(reloaded.getStats().logLines < 22);
+    await reloaded.close();
+  });
+
+  it('writes a usage batch as one log line', async () => {
+    const store = new PersistentStoreV2({dataDir, autoCompaction: false});
+    await store.initialize();
+    const user = await store.registerUserByEmail('a@example.com');
+    const browser = await store.bindBrowser(user.userId, 'http://b:9222');
+    await store.recordUsage([
+      {browserId: browser.browserId, toolCalls: 7, lastConnectedAt: 42},
+      {browserId: 'unknown', toolCalls: 1},
+    ]);
+    await store.close();
+    assert.strictEqual(readLines(logFile).length, 3);
+
+    const reloaded = new PersistentStoreV2({dataDir, autoCompaction: false});
+    await reloaded.initialize();
+    const record = reloaded.getBrowserById(browser.browserId);
+    assert.strictEqual(record?.toolCallCount, 7);
+    assert.strictEqual(record?.lastConnectedAt, 42);
+    await reloaded.close();
+  });
+
+  it('recovers from a compaction interrupted between renames', async () => {
+    const store = new PersistentStoreV2({dataDir, autoCompaction: false});
+    await store.initialize();
+    const user = await store.registerUserByEmail('a@example.com');
+    await store.close();
+    fs.renameSync(logFile, `${logFile}.compacting`);
+
+    const reloaded = new PersistentStoreV2({dataDir, autoCompaction: false});
+    await reloaded.initialize();
+    assert.ok(reloaded.hasUser(user.userId));
+    assert.ok(!fs.existsSync(`${logFile}.compacting`));
+    await reloaded.close();
+  });
+});
@@ -0,0 +1,38 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+import assert from 'node:assert';
+import {afterEach, describe, it} from 'node:test';
+
+import sinon from 'sinon';
+
+import {PostgreSQLStorageAdapter} from '../../src/multi-tenant/storage/PostgreSQLStorageAdapter.js';
+
+describe('PostgreSQLStorageAdapter', () => {
+  afterEach(() => {
+    sinon.restore();
+  });
+
+  it('binds every parameter referenced by incrementToolCallCount', async () => {
+    // pg.Pool 在第一次查询时才连接，这里直接替换 query
+    const adapter = new PostgreSQLStorageAdapter({
+      host: 'localhost',
+      port: 5432,
+      database: 'test',
+      user: 'test',
+      password: 'test',
+    });
+    // eslint-disable-next-line @typescript-eslint/no-explicit-any
+    const query = sinon.stub((adapter as any).pool, 'query').resolves({});
+
+    await adapter.incrementToolCallCount('browser-1');
+
+    const [sql, values] = query.firstCall.args as [string, unknown[]];
+    const referenced = new Set(sql.match(/\$\d+/g));
+    assert.deepStrictEqual(values, ['browser-1']);
+    assert.deepStrictEqual([...referenced], ['$1']);
+  });
+});
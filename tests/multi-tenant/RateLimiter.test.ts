@@ -0,0 +1,147 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+import assert from 'node:assert';
+import {afterEach, beforeEach, describe, it} from 'node:test';
+
+import sinon from 'sinon';
+
+import {RateLimitError} from '../../src/multi-tenant/errors/AppError.js';
+import {
+  GcraRateLimiter,
+  PerUserRateLimiter,
+  RateLimiter,
+  SlidingWindowRateLimiter,
+} from '../../src/multi-tenant/utils/RateLimiter.js';
+
+describe('RateLimiter', () => {
+  let clock: sinon.SinonFakeTimers;
+
+  beforeEach(() => {
+    clock = sinon.useFakeTimers({now: 1_000_000});
+  });
+
+  afterEach(() => {
+    clock.restore();
+  });
+
+  describe('SlidingWindowRateLimiter', () => {
+    it('limits requests within the window', () => {
+      const limiter = new SlidingWindowRateLimiter(3, 1000);
+      assert.ok(limiter.tryAcquire());
+      assert.ok(limiter.tryAcquire());
+      assert.ok(limiter.tryAcquire());
+      assert.strictEqual(limiter.tryAcquire(), false);
+      assert.strictEqual(limiter.getStats().currentRequests, 3);
+    });
+
+    it('expires requests bucket by bucket', () => {
+      const limiter = new SlidingWindowRateLimiter(2, 1000, 10);
+      assert.ok(limiter.tryAcquire());
+      clock.tick(500);
+      assert.ok(limiter.tryAcquire());
+      assert.strictEqual(limiter.tryAcquire(), false);
+
+      // 第一个请求所在的桶滑出窗口，第二个仍在窗口内
+      clock.tick(500);
+      assert.strictEqual(limiter.getStats().currentRequests, 1);
+      assert.ok(limiter.tryAcquire());
+      assert.strictEqual(limiter.tryAcquire(), false);
+      assert.strictEqual(limiter.isIdle(), false);
+
+      clock.tick(1000);
+      assert.strictEqual(limiter.isIdle(), true);
+    });
+
+    it('throws RateLimitError from acquire()', async () => {
+      const limiter = new SlidingWindowRateLimiter(1, 1000);
+      await limiter.acquire();
+      await assert.rejects(limiter.acquire(), RateLimitError);
+    });
+  });
+
+  describe('GcraRateLimiter', () => {
+    it('allows a burst and then the sustained rate', () => {
+      const limiter = new GcraRateLimiter({burst: 3, ratePerSecond: 10});
+      assert.ok(limiter.tryAcquire());
+      assert.ok(limiter.tryAcquire());
+      assert.ok(limiter.tryAcquire());
+      assert.strictEqual(limiter.tryAcquire(), false);
+      assert.strictEqual(limiter.retryAfterMs(), 100);
+
+      clock.tick(100);
+      assert.ok(limiter.tryAcquire());
+      assert.strictEqual(limiter.tryAcquire(), false);
+    });
+
+    it('matches the token bucket with the same parameters', () => {
+      const gcra = new GcraRateLimiter({burst: 5, ratePerSecond: 20});
+      const bucket = new RateLimiter({maxTokens: 5, refillRate: 20});
+      // 以 50ms（一个发射间隔）为步长，令牌桶的浮点补充量是精确的整数
+      for (let i = 0; i < 200; i++) {
+        clock.tick(((i * 7) % 4) * 50);
+        assert.strictEqual(gcra.tryAcquire(), bucket.tryAcquire(), `#${i}`);
+        assert.strictEqual(
+          gcra.getAvailableTokens(),
+          bucket.getAvailableTokens(),
+          `#${i}`,
+        );
+      }
+    });
+
+    it('becomes idle once the backlog has drained', () => {
+      const limiter = new GcraRateLimiter({burst: 10, ratePerSecond: 10});
+      assert.ok(limiter.isIdle());
+      limiter.tryAcquire(2);
+      assert.strictEqual(limiter.isIdle(), false);
+      clock.tick(200);
+      assert.ok(limiter.isIdle());
+    });
+  });
+
+  describe('PerUserRateLimiter', () => {
+    it('keeps separate limits per user', () => {
+      const limiter = new PerUserRateLimiter(
+        () => new GcraRateLimiter({burst: 1, ratePerSecond: 1}),
+      );
+      try {
+        assert.ok(limiter.tryAcquire('a'));
+        assert.strictEqual(limiter.tryAcquire('a'), false);
+        assert.ok(limiter.tryAcquire('b'));
+        assert.strictEqual(limiter.getStats().totalUsers, 2);
+      } finally {
+        limiter.stop();
+      }
+    });
+
+    it('evicts only idle limiters, one shard per tick', () => {
+      const limiter = new PerUserRateLimiter(
+        () => new GcraRateLimiter({burst: 1, ratePerSecond: 0.001}),
+        4000,
+        4,
+      );
+      try {
+        const users = Array.from({length: 20}, (_, i) => `user-${i}`);
+        for (const user of users) {
+          assert.ok(limiter.tryAcquire(user));
+        }
+
+        // 所有分片都扫描过一遍，但仍在限流中的用户不会被重置
+        clock.tick(4000);
+        assert.strictEqual(limiter.getStats().totalUsers, users.length);
+        for (const user of users) {
+          assert.strictEqual(limiter.tryAcquire(user), false);
+        }
+
+        clock.tick(2_000_000);
+        assert.strictEqual(limiter.getStats().totalUsers, 0);
+        assert.strictEqual(limiter.getStats().evicted, users.length);
+      } finally {
+        limiter.stop();
+      }
+    });
+  });
+});
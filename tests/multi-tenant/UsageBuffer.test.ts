@@ -0,0 +1,87 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+import assert from 'node:assert';
+import {describe, it} from 'node:test';
+
+import {
+  UsageBuffer,
+  type BrowserUsageUpdate,
+} from '../../src/multi-tenant/storage/UsageBuffer.js';
+
+function recorder() {
+  const batches: BrowserUsageUpdate[][] = [];
+  const write = async (updates: BrowserUsageUpdate[]) => {
+    batches.push(updates.map(update => ({...update})));
+  };
+  return {batches, write};
+}
+
+describe('UsageBuffer', () => {
+  it('coalesces records per browser into one write', async () => {
+    const {batches, write} = recorder();
+    const buffer = new UsageBuffer(write, {
+      flushIntervalMs: 60_000,
+      maxPending: 100,
+    });
+    buffer.recordToolCall('a');
+    buffer.recordToolCall('a');
+    buffer.recordConnected('a', 5);
+    buffer.recordConnected('a', 3);
+    buffer.recordToolCall('b');
+    await buffer.close();
+
+    assert.deepStrictEqual(batches, [
+      [
+        {browserId: 'a', toolCalls: 2, lastConnectedAt: 5},
+        {browserId: 'b', toolCalls: 1},
+      ],
+    ]);
+    assert.deepStrictEqual(buffer.getStats(), {
+      toolCalls: 3,
+      connections: 2,
+      flushes: 1,
+      failedFlushes: 0,
+      pending: 0,
+    });
+  });
+
+  it('flushes as soon as maxPending records are buffered', async () => {
+    const {batches, write} = recorder();
+    const buffer = new UsageBuffer(write, {
+      flushIntervalMs: 60_000,
+      maxPending: 3,
+    });
+    for (let i = 0; i < 3; i++) {
+      buffer.recordToolCall('a');
+    }
+    await buffer.flush();
+    assert.deepStrictEqual(batches, [[{browserId: 'a', toolCalls: 3}]]);
+  });
+
+  it('keeps a failed batch for the next flush', async () => {
+    let fail = true;
+    const written: BrowserUsageUpdate[][] = [];
+    const buffer = new UsageBuffer(
+      async updates => {
+        if (fail) {
+          throw new Error('disk full');
+        }
+        written.push(updates);
+      },
+      {flushIntervalMs: 60_000, maxPending: 100},
+    );
+    buffer.recordToolCall('a');
+    await buffer.flush();
+    assert.strictEqual(buffer.getStats().pending, 1);
+
+    fail = false;
+    buffer.recordToolCall('a');
+    await buffer.close();
+    assert.deepStrictEqual(written, [[{browserId: 'a', toolCalls: 2}]]);
+    assert.strictEqual(buffer.getStats().failedFlushes, 1);
+  });
+});
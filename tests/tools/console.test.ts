@@ -4,12 +4,39 @@
  * SPDX-License-Identifier: Apache-2.0
  */
 import assert from 'node:assert';
-import {describe, it} from 'node:test';
+import {afterEach, describe, it} from 'node:test';
 
+import sinon from 'sinon';
+
+import {
+  type ConsoleLog,
+  EnhancedConsoleCollector,
+} from '../../src/collectors/EnhancedConsoleCollector.js';
 import {consoleTool} from '../../src/tools/console.js';
 import {withBrowser} from '../utils.js';
 
+function collectorWithLogs(count: number): EnhancedConsoleCollector {
+  const collector = new EnhancedConsoleCollector();
+  // eslint-disable-next-line @typescript-eslint/no-explicit-any
+  const logs = (collector as any).logs;
+  for (let i = 0; i < count; i++) {
+    logs.push({
+      type: 'log',
+      args: [],
+      timestamp: 1000 + i,
+      executionContextId: 1,
+      text: `message ${i}`,
+      source: 'page',
+    } satisfies ConsoleLog);
+  }
+  return collector;
+}
+
 describe('console', () => {
+  afterEach(() => {
+    sinon.restore();
+  });
+
   describe('list_console_messages', () => {
     it('list messages', async () => {
       await withBrowser(async (response, context) => {
@@ -17,5 +44,47 @@ describe('console', () => {
         assert.ok(response.includeConsoleData);
       });
     });
+
+    it('returns only the page of messages after the cursor', async () => {
+      await withBrowser(async (response, context) => {
+        sinon
+          .stub(context, 'getEnhancedConsoleCollector')
+          .returns(collectorWithLogs(5));
+
+        await consoleTool.handler(
+          {params: {cursor: 'c1', pageSize: 2}},
+          response,
+          context,
+        );
+
+        const text = response.responseLines.join('\n');
+        assert.ok(!response.includeConsoleData);
+        assert.ok(text.includes('**Next Cursor**: c3'));
+        assert.ok(text.includes('message 2'));
+        assert.ok(text.includes('message 3'));
+        for (const skipped of ['message 0', 'message 1', 'message 4']) {
+          assert.ok(!text.includes(skipped), skipped);
+        }
+      });
+    });
+
+    it('returns the next page when following the cursor', async () => {
+      await withBrowser(async (response, context) => {
+        sinon
+          .stub(context, 'getEnhancedConsoleCollector')
+          .returns(collectorWithLogs(5));
+
+        await consoleTool.handler(
+          {params: {cursor: 'c3', pageSize: 2}},
+          response,
+          context,
+        );
+
+        const text = response.responseLines.join('\n');
+        assert.ok(text.includes('message 4'));
+        assert.ok(!text.includes('message 3'));
+        assert.ok(text.includes('**Next Cursor**: c4 (no more messages yet)'));
+      });
+    });
   });
 });
@@ -13,11 +13,11 @@ import {
   startTrace,
   stopTrace,
 } from '../../src/tools/performance.js';
-import type {TraceResult} from '../../src/trace-processing/parse.js';
 import {
   parseRawTraceBuffer,
   traceResultIsSuccess,
 } from '../../src/trace-processing/parse.js';
+import {RecordedTrace} from '../../src/trace-processing/TraceWorkerPool.js';
 import {loadTraceAsBuffer} from '../trace-processing/fixtures/load.js';
 import {withBrowser} from '../utils.js';
 
@@ -140,13 +140,13 @@ describe('performance', () => {
   });
 
   describe('performance_analyze_insight', () => {
-    async function parseTrace(fileName: string): Promise<TraceResult> {
+    async function parseTrace(fileName: string): Promise<RecordedTrace> {
       const rawData = loadTraceAsBuffer(fileName);
       const result = await parseRawTraceBuffer(rawData);
       if (!traceResultIsSuccess(result)) {
         assert.fail(`Unexpected trace parse error: ${result.error}`);
       }
-      return result;
+      return RecordedTrace.fromTraceResult(result);
     }
 
     it('returns the information on the insight', async t => {
@@ -0,0 +1,87 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+import assert from 'node:assert';
+import {EventEmitter} from 'node:events';
+import {afterEach, describe, it} from 'node:test';
+
+import type {CDPSession} from 'puppeteer-core';
+import sinon from 'sinon';
+
+import {monitorWebSocketTraffic} from '../../src/tools/websocket-monitor.js';
+import {withBrowser} from '../utils.js';
+
+/**
+ * CDP session 替身：Network.enable 之后推送一个文本帧和一个 ping
+ */
+function fakeSession(): CDPSession {
+  const session = new EventEmitter();
+  return Object.assign(session, {
+    send: async (method: string) => {
+      if (method !== 'Network.enable') {
+        return;
+      }
+      setTimeout(() => {
+        session.emit('Network.webSocketCreated', {
+          requestId: 'ws-1',
+          url: 'wss://example.com/chat',
+        });
+        for (const [opcode, payloadData] of [
+          [1, 'hello'],
+          [9, ''],
+        ] as const) {
+          session.emit('Network.webSocketFrameReceived', {
+            requestId: 'ws-1',
+            timestamp: 100,
+            response: {opcode, mask: false, payloadData},
+          });
+        }
+      }, 10);
+    },
+    detach: async () => {},
+  }) as unknown as CDPSession;
+}
+
+describe('websocket-monitor', () => {
+  afterEach(() => {
+    sinon.restore();
+  });
+
+  async function monitor(includeControlFrames: boolean): Promise<string> {
+    let text = '';
+    await withBrowser(async (response, context) => {
+      const page = context.getSelectedPage();
+      sinon
+        .stub(page, 'target')
+        .returns({createCDPSession: async () => fakeSession()} as never);
+
+      await monitorWebSocketTraffic.handler(
+        {
+          params: {
+            duration: 100,
+            maxFrames: 10,
+            includeControlFrames,
+          },
+        },
+        response,
+        context,
+      );
+      text = response.responseLines.join('\n');
+    });
+    return text;
+  }
+
+  it('leaves control frames out of the summary by default', async () => {
+    const text = await monitor(false);
+    assert.ok(text.includes('**Total Frames**: 1'), text);
+    assert.ok(!text.includes('**ping**'), text);
+  });
+
+  it('counts control frames when includeControlFrames is set', async () => {
+    const text = await monitor(true);
+    assert.ok(text.includes('**Total Frames**: 2'), text);
+    assert.ok(text.includes('**ping**: 1'), text);
+  });
+});
@@ -0,0 +1,108 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+import assert from 'node:assert';
+import {describe, it} from 'node:test';
+
+import {
+  getTraceSummary,
+  parseRawTraceBuffer,
+  traceResultIsSuccess,
+} from '../../src/trace-processing/parse.js';
+import {
+  RecordedTrace,
+  TraceWorkerPool,
+} from '../../src/trace-processing/TraceWorkerPool.js';
+
+import {loadTraceAsBuffer} from './fixtures/load.js';
+
+async function withPool(
+  size: number,
+  cb: (pool: TraceWorkerPool) => Promise<void>,
+): Promise<void> {
+  const pool = new TraceWorkerPool(size);
+  try {
+    await cb(pool);
+  } finally {
+    await pool.dispose();
+  }
+}
+
+async function parseInWorker(
+  pool: TraceWorkerPool,
+  fileName: string,
+): Promise<RecordedTrace> {
+  const result = await pool.parse(loadTraceAsBuffer(fileName));
+  if ('error' in result) {
+    assert.fail(`Unexpected trace parse error: ${result.error}`);
+  }
+  return result;
+}
+
+describe('TraceWorkerPool', () => {
+  it('parses in a worker with the same summary as the main thread', async () => {
+    const local = await parseRawTraceBuffer(
+      loadTraceAsBuffer('web-dev-with-commit.json.gz'),
+    );
+    if (!traceResultIsSuccess(local)) {
+      assert.fail(`Unexpected trace parse error: ${local.error}`);
+    }
+
+    await withPool(1, async pool => {
+      const trace = await parseInWorker(pool, 'web-dev-with-commit.json.gz');
+      assert.strictEqual(trace.summary, getTraceSummary(local));
+      const stats = pool.getStats();
+      assert.strictEqual(stats.workers, 1);
+      assert.strictEqual(stats.traces, 1);
+      assert.strictEqual(stats.inProcess, false);
+    });
+  });
+
+  it('formats each insight once per trace', async () => {
+    await withPool(1, async pool => {
+      const trace = await parseInWorker(pool, 'web-dev-with-commit.json.gz');
+      const first = await trace.getInsightOutput('LCPBreakdown');
+      const second = await trace.getInsightOutput('LCPBreakdown');
+
+      assert.ok('output' in first);
+      assert.deepStrictEqual(second, first);
+      assert.strictEqual(pool.getStats().insightRequests, 1);
+    });
+  });
+
+  it('returns parse errors from the worker', async () => {
+    await withPool(1, async pool => {
+      const result = await pool.parse(undefined);
+      assert.deepStrictEqual(result, {error: 'No buffer was provided.'});
+      assert.strictEqual(pool.getStats().parseErrors, 1);
+    });
+  });
+
+  it('keeps cached insights after a trace is released', async () => {
+    await withPool(1, async pool => {
+      const trace = await parseInWorker(pool, 'web-dev-with-commit.json.gz');
+      const cached = await trace.getInsightOutput('LCPBreakdown');
+      trace.release();
+
+      assert.strictEqual(pool.getStats().traces, 0);
+      assert.deepStrictEqual(
+        await trace.getInsightOutput('LCPBreakdown'),
+        cached,
+      );
+      const uncached = await trace.getInsightOutput('DocumentLatency');
+      assert.ok('error' in uncached);
+      assert.match(uncached.error, /no longer available/);
+    });
+  });
+
+  it('parses on the main thread when no workers are configured', async () => {
+    await withPool(0, async pool => {
+      const trace = await parseInWorker(pool, 'basic-trace.json.gz');
+      assert.ok(trace instanceof RecordedTrace);
+      assert.strictEqual(pool.getStats().workers, 0);
+      assert.strictEqual(pool.getStats().inProcess, true);
+    });
+  });
+});
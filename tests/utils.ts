@@ -8,8 +8,10 @@ import type {Browser} from 'puppeteer';
 import puppeteer from 'puppeteer';
 import type {HTTPRequest, HTTPResponse} from 'puppeteer-core';
 
+import {IndexedBuffer} from '../src/collectors/IndexedBuffer.js';
 import {McpContext} from '../src/McpContext.js';
 import {McpResponse} from '../src/McpResponse.js';
+import {NETWORK_REQUEST_INDEX} from '../src/PageCollector.js';
 
 let browser: Browser | undefined;
 
@@ -42,6 +44,7 @@ export async function withBrowser(
 
 export function getMockRequest(
   options: {
+    url?: string;
     method?: string;
     response?: HTTPResponse;
     failure?: HTTPRequest['failure'];
@@ -53,7 +56,7 @@ export function getMockRequest(
 ): HTTPRequest {
   return {
     url() {
-      return 'http://example.com';
+      return options.url ?? 'http://example.com';
     },
     method() {
       return options.method ?? 'GET';
@@ -87,6 +90,25 @@ export function getMockRequest(
   } as HTTPRequest;
 }
 
+/**
+ * Replaces the selected page's network requests, indexed like the real
+ * collector.
+ */
+export function mockNetworkRequests(
+  context: McpContext,
+  requests: HTTPRequest[],
+): void {
+  const buffer = new IndexedBuffer(
+    Math.max(requests.length, 1),
+    NETWORK_REQUEST_INDEX,
+  );
+  for (const request of requests) {
+    buffer.push(request);
+  }
+  context.getNetworkRequests = () => requests;
+  context.queryNetworkRequests = query => buffer.query(query);
+}
+
 export function getMockResponse(
   options: {
     status?: number;
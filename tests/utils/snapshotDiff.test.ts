@@ -0,0 +1,89 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+import assert from 'node:assert';
+import {describe, it} from 'node:test';
+
+import {formatA11ySnapshotDiff} from '../../src/formatters/snapshotFormatter.js';
+import type {TextSnapshotNode} from '../../src/McpContext.js';
+import {
+  indexSnapshot,
+  reconcileSnapshot,
+} from '../../src/utils/snapshotDiff.js';
+
+function node(
+  id: string,
+  role: string,
+  name: string,
+  children: TextSnapshotNode[] = [],
+  extra: Partial<TextSnapshotNode> = {},
+): TextSnapshotNode {
+  return {
+    id,
+    role,
+    name,
+    children,
+    elementHandle: async () => null,
+    ...extra,
+  };
+}
+
+describe('reconcileSnapshot', () => {
+  it('keeps uids of unchanged nodes and reports added and removed ones', () => {
+    const previous = node('1_0', 'RootWebArea', 'page', [
+      node('1_1', 'button', 'Save'),
+      node('1_2', 'button', 'Cancel'),
+    ]);
+    const next = node('2_0', 'RootWebArea', 'page', [
+      node('2_1', 'button', 'Save'),
+      node('2_2', 'link', 'Help'),
+    ]);
+
+    const diff = reconcileSnapshot(previous, next, '1');
+    assert.ok(diff);
+    assert.deepStrictEqual(
+      [...indexSnapshot(next).keys()],
+      ['1_0', '1_1', '2_2'],
+    );
+    assert.deepStrictEqual(
+      diff.added.map(added => [added.parentId, added.node.id]),
+      [['1_0', '2_2']],
+    );
+    assert.deepStrictEqual(diff.removed.map(({id}) => id), ['1_2']);
+    assert.strictEqual(diff.changed.length, 0);
+    assert.strictEqual(diff.size, 2);
+  });
+
+  it('reports renamed and updated nodes as changed', () => {
+    const previous = node('1_0', 'RootWebArea', 'page', [
+      node('1_1', 'button', 'Count 1'),
+      node('1_2', 'textbox', 'Name', [], {value: 'a'}),
+    ]);
+    const next = node('2_0', 'RootWebArea', 'page', [
+      node('2_1', 'button', 'Count 2'),
+      node('2_2', 'textbox', 'Name', [], {value: 'ab'}),
+    ]);
+
+    const diff = reconcileSnapshot(previous, next, '1');
+    assert.ok(diff);
+    assert.deepStrictEqual(diff.changed.map(({id}) => id), ['1_1', '1_2']);
+    assert.strictEqual(
+      formatA11ySnapshotDiff(diff, '2'),
+      `Snapshot 2 compared to snapshot 1: 0 added, 0 removed, 2 changed. Unchanged elements keep their uids.
+### Changed
+uid=1_1 button "Count 2"
+uid=1_2 textbox "Name" value="ab"
+`,
+    );
+  });
+
+  it('returns null when the root is replaced', () => {
+    const previous = node('1_0', 'RootWebArea', 'page');
+    const next = node('2_0', 'document', 'frame');
+    assert.strictEqual(reconcileSnapshot(previous, next, '1'), null);
+    assert.strictEqual(next.id, '2_0');
+  });
+});
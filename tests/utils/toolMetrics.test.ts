@@ -0,0 +1,85 @@
+/**
+ * @license
+ * Copyright 2025 Google LLC
+ * SPDX-License-Identifier: Apache-2.0
+ */
+
+import assert from 'node:assert';
+import {describe, it} from 'node:test';
+
+import {Histogram, ToolMetrics} from '../../src/utils/toolMetrics.js';
+
+describe('toolMetrics', () => {
+  it('places observations in the first bucket that fits', () => {
+    const histogram = new Histogram([1, 10]);
+    histogram.observe(0.5);
+    histogram.observe(1);
+    histogram.observe(5);
+    histogram.observe(50);
+    assert.deepStrictEqual(histogram.counts, [2, 1, 1]);
+    assert.strictEqual(histogram.count, 4);
+    assert.strictEqual(histogram.sum, 56.5);
+  });
+
+  it('renders cumulative buckets per tool and phase', () => {
+    const metrics = new ToolMetrics();
+    const timer = metrics.startCall('take_snapshot');
+    assert.match(
+      metrics.render(),
+      /^mcp_tool_in_flight\{tool="take_snapshot"\} 1$/m,
+    );
+    timer.mark('queue');
+    timer.mark('handler');
+    timer.mark('format');
+    timer.end('ok', [{type: 'text', text: 'héllo'}]);
+    timer.end('error');
+
+    const text = metrics.render();
+    assert.match(text, /^mcp_tool_in_flight\{tool="take_snapshot"\} 0$/m);
+    assert.match(
+      text,
+      /^mcp_tool_calls_total\{tool="take_snapshot",status="ok"\} 1$/m,
+    );
+    assert.doesNotMatch(text, /status="error"/);
+    for (const phase of ['queue', 'handler', 'format']) {
+      assert.match(
+        text,
+        new RegExp(
+          `^mcp_tool_phase_duration_seconds_count\\{tool="take_snapshot",phase="${phase}"\\} 1$`,
+          'm',
+        ),
+      );
+    }
+    assert.match(
+      text,
+      /^mcp_tool_response_bytes_bucket\{tool="take_snapshot",le="256"\} 1$/m,
+    );
+    assert.match(
+      text,
+      /^mcp_tool_response_bytes_bucket\{tool="take_snapshot",le="\+Inf"\} 1$/m,
+    );
+    assert.match(
+      text,
+      /^mcp_tool_response_bytes_sum\{tool="take_snapshot"\} 6$/m,
+    );
+  });
+
+  it('records CDP round trips and errors by method', () => {
+    const metrics = new ToolMetrics();
+    metrics.observeCdp('Runtime.evaluate', 0.002, false);
+    metrics.observeCdp('Runtime.evaluate', 0.02, true);
+    const text = metrics.render();
+    assert.match(
+      text,
+      /^mcp_cdp_command_duration_seconds_count\{method="Runtime.evaluate"\} 2$/m,
+    );
+    assert.match(
+      text,
+      /^mcp_cdp_command_duration_seconds_bucket\{method="Runtime.evaluate",le="0.0025"\} 1$/m,
+    );
+    assert.match(
+      text,
+      /^mcp_cdp_command_errors_total\{method="Runtime.evaluate"\} 1$/m,
+    );
+  });
+});